@@ -16,12 +16,33 @@ def main():
         os.path.join(base_dir, "strategy_5_filter_first.py")
     ]
 
+    # Mặc định: 1 process nạp mọi strategy như plugin (1 kết nối MT5, cache nến dùng chung,
+    # chu kỳ riêng + cô lập lỗi từng strategy, xem tradecore/runner.py).
+    # --subprocess: chế độ cũ, mỗi strategy 1 interpreter riêng.
+    if "--subprocess" not in sys.argv[1:]:
+        sys.path.append(os.path.dirname(base_dir))
+        from tradecore.runner import run_folder
+        print(f"🚀 Starting {len(scripts)} strategies in one process...")
+        print(f"📂 Execution Directory: {base_dir}")
+        run_folder(base_dir, scripts)
+        return
+
+    # Market data hub (tradecore.market_feed): 1 session MT5 đọc nến/tick và chia sẻ qua shared memory cho mọi strategy
+    feed_config = os.path.join(base_dir, "configs", "config_1.json")
+    feed_cmd = [sys.executable, "-m", "tradecore.market_feed", feed_config]
+    root_dir = os.path.dirname(base_dir)
+
     processes = []
+    feed_process = None
     
     print("🚀 Starting all 5 XAU_M1 Bots...")
     print(f"📂 Execution Directory: {base_dir}")
 
     try:
+        print(f"   📡 Launching market feed ({feed_config})...")
+        feed_process = subprocess.Popen(feed_cmd, cwd=root_dir)
+        time.sleep(2)
+
         for script in scripts:
             print(f"   ▶️ Launching {script}...")
             # Launch as a separate process
@@ -41,11 +62,17 @@ def main():
                 if p.poll() is not None:
                     print(f"⚠️ Process {scripts[i]} ended unexpected (Code: {p.returncode})")
                     # Optional: Restart logic could go here
+            if feed_process.poll() is not None:
+                # Strategy tự fallback về MT5 trực tiếp khi feed dừng; khởi động lại feeder
+                print(f"⚠️ Market feed ended unexpected (Code: {feed_process.returncode}), restarting...")
+                feed_process = subprocess.Popen(feed_cmd, cwd=root_dir)
                     
     except KeyboardInterrupt:
         print("\n🛑 Stopping all bots...")
         for p in processes:
             p.terminate()
+        if feed_process is not None:
+            feed_process.terminate()
         print("✅ All processes terminated.")
 
 if __name__ == "__main__":
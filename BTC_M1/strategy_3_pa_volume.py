@@ -8,6 +8,7 @@ import pandas as pd
 sys.path.append('..')
 from db import Database
 from utils import load_config, connect_mt5, get_data, send_telegram, manage_position, get_mt5_error_message, calculate_rsi
+from tradecore.execution import send_order
 
 # Initialize Database
 db = Database()
@@ -250,7 +251,7 @@ def strategy_3_logic(config, error_count=0):
             "type_filling": mt5.ORDER_FILLING_FOK,
         }
         
-        result = mt5.order_send(request)
+        result = send_order(request, "Strategy_3_PA_Volume", db_path=db.db_path)
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             print(f"✅ Order Success: {result.order}")
             db.log_order(result.order, "Strategy_3_PA_Volume", symbol, signal, volume, price, sl, tp, result.comment, account_id=config['account'])
@@ -9,6 +9,7 @@ sys.path.append('..')
 from db import Database
 from db import Database
 from utils import load_config, connect_mt5, get_data, send_telegram, calculate_adx, manage_position, get_mt5_error_message, calculate_rsi, check_consecutive_losses
+from tradecore.execution import send_order
 
 # Initialize Database
 db = Database()
@@ -277,7 +278,7 @@ def strategy_4_logic(config, error_count=0):
             "type_filling": mt5.ORDER_FILLING_FOK,
         }
         
-        result = mt5.order_send(request)
+        result = send_order(request, "Strategy_4_UT_Bot", db_path=db.db_path)
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             print(f"✅ Order Success: {result.order}")
             db.log_order(result.order, "Strategy_4_UT_Bot", symbol, signal, volume, price, sl, tp, result.comment, account_id=config['account'])
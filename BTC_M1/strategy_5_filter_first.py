@@ -8,6 +8,7 @@ import pandas as pd
 sys.path.append('..')
 from db import Database
 from utils import load_config, connect_mt5, get_data, send_telegram, manage_position, get_mt5_error_message, calculate_rsi, calculate_adx, check_consecutive_losses
+from tradecore.execution import send_order
 
 # Initialize Database
 db = Database()
@@ -336,7 +337,7 @@ def strategy_5_logic(config, error_count=0):
             "type_filling": mt5.ORDER_FILLING_FOK,
         }
         
-        result = mt5.order_send(request)
+        result = send_order(request, "Strategy_5_Filter_First", db_path=db.db_path)
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             print(f"✅ Order Success: {result.order}")
             db.log_order(result.order, "Strategy_5_Filter_First", symbol, signal, volume, price, sl, tp, result.comment, account_id=config['account'])
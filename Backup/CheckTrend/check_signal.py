@@ -15,12 +15,15 @@ import MetaTrader5 as mt5
 import pandas as pd
 import json
 import os
-import requests
+import sys
 import time
 import numpy as np
 from datetime import datetime
 from typing import List, Tuple, Optional, Dict
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tradecore.telegram import telegram_notifier
+
 # ==============================================================================
 # 1. CẤU HÌNH
 # ==============================================================================
@@ -109,47 +112,33 @@ def find_swing_points(df, lookback=5, min_swing_size=None):
         atr = high_low.rolling(window=14).mean().iloc[-1]
         min_swing_size = atr * 0.5 if not pd.isna(atr) else 0
     
-    for i in range(lookback, len(df) - lookback):
-        # Kiểm tra swing high
-        is_swing_high = True
-        current_high = df.iloc[i]['high']
-        
-        # Kiểm tra tất cả nến trong lookback window
-        for j in range(i - lookback, i + lookback + 1):
-            if j != i and df.iloc[j]['high'] >= current_high:
-                is_swing_high = False
-                break
-        
-        if is_swing_high:
-            # Kiểm tra kích thước swing
-            if min_swing_size > 0:
-                # Tìm đáy gần nhất trước swing high
-                for k in range(i - 1, max(0, i - lookback * 2), -1):
-                    if df.iloc[k]['low'] < current_high - min_swing_size:
-                        swing_highs.append((i, current_high))
-                        break
-            else:
-                swing_highs.append((i, current_high))
-        
-        # Kiểm tra swing low
-        is_swing_low = True
-        current_low = df.iloc[i]['low']
-        
-        for j in range(i - lookback, i + lookback + 1):
-            if j != i and df.iloc[j]['low'] <= current_low:
-                is_swing_low = False
-                break
-        
-        if is_swing_low:
-            # Kiểm tra kích thước swing
-            if min_swing_size > 0:
-                # Tìm đỉnh gần nhất trước swing low
-                for k in range(i - 1, max(0, i - lookback * 2), -1):
-                    if df.iloc[k]['high'] > current_low + min_swing_size:
-                        swing_lows.append((i, current_low))
-                        break
-            else:
-                swing_lows.append((i, current_low))
+    # Ứng viên swing: rolling max/min căn giữa (bất đẳng thức chặt như vòng lặp cũ)
+    highs = df['high'].to_numpy(dtype=np.float64)
+    lows = df['low'].to_numpy(dtype=np.float64)
+    win_h = np.lib.stride_tricks.sliding_window_view(highs, 2 * lookback + 1)
+    win_l = np.lib.stride_tricks.sliding_window_view(lows, 2 * lookback + 1)
+    others_h = np.delete(win_h, lookback, axis=1)
+    others_l = np.delete(win_l, lookback, axis=1)
+    cand_high = np.flatnonzero((win_h[:, lookback] > others_h.max(axis=1, initial=-np.inf))) + lookback
+    cand_low = np.flatnonzero((win_l[:, lookback] < others_l.min(axis=1, initial=np.inf))) + lookback
+    
+    for i in cand_high:
+        current_high = highs[i]
+        # Kiểm tra kích thước swing: có đáy trước swing high (k ∈ (max(0, i-2*lookback), i)) đủ sâu
+        if min_swing_size > 0:
+            if np.any(lows[max(0, i - lookback * 2) + 1:i] < current_high - min_swing_size):
+                swing_highs.append((int(i), current_high))
+        else:
+            swing_highs.append((int(i), current_high))
+    
+    for i in cand_low:
+        current_low = lows[i]
+        # Kiểm tra kích thước swing: có đỉnh trước swing low đủ cao
+        if min_swing_size > 0:
+            if np.any(highs[max(0, i - lookback * 2) + 1:i] > current_low + min_swing_size):
+                swing_lows.append((int(i), current_low))
+        else:
+            swing_lows.append((int(i), current_low))
     
     return swing_highs, swing_lows
 
@@ -1085,7 +1074,11 @@ def split_message(message, max_length=4096):
     return parts
 
 def send_telegram(message, max_retries=3):
-    """Gửi tin nhắn qua Telegram với retry logic và tự động chia message nếu quá dài"""
+    """
+    Gửi tin nhắn qua Telegram, tự động chia message nếu quá dài.
+    Không chặn vòng lặp: các phần được đưa vào hàng đợi tradecore.telegram (thread nền gửi,
+    thử lại / đợi retry_after khi 429). max_retries giữ cho tương thích, không còn dùng.
+    """
     if not CHAT_ID or not TELEGRAM_TOKEN:
         print("⚠️ Thiếu CHAT_ID hoặc TELEGRAM_TOKEN")
         return False
@@ -1096,58 +1089,17 @@ def send_telegram(message, max_retries=3):
     if len(message_parts) > 1:
         print(f"⚠️ Message quá dài ({len(message)} ký tự), chia thành {len(message_parts)} phần")
     
-    success_count = 0
+    queued = 0
     for part_idx, message_part in enumerate(message_parts):
         if len(message_parts) > 1:
             if part_idx > 0:
                 message_part = f"<b>📄 Phần {part_idx + 1}/{len(message_parts)}</b>\n\n" + message_part
-        
-        for attempt in range(max_retries):
-            try:
-                url = f"https://api.telegram.org/bot{TELEGRAM_TOKEN}/sendMessage"
-                data = {
-                    "chat_id": CHAT_ID,
-                    "text": message_part,
-                    "parse_mode": "HTML"
-                }
-                response = requests.post(url, data=data, timeout=15)
-                
-                if response.status_code == 200:
-                    success_count += 1
-                    if len(message_parts) > 1:
-                        print(f"✅ Đã gửi phần {part_idx + 1}/{len(message_parts)}")
-                    break
-                else:
-                    try:
-                        error_data = response.json()
-                        error_desc = error_data.get('description', 'Unknown error')
-                        print(f"⚠️ Lỗi gửi Telegram (lần {attempt + 1}/{max_retries}): Status {response.status_code}")
-                        print(f"   Chi tiết: {error_desc}")
-                        print(f"   Độ dài message: {len(message_part)} ký tự")
-                    except:
-                        print(f"⚠️ Lỗi gửi Telegram (lần {attempt + 1}/{max_retries}): Status {response.status_code}")
-                        print(f"   Response: {response.text[:200]}")
-                    
-                    if response.status_code == 429:  # Rate limit
-                        retry_after = int(response.headers.get('Retry-After', 10))
-                        print(f"⏳ Rate limit, đợi {retry_after} giây...")
-                        time.sleep(retry_after)
-                    elif attempt < max_retries - 1:
-                        time.sleep(2)
-            except requests.exceptions.Timeout:
-                print(f"⚠️ Timeout khi gửi Telegram (lần {attempt + 1}/{max_retries})")
-                if attempt < max_retries - 1:
-                    time.sleep(2)
-            except Exception as e:
-                print(f"⚠️ Lỗi gửi Telegram (lần {attempt + 1}/{max_retries}): {e}")
-                if attempt < max_retries - 1:
-                    time.sleep(2)
-        
-        # Đợi 1 giây giữa các phần để tránh rate limit
-        if part_idx < len(message_parts) - 1:
-            time.sleep(1)
+        if telegram_notifier.enqueue(message_part, TELEGRAM_TOKEN, CHAT_ID):
+            queued += 1
+        else:
+            print(f"⚠️ Hàng đợi Telegram đầy, bỏ phần {part_idx + 1}/{len(message_parts)}")
     
-    return success_count == len(message_parts)
+    return queued == len(message_parts)
 
 def escape_html(text):
     """Escape các ký tự đặc biệt trong HTML"""
@@ -1566,11 +1518,11 @@ def main():
                             print(f"   Độ dài message: {len(telegram_msg)} ký tự")
                             
                             if send_telegram(telegram_msg):
-                                print(f"✅ Đã gửi tín hiệu {signal} về Telegram")
+                                print(f"✅ Đã đưa tín hiệu {signal} vào hàng đợi Telegram")
                                 # Lưu trạng thái
                                 previous_signals[symbol] = (signal, confidence)
                             else:
-                                print(f"❌ Không thể gửi Telegram sau 3 lần thử")
+                                print(f"❌ Không thể đưa tín hiệu vào hàng đợi Telegram")
                         else:
                             print(f"⏭️ Signal {signal} ({confidence}) không thay đổi - Bỏ qua gửi Telegram")
                     else:
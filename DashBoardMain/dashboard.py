@@ -11,6 +11,11 @@ import sys
 # Use absolute path for templates folder
 dashboard_dir = os.path.dirname(os.path.abspath(__file__))
 templates_dir = os.path.join(dashboard_dir, 'templates')
+sys.path.append(os.path.dirname(dashboard_dir))
+from tradecore.execution_stats import execution_histograms, LATENCY_LABELS, SLIPPAGE_LABELS
+from tradecore.governor import fetch_stats as fetch_governor_stats
+from tradecore.profiler import latest_profile
+from tradecore.signal_stats import orders_with_indicators, indicator_bucket_stats, indicator_columns_sql, EXPORT_INDICATORS
 app = Flask(__name__, template_folder=templates_dir)
 
 # --- Databases config: multiple tabs (key -> path) ---
@@ -257,10 +262,10 @@ def index():
         # Win/Loss by hour (Vietnam time) for this bot
         bot_stats[-1]['hourly_win_loss'] = process_hourly_stats(s_orders)
 
-        # Win/Loss by RSI and ADX buckets (from closest signal indicators)
-        orders_with_indicators = fetch_orders_with_indicators(cur, strat, s_orders)
-        bot_stats[-1]['rsi_win_loss'] = process_rsi_bucket_stats(orders_with_indicators)
-        bot_stats[-1]['adx_win_loss'] = process_adx_bucket_stats(orders_with_indicators)
+        # Win/Loss by RSI and ADX buckets (from closest signal indicators, SQL GROUP BY)
+        indicator_buckets = indicator_bucket_stats(get_db(), strat, s_orders)
+        bot_stats[-1]['rsi_win_loss'] = indicator_buckets['rsi']
+        bot_stats[-1]['adx_win_loss'] = indicator_buckets['adx']
 
         # PNL BUY vs SELL for this bot
         s_buy_pnl = sum(o['profit'] for o in s_orders if o['order_type'] == 'BUY')
@@ -286,6 +291,10 @@ def index():
     # --- HOURLY STATS (VIETNAM TIME) ---
     hourly_stats = process_hourly_stats(orders)
 
+    # --- ORDER EXECUTION: latency / slippage histogram (tradecore.execution) ---
+    execution_stats = execution_histograms(get_db(), cutoff_str, end_str if parsed else None)
+    cycle_profile = latest_profile(get_db())
+
     # --- OVERVIEW: 3 biểu đồ thời gian (Equity, PNL/ngày, Thắng-Thua/giờ) ---
     orders_for_equity = [o for o in orders if o['profit'] is not None]
     overview_equity_data = []
@@ -309,7 +318,7 @@ def index():
         if not s_orders:
             continue
         display_name = format_strategy_name(strat)
-        orders_with_ind = fetch_orders_with_indicators(cur, strat, s_orders)
+        orders_with_ind = orders_with_indicators(get_db(), strat, s_orders)
         for item in orders_with_ind:
             rsi, adx = item.get('rsi'), item.get('adx')
             if rsi is not None or adx is not None:
@@ -331,6 +340,10 @@ def index():
                            losses=losses,
                            bot_stats=bot_stats,
                            hourly_stats=hourly_stats,
+                           execution_stats=execution_stats,
+                           cycle_profile=cycle_profile,
+                           latency_labels=LATENCY_LABELS,
+                           slippage_labels=SLIPPAGE_LABELS,
                            current_filter=current_filter,
                            filter_label=filter_label,
                            from_date=from_date_param if from_date_param else '',
@@ -424,145 +437,6 @@ def process_daily_pnl(orders):
     
     return daily_stats
 
-def fetch_orders_with_indicators(cur, strategy_name, orders):
-    """
-    For each order, find the closest signal (same strategy, symbol, order_type, within 30 min)
-    and extract RSI and ADX from signal indicators.
-    Returns list of dicts: {order, rsi, adx} with rsi/adx=None if not found.
-    """
-    if not orders:
-        return []
-    try:
-        open_times = [o['open_time'] for o in orders]
-        t_min = min(open_times)
-        t_max = max(open_times)
-        try:
-            dt_min = datetime.strptime(t_min, "%Y-%m-%d %H:%M:%S") - timedelta(minutes=30)
-            dt_max = datetime.strptime(t_max, "%Y-%m-%d %H:%M:%S") + timedelta(minutes=30)
-        except ValueError:
-            return [{'order': dict(o), 'rsi': None, 'adx': None} for o in orders]
-        t0 = dt_min.strftime("%Y-%m-%d %H:%M:%S")
-        t1 = dt_max.strftime("%Y-%m-%d %H:%M:%S")
-        cur.execute("""
-            SELECT timestamp, symbol, signal_type, indicators
-            FROM signals
-            WHERE strategy_name = ? AND timestamp >= ? AND timestamp <= ?
-        """, (strategy_name, t0, t1))
-        signals = cur.fetchall()
-    except Exception as e:
-        print(f"fetch_orders_with_indicators: {e}")
-        return [{'order': dict(o), 'rsi': None, 'adx': None} for o in orders]
-
-    def parse_indicator(indicators, key, min_val=0, max_val=100):
-        if indicators is None:
-            return None
-        try:
-            if isinstance(indicators, str):
-                data = json.loads(indicators)
-            else:
-                data = indicators
-            if isinstance(data, dict) and key in data:
-                v = float(data[key])
-                return v if min_val <= v <= max_val else None
-            return None
-        except Exception:
-            return None
-
-    def order_time_seconds(ot):
-        try:
-            return datetime.strptime(ot, "%Y-%m-%d %H:%M:%S").timestamp()
-        except Exception:
-            return 0
-
-    result = []
-    for o in orders:
-        o = dict(o)
-        o_time = order_time_seconds(o['open_time'])
-        best_rsi = best_adx = None
-        best_diff = float('inf')
-        for sig in signals:
-            if sig['symbol'] != o.get('symbol') or sig['signal_type'] != o.get('order_type'):
-                continue
-            try:
-                st = datetime.strptime(sig['timestamp'], "%Y-%m-%d %H:%M:%S").timestamp()
-            except Exception:
-                try:
-                    st = datetime.strptime(str(sig['timestamp'])[:19], "%Y-%m-%d %H:%M:%S").timestamp()
-                except Exception:
-                    continue
-            diff = abs(st - o_time)
-            if diff < best_diff and diff <= 30 * 60:
-                rsi = parse_indicator(sig['indicators'], 'rsi')
-                adx = parse_indicator(sig['indicators'], 'adx')
-                if rsi is not None or adx is not None:
-                    best_diff = diff
-                    best_rsi = rsi
-                    best_adx = adx
-        result.append({'order': o, 'rsi': best_rsi, 'adx': best_adx})
-    return result
-
-def process_rsi_bucket_stats(orders_with_rsi):
-    """
-    Bucket orders by RSI (0-10, 10-20, ..., 90-100) and count wins/losses per bucket.
-    Returns list of {label, wins, losses} for chart.
-    """
-    buckets = []
-    for low in range(0, 100, 10):
-        high = low + 10
-        buckets.append({'label': f'{low}-{high}', 'wins': 0, 'losses': 0})
-    for item in orders_with_rsi:
-        rsi = item.get('rsi')
-        if rsi is None:
-            continue
-        try:
-            rsi = float(rsi)
-            if rsi < 0 or rsi > 100:
-                continue
-        except (TypeError, ValueError):
-            continue
-        profit = item['order'].get('profit')
-        if profit is None:
-            continue
-        idx = min(int(rsi // 10), 9)
-        if rsi == 100:
-            idx = 9
-        if profit > 0:
-            buckets[idx]['wins'] += 1
-        elif profit < 0:
-            buckets[idx]['losses'] += 1
-    return buckets
-
-def process_adx_bucket_stats(orders_with_indicators):
-    """
-    Bucket orders by ADX (0-10, 10-20, ..., 90-100) and count wins/losses per bucket.
-    Returns list of {label, wins, losses} for chart.
-    """
-    buckets = []
-    for low in range(0, 100, 10):
-        high = low + 10
-        buckets.append({'label': f'{low}-{high}', 'wins': 0, 'losses': 0})
-    for item in orders_with_indicators:
-        adx = item.get('adx')
-        if adx is None:
-            continue
-        try:
-            adx = float(adx)
-            if adx < 0 or adx > 100:
-                continue
-        except (TypeError, ValueError):
-            continue
-        profit = item['order'].get('profit')
-        if profit is None:
-            continue
-        idx = min(int(adx // 10), 9)
-        if adx == 100:
-            idx = 9
-        if profit > 0:
-            buckets[idx]['wins'] += 1
-        elif profit < 0:
-            buckets[idx]['losses'] += 1
-    return buckets
-
 def load_display_order_config():
     """
     Load display order configuration from config file (optional).
@@ -769,6 +643,14 @@ def signals_page():
                          current_db=g._current_db,
                          db_tabs=list(DB_MAP.keys()))
 
+@app.route('/api/governor')
+def governor_stats():
+    """Counters của governor exposure / tốc độ lệnh (tradecore.governor). ?address=host:port"""
+    stats = fetch_governor_stats(request.args.get('address') or None)
+    if stats is None:
+        return jsonify({'error': 'Governor is not running'}), 503
+    return jsonify(stats)
+
 @app.route('/api/check_signal/<int:signal_id>')
 def check_signal(signal_id):
     """Check MT5 not available in shared dashboard (no bot config/MT5 here)."""
@@ -1045,14 +927,16 @@ def export_orders():
     cur.execute(base_query, tuple(params))
     orders = cur.fetchall()
     
-    # Now find matching signals for each order
+    # Now find matching signals for each order (chỉ báo có kiểu từ signal_indicators)
+    indicator_names = [name for name, _ in EXPORT_INDICATORS]
+    indicator_columns = indicator_columns_sql(get_db(), indicator_names)
     orders_with_signals = []
     for order in orders:
         order_dict = dict(order)
         
         # Find closest matching signal
         cur.execute("""
-            SELECT timestamp, indicators, status
+            SELECT timestamp, indicators, status""" + indicator_columns + """
             FROM signals
             WHERE strategy_name = ?
               AND symbol = ?
@@ -1068,10 +952,12 @@ def export_orders():
             order_dict['signal_timestamp'] = signal['timestamp']
             order_dict['signal_indicators'] = signal['indicators']
             order_dict['signal_status'] = signal['status']
+            order_dict['signal_values'] = [signal[name] for name in indicator_names]
         else:
             order_dict['signal_timestamp'] = None
             order_dict['signal_indicators'] = None
             order_dict['signal_status'] = None
+            order_dict['signal_values'] = [None] * len(indicator_names)
         
         orders_with_signals.append(order_dict)
     
@@ -1101,6 +987,7 @@ def export_orders():
         'Account ID',
         'Signal Timestamp',
         'Signal Indicators',
+        *[title for _, title in EXPORT_INDICATORS],
         'Signal Status',
         'Win/Loss',
         'Profit %',
@@ -1152,6 +1039,7 @@ def export_orders():
             except:
                 indicators_str = str(order['signal_indicators'])
         row.append(indicators_str)
+        row.extend('' if value is None else value for value in order['signal_values'])
         
         row.append(order['signal_status'] if order['signal_status'] else '')
         
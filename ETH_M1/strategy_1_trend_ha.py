@@ -10,6 +10,7 @@ sys.path.append('..') # Add parent directory to path to find XAU_M1 modules if r
 from db import Database
 from db import Database
 from utils import load_config, connect_mt5, get_data, calculate_heiken_ashi, send_telegram, is_doji, manage_position, get_mt5_error_message, calculate_rsi, calculate_adx, check_consecutive_losses
+from tradecore.execution import send_order
 
 # Initialize Database
 db = Database()
@@ -232,7 +233,7 @@ def strategy_1_logic(config, error_count=0):
             "type_filling": mt5.ORDER_FILLING_FOK,
         }
         
-        result = mt5.order_send(request)
+        result = send_order(request, "Strategy_1_Trend_HA", db_path=db.db_path)
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             print(f"✅ Order Executed: {result.order}")
             db.log_order(result.order, "Strategy_1_Trend_HA", symbol, signal, volume, price, sl, tp, result.comment, account_id=config['account'])
@@ -9,6 +9,7 @@ sys.path.append('..')
 from db import Database
 from db import Database
 from utils import load_config, connect_mt5, get_data, send_telegram, manage_position, get_mt5_error_message, calculate_rsi, calculate_adx, check_consecutive_losses
+from tradecore.execution import send_order
 
 # Initialize Database
 # Initialize Database
@@ -261,7 +262,7 @@ def strategy_2_logic(config, error_count=0):
             "type_filling": mt5.ORDER_FILLING_FOK,
         }
         
-        result = mt5.order_send(request)
+        result = send_order(request, "Strategy_2_EMA_ATR", db_path=db.db_path)
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             print(f"✅ Order Scussess: {result.order}")
             db.log_order(result.order, "Strategy_2_EMA_ATR", symbol, signal, volume, price, sl, tp, result.comment, account_id=config['account'])
@@ -1,145 +1,19 @@
-import MetaTrader5 as mt5
+"""
+Shim: indicator / data / order helper nằm trong package dùng chung tradecore (thư mục gốc repo).
+get_data / get_data_np / get_tick lấy từ tradecore.market_feed (ưu tiên shared memory của feeder).
+Hàm riêng của bot này giữ lại ở đây: manage_position (breakeven/trailing theo points), check_consecutive_losses.
+"""
 import os
-import json
-import requests
-import pandas as pd
-import numpy as np
-
-def load_config(config_path):
-    """Load configuration from JSON file"""
-    if not os.path.exists(config_path):
-        print(f"❌ Config file not found: {config_path}")
-        return None
-    try:
-        with open(config_path, 'r') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"❌ Error loading config: {e}")
-        return None
-
-def connect_mt5(config):
-    """Initialize MT5 connection using config"""
-    login = config.get("account")
-    password = config.get("password")
-    server = config.get("server")
-    path = config.get("mt5_path") # Optional custom path
-
-    if not all([login, password, server]):
-        print("❌ Missing MT5 credentials in config")
-        return False
-
-    try:
-        if path:
-            if not mt5.initialize(path=path, login=login, password=password, server=server):
-                print(f"❌ MT5 Init failed with path: {mt5.last_error()}")
-                return False
-        else:
-            if not mt5.initialize(login=login, password=password, server=server):
-                print(f"❌ MT5 Init failed: {mt5.last_error()}")
-                return False
-                
-        print(f"✅ Connected to MT5 Account: {login}")
-        return True
-    except Exception as e:
-        print(f"❌ Connection error: {e}")
-        return False
-
-def send_telegram(message, token, chat_id):
-    """Send message to Telegram"""
-    if not token or not chat_id:
-        return
-    
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    payload = {
-        "chat_id": chat_id,
-        "text": message,
-        "parse_mode": "HTML"
-    }
-    try:
-        requests.post(url, data=payload, timeout=5)
-    except Exception as e:
-        print(f"⚠️ Telegram error: {e}")
-
-def get_data(symbol, timeframe, n=100):
-    """Fetch recent candles from MT5"""
-    rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, n)
-    if rates is None or len(rates) == 0:
-        return None
-    
-    df = pd.DataFrame(rates)
-    df['time'] = pd.to_datetime(df['time'], unit='s')
-    return df
-
-def calculate_heiken_ashi(df):
-    """Calculate Heiken Ashi candles"""
-    ha_df = df.copy()
-    ha_df['ha_close'] = (df['open'] + df['high'] + df['low'] + df['close']) / 4
-    
-    # Initialize first HA open
-    ha_df.at[0, 'ha_open'] = (df.iloc[0]['open'] + df.iloc[0]['close']) / 2
-    
-    for i in range(1, len(df)):
-        ha_df.at[i, 'ha_open'] = (ha_df.at[i-1, 'ha_open'] + ha_df.at[i-1, 'ha_close']) / 2
-        
-    ha_df['ha_high'] = ha_df[['high', 'ha_open', 'ha_close']].max(axis=1)
-    ha_df['ha_low'] = ha_df[['low', 'ha_open', 'ha_close']].min(axis=1)
-    
-    return ha_df
-
-def calculate_adx(df, period=14):
-    """Calculate ADX Indicator"""
-    df = df.copy()
-    df['up'] = df['high'].diff()
-    df['down'] = -df['low'].diff()
-    
-    df['dm_plus'] = np.where((df['up'] > df['down']) & (df['up'] > 0), df['up'], 0)
-    df['dm_minus'] = np.where((df['down'] > df['up']) & (df['down'] > 0), df['down'], 0)
-    
-    df['tr'] = np.maximum(df['high'] - df['low'], 
-                          np.maximum(abs(df['high'] - df['close'].shift(1)), 
-                                     abs(df['low'] - df['close'].shift(1))))
-    
-    df['tr_s'] = df['tr'].rolling(window=period).sum()
-    df['dm_plus_s'] = df['dm_plus'].rolling(window=period).sum()
-    df['dm_minus_s'] = df['dm_minus'].rolling(window=period).sum()
-    
-    df['di_plus'] = 100 * (df['dm_plus_s'] / df['tr_s'])
-    df['di_minus'] = 100 * (df['dm_minus_s'] / df['tr_s'])
-    
-    df['dx'] = 100 * abs(df['di_plus'] - df['di_minus']) / (df['di_plus'] + df['di_minus'])
-    df['adx'] = df['dx'].rolling(window=period).mean()
-    
-    return df
-
-def calculate_rsi(series, period=14):
-    """
-    Calculate RSI using Wilder's Smoothing (Standard MT5/TradingView RSI)
-    """
-    delta = series.diff()
-    
-    # Separate gains and losses
-    gain = (delta.where(delta > 0, 0))
-    loss = (-delta.where(delta < 0, 0))
-    
-    # Calculate initial average (simple MA)
-    avg_gain = gain.rolling(window=period, min_periods=period).mean()[:period+1]
-    avg_loss = loss.rolling(window=period, min_periods=period).mean()[:period+1]
-    
-    # Manual loop or pandas ewm for Wilder's Smoothing (alpha=1/period)
-    # Pandas EWM with adjust=False approximates Wilder's if alpha=1/period
-    avg_gain = gain.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
-    avg_loss = loss.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
-    
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    
-    return rsi
+import sys
+import MetaTrader5 as mt5
 
-def is_doji(row, threshold=0.1):
-    """Check if candle is a Doji (Body < 10% of Range)"""
-    body = abs(row['close'] - row['open'])
-    rng = row['high'] - row['low']
-    return body <= (rng * threshold) if rng > 0 else True
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tradecore.data import load_config, connect_mt5, send_telegram
+from tradecore.market_feed import get_data, get_data_np, get_tick
+from tradecore.indicators import (
+    ha_open_recurrence, calculate_heiken_ashi, calculate_adx, calculate_rsi, is_doji
+)
+from tradecore.orders import get_mt5_error_message
 
 def manage_position(order_ticket, symbol, magic, config):
     """
@@ -225,26 +99,6 @@ def manage_position(order_ticket, symbol, magic, config):
     except Exception as e:
         print(f"⚠️ Error managing position {order_ticket}: {e}")
 
-def get_mt5_error_message(error_code):
-    """
-    Translate MT5 Error Codes to Human Readable Messages
-    """
-    error_map = {
-        10004: "Requote",
-        10006: "Request Rejected",
-        10013: "Invalid Request",
-        10014: "Invalid Volume",
-        10015: "Invalid Price",
-        10016: "Invalid Stops",
-        10018: "Market Closed",
-        10027: "AutoTrading Disabled by Client",
-        10030: "Unsupported Filling Mode",
-        10031: "Connection Error",
-        10036: "Request Timeout"
-    }
-    msg = error_map.get(error_code, "Unknown Error")
-    return f"{error_code} ({msg})"
-
 def check_consecutive_losses(symbol, magic, config):
     """
     Check consecutive losses and apply cooldown
@@ -301,4 +155,4 @@ def check_consecutive_losses(symbol, magic, config):
         return True, "OK"
     except Exception as e:
         print(f"⚠️ Error checking consecutive losses: {e}")
-        return True, "OK"  # Fail open - allow trading if check fails
+        return True, "OK"
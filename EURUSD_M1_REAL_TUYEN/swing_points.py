@@ -0,0 +1,6 @@
+"""Shim: module đã chuyển sang package dùng chung tradecore.swing_points (thư mục gốc repo)."""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tradecore.swing_points import *  # noqa: F401,F403
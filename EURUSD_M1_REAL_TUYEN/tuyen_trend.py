@@ -10,6 +10,8 @@ from datetime import datetime
 sys.path.append('..') 
 from db import Database
 from utils import load_config, connect_mt5, get_data, send_telegram, manage_position, get_mt5_error_message, calculate_rsi
+from tradecore.bar_events import gate_from_config
+from swing_points import swing_points_from_df, SwingPointTracker
 
 # Initialize Database
 db = Database()
@@ -260,48 +262,35 @@ def calculate_ema(series, span):
     """Calculate EMA"""
     return series.ewm(span=span, adjust=False).mean()
 
-def find_swing_points(df, lookback=5):
-    """Find swing highs and lows"""
-    swing_highs = []
-    swing_lows = []
-    
-    for i in range(lookback, len(df) - lookback):
-        # Swing High: Higher than lookback candles on both sides
-        is_swing_high = True
-        for j in range(i - lookback, i + lookback + 1):
-            if j != i and df.iloc[j]['high'] >= df.iloc[i]['high']:
-                is_swing_high = False
-                break
-        if is_swing_high:
-            swing_highs.append({'index': i, 'price': df.iloc[i]['high'], 'time': df.index[i]})
-        
-        # Swing Low: Lower than lookback candles on both sides
-        is_swing_low = True
-        for j in range(i - lookback, i + lookback + 1):
-            if j != i and df.iloc[j]['low'] <= df.iloc[i]['low']:
-                is_swing_low = False
-                break
-        if is_swing_low:
-            swing_lows.append({'index': i, 'price': df.iloc[i]['low'], 'time': df.index[i]})
-    
-    return swing_highs, swing_lows
+# Swing tracker incremental theo từng khung (H1/M5 lookback=3, M1 lookback=5)
+SWING_TRACKERS = {"H1": SwingPointTracker(3), "M5": SwingPointTracker(3), "M1": SwingPointTracker(5)}
+
+def find_swing_points(df, lookback=5, tracker=None):
+    """Find swing highs and lows (rolling max/min căn giữa; tracker → chỉ tính lại các nến cuối)"""
+    return swing_points_from_df(df, lookback, tracker)
 
 def find_supply_demand_zones(df, swing_highs, swing_lows, lookback=20):
     """Find Supply (resistance) and Demand (support) zones"""
     supply_zones = []
     demand_zones = []
+    # Mảng cột thay cho df.iloc[i] từng nến (mỗi lần tạo 1 Series ~0.5 ms, ~800 lần / lần gọi)
+    highs = df['high'].to_numpy()
+    lows = df['low'].to_numpy()
+    n = len(df)
     
     # Supply zones from swing highs
     for swing in swing_highs[-10:]:  # Last 10 swing highs
         idx = swing['index']
-        if idx < len(df):
-            zone_high = df.iloc[idx]['high']
-            zone_low = df.iloc[idx]['low']
+        if idx < n:
+            zone_high = highs[idx]
+            zone_low = lows[idx]
             # Check if price reacted to this zone
-            reactions = 0
-            for i in range(max(0, idx - lookback), min(len(df), idx + lookback)):
-                if i != idx and df.iloc[i]['high'] >= zone_low and df.iloc[i]['high'] <= zone_high:
-                    reactions += 1
+            lo, hi = max(0, idx - lookback), min(n, idx + lookback)
+            window = highs[lo:hi]
+            hit = (window >= zone_low) & (window <= zone_high)
+            if lo <= idx < hi:
+                hit[idx - lo] = False
+            reactions = int(hit.sum())
             
             if reactions >= 1:  # At least 1 reaction
                 supply_zones.append({
@@ -309,20 +298,22 @@ def find_supply_demand_zones(df, swing_highs, swing_lows, lookback=20):
                     'low': zone_low,
                     'price': zone_high,  # Entry level
                     'time': swing['time'],
-                    'freshness': len(df) - idx  # How recent
+                    'freshness': n - idx  # How recent
                 })
     
     # Demand zones from swing lows
     for swing in swing_lows[-10:]:  # Last 10 swing lows
         idx = swing['index']
-        if idx < len(df):
-            zone_high = df.iloc[idx]['high']
-            zone_low = df.iloc[idx]['low']
+        if idx < n:
+            zone_high = highs[idx]
+            zone_low = lows[idx]
             # Check if price reacted to this zone
-            reactions = 0
-            for i in range(max(0, idx - lookback), min(len(df), idx + lookback)):
-                if i != idx and df.iloc[i]['low'] <= zone_high and df.iloc[i]['low'] >= zone_low:
-                    reactions += 1
+            lo, hi = max(0, idx - lookback), min(n, idx + lookback)
+            window = lows[lo:hi]
+            hit = (window <= zone_high) & (window >= zone_low)
+            if lo <= idx < hi:
+                hit[idx - lo] = False
+            reactions = int(hit.sum())
             
             if reactions >= 1:  # At least 1 reaction
                 demand_zones.append({
@@ -330,7 +321,7 @@ def find_supply_demand_zones(df, swing_highs, swing_lows, lookback=20):
                     'low': zone_low,
                     'price': zone_low,  # Entry level
                     'time': swing['time'],
-                    'freshness': len(df) - idx  # How recent
+                    'freshness': n - idx  # How recent
                 })
     
     return supply_zones, demand_zones
@@ -1272,22 +1263,22 @@ def find_swing_high_with_rsi(df_m1, lookback=5, min_rsi=70):
     Returns: list of dicts với {'index': i, 'price': high, 'time': time, 'rsi': rsi_value}
     """
     swing_highs = []
+    # Mảng cột thay cho df_m1.iloc[j] trong vòng lặp lồng nhau (mỗi lần tạo 1 Series)
+    highs = df_m1['high'].to_numpy()
+    rsis = df_m1['rsi'].to_numpy() if 'rsi' in df_m1.columns else None
     
     for i in range(lookback, len(df_m1) - lookback):
-        # Check if it's a swing high
-        is_swing_high = True
-        for j in range(i - lookback, i + lookback + 1):
-            if j != i and df_m1.iloc[j]['high'] >= df_m1.iloc[i]['high']:
-                is_swing_high = False
-                break
+        # Check if it's a swing high: mọi nến khác trong cửa sổ thấp hơn hẳn
+        window = highs[i - lookback:i + lookback + 1]
+        is_swing_high = int((window >= highs[i]).sum()) <= 1 if highs[i] == highs[i] else True
         
         if is_swing_high:
             # Check RSI at swing high
-            rsi_val = df_m1.iloc[i].get('rsi', None)
+            rsi_val = rsis[i] if rsis is not None else None
             if pd.notna(rsi_val) and rsi_val > min_rsi:
                 swing_highs.append({
                     'index': i,
-                    'price': df_m1.iloc[i]['high'],
+                    'price': highs[i],
                     'time': df_m1.index[i],
                     'rsi': rsi_val
                 })
@@ -1300,22 +1291,21 @@ def find_swing_low_with_rsi(df_m1, lookback=5, min_rsi=30):
     Returns: list of dicts với {'index': i, 'price': low, 'time': time, 'rsi': rsi_value}
     """
     swing_lows = []
+    lows = df_m1['low'].to_numpy()
+    rsis = df_m1['rsi'].to_numpy() if 'rsi' in df_m1.columns else None
     
     for i in range(lookback, len(df_m1) - lookback):
-        # Check if it's a swing low
-        is_swing_low = True
-        for j in range(i - lookback, i + lookback + 1):
-            if j != i and df_m1.iloc[j]['low'] <= df_m1.iloc[i]['low']:
-                is_swing_low = False
-                break
+        # Check if it's a swing low: mọi nến khác trong cửa sổ cao hơn hẳn
+        window = lows[i - lookback:i + lookback + 1]
+        is_swing_low = int((window <= lows[i]).sum()) <= 1 if lows[i] == lows[i] else True
         
         if is_swing_low:
             # Check RSI at swing low
-            rsi_val = df_m1.iloc[i].get('rsi', None)
+            rsi_val = rsis[i] if rsis is not None else None
             if pd.notna(rsi_val) and rsi_val < min_rsi:
                 swing_lows.append({
                     'index': i,
-                    'price': df_m1.iloc[i]['low'],
+                    'price': lows[i],
                     'time': df_m1.index[i],
                     'rsi': rsi_val
                 })
@@ -1729,7 +1719,7 @@ def tuyen_trend_logic(config, error_count=0):
 
     # --- 3. H1 Higher-timeframe Bias (Supply/Demand) ---
     h1_bias = None
-    h1_swing_highs, h1_swing_lows = find_swing_points(df_h1, lookback=3)
+    h1_swing_highs, h1_swing_lows = find_swing_points(df_h1, lookback=3, tracker=SWING_TRACKERS["H1"])
     h1_supply_zones, h1_demand_zones = find_supply_demand_zones(df_h1, h1_swing_highs, h1_swing_lows)
     
     current_h1_price = df_h1.iloc[-1]['close']
@@ -1790,7 +1780,7 @@ def tuyen_trend_logic(config, error_count=0):
         trend_reason = "EMAs Crossed or Price Inside EMAs"
     
     # M5 Supply/Demand zones
-    m5_swing_highs, m5_swing_lows = find_swing_points(df_m5, lookback=3)
+    m5_swing_highs, m5_swing_lows = find_swing_points(df_m5, lookback=3, tracker=SWING_TRACKERS["M5"])
     m5_supply_zones, m5_demand_zones = find_supply_demand_zones(df_m5, m5_swing_highs, m5_swing_lows)
     
     current_m5_price = df_m5.iloc[-1]['close']
@@ -1821,7 +1811,7 @@ def tuyen_trend_logic(config, error_count=0):
     df_m1['rsi'] = calculate_rsi(df_m1['close'], period=14)  # Add RSI for new SELL strategy
     
     # M1 Structure Detection (Lower Highs/Lows for SELL, Higher Highs/Lows for BUY)
-    m1_swing_highs, m1_swing_lows = find_swing_points(df_m1, lookback=5)
+    m1_swing_highs, m1_swing_lows = find_swing_points(df_m1, lookback=5, tracker=SWING_TRACKERS["M1"])
     m1_structure_valid = True
     
     if len(m1_swing_highs) >= 2 and len(m1_swing_lows) >= 2:
@@ -3789,13 +3779,28 @@ if __name__ == "__main__":
             print("🔄 Bắt đầu vòng lặp chính...\n")
             
             loop_count = 0
+            # Event mode ("event_mode": "bar_close"): phân tích đầy đủ chỉ ở tick đầu mỗi nến mới,
+            # các giây còn lại chỉ trailing/breakeven (xem tradecore/bar_events.py)
+            bar_gate = gate_from_config(config)
+            if bar_gate:
+                print(f"⏱️ Event mode: phân tích khi đóng nến {config.get('event_timeframe', 'M1')}")
             while True:
                 try:
                     loop_count += 1
                     if loop_count % 60 == 0:  # Print every 60 iterations (~1 minute)
                         print(f"⏳ Bot đang chạy... (vòng lặp #{loop_count})")
                     
-                    consecutive_errors, last_error = tuyen_trend_logic(config, consecutive_errors)
+                    if bar_gate is not None and not bar_gate.due():
+                        for pos in mt5.positions_get(symbol=config['symbol'], magic=config['magic']) or []:
+                            manage_position(pos.ticket, config['symbol'], config['magic'], config)
+                        time.sleep(1)
+                        continue
+                    try:
+                        consecutive_errors, last_error = tuyen_trend_logic(config, consecutive_errors)
+                    except Exception:
+                        if bar_gate is not None:
+                            bar_gate.retry()
+                        raise
                     if consecutive_errors >= 5:
                         print("⚠️ Too many errors. Pausing...")
                         time.sleep(120)
@@ -2030,7 +2030,7 @@ if __name__ == "__main__":
             # Test Telegram connection
             print("\n📤 [Telegram] Đang kiểm tra kết nối Telegram...")
             test_msg = f"✅ <b>M1 Scalp Bot - XAUUSD</b>\n\nBot đã khởi động thành công!\n💱 Symbol: {config.get('symbol', 'N/A')}\n⏰ {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-            telegram_ok = send_telegram(test_msg, config.get('telegram_token'), config.get('telegram_chat_id'), symbol=config.get('symbol'))
+            telegram_ok = send_telegram(test_msg, config.get('telegram_token'), config.get('telegram_chat_id'), symbol=config.get('symbol'), wait=True)
             if telegram_ok:
                 print("✅ [Telegram] Kết nối Telegram thành công!")
             else:
@@ -10,6 +10,8 @@ from datetime import datetime
 sys.path.append('..') 
 from db import Database
 from utils import load_config, connect_mt5, get_data, send_telegram, manage_position, get_mt5_error_message
+from tradecore.bar_events import gate_from_config
+from swing_points import swing_points_from_df, SwingPointTracker
 
 # Initialize Database
 db = Database()
@@ -260,31 +262,12 @@ def calculate_ema(series, span):
     """Calculate EMA"""
     return series.ewm(span=span, adjust=False).mean()
 
-def find_swing_points(df, lookback=5):
-    """Find swing highs and lows"""
-    swing_highs = []
-    swing_lows = []
-    
-    for i in range(lookback, len(df) - lookback):
-        # Swing High: Higher than lookback candles on both sides
-        is_swing_high = True
-        for j in range(i - lookback, i + lookback + 1):
-            if j != i and df.iloc[j]['high'] >= df.iloc[i]['high']:
-                is_swing_high = False
-                break
-        if is_swing_high:
-            swing_highs.append({'index': i, 'price': df.iloc[i]['high'], 'time': df.index[i]})
-        
-        # Swing Low: Lower than lookback candles on both sides
-        is_swing_low = True
-        for j in range(i - lookback, i + lookback + 1):
-            if j != i and df.iloc[j]['low'] <= df.iloc[i]['low']:
-                is_swing_low = False
-                break
-        if is_swing_low:
-            swing_lows.append({'index': i, 'price': df.iloc[i]['low'], 'time': df.index[i]})
-    
-    return swing_highs, swing_lows
+# Swing tracker incremental theo từng khung (H1/M5 lookback=3, M1 lookback=5)
+SWING_TRACKERS = {"H1": SwingPointTracker(3), "M5": SwingPointTracker(3), "M1": SwingPointTracker(5)}
+
+def find_swing_points(df, lookback=5, tracker=None):
+    """Find swing highs and lows (rolling max/min căn giữa; tracker → chỉ tính lại các nến cuối)"""
+    return swing_points_from_df(df, lookback, tracker)
 
 def find_supply_demand_zones(df, swing_highs, swing_lows, lookback=20):
     """Find Supply (resistance) and Demand (support) zones"""
@@ -1248,7 +1231,7 @@ def tuyen_trend_logic(config, error_count=0):
 
     # --- 3. H1 Higher-timeframe Bias (Supply/Demand) ---
     h1_bias = None
-    h1_swing_highs, h1_swing_lows = find_swing_points(df_h1, lookback=3)
+    h1_swing_highs, h1_swing_lows = find_swing_points(df_h1, lookback=3, tracker=SWING_TRACKERS["H1"])
     h1_supply_zones, h1_demand_zones = find_supply_demand_zones(df_h1, h1_swing_highs, h1_swing_lows)
     
     current_h1_price = df_h1.iloc[-1]['close']
@@ -1309,7 +1292,7 @@ def tuyen_trend_logic(config, error_count=0):
         trend_reason = "EMAs Crossed or Price Inside EMAs"
     
     # M5 Supply/Demand zones
-    m5_swing_highs, m5_swing_lows = find_swing_points(df_m5, lookback=3)
+    m5_swing_highs, m5_swing_lows = find_swing_points(df_m5, lookback=3, tracker=SWING_TRACKERS["M5"])
     m5_supply_zones, m5_demand_zones = find_supply_demand_zones(df_m5, m5_swing_highs, m5_swing_lows)
     
     current_m5_price = df_m5.iloc[-1]['close']
@@ -1339,7 +1322,7 @@ def tuyen_trend_logic(config, error_count=0):
     df_m1['atr'] = calculate_atr(df_m1, 14)
     
     # M1 Structure Detection (Lower Highs/Lows for SELL, Higher Highs/Lows for BUY)
-    m1_swing_highs, m1_swing_lows = find_swing_points(df_m1, lookback=5)
+    m1_swing_highs, m1_swing_lows = find_swing_points(df_m1, lookback=5, tracker=SWING_TRACKERS["M1"])
     m1_structure_valid = True
     
     if len(m1_swing_highs) >= 2 and len(m1_swing_lows) >= 2:
@@ -2703,13 +2686,28 @@ if __name__ == "__main__":
             print("🔄 Bắt đầu vòng lặp chính...\n")
             
             loop_count = 0
+            # Event mode ("event_mode": "bar_close"): phân tích đầy đủ chỉ ở tick đầu mỗi nến mới,
+            # các giây còn lại chỉ trailing/breakeven (xem tradecore/bar_events.py)
+            bar_gate = gate_from_config(config)
+            if bar_gate:
+                print(f"⏱️ Event mode: phân tích khi đóng nến {config.get('event_timeframe', 'M1')}")
             while True:
                 try:
                     loop_count += 1
                     if loop_count % 60 == 0:  # Print every 60 iterations (~1 minute)
                         print(f"⏳ Bot đang chạy... (vòng lặp #{loop_count})")
                     
-                    consecutive_errors, last_error = tuyen_trend_logic(config, consecutive_errors)
+                    if bar_gate is not None and not bar_gate.due():
+                        for pos in mt5.positions_get(symbol=config['symbol'], magic=config['magic']) or []:
+                            manage_position(pos.ticket, config['symbol'], config['magic'], config)
+                        time.sleep(1)
+                        continue
+                    try:
+                        consecutive_errors, last_error = tuyen_trend_logic(config, consecutive_errors)
+                    except Exception:
+                        if bar_gate is not None:
+                            bar_gate.retry()
+                        raise
                     if consecutive_errors >= 5:
                         print("⚠️ Too many errors. Pausing...")
                         time.sleep(120)
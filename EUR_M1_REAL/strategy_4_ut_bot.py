@@ -7,7 +7,8 @@ import pandas as pd
 # Import local modules
 sys.path.append('..')
 from db import Database
-from utils import load_config, connect_mt5, get_data, send_telegram, calculate_adx, manage_position, get_mt5_error_message, calculate_rsi
+from utils import load_config, connect_mt5, get_data, send_telegram, calculate_adx, manage_positions, get_mt5_error_message, calculate_rsi
+from tradecore.execution import send_order
 from datetime import datetime, timedelta
 
 # Initialize Database
@@ -58,8 +59,7 @@ def strategy_4_logic(config, error_count=0):
     # 2. Check Global Max Positions & Manage Existing
     positions = mt5.positions_get(symbol=symbol, magic=magic)
     if positions:
-        for pos in positions:
-            manage_position(pos.ticket, symbol, magic, config)
+        manage_positions(symbol, magic, config, positions)
             
         if len(positions) >= max_positions:
             return error_count, 0
@@ -361,7 +361,7 @@ def strategy_4_logic(config, error_count=0):
             "type_filling": mt5.ORDER_FILLING_FOK,
         }
         
-        result = mt5.order_send(request)
+        result = send_order(request, "Strategy_4_UT_Bot", db_path=db.db_path)
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             print(f"✅ Order Success: {result.order}")
             db.log_order(result.order, "Strategy_4_UT_Bot", symbol, signal, volume, price, sl, tp, result.comment, account_id=config['account'])
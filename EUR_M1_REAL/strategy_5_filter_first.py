@@ -7,7 +7,8 @@ import pandas as pd
 # Import local modules
 sys.path.append('..')
 from db import Database
-from utils import load_config, connect_mt5, get_data, send_telegram, manage_position, get_mt5_error_message, calculate_rsi, calculate_adx
+from utils import load_config, connect_mt5, get_data, send_telegram, manage_positions, get_mt5_error_message, calculate_rsi, calculate_adx
+from tradecore.execution import send_order
 from datetime import datetime, timedelta
 
 # Initialize Database
@@ -25,8 +26,7 @@ def strategy_5_logic(config, error_count=0):
     # 2. Check Global Max Positions & Manage Existing
     positions = mt5.positions_get(symbol=symbol, magic=magic)
     if positions:
-        for pos in positions:
-            manage_position(pos.ticket, symbol, magic, config)
+        manage_positions(symbol, magic, config, positions)
             
         if len(positions) >= max_positions:
             return error_count, 0
@@ -554,7 +554,7 @@ def strategy_5_logic(config, error_count=0):
             "type_filling": mt5.ORDER_FILLING_FOK,
         }
         
-        result = mt5.order_send(request)
+        result = send_order(request, "Strategy_5_Filter_First", db_path=db.db_path)
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             print(f"✅ Order Success: {result.order}")
             db.log_order(result.order, "Strategy_5_Filter_First", symbol, signal, volume, price, sl, tp, result.comment, account_id=config['account'])
@@ -1,10 +1,16 @@
 """
 Grid Step – logic dùng chung cho strategy_grid_step.py, strategy_grid_step_btc.py, ...
-Kiểm tra history MT5 theo cặp (symbol + magic) trước khi đặt BUY_STOP/SELL_STOP.
+Kiểm tra history MT5 theo cặp (symbol + magic) trước khi đặt BUY_STOP/SELL_STOP
+(TRADECORE_POSITION_INDEX=1: position đã đóng lấy từ tradecore.position_index — deal giữ trong RAM, chỉ hỏi MT5 deal mới).
 """
+import os
+import sys
 import MetaTrader5 as mt5
 from datetime import datetime, timedelta
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tradecore import position_index
+
 # Bật log debug cho consecutive loss / history. Set False để tắt.
 DEBUG_HISTORY = False
 
@@ -13,6 +19,16 @@ def get_last_n_closed_profits_by_symbol(symbol, magic, n, days_back=1, comment_p
     """Lấy N lệnh đóng gần nhất của cặp (symbol) + magic từ MT5 history (chỉ 1 ngày gần nhất).
     Nếu comment_prefix được truyền (vd. 'GridStep_V11', 'GridStep_V12'), chỉ tính các deal có comment bắt đầu bằng prefix đó — tránh lẫn lệnh của bot khác.
     Trả về (list_profit, last_close_time_str). list_profit sắp từ mới nhất → cũ. last_close_time_str theo UTC (để tính pause)."""
+    if DEBUG_HISTORY:
+        print(f"[GridStep:history] get_last_n_closed_profits_by_symbol symbol={symbol} magic={magic} n={n} days_back={days_back} comment_prefix={comment_prefix!r}")
+    if position_index.enabled():
+        index = position_index.get_index()
+        # deal-level: chỉ gom deal có comment khớp prefix (bản cũ lọc từng deal)
+        positions = index.last_n_closed(symbol, magic, sys.maxsize, days_back=days_back, comment_prefix=comment_prefix,
+                                        match="deal")
+        if DEBUG_HISTORY:
+            print(f"[GridStep:history]   position_index: {index.stats} (deal mới từ {index.last_time})")
+        return _profits_and_last_close(positions, n)
     # Dùng now() (local/PC) để khoảng lấy history khớp với ngày hiển thị trên MT5 terminal
     to_date = datetime.now()
     from_date = to_date - timedelta(days=days_back)
@@ -20,7 +36,6 @@ def get_last_n_closed_profits_by_symbol(symbol, magic, n, days_back=1, comment_p
     if deals is None:
         deals = mt5.history_deals_get(from_date, to_date, group="*")
     if DEBUG_HISTORY:
-        print(f"[GridStep:history] get_last_n_closed_profits_by_symbol symbol={symbol} magic={magic} n={n} days_back={days_back} comment_prefix={comment_prefix!r}")
         print(f"[GridStep:history]   history_deals_get: {len(deals) if deals else 0} deals (from {from_date} to {to_date} local)")
     if not deals:
         if DEBUG_HISTORY:
@@ -52,6 +67,13 @@ def get_last_n_closed_profits_by_symbol(symbol, magic, n, days_back=1, comment_p
             continue
         positions.append((v["out_profit"], v["out_time"]))
     positions.sort(key=lambda x: x[1], reverse=True)
+    if DEBUG_HISTORY:
+        print(f"[GridStep:history]   positions (symbol+magic): {len(by_position)}")
+    return _profits_and_last_close(positions, n)
+
+
+def _profits_and_last_close(positions, n):
+    """positions [(net_profit, close_time)] mới trước → (N profit gần nhất, giờ đóng gần nhất UTC)."""
     first_n = positions[:n]
     profits = [p[0] for p in first_n]
     last_close_time_str = None
@@ -67,7 +89,7 @@ def get_last_n_closed_profits_by_symbol(symbol, magic, n, days_back=1, comment_p
     if DEBUG_HISTORY and last_close_time_str is None and first_n:
         print(f"[GridStep:history]   last_close_time: (raw ts={first_n[0][1]})")
     if DEBUG_HISTORY:
-        print(f"[GridStep:history]   positions đã đóng (symbol+magic): {len(by_position)}, lấy {len(first_n)} gần nhất")
+        print(f"[GridStep:history]   positions đã đóng (symbol+magic): {len(positions)}, lấy {len(first_n)} gần nhất")
         print(f"[GridStep:history]   profits (mới→cũ): {profits}")
         all_loss = len(profits) >= n and all((p or 0) < 0 for p in profits)
         print(f"[GridStep:history]   cần {n} lệnh thua liên tiếp -> all_loss={all_loss} (len(profits)={len(profits)}, all<0={all((p or 0) < 0 for p in profits) if profits else False})")
@@ -77,9 +99,11 @@ def get_last_n_closed_profits_by_symbol(symbol, magic, n, days_back=1, comment_p
 def get_closed_from_mt5_history(config, days_back=1):
     """Lấy position đã đóng từ MT5 history (theo magic, 1 ngày gần nhất).
     Trả về dict position_id -> (profit, close_price, close_time_str)."""
+    magic = config.get("magic", 0)
+    if position_index.enabled():
+        return _closed_from_index(magic, days_back)
     to_date = datetime.now()
     from_date = to_date - timedelta(days=days_back)
-    magic = config.get("magic", 0)
     deals = mt5.history_deals_get(from_date, to_date)
     if deals is None:
         deals = mt5.history_deals_get(from_date, to_date, group="*")
@@ -116,3 +140,21 @@ def get_closed_from_mt5_history(config, days_back=1):
     if DEBUG_HISTORY:
         print(f"[GridStep:history] get_closed_from_mt5_history magic={magic}: {len(deals)} deals -> {len(result)} positions đã đóng")
     return result
+
+
+def _closed_from_index(magic, days_back):
+    """get_closed_from_mt5_history qua tradecore.position_index (mọi symbol của magic, cùng định dạng kết quả)."""
+    result = {}
+    for r in position_index.get_index().closed(None, magic, days_back=days_back, newest_first=False):
+        out_price = getattr(r.last_out, "price", 0)
+        if r.net_profit != 0 or out_price != 0:
+            close_time_str = None
+            if r.close_time:
+                try:
+                    close_time_str = datetime.utcfromtimestamp(r.close_time).strftime("%Y-%m-%d %H:%M:%S")
+                except (TypeError, OSError):
+                    pass
+            result[r.position_id] = (r.net_profit, out_price, close_time_str)
+    if DEBUG_HISTORY:
+        print(f"[GridStep:history] get_closed_from_mt5_history magic={magic}: {len(result)} positions đã đóng (position_index)")
+    return result
@@ -17,12 +17,16 @@ from __future__ import annotations
 
 import json
 import os
+import sys
 import time
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
 import MetaTrader5 as mt5
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tradecore import position_index
+
 DEAL_ENTRY_IN = getattr(mt5, "DEAL_ENTRY_IN", 0)
 DEAL_ENTRY_OUT = getattr(mt5, "DEAL_ENTRY_OUT", 1)
 
@@ -173,7 +177,16 @@ def _find_latest_sl_loss_deal(
     Position đóng lỗ gần nhất của bot: gom theo position_id.
     Comment prefix khớp nếu **bất kỳ** deal IN/OUT của position có comment (deal OUT đóng thường để trống comment).
     Trả về deal OUT **cuối cùng** của position đó (để lấy price/time/ticket); net = tổng các deal OUT.
+    TRADECORE_POSITION_INDEX=1: deal lấy từ tradecore.position_index (giữ trong RAM, mỗi lần chỉ hỏi MT5 deal mới).
     """
+    if position_index.enabled():
+        return position_index.get_index().latest_loss(
+            symbol,
+            magic,
+            (comment_prefix or "GridZone").strip(),
+            days_back=max(1, int(days_back)),
+            still_open=lambda pid: not _position_fully_closed(symbol, pid),
+        )
     now = datetime.now()
     from_date = now - timedelta(days=max(1, int(days_back)))
     to_date = now
@@ -64,6 +64,8 @@ from utils import (
     close_positions_bot,
     place_market_order,
 )
+from tradecore import position_index
+from tradecore.profiler import profiler, profiling_enabled, instrument_module
 from scores import (
     normalize_preferred_direction_v5,
     xauusd_grid_step_v5_is_blocked,
@@ -344,9 +346,12 @@ _LIVE_BLIND_RELAX_REASONS = frozenset(
 
 def _invoke_strategy_grid_step_logic(config, consecutive_errors, step):
     mod = _grid_strategy_module if _grid_strategy_module is not None else base
-    if step is not None:
-        return mod.strategy_grid_step_logic(config, consecutive_errors, step=step)
-    return mod.strategy_grid_step_logic(config, consecutive_errors, step=None)
+    name = f"Grid_Step_V5_{step}" if step is not None else "Grid_Step_V5"
+    db_path = getattr(getattr(mod, "db", None), "db_path", None)
+    with profiler.cycle(name, db_path):
+        if step is not None:
+            return mod.strategy_grid_step_logic(config, consecutive_errors, step=step)
+        return mod.strategy_grid_step_logic(config, consecutive_errors, step=None)
 
 
 def _v5_apply_relay_paths_from_config(config: Dict[str, Any]) -> None:
@@ -429,9 +434,13 @@ def _fetch_closed_positions_list(
     symbol, magic, comment_prefix="GridStep", days_back=3, max_positions=500
 ):
     """
-    Lấy trade đã đóng (position-level) từ MT5 history.
+    Lấy trade đã đóng (position-level) từ MT5 history (TRADECORE_POSITION_INDEX=1: qua tradecore.position_index).
     Sort theo close_time giảm dần; cắt max_positions (không dùng slice này cho chuỗi tín hiệu — chỉ cho state).
     """
+    if position_index.enabled():
+        closed = _closed_positions_from_index(symbol, magic, comment_prefix, days_back)
+        closed.sort(key=lambda x: x["close_time"], reverse=True)
+        return closed[:max(1, int(max_positions))]
     to_date = datetime.now()
     from_date = to_date - timedelta(days=max(1, int(days_back)))
     deals = mt5.history_deals_get(from_date, to_date)
@@ -500,6 +509,38 @@ def _fetch_closed_positions_list(
     return closed[:cap]
 
 
+def _closed_positions_from_index(symbol, magic, comment_prefix, days_back):
+    """Như vòng gom by_pos của _fetch_closed_positions_list nhưng từ position_index (deal IN đầu, deal OUT cuối)."""
+    # deal-level: chỉ gom deal có comment khớp prefix (prefix rỗng = không lọc)
+    rows = position_index.get_index().closed(
+        symbol, magic, days_back=max(1, int(days_back)), comment_prefix=comment_prefix or None, match="deal"
+    )
+    closed = []
+    for r in rows:
+        din, dout = r.first_in, r.last_out
+        if din is None:
+            continue
+        profit = float(getattr(dout, "profit", 0) or 0)
+        commission = float(getattr(dout, "commission", 0) or 0)
+        swap = float(getattr(dout, "swap", 0) or 0)
+        closed.append(
+            {
+                "position_id": int(r.position_id),
+                "type": "BUY" if int(getattr(din, "type", -1)) == int(mt5.DEAL_TYPE_BUY) else "SELL",
+                "volume": float(getattr(din, "volume", 0) or 0),
+                "open_time": int(getattr(din, "time", 0) or 0),
+                "open_price": float(getattr(din, "price", 0) or 0),
+                "close_time": int(getattr(dout, "time", 0) or 0),
+                "close_price": float(getattr(dout, "price", 0) or 0),
+                "profit": profit,
+                "commission": commission,
+                "swap": swap,
+                "net_profit": float(profit + commission + swap),
+            }
+        )
+    return closed
+
+
 def _fetch_closed_trades(symbol, magic, history_window=20, comment_prefix="GridStep", days_back=3):
     """Tương thích cũ: chỉ lấy history_window bản ghi đầu (theo close_time)."""
     raw = _fetch_closed_positions_list(
@@ -859,6 +900,8 @@ def _v5_peek_any_out_deal_after(symbol, magic, comment_prefix, since_ts: int) ->
     if since_ts <= 0:
         return True
     try:
+        if position_index.enabled():
+            return position_index.get_index().has_out_after(symbol, magic, since_ts, comment_prefix=comment_prefix or None)
         from_dt = datetime.utcfromtimestamp(max(0, since_ts - 5))
         to_dt = datetime.now()
         deals = mt5.history_deals_get(from_dt, to_dt)
@@ -2543,6 +2586,10 @@ def _run_v5_bot():
 
         label = f"steps: {steps_list}" if steps_list is not None else "single step (legacy)"
         consecutive_loss_pause_enabled = params.get("consecutive_loss_pause_enabled", True)
+        if profiling_enabled(config):
+            # "profile": true → đo stage của strategy_grid_step_logic, ghi cycle_profile trong trades.db
+            profiler.enable()
+            instrument_module(_grid_strategy_module if _grid_strategy_module is not None else base)
         print(f"✅ Grid Step Bot V5 - Started ({label})")
         loop_count = 0
         demo_copy_fill_ipc_state: Dict[str, Any] = {
@@ -1,11 +1,10 @@
 import MetaTrader5 as mt5
-import sqlite3
 import json
 import os
 import time
-from datetime import datetime, timedelta
 from db import Database
 from utils import connect_mt5
+from tradecore.history_sync import FULL_DAYS, HistorySync
 
 def load_config(filepath):
     with open(filepath, 'r') as f:
@@ -38,83 +37,33 @@ def _strategy_name_variants(strategy_name):
             uniq.append(x)
     return uniq
 
-def _get_closed_positions_from_history(config, days_back=90, debug=False):
-    """Lấy danh sách position đã đóng từ MT5 history (theo magic), trả về dict position_id (int) -> (profit, close_price, symbol, volume, type, open_price, close_time_str)."""
-    # Dùng local time để khớp với MT5 terminal (broker/server time thường gần local)
-    now = datetime.now()
-    from_date = now - timedelta(days=days_back)
-    to_date = now
+def _get_closed_positions_from_history(history, config, positions=None, debug=False):
+    """Position đã đóng (theo magic) từ deal history đã đồng bộ vào trades.db (tradecore.history_sync),
+    trả về dict position_id (int) -> (profit, close_price, symbol, volume, type, open_price, close_time_str)."""
+    account_id = int(config.get('account', 0))
     magic = config.get('magic', 0)
-    # MT5 thường cần history_select trước khi history_deals_get trả deal (giống utils._history_deals_select_and_get).
-    try:
-        mt5.history_select(from_date, to_date)
-    except (TypeError, ValueError, AttributeError):
-        pass
-    deals = mt5.history_deals_get(from_date, to_date)
-    if deals is None:
-        deals = mt5.history_deals_get(from_date, to_date, group="*")
-    if not deals:
-        if debug:
-            print(f"   [debug] history_deals_get: 0 deals (magic={magic})")
-        return {}
-    n_total = len(deals)
-    by_position = {}
-    entry_out = getattr(mt5, 'DEAL_ENTRY_OUT', 1)
-    entry_in = getattr(mt5, 'DEAL_ENTRY_IN', 0)
-    entry_inout = getattr(mt5, 'DEAL_ENTRY_INOUT', 4)
-    for d in deals:
-        d_magic = getattr(d, 'magic', 0)
-        if d_magic != magic:
-            continue
-        pid = getattr(d, 'position_id', None) or getattr(d, 'position', None)
-        if pid is None:
-            continue
-        try:
-            pid = int(pid)
-        except (TypeError, ValueError):
-            continue
-        if pid not in by_position:
-            by_position[pid] = {'in': None, 'out_profit': 0.0, 'out_price': 0.0, 'out_time': None}
-        d_entry = getattr(d, 'entry', None)
-        if d_entry == entry_in:
-            by_position[pid]['in'] = d
-        elif d_entry == entry_out:
-            by_position[pid]['out_profit'] += getattr(d, 'profit', 0) + getattr(d, 'swap', 0) + getattr(d, 'commission', 0)
-            by_position[pid]['out_price'] = getattr(d, 'price', 0)
-            by_position[pid]['out_time'] = getattr(d, 'time', None)
-        elif d_entry == entry_inout:
-            by_position[pid]['in'] = d
-            by_position[pid]['out_profit'] += getattr(d, 'profit', 0) + getattr(d, 'swap', 0) + getattr(d, 'commission', 0)
-            by_position[pid]['out_price'] = getattr(d, 'price', 0)
-            by_position[pid]['out_time'] = getattr(d, 'time', None)
-    n_with_magic = sum(1 for d in deals if getattr(d, 'magic', 0) == magic)
-    result = {}
-    for pid, v in by_position.items():
-        if v['out_profit'] != 0 or v['out_price'] != 0:
-            din = v['in']
-            is_buy = din and getattr(din, 'type', 1) == getattr(mt5, 'DEAL_TYPE_BUY', 0)
-            out_ts = v.get('out_time')
-            close_time_str = None
-            if out_ts:
-                try:
-                    close_time_str = datetime.utcfromtimestamp(out_ts).strftime('%Y-%m-%d %H:%M:%S')
-                except (TypeError, OSError):
-                    pass
-            result[int(pid)] = (
-                v['out_profit'],
-                v['out_price'],
-                getattr(din, 'symbol', '') if din else '',
-                getattr(din, 'volume', 0) if din else 0,
-                mt5.ORDER_TYPE_BUY if is_buy else mt5.ORDER_TYPE_SELL,
-                getattr(din, 'price', 0) if din else 0,
-                close_time_str
-            )
+    result = history.closed_positions(account_id, magic, positions)
     if debug:
-        print(f"   [debug] Deals: total={n_total}, magic={magic} -> {n_with_magic}, closed positions={len(result)}")
+        asked = "all" if positions is None else len(positions)
+        print(f"   [debug] Deals in DB: magic={magic}, positions asked={asked}, closed positions={len(result)}")
     return result
 
 
-def update_trades_for_strategy(db, config, strategy_name):
+# Strategy tự backfill từ history (position đã đóng mà chưa có trong orders) khi config không có "steps"
+# → comment MT5 ghi vào orders. Có "steps" thì bot đã ghi đúng Grid_Step_5.0 / Grid_Step_200.0...; không
+# backfill với tên gốc để tránh tạo bản ghi sai strategy_name. Grid_Step_BTC_V2_*: chỉ update profit / close_time.
+BACKFILL_COMMENTS = {
+    "Grid_Step": "GridStep",
+    "Grid_ZoneLock": "GridZone",
+    "Grid_21_Step": "Grid21",
+    "Grid_22_Step": "Grid22",
+    "Grid_3_Step": "Grid3",
+    "Grid_V2_Step": "GridV2",          # strategy_grid_step_v2.py khi không có steps
+    "Grid_Step_V11": "GridStepV11",
+}
+
+
+def update_trades_for_strategy(db, config, strategy_name, history, full=False):
     # 1. Connect to MT5 for this account
     if not connect_mt5(config):
         print(f"❌ Could not connect for {strategy_name}")
@@ -131,231 +80,86 @@ def update_trades_for_strategy(db, config, strategy_name):
     account_id = int(config.get('account', 0))
     magic = config.get('magic', 0)
 
-    # 2. Lấy deals đã đóng từ history (theo khoảng thời gian, tránh history_deals_get(position=ticket) trả về None)
-    closed = _get_closed_positions_from_history(config, days_back=90, debug=True)
-    if not closed and (
-        strategy_name == "Grid_Step"
-        or strategy_name.startswith("Grid_Step_BTC")
-        or strategy_name == "Grid_ZoneLock"
-        or strategy_name.startswith("Grid_ZoneLock_")
-    ):
-        print(f"ℹ️ No closed deals in history for magic {magic} ({strategy_name})")
+    # 2. Deal mới của account (1 lần mỗi vòng, dùng chung cho mọi strategy cùng account): từ high-water mark,
+    #    không lấy lại 90 ngày history; --full lấy lại cả cửa sổ.
+    touched = history.touched.get(account_id)
+    if touched is None:
+        touched = history.sync(account_id, full=full)
+        st = history.stats.get(account_id)
+        if st:
+            print(f"   [sync] account {account_id}: from {st['from']}{' (full)' if st['full'] else ''}, "
+                  f"{st['fetched']} deals fetched, {st['new']} new, {st['positions']} positions touched")
 
     # 3. Orders trong DB có profit IS NULL (match bằng int để khớp với position_id từ MT5)
     # Thử account_id từ config trước; nếu không có thì thử account_id=0 (bản ghi cũ có thể thiếu account_id)
-    conn = sqlite3.connect(db.db_path)
-    cursor = conn.cursor()
     name_variants = _strategy_name_variants(strategy_name)
     placeholders = ",".join("?" * len(name_variants))
-    cursor.execute(
+    rows = db._store.query(
         f"SELECT DISTINCT ticket FROM orders WHERE strategy_name IN ({placeholders}) "
         "AND profit IS NULL AND (account_id = ? OR account_id = 0)",
         (*name_variants, account_id)
     )
-    tickets_pending = [row[0] for row in cursor.fetchall()]
     # Chuẩn hóa ticket sang int để khớp với key trong closed (position_id)
     tickets_pending_int = []
-    for t in tickets_pending:
+    for (t,) in rows:
         try:
             tickets_pending_int.append(int(t))
         except (TypeError, ValueError):
             tickets_pending_int.append(t)
     print(f"   [debug] Pending in DB: {len(tickets_pending_int)} (strategy={strategy_name} variants={name_variants}, account={account_id})")
 
-    updated = 0
-    for ticket in tickets_pending_int:
-        if ticket in closed:
-            row = closed[ticket]
-            profit, close_price = row[0], row[1]
-            close_time = row[6] if len(row) > 6 else None
-            db.update_order_profit(ticket, close_price, profit, close_time)
-            print(f"✅ Updated trade {ticket}: Profit=${profit:.2f}")
-            updated += 1
+    # 4. Chỉ tính lại position còn mở trong DB + position có deal mới (full: mọi position của magic)
+    positions = None if full else {t for t in tickets_pending_int if isinstance(t, int)} | touched
+    closed = _get_closed_positions_from_history(history, config, positions, debug=True)
+    backfill_comment = BACKFILL_COMMENTS.get(strategy_name)
+    if not closed and (backfill_comment or strategy_name.startswith("Grid_Step_BTC")
+                       or strategy_name.startswith("Grid_ZoneLock_")):
+        print(f"ℹ️ No new closed deals in history for magic {magic} ({strategy_name})")
 
-    # 4. Grid_Step: đồng bộ từ history — position đã đóng nhưng chưa có trong orders thì insert (backfill).
-    # Khi config có "steps" (vd [5], [200]) thì bot chính đã ghi đúng Grid_Step_5.0 / Grid_Step_200.0;
-    # không backfill với "Grid_Step" để tránh tạo bản ghi sai strategy_name.
-    if strategy_name == "Grid_Step" and closed:
-        steps = config.get("parameters", {}).get("steps")
-        if steps is not None and len(steps) > 0:
-            # Đang dùng multi-step: không backfill với "Grid_Step", tránh ghi nhận sai trong dashboard.
-            pass
-        else:
-            p = config.get("parameters", {})
-            step = float(p.get("sl_tp_price") or p.get("step") or 5.0)
-            for position_id, row in closed.items():
-                profit, close_price, symbol, volume, order_type, open_price = row[0], row[1], row[2], row[3], row[4], row[5]
-                close_time = row[6] if len(row) > 6 else None
-                if not db.order_exists(position_id):
-                    order_type_str = "BUY" if order_type == mt5.ORDER_TYPE_BUY else "SELL"
-                    op = float(open_price)
-                    if order_type == mt5.ORDER_TYPE_BUY:
-                        sl, tp = op - step, op + step
-                    else:
-                        sl, tp = op + step, op - step
-                    db.log_order(position_id, strategy_name, symbol or config.get('symbol', 'XAUUSD'), order_type_str,
-                                 float(volume), op, sl, tp, "GridStep", account_id)
-                    db.update_order_profit(position_id, close_price, profit, close_time)
-                    print(f"✅ Backfill Grid_Step position {position_id}: Profit=${profit:.2f}")
-                    updated += 1
+    # orders đã có: của strategy này (update nếu đổi) / của strategy khác (không backfill)
+    own, existing = set(), set()
+    if closed:
+        for ticket, mine in db._store.query(
+                f"SELECT ticket, strategy_name IN ({placeholders}) FROM orders "
+                "WHERE ticket IN (SELECT value FROM json_each(?))",
+                (*name_variants, json.dumps(sorted(closed)))):
+            existing.add(ticket)
+            if mine:
+                own.add(ticket)
 
-    # 4a. Grid_ZoneLock: giống Grid_Step (comment MT5 GridZone).
-    if strategy_name == "Grid_ZoneLock" and closed:
-        steps = config.get("parameters", {}).get("steps")
-        if steps is not None and len(steps) > 0:
-            pass
-        else:
-            p = config.get("parameters", {})
-            step = float(p.get("sl_tp_price") or p.get("step") or 5.0)
-            for position_id, row in closed.items():
-                profit, close_price, symbol, volume, order_type, open_price = row[0], row[1], row[2], row[3], row[4], row[5]
-                close_time = row[6] if len(row) > 6 else None
-                if not db.order_exists(position_id):
-                    order_type_str = "BUY" if order_type == mt5.ORDER_TYPE_BUY else "SELL"
-                    op = float(open_price)
-                    if order_type == mt5.ORDER_TYPE_BUY:
-                        sl, tp = op - step, op + step
-                    else:
-                        sl, tp = op + step, op - step
-                    db.log_order(position_id, strategy_name, symbol or config.get('symbol', 'XAUUSD'), order_type_str,
-                                 float(volume), op, sl, tp, "GridZone", account_id)
-                    db.update_order_profit(position_id, close_price, profit, close_time)
-                    print(f"✅ Backfill Grid_ZoneLock position {position_id}: Profit=${profit:.2f}")
-                    updated += 1
+    pending = set(tickets_pending_int)
+    updates, inserts = [], []
+    for ticket in sorted(closed):
+        profit, close_price, symbol, volume, order_type, open_price, close_time = closed[ticket]
+        if ticket in pending or ticket in own:
+            updates.append((ticket, close_price, profit, close_time))
+            if ticket in pending:
+                print(f"✅ Updated trade {ticket}: Profit=${profit:.2f}")
 
-    # 4b. Grid_21_Step: tương tự Grid_Step — khi config có "steps" thì không backfill với "Grid_21_Step".
-    if strategy_name == "Grid_21_Step" and closed:
-        steps = config.get("parameters", {}).get("steps")
-        if steps is not None and len(steps) > 0:
-            pass
-        else:
-            p = config.get("parameters", {})
-            step = float(p.get("sl_tp_price") or p.get("step") or 5.0)
-            for position_id, row in closed.items():
-                profit, close_price, symbol, volume, order_type, open_price = row[0], row[1], row[2], row[3], row[4], row[5]
-                close_time = row[6] if len(row) > 6 else None
-                if not db.order_exists(position_id):
-                    order_type_str = "BUY" if order_type == mt5.ORDER_TYPE_BUY else "SELL"
-                    op = float(open_price)
-                    if order_type == mt5.ORDER_TYPE_BUY:
-                        sl, tp = op - step, op + step
-                    else:
-                        sl, tp = op + step, op - step
-                    db.log_order(position_id, strategy_name, symbol or config.get('symbol', 'XAUUSD'), order_type_str,
-                                 float(volume), op, sl, tp, "Grid21", account_id)
-                    db.update_order_profit(position_id, close_price, profit, close_time)
-                    print(f"✅ Backfill Grid_21_Step position {position_id}: Profit=${profit:.2f}")
-                    updated += 1
-
-    # 4c. Grid_22_Step: tương tự — khi config có "steps" thì không backfill với "Grid_22_Step".
-    if strategy_name == "Grid_22_Step" and closed:
-        steps = config.get("parameters", {}).get("steps")
-        if steps is not None and len(steps) > 0:
-            pass
-        else:
-            p = config.get("parameters", {})
-            step = float(p.get("sl_tp_price") or p.get("step") or 5.0)
-            for position_id, row in closed.items():
-                profit, close_price, symbol, volume, order_type, open_price = row[0], row[1], row[2], row[3], row[4], row[5]
-                close_time = row[6] if len(row) > 6 else None
-                if not db.order_exists(position_id):
-                    order_type_str = "BUY" if order_type == mt5.ORDER_TYPE_BUY else "SELL"
-                    op = float(open_price)
-                    if order_type == mt5.ORDER_TYPE_BUY:
-                        sl, tp = op - step, op + step
-                    else:
-                        sl, tp = op + step, op - step
-                    db.log_order(position_id, strategy_name, symbol or config.get('symbol', 'XAUUSD'), order_type_str,
-                                 float(volume), op, sl, tp, "Grid22", account_id)
-                    db.update_order_profit(position_id, close_price, profit, close_time)
-                    print(f"✅ Backfill Grid_22_Step position {position_id}: Profit=${profit:.2f}")
-                    updated += 1
-
-    # 4d. Grid_3_Step: tương tự — khi config có "steps" thì không backfill với "Grid_3_Step".
-    if strategy_name == "Grid_3_Step" and closed:
-        steps = config.get("parameters", {}).get("steps")
-        if steps is not None and len(steps) > 0:
-            pass
-        else:
-            p = config.get("parameters", {})
-            step = float(p.get("sl_tp_price") or p.get("step") or 5.0)
-            for position_id, row in closed.items():
-                profit, close_price, symbol, volume, order_type, open_price = row[0], row[1], row[2], row[3], row[4], row[5]
-                close_time = row[6] if len(row) > 6 else None
-                if not db.order_exists(position_id):
-                    order_type_str = "BUY" if order_type == mt5.ORDER_TYPE_BUY else "SELL"
-                    op = float(open_price)
-                    if order_type == mt5.ORDER_TYPE_BUY:
-                        sl, tp = op - step, op + step
-                    else:
-                        sl, tp = op + step, op - step
-                    db.log_order(position_id, strategy_name, symbol or config.get('symbol', 'XAUUSD'), order_type_str,
-                                 float(volume), op, sl, tp, "Grid3", account_id)
-                    db.update_order_profit(position_id, close_price, profit, close_time)
-                    print(f"✅ Backfill Grid_3_Step position {position_id}: Profit=${profit:.2f}")
-                    updated += 1
-
-    # 4e. Grid_V2_Step (strategy_grid_step_v2.py): khi không có steps trong config thì strategy_name = Grid_V2_Step
-    if strategy_name == "Grid_V2_Step" and closed:
-        steps = config.get("parameters", {}).get("steps")
-        if steps is not None and len(steps) > 0:
-            pass
-        else:
-            p = config.get("parameters", {})
-            step = float(p.get("sl_tp_price") or p.get("step") or 5.0)
-            for position_id, row in closed.items():
-                profit, close_price, symbol, volume, order_type, open_price = row[0], row[1], row[2], row[3], row[4], row[5]
-                close_time = row[6] if len(row) > 6 else None
-                if not db.order_exists(position_id):
-                    order_type_str = "BUY" if order_type == mt5.ORDER_TYPE_BUY else "SELL"
-                    op = float(open_price)
-                    if order_type == mt5.ORDER_TYPE_BUY:
-                        sl, tp = op - step, op + step
-                    else:
-                        sl, tp = op + step, op - step
-                    db.log_order(position_id, strategy_name, symbol or config.get('symbol', 'XAUUSD'), order_type_str,
-                                 float(volume), op, sl, tp, "GridV2", account_id)
-                    db.update_order_profit(position_id, close_price, profit, close_time)
-                    print(f"✅ Backfill Grid_V2_Step position {position_id}: Profit=${profit:.2f}")
-                    updated += 1
-
-    # 4f. Grid_Step_V11: khi không có steps → strategy_name = Grid_Step_V11 (có steps thì bot ghi Grid_Step_V11_5.0 — chỉ update, không backfill tên gốc)
-    if strategy_name == "Grid_Step_V11" and closed:
-        steps = config.get("parameters", {}).get("steps")
-        if steps is not None and len(steps) > 0:
-            pass
-        else:
-            p = config.get("parameters", {})
-            step = float(p.get("sl_tp_price") or p.get("step") or 5.0)
-            for position_id, row in closed.items():
-                profit, close_price, symbol, volume, order_type, open_price = row[0], row[1], row[2], row[3], row[4], row[5]
-                close_time = row[6] if len(row) > 6 else None
-                if not db.order_exists(position_id):
-                    order_type_str = "BUY" if order_type == mt5.ORDER_TYPE_BUY else "SELL"
-                    op = float(open_price)
-                    if order_type == mt5.ORDER_TYPE_BUY:
-                        sl, tp = op - step, op + step
-                    else:
-                        sl, tp = op + step, op - step
-                    db.log_order(position_id, strategy_name, symbol or config.get('symbol', 'XAUUSD'), order_type_str,
-                                 float(volume), op, sl, tp, "GridStepV11", account_id)
-                    db.update_order_profit(position_id, close_price, profit, close_time)
-                    print(f"✅ Backfill Grid_Step_V11 position {position_id}: Profit=${profit:.2f}")
-                    updated += 1
+    # 5. Backfill: position đã đóng nhưng chưa có trong orders thì insert (xem BACKFILL_COMMENTS)
+    steps = config.get("parameters", {}).get("steps")
+    if backfill_comment and closed and not (steps is not None and len(steps) > 0):
+        p = config.get("parameters", {})
+        step = float(p.get("sl_tp_price") or p.get("step") or 5.0)
+        for position_id in sorted(closed):
+            if position_id in existing:
+                continue
+            profit, close_price, symbol, volume, order_type, open_price, close_time = closed[position_id]
+            order_type_str = "BUY" if order_type == mt5.ORDER_TYPE_BUY else "SELL"
+            op = float(open_price)
+            if order_type == mt5.ORDER_TYPE_BUY:
+                sl, tp = op - step, op + step
+            else:
+                sl, tp = op + step, op - step
+            inserts.append((position_id, strategy_name, symbol or config.get('symbol', 'XAUUSD'), order_type_str,
+                            float(volume), op, sl, tp, backfill_comment, account_id))
+            updates.append((position_id, close_price, profit, close_time))
+            print(f"✅ Backfill {strategy_name} position {position_id}: Profit=${profit:.2f}")
 
-    # 4g. Grid_Step_BTC_V2_*: không backfill (bot đã ghi đúng strategy_name khi mở lệnh), chỉ update profit/close_time.
+    # 6. Mọi thay đổi của strategy trong 1 transaction, chỉ ghi order khác với DB
+    updated = db.apply_closed_positions(updates, inserts)
 
-    conn.close()
-    _skip_msg = (
-        (strategy_name == "Grid_Step" and closed)
-        or (strategy_name == "Grid_ZoneLock" and closed)
-        or (strategy_name == "Grid_21_Step" and closed)
-        or (strategy_name == "Grid_22_Step" and closed)
-        or (strategy_name == "Grid_3_Step" and closed)
-        or (strategy_name == "Grid_V2_Step" and closed)
-        or (strategy_name == "Grid_Step_V11" and closed)
-        or (strategy_name.startswith("Grid_Step_BTC_V2") and closed)
-    )
+    _skip_msg = closed and (backfill_comment or strategy_name.startswith("Grid_Step_BTC_V2"))
     if not tickets_pending_int and not _skip_msg:
         if updated == 0:
             print(f"ℹ️ No pending trades to update for {strategy_name} (Account {account_id})")
@@ -462,8 +266,9 @@ def load_strategy_configs(script_dir):
     
     return strategies
 
-def main(db_path=None):
-    """Chạy sync MT5 -> DB. db_path: đường dẫn trades.db (None = dùng mặc định GridStep/trades.db)."""
+def main(db_path=None, full=False, days_back=FULL_DAYS):
+    """Chạy sync MT5 -> DB. db_path: đường dẫn trades.db (None = dùng mặc định GridStep/trades.db).
+    full=True: lấy lại days_back ngày history và tính lại mọi position (sửa DB lệch), thay vì chỉ deal mới."""
     import os
     script_dir = os.path.dirname(os.path.abspath(__file__))
     if db_path is None:
@@ -471,6 +276,7 @@ def main(db_path=None):
     db_path = os.path.normpath(os.path.abspath(db_path))
     print(f"📂 Using DB: {db_path}")
     db = Database(db_path)
+    history = HistorySync(db_path, full_days=days_back)
     
     # Auto-load strategy configs mapping
     strategies = load_strategy_configs(script_dir)
@@ -489,10 +295,10 @@ def main(db_path=None):
                 for step in steps:
                     sn = f"Grid_Step_{float(step)}"
                     print(f"\n--- Processing {sn} (Grid Step BTC) ---")
-                    update_trades_for_strategy(db, config, sn)
+                    update_trades_for_strategy(db, config, sn, history, full)
             else:
                 print(f"\n--- Processing {strat_name} ---")
-                update_trades_for_strategy(db, config, "Grid_Step")
+                update_trades_for_strategy(db, config, "Grid_Step", history, full)
         # Grid Step BTC V2: config có "steps" [200] → update từng strategy_name Grid_Step_BTC_V2_200.0, ...
         elif strat_name == "Grid_Step_BTC_V2":
             steps = config.get("parameters", {}).get("steps")
@@ -500,10 +306,10 @@ def main(db_path=None):
                 for step in steps:
                     sn = f"Grid_Step_BTC_V2_{float(step)}"
                     print(f"\n--- Processing {sn} (Grid Step BTC V2) ---")
-                    update_trades_for_strategy(db, config, sn)
+                    update_trades_for_strategy(db, config, sn, history, full)
             else:
                 print(f"\n--- Processing {strat_name} ---")
-                update_trades_for_strategy(db, config, "Grid_Step_BTC_V2")
+                update_trades_for_strategy(db, config, "Grid_Step_BTC_V2", history, full)
         # Grid_Step (base): bot dùng parameters.steps → ghi DB Grid_Step_5.0, Grid_Step_200.0, ...
         # Grid_Step_V5: strategy_configs.json từng dùng key này cho config_grid_step_5min — bot vẫn ghi Grid_Step / Grid_Step_{step}, không phải Grid_Step_V5.
         elif strat_name == "Grid_Step" or strat_name == "Grid_Step_V5":
@@ -512,20 +318,20 @@ def main(db_path=None):
                 for step in steps:
                     sn = f"Grid_Step_{float(step)}"
                     print(f"\n--- Processing {sn} (Grid Step) ---")
-                    update_trades_for_strategy(db, config, sn)
+                    update_trades_for_strategy(db, config, sn, history, full)
             else:
                 print(f"\n--- Processing Grid_Step (config key={strat_name}) ---")
-                update_trades_for_strategy(db, config, "Grid_Step")
+                update_trades_for_strategy(db, config, "Grid_Step", history, full)
         elif strat_name == "Grid_ZoneLock":
             steps = config.get("parameters", {}).get("steps")
             if steps is not None and len(steps) > 0:
                 for step in steps:
                     sn = f"Grid_ZoneLock_{float(step)}"
                     print(f"\n--- Processing {sn} (Grid Zone-Lock) ---")
-                    update_trades_for_strategy(db, config, sn)
+                    update_trades_for_strategy(db, config, sn, history, full)
             else:
                 print(f"\n--- Processing Grid_ZoneLock ---")
-                update_trades_for_strategy(db, config, "Grid_ZoneLock")
+                update_trades_for_strategy(db, config, "Grid_ZoneLock", history, full)
         # Grid_3_Step: bot ghi Grid_3_Step_5.0 khi có steps
         elif strat_name == "Grid_3_Step":
             steps = config.get("parameters", {}).get("steps")
@@ -533,10 +339,10 @@ def main(db_path=None):
                 for step in steps:
                     sn = f"Grid_3_Step_{float(step)}"
                     print(f"\n--- Processing {sn} (Grid 3 Step) ---")
-                    update_trades_for_strategy(db, config, sn)
+                    update_trades_for_strategy(db, config, sn, history, full)
             else:
                 print(f"\n--- Processing {strat_name} ---")
-                update_trades_for_strategy(db, config, "Grid_3_Step")
+                update_trades_for_strategy(db, config, "Grid_3_Step", history, full)
         # strategy_configs key là Grid_Step_V2; bot thực tế ghi Grid_V2_Step / Grid_V2_Step_5.0
         elif strat_name == "Grid_Step_V2":
             steps = config.get("parameters", {}).get("steps")
@@ -544,10 +350,10 @@ def main(db_path=None):
                 for step in steps:
                     sn = f"Grid_V2_Step_{float(step)}"
                     print(f"\n--- Processing {sn} (Grid V2 Step) ---")
-                    update_trades_for_strategy(db, config, sn)
+                    update_trades_for_strategy(db, config, sn, history, full)
             else:
                 print(f"\n--- Processing Grid_V2_Step ---")
-                update_trades_for_strategy(db, config, "Grid_V2_Step")
+                update_trades_for_strategy(db, config, "Grid_V2_Step", history, full)
         # Grid_Step_V11 (strategy_grid_step_v11.py): có steps → ghi DB Grid_Step_V11_5.0, ...
         elif strat_name == "Grid_Step_V11":
             steps = config.get("parameters", {}).get("steps")
@@ -555,33 +361,33 @@ def main(db_path=None):
                 for step in steps:
                     sn = f"Grid_Step_V11_{float(step)}"
                     print(f"\n--- Processing {sn} (Grid Step V11) ---")
-                    update_trades_for_strategy(db, config, sn)
+                    update_trades_for_strategy(db, config, sn, history, full)
             else:
                 print(f"\n--- Processing {strat_name} ---")
-                update_trades_for_strategy(db, config, "Grid_Step_V11")
+                update_trades_for_strategy(db, config, "Grid_Step_V11", history, full)
         elif strat_name == "Grid_21_Step":
             steps = config.get("parameters", {}).get("steps")
             if steps is not None and len(steps) > 0:
                 for step in steps:
                     sn = f"Grid_21_Step_{float(step)}"
                     print(f"\n--- Processing {sn} (Grid 21 Step) ---")
-                    update_trades_for_strategy(db, config, sn)
+                    update_trades_for_strategy(db, config, sn, history, full)
             else:
                 print(f"\n--- Processing {strat_name} ---")
-                update_trades_for_strategy(db, config, "Grid_21_Step")
+                update_trades_for_strategy(db, config, "Grid_21_Step", history, full)
         elif strat_name == "Grid_22_Step":
             steps = config.get("parameters", {}).get("steps")
             if steps is not None and len(steps) > 0:
                 for step in steps:
                     sn = f"Grid_22_Step_{float(step)}"
                     print(f"\n--- Processing {sn} (Grid 22 Step) ---")
-                    update_trades_for_strategy(db, config, sn)
+                    update_trades_for_strategy(db, config, sn, history, full)
             else:
                 print(f"\n--- Processing {strat_name} ---")
-                update_trades_for_strategy(db, config, "Grid_22_Step")
+                update_trades_for_strategy(db, config, "Grid_22_Step", history, full)
         else:
             print(f"\n--- Processing {strat_name} ---")
-            update_trades_for_strategy(db, config, strat_name)
+            update_trades_for_strategy(db, config, strat_name, history, full)
 
     print("\n✅ Update Complete!")
     mt5.shutdown()
@@ -591,18 +397,25 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Sync closed trades from MT5 to DB")
     parser.add_argument("--db", type=str, default=None, help="Path to trades.db (default: GridStep/trades.db)")
     parser.add_argument("--once", action="store_true", help="Run once and exit (no loop)")
+    parser.add_argument("--interval", type=float, default=600,
+                        help="Seconds between syncs when looping (default: 600; each sync only fetches new deals)")
+    parser.add_argument("--full", action="store_true",
+                        help="Repair: re-fetch --days of history and recompute every position, then exit")
+    parser.add_argument("--days", type=int, default=FULL_DAYS, help=f"History window for --full / first sync (default: {FULL_DAYS})")
     args = parser.parse_args()
     db_path = args.db
     if os.environ.get("TRADES_DB_PATH"):
         db_path = db_path or os.environ.get("TRADES_DB_PATH")
     try:
-        if args.once:
-            main(db_path=db_path)
+        if args.once or args.full:
+            main(db_path=db_path, full=args.full, days_back=args.days)
         else:
             while True:
-                main(db_path=db_path)
-                print("Sleeping for 600 seconds...")
-                time.sleep(600)
+                started = time.time()
+                main(db_path=db_path, days_back=args.days)
+                wait = max(args.interval - (time.time() - started), 1)
+                print(f"Sleeping for {wait:.0f} seconds...")
+                time.sleep(wait)
     except KeyboardInterrupt:
         print("\n🛑 update_db stopped by user (Ctrl+C)")
         try:
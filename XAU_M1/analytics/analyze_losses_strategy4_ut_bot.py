@@ -11,41 +11,23 @@ import time
 # Import local modules
 sys.path.append('..')
 from utils import load_config, connect_mt5, get_data, calculate_rsi, calculate_adx
+from indicators_np import ut_bot_trailing_stop_np
 
 STRATEGY_NAME = "Strategy_4_UT_Bot"
 
 def calculate_ut_bot(df, sensitivity=2, period=10):
     """
-    UT Bot Logic: ATR Trailing Stop
+    UT Bot Logic: ATR Trailing Stop.
+    Thêm cột atr, n_loss, x_atr_trailing_stop, pos vào df (kernel: indicators_np.ut_bot_trailing_stop_np).
     """
-    df['atr'] = df['high'].combine(df['close'].shift(1), max) - df['low'].combine(df['close'].shift(1), min)
+    prev_close = df['close'].shift(1)
+    df['atr'] = np.fmax(df['high'], prev_close) - np.fmin(df['low'], prev_close)
     df['atr'] = df['atr'].rolling(window=period).mean()
     df['n_loss'] = sensitivity * df['atr']
-    
-    # Initialize Stop Logic columns
-    df['x_atr_trailing_stop'] = 0.0
-    df['pos'] = 0  # 1 for Buy, -1 for Sell
-    
-    for i in range(1, len(df)):
-        # Calculate trailing stop
-        if df.at[i, 'close'] > df.at[i-1, 'x_atr_trailing_stop'] and df.at[i-1, 'close'] > df.at[i-1, 'x_atr_trailing_stop']:
-            df.at[i, 'x_atr_trailing_stop'] = max(df.at[i-1, 'x_atr_trailing_stop'], df.at[i, 'close'] - df.at[i, 'n_loss'])
-        elif df.at[i, 'close'] < df.at[i-1, 'x_atr_trailing_stop'] and df.at[i-1, 'close'] < df.at[i-1, 'x_atr_trailing_stop']:
-            df.at[i, 'x_atr_trailing_stop'] = min(df.at[i-1, 'x_atr_trailing_stop'], df.at[i, 'close'] + df.at[i, 'n_loss'])
-        elif df.at[i, 'close'] > df.at[i-1, 'x_atr_trailing_stop']:
-            df.at[i, 'x_atr_trailing_stop'] = df.at[i, 'close'] - df.at[i, 'n_loss']
-        else:
-            df.at[i, 'x_atr_trailing_stop'] = df.at[i, 'close'] + df.at[i, 'n_loss']
-            
-        # Determine Position
-        prev_pos = df.at[i-1, 'pos']
-        if df.at[i, 'close'] > df.at[i-1, 'x_atr_trailing_stop'] and df.at[i-1, 'close'] < df.at[i-1, 'x_atr_trailing_stop']:
-             df.at[i, 'pos'] = 1  # BUY Signal transition
-        elif df.at[i, 'close'] < df.at[i-1, 'x_atr_trailing_stop'] and df.at[i-1, 'close'] > df.at[i-1, 'x_atr_trailing_stop']:
-             df.at[i, 'pos'] = -1  # SELL Signal transition
-        else:
-             df.at[i, 'pos'] = prev_pos if prev_pos != 0 else (1 if df.at[i, 'close'] > df.at[i, 'x_atr_trailing_stop'] else -1)
 
+    stop, pos = ut_bot_trailing_stop_np(df['close'].to_numpy(), df['n_loss'].to_numpy())
+    df['x_atr_trailing_stop'] = stop
+    df['pos'] = pos  # 1 for Buy, -1 for Sell
     return df
 
 def analyze_order_loss(ticket, order_type, open_time_str, open_price, sl, tp, close_price, profit):
@@ -0,0 +1,6 @@
+"""Shim: module đã chuyển sang package dùng chung tradecore.bar_cache (thư mục gốc repo)."""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tradecore.bar_cache import *  # noqa: F401,F403
@@ -0,0 +1,175 @@
+"""
+Kiểm tra + đo tradecore.backtest (không cần MT5, dữ liệu nến ngẫu nhiên của fake_mt5):
+
+1. strategy thử (mở lệnh mỗi nến khi không có lệnh, SL/TP ±0.8, nghỉ 5 phút sau lệnh thua đọc từ
+   get_last_closed_orders) → trades.db: open_time / timestamp / close_time là giờ giả, tổng profit các lệnh
+   đã đóng khớp deal OUT của terminal giả (profit + commission như update_db.py), strategy thấy lệnh thua đã đóng (có lần nghỉ),
+   chạy lại ra cùng kết quả; --jobs 2 gộp đúng (ticket không trùng, lệnh đủ 2 đoạn)
+2. thời gian 1 nến M1 của strategy_1..5 (XAU_M1) và tuyen_trend_logic → ước lượng 1 năm (~372k nến M1)
+
+Chạy: python benchmarks/bench_backtest.py [số nến đo, mặc định 300]
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BOT_DIR = os.path.join(ROOT, "XAU_M1")
+sys.path.append(ROOT)
+sys.path.insert(0, BOT_DIR)
+from tradecore import fake_mt5
+
+fake_mt5.install()
+from tradecore import backtest
+from tradecore.runner import _CONFIG_RE
+
+YEAR_BARS = 372_000
+PROBE_BARS = 1500
+
+PROBE = '''
+import os
+import MetaTrader5 as mt5
+from datetime import datetime, timedelta
+from db import Database
+from utils import get_data, manage_positions
+from tradecore.execution import send_order
+
+db = Database(os.path.join(os.path.dirname(os.path.abspath(__file__)), "trades.db"))
+
+
+def strategy_probe_logic(config, error_count=0):
+    symbol, magic = config['symbol'], config['magic']
+    if [p for p in (mt5.positions_get(symbol=symbol) or []) if p.magic == magic]:
+        return error_count, 0
+    last = db.get_last_closed_orders("Probe", limit=1)
+    if last and last[0]["profit"] < 0:
+        closed = datetime.strptime(last[0]["close_time"], "%Y-%m-%d %H:%M:%S")
+        if datetime.utcnow() - closed < timedelta(minutes=5):
+            db.log_signal("Probe", symbol, "WAIT", 0, 0, 0, "{}", status="COOLDOWN")
+            return error_count, 0
+    df = get_data(symbol, mt5.TIMEFRAME_M1, 20)
+    buy = df.iloc[-2]['close'] >= df.iloc[-2]['open']
+    tick = mt5.symbol_info_tick(symbol)
+    price = tick.ask if buy else tick.bid
+    sl, tp = (price - 0.8, price + 0.8) if buy else (price + 0.8, price - 0.8)
+    db.log_signal("Probe", symbol, "BUY" if buy else "SELL", price, sl, tp, "{}")
+    result = send_order({"action": mt5.TRADE_ACTION_DEAL, "symbol": symbol, "volume": 0.01,
+                         "type": mt5.ORDER_TYPE_BUY if buy else mt5.ORDER_TYPE_SELL, "price": price,
+                         "sl": sl, "tp": tp, "magic": magic, "comment": "probe", "deviation": 20,
+                         "type_filling": mt5.ORDER_FILLING_IOC}, "Probe", db.db_path)
+    if result is None or result.retcode != mt5.TRADE_RETCODE_DONE:
+        return error_count + 1, getattr(result, "retcode", 0)
+    db.log_order(result.order, "Probe", symbol, "BUY" if buy else "SELL", 0.01, result.price, sl, tp, "probe")
+    return 0, 0
+'''
+
+
+def make_probe(tmp):
+    os.makedirs(os.path.join(tmp, "configs"))
+    with open(os.path.join(tmp, "configs", "config_probe.json"), "w", encoding="utf-8") as f:
+        f.write('{"symbol": "XAUUSD", "magic": 424242, "volume": 0.01}')
+    path = os.path.join(tmp, "strategy_probe.py")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(PROBE)
+    return path, os.path.join(tmp, "configs", "config_probe.json")
+
+
+def orders_of(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT ticket, order_type, open_price, open_time, close_price, profit, close_time "
+                            "FROM orders ORDER BY ticket").fetchall()
+    finally:
+        conn.close()
+
+
+def check_probe():
+    tmp = tempfile.mkdtemp()
+    script, config = make_probe(tmp)
+    bars = [("XAUUSD", ("synthetic", backtest.DEFAULT_WARMUP + PROBE_BARS))]
+    out, report, summaries = backtest.run(script, bars, config=config, out=os.path.join(tmp, "a", "trades.db"),
+                                            commission=7.0)
+    s = summaries[0]
+    rows = orders_of(out)
+    first, last = backtest._utc(s["start"]), backtest._utc(s["end"] + 60)
+    assert len(rows) > 50, len(rows)
+    assert all(first <= r[3] <= last for r in rows), (first, last, rows[:2])
+    closed = [r for r in rows if r[5] is not None]
+    assert all(r[3] <= r[6] <= last for r in closed)
+    # như update_db.py: profit = profit + commission của deal OUT → lãi ròng terminal trừ commission deal IN
+    in_commission = 0.07 * len(rows)
+    assert abs(sum(r[5] for r in closed) - (s["net_profit"] + in_commission)) < 1e-6, \
+        (sum(r[5] for r in closed), s["net_profit"], in_commission)
+    conn = sqlite3.connect(out)
+    cooldowns = conn.execute("SELECT COUNT(*) FROM signals WHERE status = 'COOLDOWN'").fetchone()[0]
+    stamps = conn.execute("SELECT MIN(timestamp), MAX(timestamp) FROM signals").fetchone()
+    executions = conn.execute("SELECT COUNT(*) FROM order_executions").fetchone()[0]
+    conn.close()
+    assert cooldowns > 0 and first <= stamps[0] and stamps[1] <= last, (cooldowns, stamps)
+    assert executions >= len(rows), executions
+    print(f"1. strategy thử: {len(rows)} lệnh ({len(closed)} đã đóng, {report['win_rate']}% thắng, net "
+          f"{report['net_profit']}) | giờ giả {stamps[0]} → {stamps[1]} | nghỉ sau lệnh thua {cooldowns} nến | "
+          f"{s['bars'] / s['wall_seconds']:.0f} nến/s")
+
+    backtest.run(script, bars, config=config, out=os.path.join(tmp, "b", "trades.db"), commission=7.0)
+    assert orders_of(os.path.join(tmp, "b", "trades.db")) == rows
+    print("   chạy lại: cùng trades.db")
+
+    split, split_report, parts = backtest.run(script, bars, config=config, out=os.path.join(tmp, "c", "trades.db"),
+                                              commission=7.0, jobs=2)
+    merged = orders_of(split)
+    tickets = [r[0] for r in merged]
+    assert len(parts) == 2 and len(set(tickets)) == len(tickets)
+    assert {t // backtest.TICKET_BLOCK for t in tickets} == {100000000 // backtest.TICKET_BLOCK,
+                                                              100000000 // backtest.TICKET_BLOCK + 1}
+    assert abs(len(merged) - len(rows)) <= 0.1 * len(rows), (len(merged), len(rows))
+    assert all(r[5] is not None for r in merged if r[0] < 100000000 + backtest.TICKET_BLOCK)   # đoạn đầu đã đóng hết
+    print(f"   --jobs 2: {len(merged)} lệnh (tuần tự {len(rows)}), net {split_report['net_profit']} "
+          f"(tuần tự {report['net_profit']}), ticket không trùng")
+
+
+def bench_strategies(n_bars):
+    tuyen_dir = os.path.join(ROOT, "EURUSD_M1_REAL_TUYEN")
+    cases = [(os.path.join(BOT_DIR, f"{name}.py"), None, None) for name in (
+        "strategy_1_trend_ha", "strategy_2_ema_atr", "strategy_3_pa_volume", "strategy_4_ut_bot",
+        "strategy_5_filter_first")]
+    cases.append((os.path.join(tuyen_dir, "tuyen_trend.py"), "tuyen_trend_logic",
+                  os.path.join(tuyen_dir, "configs", "config_tuyen.json")))
+    tmp = tempfile.mkdtemp()
+    print(f"\n2. {n_bars} nến M1 mỗi strategy (sau {backtest.DEFAULT_WARMUP} nến warmup), 1 process:")
+    print(f"   {'strategy':<24}{'ms/nến':>9}{'logic ms':>10}{'nến/s':>8}{'1 năm / 1 job':>15}{'lệnh':>6}")
+    for script, logic, config in cases:
+        name = os.path.splitext(os.path.basename(script))[0]
+        with open(script, encoding="utf-8") as f:
+            config_path = config or os.path.join(os.path.dirname(script), "configs", _CONFIG_RE.findall(f.read())[-1])
+        with open(config_path, encoding="utf-8") as f:
+            symbol = json.load(f)["symbol"]
+        if os.path.dirname(script) not in sys.path:
+            sys.path.insert(0, os.path.dirname(script))
+        out = os.path.join(tmp, name, "trades.db")
+        t0 = time.perf_counter()
+        _, report, summaries = backtest.run(script, [(symbol, ("synthetic", backtest.DEFAULT_WARMUP + n_bars))],
+                                            logic=logic, config=config, out=out)
+        s = summaries[0]
+        per_bar = s["wall_seconds"] / max(s["bars"], 1) * 1e3
+        print(f"   {name:<24}{per_bar:>9.2f}{s['logic_ms_avg']:>10.2f}{1e3 / per_bar:>8.0f}"
+              f"{YEAR_BARS * per_bar / 6e4:>12.1f} ph{report['trades']:>6}   (nạp {time.perf_counter() - t0 - s['wall_seconds']:.1f}s)")
+        for module in ("utils", "db", "swing_points"):
+            sys.modules.pop(module, None)   # thư mục bot kế tiếp có utils / db riêng
+        if os.path.dirname(script) != BOT_DIR:
+            sys.path.remove(os.path.dirname(script))
+    print("   (1 năm / N job ≈ cột trên / N: --jobs chia theo đoạn thời gian, mỗi job 1 core)")
+
+
+def main():
+    n_bars = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    check_probe()
+    bench_strategies(n_bars)
+    print("\n✅ backtest OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark event mode (tradecore.bar_events): giả lập `--minutes` phút vòng lặp 1 giây với tick
+không đều (có giây không có tick), so
+- polling: chạy phân tích kiểu Strategy 1 (cycle_pandas của bench_np_path) mỗi giây
+- event  : BarCloseGate.due() mỗi giây, phân tích chỉ ở tick đầu của nến M1 mới
+Đếm số lần phân tích, kiểm tra mỗi nến đều được phân tích đúng 1 lần ở tick đầu tiên của nến,
+và thời gian CPU của 2 chế độ.
+
+Chạy: python benchmarks/bench_bar_events.py [--minutes 30]
+"""
+import os
+import sys
+import time
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils  # noqa: F401  (thêm thư mục gốc repo vào sys.path cho tradecore)
+from tradecore.bar_events import BarCloseGate
+from bench_np_path import make_rates, cycle_pandas
+
+Tick = namedtuple("Tick", "time bid ask")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=int, default=30)
+    args = parser.parse_args()
+
+    m1, m5, h1 = make_rates(200, 60, 1), make_rates(200, 300, 2), make_rates(200, 3600, 3)
+    rng = np.random.default_rng(7)
+    start = 1_700_000_000 - 1_700_000_000 % 60 + 17     # bắt đầu giữa nến
+    seconds = args.minutes * 60
+    has_tick = rng.random(seconds) > 0.2                # ~20% giây không có tick mới
+    ticks = [Tick(start + s, 2000.0, 2000.2) if has_tick[s] else None for s in range(seconds)]
+
+    t0 = time.process_time()
+    for _ in ticks:
+        cycle_pandas(m1, m5, h1)
+    polling = time.process_time() - t0
+
+    gate = BarCloseGate("XAUUSDm")
+    evaluated = []
+    last_tick = None
+    t0 = time.process_time()
+    for tick in ticks:
+        last_tick = tick or last_tick                   # terminal trả về tick cuối nếu chưa có tick mới
+        if gate.due(last_tick):
+            cycle_pandas(m1, m5, h1)
+            evaluated.append(last_tick.time)
+    event = time.process_time() - t0
+
+    # Tick đầu tiên của mỗi phút (nến M1) phải là lần phân tích duy nhất của nến đó
+    first_ticks, seen = [], set()
+    for tick in ticks:
+        if tick is not None and tick.time // 60 not in seen:
+            seen.add(tick.time // 60)
+            first_ticks.append(tick.time)
+    assert evaluated == first_ticks, "event mode lệch tick đầu nến"
+
+    print(f"{seconds} vòng 1 giây, {len(first_ticks)} nến M1")
+    print(f"polling: {seconds} lần phân tích, CPU {polling:.2f}s")
+    print(f"event  : {len(evaluated)} lần phân tích (đúng tick đầu mỗi nến), CPU {event:.2f}s "
+          f"({polling / max(event, 1e-9):.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
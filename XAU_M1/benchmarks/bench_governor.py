@@ -0,0 +1,108 @@
+"""
+Kiểm tra + đo tradecore.governor (không cần MT5: positions đẩy qua op "positions"):
+1. Giới hạn: net theo symbol, tổng lot, lệnh giảm |net| luôn qua, lệnh chờ chỉ tính rate,
+   lệnh đã khớp giữ tới snapshot kế tiếp
+2. Nhiều process (như 5 bot XAU + GridStep) cùng xin lệnh: tổng số lệnh được phép không vượt
+   token bucket của cả tài khoản
+3. Latency 1 lượt reserve+release qua localhost (p50 / p99), mục tiêu < 1 ms
+
+Chạy: python benchmarks/bench_governor.py
+"""
+import os
+import sys
+import time
+import threading
+import multiprocessing as mp
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tradecore.governor import GovernorState, GovernorServer, GovernorClient
+
+
+def check_limits():
+    state = GovernorState(max_net_volume=1.0, max_total_volume=2.0, symbol_limits={"BTCUSD": 0.5},
+                          rate=1000, burst=1000)
+    state.set_positions([("XAUUSD", "BUY", 0.6), ("XAUUSD", "SELL", 0.1)])   # net +0.5, total 0.7
+    ok = state.reserve("XAUUSD", "BUY", 0.5, "S1")
+    assert ok["allowed"], ok                                            # net 1.0 = giới hạn
+    assert not state.reserve("XAUUSD", "BUY", 0.01, "S2")["allowed"]    # net 1.01 > 1.0
+    assert state.reserve("XAUUSD", "SELL", 0.3, "S3")["allowed"]        # giảm |net|
+    assert not state.reserve("BTCUSD", "SELL", 0.6, "S4")["allowed"]    # symbol_limits
+    assert state.reserve("BTCUSD", "SELL", 0.5, "S4")["allowed"]        # total 0.7+0.5+0.3+0.5 = 2.0
+    denied = state.reserve("EURUSD", "BUY", 0.1, "S5")
+    assert not denied["allowed"] and denied["reason"].startswith("total"), denied
+    assert state.reserve("EURUSD", "BUY", 5.0, "Grid", kind="pending")["allowed"]
+
+    # lệnh khớp: giữ chỗ tới snapshot bắt đầu sau thời điểm khớp
+    t_fill = time.monotonic()
+    state.release(ok["intent_id"], filled=True, now=t_fill)
+    state.set_positions([("XAUUSD", "BUY", 0.6), ("XAUUSD", "SELL", 0.1)], now=t_fill - 0.5)
+    assert state.stats()["exposure"]["XAUUSD"]["net_with_intents"] == 0.7
+    state.set_positions([("XAUUSD", "BUY", 1.1), ("XAUUSD", "SELL", 0.1)], now=t_fill + 0.5)
+    assert state.stats()["exposure"]["XAUUSD"]["net_with_intents"] == 0.7   # 1.0 - 0.3 (S3 còn mở)
+
+    # TTL
+    state = GovernorState(max_net_volume=1.0, rate=1000, burst=1000, intent_ttl=0.05)
+    state.reserve("XAUUSD", "BUY", 1.0, "S1")
+    assert not state.reserve("XAUUSD", "BUY", 0.1, "S1")["allowed"]
+    time.sleep(0.06)
+    assert state.reserve("XAUUSD", "BUY", 0.1, "S1")["allowed"]
+    print("1. limits: net / total / reduce / pending / filled-until-snapshot / TTL OK")
+
+
+def _burst_worker(address, n, out):
+    client = GovernorClient(*address, timeout=1.0)
+    allowed = 0
+    for _ in range(n):
+        decision = client.reserve("XAUUSD", "BUY", 0.01, f"pid{os.getpid()}", kind="pending")
+        allowed += bool(decision["allowed"])
+    out.put(allowed)
+
+
+def main():
+    check_limits()
+
+    rate, burst = 20.0, 10
+    state = GovernorState(rate=rate, burst=burst)
+    server = GovernorServer(state, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    address = server.server_address
+
+    # 2. 6 process bắn 200 lệnh mỗi process
+    out = mp.Queue()
+    procs = [mp.Process(target=_burst_worker, args=(address, 200, out)) for _ in range(6)]
+    t0 = time.monotonic()
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    elapsed = time.monotonic() - t0
+    allowed = sum(out.get() for _ in procs)
+    ceiling = burst + rate * elapsed
+    print(f"2. 6 process × 200 lệnh trong {elapsed:.2f}s: được phép {allowed} "
+          f"(trần token bucket {ceiling:.0f}), bị chặn {state.counters['denied_rate']}")
+    assert allowed <= ceiling + 1
+
+    # 3. latency reserve + release (bucket rộng để mọi lượt đều được phép)
+    state.rate, state.burst, state._tokens = 1e6, 1e6, 1e6
+    client = GovernorClient(*address, timeout=1.0)
+    costs = []
+    for _ in range(5000):
+        t = time.perf_counter()
+        decision = client.reserve("XAUUSD", "BUY", 0.01, "bench")
+        client.release(decision["intent_id"], filled=False)
+        costs.append((time.perf_counter() - t) * 1e3)
+    costs = np.array(costs)
+    print(f"3. reserve+release: p50 {np.percentile(costs, 50):.3f} ms | p99 {np.percentile(costs, 99):.3f} ms")
+    assert np.percentile(costs, 50) < 1.0
+
+    # fail-open khi governor không chạy
+    down = GovernorClient("127.0.0.1", 1, timeout=0.05, verbose=False)
+    assert down.reserve("XAUUSD", "BUY", 0.01)["allowed"]
+    server.shutdown()
+    print("✅ governor OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Micro-benchmark Heiken Ashi: vòng lặp df.at cũ vs utils.calculate_heiken_ashi (IIR) vs
+indicators_np.calculate_heiken_ashi_np, trên 200 / 10k / 1M nến; kiểm tra trùng từng bit.
+Kèm HeikenAshi stream (append 1 nến).
+
+Vòng lặp cũ trên 1M nến mất hàng chục giây → mặc định ước lượng tuyến tính từ 10k nến;
+thêm --full để chạy thật.
+Chạy: python benchmarks/bench_heiken_ashi.py [--full]
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import indicators_np
+from utils import calculate_heiken_ashi
+from indicators_np import calculate_heiken_ashi_np
+from streaming_indicators import HeikenAshi
+from bench_np_path import make_rates
+
+
+def calculate_heiken_ashi_legacy(df):
+    """Bản cũ (vòng lặp df.at) — giữ lại để đo và so kết quả"""
+    ha_df = df.copy()
+    ha_df['ha_close'] = (df['open'] + df['high'] + df['low'] + df['close']) / 4
+    ha_df.at[0, 'ha_open'] = (df.iloc[0]['open'] + df.iloc[0]['close']) / 2
+    for i in range(1, len(df)):
+        ha_df.at[i, 'ha_open'] = (ha_df.at[i-1, 'ha_open'] + ha_df.at[i-1, 'ha_close']) / 2
+    ha_df['ha_high'] = ha_df[['high', 'ha_open', 'ha_close']].max(axis=1)
+    ha_df['ha_low'] = ha_df[['low', 'ha_open', 'ha_close']].min(axis=1)
+    return ha_df
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def fmt(seconds):
+    return f"{seconds * 1e3:10.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--full", action="store_true", help="Chạy cả vòng lặp cũ trên 1M nến")
+    args = parser.parse_args()
+
+    print(f"scipy lfilter: {'có' if indicators_np.lfilter is not None else 'không (vòng lặp float)'}")
+    print(f"{'bars':>9} | {'legacy df.at':>13} | {'utils (IIR)':>13} | {'numpy':>13} | {'stream/bar':>10} | speedup | bit-exact")
+    legacy_per_bar = None
+    for n in (200, 10_000, 1_000_000):
+        rates = make_rates(n, 60, 11)
+        df = pd.DataFrame(rates)
+        repeat = 5 if n <= 10_000 else 1
+
+        if n <= 10_000 or args.full:
+            t_legacy, ref = best_of(lambda: calculate_heiken_ashi_legacy(df), repeat)
+            legacy_per_bar = t_legacy / n
+            legacy_label = fmt(t_legacy)
+        else:
+            ref = None
+            t_legacy = legacy_per_bar * n
+            legacy_label = fmt(t_legacy) + "*"
+
+        t_new, ha_df = best_of(lambda: calculate_heiken_ashi(df), repeat)
+        t_np, ha_np = best_of(lambda: calculate_heiken_ashi_np(rates['open'], rates['high'], rates['low'], rates['close']), repeat)
+
+        stream = HeikenAshi()
+        o, h, l, c = (rates[k].tolist() for k in ('open', 'high', 'low', 'close'))
+        t0 = time.perf_counter()
+        for i in range(n):
+            stream.push(o[i], h[i], l[i], c[i])
+        t_stream = (time.perf_counter() - t0) / n
+
+        exact = np.array_equal(ha_np[0], ha_df['ha_open'].to_numpy()) and stream.value[0] == ha_np[0][-1]
+        if ref is not None:
+            exact = exact and all(np.array_equal(ref[col].to_numpy(), ha_df[col].to_numpy())
+                                  for col in ('ha_open', 'ha_close', 'ha_high', 'ha_low'))
+        print(f"{n:>9} | {legacy_label:>13} | {fmt(t_new)} | {fmt(t_np)} | {t_stream * 1e6:7.2f} µs | "
+              f"{t_legacy / t_new:6.0f}x | {'✅' if exact else '❌'}")
+    if not args.full:
+        print("* ước lượng tuyến tính từ 10k nến")
+
+
+if __name__ == "__main__":
+    main()
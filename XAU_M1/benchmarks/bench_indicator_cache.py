@@ -0,0 +1,62 @@
+"""
+Benchmark indicator_cache trên 1 vòng lặp giả lập: 5 strategy cùng process tính ATR/ADX/RSI/HA
+trên cùng khung M1/M5 (200 nến) + manage_position tính ATR M5 cho từng lệnh đang mở.
+So thời gian/vòng khi không cache (hàm .uncached) và có cache, kèm hit/miss.
+
+Chạy: python benchmarks/bench_indicator_cache.py [--cycles 50] [--positions 10]
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import utils  # noqa: F401  (thêm thư mục gốc repo vào sys.path cho tradecore)
+from tradecore.data import rates_to_df
+from tradecore.indicators import calculate_atr, calculate_adx, calculate_rsi, calculate_heiken_ashi
+from tradecore.indicator_cache import indicator_cache
+from bench_np_path import make_rates
+
+
+def cycle(frames, positions, cached):
+    m1, m5 = frames
+    atr = calculate_atr if cached else calculate_atr.uncached
+    adx = calculate_adx if cached else calculate_adx.uncached
+    rsi = calculate_rsi if cached else calculate_rsi.uncached
+    ha = calculate_heiken_ashi if cached else calculate_heiken_ashi.uncached
+    for _ in range(5):
+        ha(m1)
+        adx(m5, 14)
+        rsi(m1['close'], 14)
+        atr(m1, 14)
+    for _ in range(positions):
+        atr(m5, 14).iloc[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cycles", type=int, default=50)
+    parser.add_argument("--positions", type=int, default=10)
+    args = parser.parse_args()
+
+    m1_rates = make_rates(200 + args.cycles, 60, 1)
+    m5_rates = make_rates(200 + args.cycles, 300, 2)
+    results = {}
+    for cached in (False, True):
+        t0 = time.perf_counter()
+        for i in range(args.cycles):
+            # Mỗi vòng 1 nến mới (khung trượt) như vòng lặp live
+            frames = (rates_to_df(m1_rates[i:i + 200], "XAUUSDm", 1), rates_to_df(m5_rates[i:i + 200], "XAUUSDm", 5))
+            cycle(frames, args.positions, cached)
+        results[cached] = (time.perf_counter() - t0) / args.cycles * 1e3
+    stats = indicator_cache.stats()
+    print(f"không cache: {results[False]:.2f} ms/vòng | có cache: {results[True]:.2f} ms/vòng "
+          f"({results[False] / results[True]:.1f}x)")
+    print(f"hits={stats['hits']} misses={stats['misses']} hit_rate={stats['hit_rate']:.0%} "
+          f"size={stats['size']} evictions={stats['evictions']}")
+    for name, counts in stats["by_indicator"].items():
+        print(f"  {name:<12} hits={counts['hits']:<5} misses={counts['misses']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark 1 chu kỳ quyết định kiểu Strategy 1 (M1/M5/H1 × 200 nến):
+- pandas: pd.DataFrame + pd.to_datetime + calculate_* trong utils (đường hiện tại)
+- numpy : structured array (như get_data_np) + indicators_np
+
+Dùng nến giả lập (random walk) nên không cần terminal MT5.
+Chạy: python benchmarks/bench_np_path.py [--cycles 300] [--bars 200]
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import calculate_heiken_ashi, calculate_adx, calculate_rsi, calculate_atr
+from indicators_np import sma_np, calculate_heiken_ashi_np, calculate_adx_np, calculate_rsi_np, calculate_atr_np
+from market_feed import RATES_DTYPE
+
+
+def make_rates(n, seconds, seed):
+    rng = np.random.default_rng(seed)
+    rates = np.zeros(n, dtype=RATES_DTYPE)
+    rates['time'] = 1_700_000_000 + np.arange(n) * seconds
+    close = 2000 + np.cumsum(rng.normal(0, 1, n))
+    rates['open'] = close + rng.normal(0, 0.3, n)
+    rates['close'] = close
+    rates['high'] = np.maximum(rates['open'], close) + rng.random(n)
+    rates['low'] = np.minimum(rates['open'], close) - rng.random(n)
+    rates['tick_volume'] = rng.integers(1, 500, n)
+    return rates
+
+
+def cycle_pandas(m1, m5, h1):
+    df_m1 = pd.DataFrame(m1)
+    df_m1['time'] = pd.to_datetime(df_m1['time'], unit='s')
+    df_m5 = pd.DataFrame(m5)
+    df_m5['time'] = pd.to_datetime(df_m5['time'], unit='s')
+    df_h1 = pd.DataFrame(h1)
+    df_h1['time'] = pd.to_datetime(df_h1['time'], unit='s')
+
+    df_m5['ema200'] = df_m5['close'].rolling(window=200).mean()
+    trend = df_m5.iloc[-1]['close'] > df_m5.iloc[-1]['ema200']
+    df_h1['ema100'] = df_h1['close'].rolling(window=100).mean()
+    h1_trend = df_h1.iloc[-1]['close'] > df_h1.iloc[-1]['ema100']
+    df_m5 = calculate_adx(df_m5, period=14)
+    adx = df_m5.iloc[-1]['adx']
+    atr = calculate_atr(df_m5, period=14).iloc[-1]
+    df_m1['sma55_high'] = df_m1['high'].rolling(window=55).mean()
+    df_m1['sma55_low'] = df_m1['low'].rolling(window=55).mean()
+    ha_df = calculate_heiken_ashi(df_m1)
+    ha_df['rsi'] = calculate_rsi(df_m1['close'], period=14)
+    last, prev = ha_df.iloc[-1], ha_df.iloc[-2]
+    return (trend, h1_trend, adx, atr, last['ha_close'] > last['sma55_high'],
+            prev['ha_close'] <= prev['sma55_high'], last['rsi'])
+
+
+def cycle_numpy(m1, m5, h1):
+    trend = m5['close'][-1] > sma_np(m5['close'], 200)[-1]
+    h1_trend = h1['close'][-1] > sma_np(h1['close'], 100)[-1]
+    adx = calculate_adx_np(m5['high'], m5['low'], m5['close'], 14)[0][-1]
+    atr = calculate_atr_np(m5['high'], m5['low'], m5['close'], 14)[-1]
+    sma55_high = sma_np(m1['high'], 55)
+    _, ha_close, _, _ = calculate_heiken_ashi_np(m1['open'], m1['high'], m1['low'], m1['close'])
+    rsi = calculate_rsi_np(m1['close'], 14)
+    return (trend, h1_trend, adx, atr, ha_close[-1] > sma55_high[-1],
+            ha_close[-2] <= sma55_high[-2], rsi[-1])
+
+
+def timeit(fn, args, cycles):
+    samples = []
+    for _ in range(cycles):
+        t0 = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return samples[len(samples) // 2] * 1e6, samples[int(len(samples) * 0.95)] * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cycles", type=int, default=300)
+    parser.add_argument("--bars", type=int, default=200)
+    args = parser.parse_args()
+
+    m1 = make_rates(args.bars, 60, 1)
+    m5 = make_rates(args.bars, 300, 2)
+    h1 = make_rates(args.bars, 3600, 3)
+
+    a, b = cycle_pandas(m1, m5, h1), cycle_numpy(m1, m5, h1)
+    same = all(x == y or (isinstance(x, float) and abs(x - y) < 1e-9) for x, y in zip(a, b))
+    print(f"Kết quả 2 đường khớp nhau: {'✅' if same else '❌'}")
+
+    p50_pd, p95_pd = timeit(cycle_pandas, (m1, m5, h1), args.cycles)
+    p50_np, p95_np = timeit(cycle_numpy, (m1, m5, h1), args.cycles)
+    print(f"{'path':<8} {'p50 (µs)':>10} {'p95 (µs)':>10}")
+    print(f"{'pandas':<8} {p50_pd:>10.0f} {p95_pd:>10.0f}")
+    print(f"{'numpy':<8} {p50_np:>10.0f} {p95_np:>10.0f}")
+    print(f"Speedup p50: {p50_pd / p50_np:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
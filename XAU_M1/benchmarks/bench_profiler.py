@@ -0,0 +1,142 @@
+"""
+Đo overhead của tradecore.profiler trên 1 vòng strategy giả lập (không cần MT5):
+get_data (copy DataFrame 200 nến) → HA / ATR / ADX / RSI → vài print → ghi signal sqlite.
+
+- Tắt (không instrument, cycle() trả về context rỗng): overhead ≈ 0
+- Bật + instrument_module: overhead mục tiêu < 1% thời gian vòng, tính từ chi phí cố định mỗi lần
+  gọi hàm đã bọc × số lần gọi / vòng (so 2 vòng xen kẽ chỉ để tham khảo: nhiễu máy lớn hơn overhead)
+- In bảng p50 / p95 / p99 từng stage như dashboard đọc từ cycle_profile
+
+Chạy: python benchmarks/bench_profiler.py
+"""
+import io
+import os
+import sys
+import time
+import types
+import sqlite3
+import tempfile
+import contextlib
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tradecore import indicators
+from tradecore.profiler import Profiler, instrument_module, latest_profile
+
+N_CYCLES = 1000
+
+
+def make_module(db_path):
+    rng = np.random.default_rng(7)
+    close = 2000 + np.cumsum(rng.normal(0, 0.5, 200))
+    base = pd.DataFrame({"open": close + rng.normal(0, 0.2, 200), "close": close,
+                         "high": close + 0.6, "low": close - 0.6,
+                         "tick_volume": rng.integers(50, 500, 200)})
+
+    class FakeDb:
+        def __init__(self, path):
+            self.db_path = path
+            self.conn = sqlite3.connect(path)
+            self.conn.execute("PRAGMA synchronous=OFF")   # bỏ nhiễu fsync khỏi phép đo
+            self.conn.execute("CREATE TABLE IF NOT EXISTS signals (name TEXT, value REAL)")
+
+        def log_signal(self, name, value):
+            self.conn.execute("INSERT INTO signals VALUES (?, ?)", (name, value))
+            self.conn.commit()
+
+    module = types.ModuleType("fake_strategy")
+    module.db = FakeDb(db_path)
+    module.get_data = lambda symbol, timeframe, n: base.copy()
+    module.calculate_heiken_ashi = indicators.calculate_heiken_ashi
+    module.calculate_atr = indicators.calculate_atr
+    module.calculate_adx = indicators.calculate_adx
+    module.calculate_rsi = indicators.calculate_rsi
+    code = '''
+def strategy_logic(config, error_count=0):
+    df = get_data("XAUUSD", 1, 200)
+    ha = calculate_heiken_ashi(df)
+    atr = calculate_atr(df, 14)
+    adx = calculate_adx(df.copy(), 14)
+    rsi = calculate_rsi(df["close"], 14)
+    for _ in range(5):
+        print(f"ha={ha.iloc[-1]['ha_close']:.2f} atr={atr.iloc[-1]:.2f} rsi={rsi.iloc[-1]:.1f}")
+    db.log_signal("S1", float(adx.iloc[-1]["adx"]))
+    return error_count, 0
+'''
+    exec(code, vars(module))
+    return module
+
+
+def run_interleaved(plain, instrumented, off, on, name):
+    """Xen kẽ vòng tắt / bật để nhiễu máy (CPU boost, cache) chia đều cho 2 bên."""
+    costs_off, costs_on = [], []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for i in range(N_CYCLES):
+            pair = ((plain, off, costs_off), (instrumented, on, costs_on))
+            for module, prof, costs in (pair if i % 2 else pair[::-1]):
+                t0 = time.perf_counter()
+                with prof.cycle(name, module.db.db_path):
+                    module.strategy_logic({})
+                costs.append(time.perf_counter() - t0)
+    return float(np.median(costs_off)) * 1e3, float(np.median(costs_on)) * 1e3
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    db_path = os.path.join(tmp, "trades.db")
+
+    off = Profiler()
+    off.enabled = False
+    on = Profiler(flush_every=3600)
+    on.enable()
+    plain = make_module(db_path)
+    instrumented = instrument_module(make_module(db_path), on)
+    run_interleaved(plain, instrumented, off, on, "warmup")
+    on.rings.clear()
+    t_off, t_on = run_interleaved(plain, instrumented, off, on, "S1")
+    print(f"cycle median (xen kẽ): tắt {t_off:.3f} ms | bật {t_on:.3f} ms | chênh {t_on - t_off:+.3f} ms")
+
+    # chi phí cố định: 1 lần gọi hàm đã bọc trong cycle, 1 cycle rỗng, stage() khi tắt
+    noop = on.wrap(lambda: None, "noop")
+    raw = lambda: None
+    n = 200000
+    with on.cycle("micro"):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            noop()
+        wrapped_ns = (time.perf_counter() - t0) / n * 1e9
+        t0 = time.perf_counter()
+        for _ in range(n):
+            raw()
+        wrapped_ns -= (time.perf_counter() - t0) / n * 1e9
+    t0 = time.perf_counter()
+    for _ in range(n // 10):
+        with on.cycle("micro"):
+            pass
+    cycle_ns = (time.perf_counter() - t0) / (n // 10) * 1e9
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with off.stage("data"):
+            pass
+    print(f"1 hàm bọc: +{wrapped_ns:.0f} ns | 1 cycle: {cycle_ns:.0f} ns | stage() khi tắt: "
+          f"{(time.perf_counter() - t0) / n * 1e9:.0f} ns")
+    calls = sum(r.count for r in on.rings["S1"].values()) / on.rings["S1"]["cycle"].count - 2
+    overhead = 100.0 * (calls * wrapped_ns + cycle_ns) / (t_off * 1e6)
+    print(f"{calls:.0f} lần gọi được đo / vòng → overhead ≈ {overhead:.2f}% thời gian vòng")
+
+    on.flush()
+    rows = latest_profile(sqlite3.connect(db_path))
+    print(f"\n{'stage':<12}{'n':>6}{'p50':>9}{'p95':>9}{'p99':>9}{'share':>8}")
+    for st in rows[0]["stages"]:
+        print(f"{st['stage']:<12}{st['samples']:>6}{st['p50_ms']:>9.3f}{st['p95_ms']:>9.3f}"
+              f"{st['p99_ms']:>9.3f}{(st['share_pct'] or 0):>7.1f}%")
+    stages = {st["stage"] for st in rows[0]["stages"]}
+    assert {"cycle", "data", "indicators", "print", "db", "other"} <= stages, stages
+    assert overhead < 1.0, overhead
+    print("\n✅ profiler overhead OK")
+
+
+if __name__ == "__main__":
+    main()
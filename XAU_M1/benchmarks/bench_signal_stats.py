@@ -0,0 +1,179 @@
+"""
+Thống kê RSI / ADX theo order của dashboard: bản cũ (lấy mọi signal trong khoảng thời gian, json.loads từng
+signal cho từng order trong Python) so với tradecore.signal_stats (SQL trên signal_indicators, bucket bằng GROUP BY).
+
+Kiểm tra kết quả giống hệt bản cũ trên:
+- DB đã nâng schema (signal_indicators + trigger) — dữ liệu ngẫu nhiên, hoặc copy của --db
+- DB cũ chưa có signal_indicators (nhánh json_extract)
+rồi đo thời gian cho mỗi strategy như trang chủ dashboard.
+
+Chạy: python benchmarks/bench_signal_stats.py [--signals 10000] [--orders 1000] [--db trades.db]
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import sqlite3
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tradecore import signal_stats, trades_db
+
+
+def legacy_fetch_orders_with_indicators(cur, strategy_name, orders):
+    """DashBoardMain/dashboard.py trước tradecore.signal_stats."""
+    if not orders:
+        return []
+    try:
+        open_times = [o['open_time'] for o in orders]
+        dt_min = datetime.strptime(min(open_times), "%Y-%m-%d %H:%M:%S") - timedelta(minutes=30)
+        dt_max = datetime.strptime(max(open_times), "%Y-%m-%d %H:%M:%S") + timedelta(minutes=30)
+        cur.execute("""
+            SELECT timestamp, symbol, signal_type, indicators
+            FROM signals
+            WHERE strategy_name = ? AND timestamp >= ? AND timestamp <= ?
+        """, (strategy_name, dt_min.strftime("%Y-%m-%d %H:%M:%S"), dt_max.strftime("%Y-%m-%d %H:%M:%S")))
+        signals = cur.fetchall()
+    except Exception:
+        return [{'order': dict(o), 'rsi': None, 'adx': None} for o in orders]
+
+    def parse_indicator(indicators, key):
+        try:
+            data = json.loads(indicators) if isinstance(indicators, str) else indicators
+            if isinstance(data, dict) and key in data:
+                v = float(data[key])
+                return v if 0 <= v <= 100 else None
+        except Exception:
+            pass
+        return None
+
+    result = []
+    for o in orders:
+        o = dict(o)
+        o_time = datetime.strptime(o['open_time'], "%Y-%m-%d %H:%M:%S").timestamp()
+        best_rsi = best_adx = None
+        best_diff = float('inf')
+        for sig in signals:
+            if sig['symbol'] != o.get('symbol') or sig['signal_type'] != o.get('order_type'):
+                continue
+            try:
+                st = datetime.strptime(str(sig['timestamp'])[:19], "%Y-%m-%d %H:%M:%S").timestamp()
+            except Exception:
+                continue
+            diff = abs(st - o_time)
+            if diff < best_diff and diff <= 30 * 60:
+                rsi = parse_indicator(sig['indicators'], 'rsi')
+                adx = parse_indicator(sig['indicators'], 'adx')
+                if rsi is not None or adx is not None:
+                    best_diff, best_rsi, best_adx = diff, rsi, adx
+        result.append({'order': o, 'rsi': best_rsi, 'adx': best_adx})
+    return result
+
+
+def legacy_buckets(items, key):
+    buckets = [{'label': label, 'wins': 0, 'losses': 0} for label in signal_stats.BUCKET_LABELS]
+    for item in items:
+        value, profit = item.get(key), item['order'].get('profit')
+        if value is None or profit is None:
+            continue
+        idx = min(int(float(value) // 10), 9)
+        if profit > 0:
+            buckets[idx]['wins'] += 1
+        elif profit < 0:
+            buckets[idx]['losses'] += 1
+    return buckets
+
+
+def synthetic_db(path, n_signals, n_orders):
+    rnd = random.Random(3)
+    db = trades_db.Database(path)
+    strategies = ["Strategy_1_Trend_HA", "Strategy_4_UT_Bot", "Grid_Step"]
+    base = datetime(2025, 1, 1)
+    span = n_signals * 300         # ~1 signal / 5 phút như bot thật
+    for i in range(n_signals):
+        ind = {"rsi": round(rnd.uniform(-5, 105), 2), "trend": rnd.choice(["BULLISH", "BEARISH"])}
+        if rnd.random() < 0.5:
+            ind["adx"] = round(rnd.uniform(5, 60), 2)
+        if rnd.random() < 0.05:
+            ind = "" if rnd.random() < 0.5 else {"ema14": 1.0}
+        ts = base + timedelta(seconds=int(span * i / n_signals))
+        db._store.enqueue("INSERT INTO signals (timestamp, strategy_name, symbol, signal_type, price, sl, tp, indicators, status) "
+                          "VALUES (?, ?, 'XAUUSD', ?, 0, 0, 0, ?, 'PENDING')",
+                          (ts.strftime("%Y-%m-%d %H:%M:%S"), rnd.choice(strategies), rnd.choice(["BUY", "SELL"]),
+                           json.dumps(ind) if isinstance(ind, dict) else ind))
+    for i in range(n_orders):
+        t = base + timedelta(seconds=int(span * i / n_orders) + rnd.randint(-900, 900))
+        db._store.enqueue("INSERT OR REPLACE INTO orders (ticket, strategy_name, symbol, order_type, open_time, profit) "
+                          "VALUES (?, ?, 'XAUUSD', ?, ?, ?)",
+                          (i + 1, rnd.choice(strategies), rnd.choice(["BUY", "SELL"]), t.strftime("%Y-%m-%d %H:%M:%S"),
+                           None if rnd.random() < 0.02 else round(rnd.uniform(-5, 5), 2)))
+    db.flush()
+
+
+def compare(path, label):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    cur = conn.cursor()
+    orders = cur.execute("SELECT * FROM orders WHERE profit IS NOT NULL ORDER BY COALESCE(close_time, open_time) DESC").fetchall()
+    strategies = sorted({o['strategy_name'] for o in orders})
+    t_old = t_new = 0.0
+    ok = True
+    matched = 0
+    for strat in strategies:
+        s_orders = [o for o in orders if o['strategy_name'] == strat]
+        t0 = time.perf_counter()
+        old = legacy_fetch_orders_with_indicators(cur, strat, s_orders)
+        old_stats = {"rsi": legacy_buckets(old, "rsi"), "adx": legacy_buckets(old, "adx")}
+        t1 = time.perf_counter()
+        new = signal_stats.orders_with_indicators(conn, strat, s_orders)
+        new_stats = signal_stats.indicator_bucket_stats(conn, strat, s_orders)
+        t2 = time.perf_counter()
+        t_old += t1 - t0
+        t_new += t2 - t1
+        matched += sum(1 for item in new if item['rsi'] is not None or item['adx'] is not None)
+        if old != new or old_stats != new_stats:
+            ok = False
+            diff = [(a['order']['ticket'], a['rsi'], a['adx'], b['rsi'], b['adx']) for a, b in zip(old, new) if a != b]
+            print(f"   ❌ {strat}: {diff[:5]}")
+    conn.close()
+    print(f"{'✅' if ok else '❌'} {label}: {len(orders)} order / {len(strategies)} strategy, {matched} khớp signal | "
+          f"Python + json.loads {t_old * 1e3:8.1f} ms → SQL {t_new * 1e3:7.1f} ms ({t_old / max(t_new, 1e-9):.1f}x)")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--signals", type=int, default=10_000)
+    parser.add_argument("--orders", type=int, default=1_000)
+    parser.add_argument("--db", help="copy trades.db thật để so (không sửa file gốc)")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp()
+    ok = True
+    if args.db:
+        legacy_copy = os.path.join(work, "real_legacy.db")
+        shutil.copy(args.db, legacy_copy)
+        ok = compare(legacy_copy, "DB thật, json_extract") and ok
+        migrated = os.path.join(work, "real.db")
+        shutil.copy(args.db, migrated)
+        trades_db.Database(migrated)
+        ok = compare(migrated, "DB thật, signal_indicators") and ok
+
+    path = os.path.join(work, "trades.db")
+    synthetic_db(path, args.signals, args.orders)
+    ok = compare(path, "ngẫu nhiên, signal_indicators") and ok
+    conn = sqlite3.connect(path)
+    conn.executescript("DROP TRIGGER signals_indicators_insert; DROP TRIGGER signals_indicators_delete; DROP TABLE signal_indicators;")
+    conn.close()
+    ok = compare(path, "ngẫu nhiên, json_extract (DB cũ)") and ok
+
+    print("\n✅ signal_stats OK" if ok else "\n❌ signal_stats lệch bản cũ")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
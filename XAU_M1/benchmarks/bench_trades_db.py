@@ -0,0 +1,199 @@
+"""
+Đo ghi trades.db trước / sau tradecore.trades_db (1 kết nối WAL mỗi process + write-behind cho signal):
+N process bot (mặc định 5, như XAU_M1) cùng ghi 1 file — mỗi vòng log_signal, cứ 10 signal thì 1 lệnh
+(log_order + update_order_profit + get_last_closed_orders) — trong khi M process dashboard liên tục đọc
+(orders theo khoảng thời gian, 50 signal mới nhất, signals theo strategy như fetch_orders_with_indicators).
+
+Bản cũ (connect / commit / close mỗi hàm, journal rollback) giữ lại dưới đây để so.
+Kiểm tra thêm: không mất dòng nào (đếm lại sau khi các process thoát), đọc trong process thấy signal đang chờ.
+
+Chạy: python benchmarks/bench_trades_db.py [--seconds 5] [--writers 5] [--readers 2]
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+import multiprocessing as mp
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tradecore import trades_db
+
+
+class LegacyDatabase:
+    """db.Database trước khi chuyển sang tradecore.trades_db (mỗi hàm 1 kết nối)"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        conn = sqlite3.connect(db_path)
+        conn.execute('''CREATE TABLE IF NOT EXISTS signals (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP, strategy_name TEXT, symbol TEXT, signal_type TEXT,
+            price REAL, sl REAL, tp REAL, indicators TEXT, status TEXT, account_id INTEGER DEFAULT 0)''')
+        conn.execute('''CREATE TABLE IF NOT EXISTS orders (ticket INTEGER PRIMARY KEY, strategy_name TEXT,
+            symbol TEXT, order_type TEXT, volume REAL, open_price REAL, sl REAL, tp REAL, open_time DATETIME,
+            close_price REAL, profit REAL, comment TEXT, account_id INTEGER DEFAULT 0, close_time DATETIME)''')
+        conn.commit()
+        conn.close()
+
+    def log_signal(self, strategy_name, symbol, signal_type, price, sl, tp, indicators, status="PENDING", account_id=0):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        if isinstance(indicators, dict):
+            indicators = json.dumps(indicators)
+        cursor.execute('''
+            INSERT INTO signals (strategy_name, symbol, signal_type, price, sl, tp, indicators, status, account_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (strategy_name, symbol, signal_type, price, sl, tp, indicators, status, account_id))
+        conn.commit()
+        conn.close()
+
+    def log_order(self, ticket, strategy_name, symbol, order_type, volume, open_price, sl, tp, comment="", account_id=0):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT OR REPLACE INTO orders (ticket, strategy_name, symbol, order_type, volume, open_price, sl, tp, open_time, comment, account_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), ?, ?)
+        ''', (ticket, strategy_name, symbol, order_type, volume, open_price, sl, tp, comment, account_id))
+        conn.commit()
+        conn.close()
+
+    def update_order_profit(self, ticket, close_price, profit, close_time=None):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute("UPDATE orders SET close_price = ?, profit = ?, close_time = ? WHERE ticket = ?",
+                       (close_price, profit, close_time, ticket))
+        conn.commit()
+        conn.close()
+
+    def get_last_closed_orders(self, strategy_name, limit=10, account_id=None):
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT profit, open_time, close_time FROM orders
+            WHERE strategy_name = ? AND profit IS NOT NULL
+            ORDER BY COALESCE(close_time, open_time) DESC LIMIT ?
+        ''', (strategy_name, limit))
+        rows = cursor.fetchall()
+        conn.close()
+        return [{"profit": r[0], "open_time": r[1], "close_time": r[2]} for r in rows]
+
+
+DASHBOARD_QUERIES = (
+    ("SELECT * FROM orders WHERE COALESCE(close_time, open_time) >= ? AND COALESCE(close_time, open_time) <= ? "
+     "ORDER BY COALESCE(close_time, open_time) DESC", ("2000-01-01 00:00:00", "2100-01-01 00:00:00")),
+    ("SELECT * FROM signals WHERE timestamp >= ? ORDER BY timestamp DESC LIMIT 50", ("2000-01-01 00:00:00",)),
+    ("SELECT timestamp, symbol, signal_type, indicators FROM signals WHERE strategy_name = ? AND timestamp >= ?",
+     ("Strategy_1", "2000-01-01 00:00:00")),
+)
+
+
+def writer(kind, path, index, seconds, start, out):
+    db = LegacyDatabase(path) if kind == "legacy" else trades_db.Database(path)
+    name = f"Strategy_{index + 1}"
+    start.wait()
+    deadline = time.perf_counter() + seconds
+    writes = errors = 0
+    ticket = index * 1_000_000
+    while time.perf_counter() < deadline:
+        try:
+            db.log_signal(name, "XAUUSD", "BUY", 2350.0, 2349.0, 2352.0, {"rsi": 55.2, "adx": 24.1, "trend": "BULLISH"})
+            writes += 1
+            if writes % 10 == 0:
+                ticket += 1
+                db.log_order(ticket, name, "XAUUSD", "BUY", 0.01, 2350.0, 2349.0, 2352.0, "bench")
+                db.update_order_profit(ticket, 2351.0, 1.0, "2024-01-01 00:00:00")
+                db.get_last_closed_orders(name, limit=3)
+                writes += 2
+        except sqlite3.OperationalError:
+            errors += 1
+    if kind != "legacy":
+        trades_db.flush_all()
+    out.put((writes, errors))
+
+
+def reader(path, start, stop, out):
+    start.wait()
+    queries = errors = 0
+    worst = 0.0
+    while not stop.is_set():
+        for sql, params in DASHBOARD_QUERIES:
+            t0 = time.perf_counter()
+            try:
+                conn = sqlite3.connect(path, timeout=5)
+                conn.execute(sql, params).fetchall()
+                conn.close()
+                queries += 1
+            except sqlite3.OperationalError:
+                errors += 1
+            worst = max(worst, time.perf_counter() - t0)
+    out.put((queries, errors, worst))
+
+
+def run(kind, args):
+    path = os.path.join(tempfile.mkdtemp(), "trades.db")
+    (LegacyDatabase(path) if kind == "legacy" else trades_db.Database(path))
+    ctx = mp.get_context("spawn")
+    start, stop, out, reads = ctx.Event(), ctx.Event(), ctx.Queue(), ctx.Queue()
+    writers = [ctx.Process(target=writer, args=(kind, path, i, args.seconds, start, out)) for i in range(args.writers)]
+    readers = [ctx.Process(target=reader, args=(path, start, stop, reads)) for _ in range(args.readers)]
+    for p in writers + readers:
+        p.start()
+    time.sleep(1.0)       # spawn + import
+    start.set()
+    results = [out.get() for _ in writers]
+    stop.set()
+    read_results = [reads.get() for _ in readers]
+    for p in writers + readers:
+        p.join()
+    writes = sum(r[0] for r in results)
+    conn = sqlite3.connect(path)
+    stored = conn.execute("SELECT COUNT(*) FROM signals").fetchone()[0] + 2 * conn.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
+    mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    conn.close()
+    row = {
+        "writes_per_s": writes / args.seconds, "write_errors": sum(r[1] for r in results), "lost": writes - stored,
+        "reads_per_s": sum(r[0] for r in read_results) / args.seconds, "read_errors": sum(r[1] for r in read_results),
+        "read_worst_ms": max((r[2] for r in read_results), default=0.0) * 1e3, "journal": mode,
+    }
+    print(f"   {kind:<8} ({mode:<6}): {row['writes_per_s']:>8,.0f} ghi/s (lỗi {row['write_errors']}, mất {row['lost']}) | "
+          f"dashboard {row['reads_per_s']:>6,.0f} truy vấn/s (lỗi {row['read_errors']}, chậm nhất {row['read_worst_ms']:.0f} ms)")
+    return row
+
+
+def check_read_your_writes():
+    path = os.path.join(tempfile.mkdtemp(), "trades.db")
+    db = trades_db.Database(path)
+    db.log_signal("S1", "XAUUSD", "BUY", 1.0, 0.5, 2.0, {"rsi": 60})
+    other = sqlite3.connect(path)
+    assert other.execute("SELECT COUNT(*) FROM signals").fetchone()[0] == 0      # còn trong hàng đợi
+    db.log_order(1, "S1", "XAUUSD", "BUY", 0.01, 1.0, 0.5, 2.0)                    # ghi đồng bộ kéo theo hàng đợi
+    assert other.execute("SELECT COUNT(*) FROM signals").fetchone()[0] == 1
+    db.log_signal("S1", "XAUUSD", "SELL", 1.0, 1.5, 0.0, {"rsi": 40})
+    assert db._store.query("SELECT COUNT(*) FROM signals")[0][0] == 2             # đọc cùng process thấy ngay
+    time.sleep(trades_db.FLUSH_INTERVAL * 3)
+    assert other.execute("SELECT COUNT(*) FROM signals").fetchone()[0] == 2       # thread nền đã ghi
+    other.close()
+    print("1. hàng đợi: process khác thấy sau flush / ghi lệnh, cùng process thấy ngay OK")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--writers", type=int, default=5)
+    parser.add_argument("--readers", type=int, default=2)
+    args = parser.parse_args()
+
+    check_read_your_writes()
+    print(f"2. {args.writers} process ghi + {args.readers} process dashboard đọc, {args.seconds:g}s:")
+    before = run("legacy", args)
+    after = run("wal", args)
+    assert after["lost"] == 0 and after["write_errors"] == 0, after
+    print(f"   → ghi nhanh {after['writes_per_s'] / max(before['writes_per_s'], 1e-9):.1f} lần, "
+          f"dashboard {after['reads_per_s'] / max(before['reads_per_s'], 1e-9):.1f} lần")
+    print("\n✅ trades_db OK")
+
+
+if __name__ == "__main__":
+    main()
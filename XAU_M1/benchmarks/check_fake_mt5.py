@@ -0,0 +1,216 @@
+"""
+Kiểm tra tradecore.fake_mt5 (MetaTrader5 giả lập, chạy trên Linux):
+1. copy_rates_*: nến đang chạy chỉ chứa dữ liệu tới đồng hồ (không nhìn trước), nến M5 / H1 gộp đúng từ M1
+2. lệnh: market + SL / TP, lệnh chờ STOP / LIMIT khớp, hết hạn, đóng một phần, history_deals_get IN / OUT,
+   retcode 10014 / 10015 / 10016 / 10025 / 10030 / 10036, fail_next, requote (instant) → send_order đặt lại giá
+3. strategy_1_logic của XAU_M1 chạy nguyên vẹn trên đồng hồ giả: 2 lần chạy cùng seed ra cùng deal,
+   nhanh hơn thời gian thực nhiều lần
+
+Chạy: python benchmarks/check_fake_mt5.py
+"""
+import io
+import os
+import sys
+import json
+import time
+import tempfile
+import importlib
+import contextlib
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BOT_DIR = os.path.join(ROOT, "XAU_M1")
+sys.path.append(ROOT)
+os.environ["TELEGRAM_API_BASE"] = "http://127.0.0.1:9"   # không gửi Telegram thật
+
+from tradecore import fake_mt5 as mt5
+from tradecore.fake_mt5 import SimTerminal, synthetic_rates, patch_clock, SimulationFinished
+
+mt5.install()
+from tradecore.execution import send_order  # noqa: E402 — sau install() để execution thấy MT5 giả
+from tradecore import trades_db  # noqa: E402
+
+
+def new_terminal(bars=600, **kwargs):
+    sim = SimTerminal(**kwargs)
+    sim.load_bars("XAUUSD", synthetic_rates(bars), spread_points=20)
+    mt5.install(sim)
+    return sim.start(warmup_bars=100)
+
+
+def check_rates():
+    sim = new_terminal()
+    m1 = sim.feeds["XAUUSD"].m1
+    sim.advance_to(sim.now + 20)          # điểm thứ 2 của nến M1 hiện tại
+    bar = mt5.copy_rates_from_pos("XAUUSD", mt5.TIMEFRAME_M1, 0, 3)
+    i = 100
+    assert bar["time"][-1] == m1["time"][i] and bar["close"][-1] != m1["close"][i]
+    seen = min(m1["open"][i], m1["low"][i] if m1["close"][i] >= m1["open"][i] else m1["high"][i])
+    assert bar["low"][-1] <= seen + 1e-9 and bar["time"][-2] == m1["time"][i - 1]
+    assert np.array_equal(bar[:-1], m1[i - 2:i])
+
+    sim.advance_to(m1["time"][160] + 59)  # nến M1 thứ 160 vừa đóng xong
+    h1 = mt5.copy_rates_from_pos("XAUUSD", mt5.TIMEFRAME_H1, 0, 5)
+    m5 = mt5.copy_rates_from_pos("XAUUSD", mt5.TIMEFRAME_M5, 1, 10)
+    assert h1["time"][-1] <= sim.now and h1["high"][-1] == m1["high"][(m1["time"] >= h1["time"][-1]) &
+                                                                     (m1["time"] <= sim.now)].max()
+    start = m5["time"][-1]
+    window = m1[(m1["time"] >= start) & (m1["time"] < start + 300)]
+    assert m5["open"][-1] == window["open"][0] and m5["close"][-1] == window["close"][-1]
+    assert m5["high"][-1] == window["high"].max() and m5["tick_volume"][-1] == window["tick_volume"].sum()
+    frm = mt5.copy_rates_from("XAUUSD", mt5.TIMEFRAME_M1, sim.now + 86400 * 365, 50)
+    assert len(frm) == 50 and frm["time"][-1] == m1["time"][160]   # không trả nến tương lai
+    ticks = mt5.copy_ticks_from("XAUUSD", m1["time"][160], 100, mt5.COPY_TICKS_ALL)
+    assert len(ticks) == 4 and ticks["time"][-1] <= sim.now
+    print("1. copy_rates_from_pos / copy_rates_from / copy_ticks_from: không nhìn trước, M5 / H1 gộp đúng")
+
+
+def check_orders():
+    sim = new_terminal(commission_per_lot=7.0)
+    tick = mt5.symbol_info_tick("XAUUSD")
+    point = mt5.symbol_info("XAUUSD").point
+    buy = {"action": mt5.TRADE_ACTION_DEAL, "symbol": "XAUUSD", "volume": 0.02, "type": mt5.ORDER_TYPE_BUY,
+           "price": tick.ask, "sl": tick.bid - 300 * point, "tp": tick.bid + 300 * point, "magic": 7,
+           "comment": "S1", "type_filling": mt5.ORDER_FILLING_FOK}
+    assert mt5.order_send(dict(buy, volume=0.015)).retcode == mt5.TRADE_RETCODE_INVALID_VOLUME
+    assert mt5.order_send(dict(buy, sl=tick.bid + 1)).retcode == mt5.TRADE_RETCODE_INVALID_STOPS
+    assert mt5.order_send(dict(buy, comment="x" * 40)) is None and mt5.last_error()[0] == mt5.RES_E_INVALID_PARAMS
+    assert mt5.order_check(buy).retcode == 0 and not mt5.positions_get()
+    result = mt5.order_send(buy)
+    assert result.retcode == mt5.TRADE_RETCODE_DONE and result.price == tick.ask
+    ticket = result.order
+    pos = mt5.positions_get(ticket=ticket)[0]
+    assert pos.magic == 7 and pos.identifier == ticket and pos.volume == 0.02
+    same = {"action": mt5.TRADE_ACTION_SLTP, "position": ticket, "sl": pos.sl, "tp": pos.tp}
+    assert mt5.order_send(same).retcode == mt5.TRADE_RETCODE_NO_CHANGES
+
+    # đóng một phần rồi để SL / TP đóng nốt
+    close = {"action": mt5.TRADE_ACTION_DEAL, "position": ticket, "symbol": "XAUUSD", "volume": 0.01,
+             "type": mt5.ORDER_TYPE_SELL, "price": mt5.symbol_info_tick("XAUUSD").bid, "magic": 7}
+    assert mt5.order_send(close).retcode == mt5.TRADE_RETCODE_DONE
+    assert mt5.positions_get(ticket=ticket)[0].volume == 0.01
+    while mt5.positions_get(ticket=ticket):
+        sim.step()
+    deals = mt5.history_deals_get(position=ticket)
+    assert [d.entry for d in deals] == [mt5.DEAL_ENTRY_IN, mt5.DEAL_ENTRY_OUT, mt5.DEAL_ENTRY_OUT]
+    last = deals[-1]
+    assert last.reason in (mt5.DEAL_REASON_SL, mt5.DEAL_REASON_TP) and last.comment.startswith(("[sl", "[tp"))
+    assert last.price in (pos.sl, pos.tp) and all(d.commission == -round(7.0 * d.volume, 2) for d in deals)
+    assert mt5.order_send(dict(close, volume=0.01)).retcode == mt5.TRADE_RETCODE_POSITION_CLOSED
+    expected = round(10000 + sum(d.profit + d.commission for d in deals), 2)
+    assert mt5.account_info().balance == expected, (mt5.account_info().balance, expected)
+
+    # lệnh chờ: BUY_STOP / SELL_LIMIT khớp, hết hạn, sai phía giá
+    tick = mt5.symbol_info_tick("XAUUSD")
+    pending = {"action": mt5.TRADE_ACTION_PENDING, "symbol": "XAUUSD", "volume": 0.01, "magic": 9,
+               "type_time": mt5.ORDER_TIME_GTC, "type_filling": mt5.ORDER_FILLING_RETURN, "comment": "grid"}
+    assert mt5.order_send(dict(pending, type=mt5.ORDER_TYPE_BUY_STOP, price=tick.ask - 1)).retcode == \
+        mt5.TRADE_RETCODE_INVALID_PRICE
+    stop = mt5.order_send(dict(pending, type=mt5.ORDER_TYPE_BUY_STOP, price=round(tick.ask + 0.5, 2)))
+    limit = mt5.order_send(dict(pending, type=mt5.ORDER_TYPE_SELL_LIMIT, price=round(tick.bid + 0.6, 2)))
+    expiring = mt5.order_send(dict(pending, type=mt5.ORDER_TYPE_SELL_STOP, price=round(tick.bid - 50, 2),
+                                   type_time=mt5.ORDER_TIME_SPECIFIED, expiration=int(sim.now) + 120))
+    assert {stop.retcode, limit.retcode, expiring.retcode} == {mt5.TRADE_RETCODE_DONE}
+    assert len(mt5.orders_get(symbol="XAUUSD")) == 3
+    for _ in range(400):
+        if not mt5.orders_get():
+            break
+        sim.step()
+    states = {o.ticket: o.state for o in mt5.history_orders_get(0, sim.now + 1)}
+    assert states[stop.order] == mt5.ORDER_STATE_FILLED and states[expiring.order] == mt5.ORDER_STATE_EXPIRED
+    opened = {p.ticket: p for p in mt5.positions_get()}
+    assert stop.order in opened and opened[stop.order].price_open >= round(tick.ask + 0.5, 2)
+    entries = mt5.history_deals_get(ticket=stop.order)
+    assert entries[0].entry == mt5.DEAL_ENTRY_IN and entries[0].position_id == stop.order
+    remove = mt5.order_send({"action": mt5.TRADE_ACTION_REMOVE, "order": limit.order})
+    assert remove.retcode in (mt5.TRADE_RETCODE_DONE, mt5.TRADE_RETCODE_INVALID_ORDER)
+    print("2a. market / partial close / SL-TP / pending STOP-LIMIT / expiration / history IN-OUT / retcode OK")
+
+    # filling + requote qua tradecore.execution.send_order; fail_next
+    sim = new_terminal()
+    sim.add_symbol("XAUUSD", filling_mode=mt5.SYMBOL_FILLING_IOC)
+    tick = mt5.symbol_info_tick("XAUUSD")
+    req = {"action": mt5.TRADE_ACTION_DEAL, "symbol": "XAUUSD", "volume": 0.01, "type": mt5.ORDER_TYPE_BUY,
+           "price": tick.ask, "deviation": 20, "magic": 1, "type_filling": mt5.ORDER_FILLING_FOK}
+    assert mt5.order_send(req).retcode == mt5.TRADE_RETCODE_INVALID_FILL
+    db_path = os.path.join(tempfile.mkdtemp(), "trades.db")
+    assert send_order(dict(req), "check", db_path=db_path).retcode == mt5.TRADE_RETCODE_DONE
+    sim.add_symbol("XAUUSD", trade_exemode=mt5.SYMBOL_TRADE_EXECUTION_INSTANT)
+    stale = dict(req, price=tick.ask - 5, type_filling=mt5.ORDER_FILLING_IOC)
+    assert mt5.order_send(stale).retcode == mt5.TRADE_RETCODE_REQUOTE
+    assert send_order(dict(stale), "check", db_path=db_path).retcode == mt5.TRADE_RETCODE_DONE
+    sim.fail_next(mt5.TRADE_RETCODE_TOO_MANY_REQUESTS, actions=[mt5.TRADE_ACTION_DEAL])
+    assert mt5.order_send(dict(req, type_filling=mt5.ORDER_FILLING_IOC)).retcode == 10024
+    sim.shutdown()
+    assert mt5.positions_get() is None and mt5.last_error()[0] == mt5.RES_E_NO_IPC_CONNECTION
+    print("2b. filling fallback 10030 / requote instant / fail_next / mất kết nối qua send_order OK")
+
+    # latency ảo: đồng hồ chạy trong lúc gửi lệnh
+    sim = new_terminal(latency_ms=250, slippage_points=5, seed=3)
+    before = sim.now
+    tick = mt5.symbol_info_tick("XAUUSD")
+    mt5.order_send({"action": mt5.TRADE_ACTION_DEAL, "symbol": "XAUUSD", "volume": 0.01,
+                    "type": mt5.ORDER_TYPE_BUY, "price": tick.ask})
+    assert abs(sim.now - before - 0.25) < 1e-6
+    print("2c. latency ảo 250 ms + slippage OK")
+
+
+def run_strategy(bars, seed):
+    """strategy_1_logic nguyên bản, gọi mỗi 1 giây giả như vòng while của bot; trả về (deal, summary)."""
+    sim = SimTerminal(seed=seed, slippage_points=3, latency_ms=40, commission_per_lot=7.0)
+    sim.load_bars("XAUUSD", synthetic_rates(bars, step=0.6, seed=seed), spread_points=20)
+    mt5.install(sim)
+    sim.start(warmup_bars=1500)
+
+    if BOT_DIR not in sys.path:
+        sys.path.insert(0, BOT_DIR)
+    tmp = tempfile.mkdtemp()
+    # Database() lúc import không đụng XAU_M1/trades.db; mỗi lần chạy 1 DB mới
+    with contextlib.redirect_stdout(io.StringIO()), trades_db.redirect(os.path.join(tmp, "import.db")):
+        strategy = importlib.import_module("strategy_1_trend_ha")
+        from db import Database
+    strategy.db = Database(os.path.join(tmp, "trades.db"))
+    import tradecore.orders, tradecore.data, tradecore.execution
+    restore = patch_clock(sim, strategy, tradecore.orders, tradecore.data, tradecore.execution)
+    with open(os.path.join(BOT_DIR, "configs", "config_1.json"), encoding="utf-8") as f:
+        config = json.load(f)
+    errors = 0
+    t0 = time.perf_counter()
+    calls = 0
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            while True:
+                errors, _ = strategy.strategy_1_logic(config, errors)
+                calls += 1
+                sim.sleep(1)
+    except SimulationFinished:
+        pass
+    finally:
+        restore()
+    wall = time.perf_counter() - t0
+    deals = [(d.time, d.type, d.entry, d.volume, d.price, d.profit, d.reason) for d in sim.deals]
+    return deals, sim.summary(), calls, wall
+
+
+def check_strategy():
+    bars = 1500 + 90
+    deals, summary, calls, wall = run_strategy(bars, seed=11)
+    again, _, _, _ = run_strategy(bars, seed=11)
+    assert deals == again, "cùng dữ liệu + seed phải ra cùng deal"
+    simulated = summary["simulated_hours"] * 3600
+    print(f"3. strategy_1_logic: {calls} vòng / {summary['simulated_hours']} giờ giả trong {wall:.1f}s "
+          f"(×{simulated / wall:.0f} thời gian thực) | deal {len(deals)} | net {summary['net_profit']} | "
+          f"order_send {summary['order_send']} | chạy lại: cùng deal")
+    assert simulated / wall > 10
+
+
+def main():
+    check_rates()
+    check_orders()
+    check_strategy()
+    print("✅ fake_mt5 OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Kiểm tra đồng bộ history MT5 tăng dần của GridStep/update_db.py (tradecore.history_sync) trên fake_mt5:
+bot giả mở / đóng / đóng một phần lệnh (magic của Grid_Step + 1 magic khác cùng account, có lệnh log sẵn
+trong orders và lệnh chỉ có trong history → backfill), update_db chạy mỗi --interval phút giả lập.
+
+1. closed_positions() từ mt5_deals == cách gộp deal của update_db cũ (history_deals_get 90 ngày) ở mọi vòng
+2. orders sau các vòng tăng dần == orders của DB mới chạy 1 lần --full (resync sửa chữa)
+3. vòng không có deal mới: 0 deal mới, 0 order ghi; số deal hỏi terminal mỗi vòng so với lấy lại 90 ngày
+
+Chạy: python benchmarks/check_history_sync.py [--days 10] [--interval 10]
+"""
+import io
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import contextlib
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+sys.path.insert(0, os.path.join(ROOT, "GridStep"))
+os.environ["TELEGRAM_API_BASE"] = "http://127.0.0.1:9"   # không gửi Telegram thật
+
+from tradecore import fake_mt5 as mt5
+from tradecore.fake_mt5 import SimTerminal, synthetic_rates, patch_clock, SimulationFinished
+
+mt5.install()
+from tradecore import history_sync  # noqa: E402 — sau install() để thấy MT5 giả
+import update_db  # noqa: E402
+
+MAGIC, OTHER_MAGIC = 7, 8
+CONFIG = {"account": 1000001, "password": "x", "server": "Sim-Server", "magic": MAGIC, "symbol": "XAUUSD",
+          "parameters": {"step": 5.0}}
+
+
+def legacy_closed_positions(magic, days_back=90):
+    """update_db._get_closed_positions_from_history trước history_sync (lấy lại cả cửa sổ mỗi lần)."""
+    now = datetime.now()
+    deals = mt5.history_deals_get(now - timedelta(days=days_back), now)
+    by_position = {}
+    for d in deals or ():
+        if d.magic != magic:
+            continue
+        v = by_position.setdefault(int(d.position_id), {'in': None, 'out_profit': 0.0, 'out_price': 0.0, 'out_time': None})
+        if d.entry in (mt5.DEAL_ENTRY_IN, mt5.DEAL_ENTRY_INOUT):
+            v['in'] = d
+        if d.entry in (mt5.DEAL_ENTRY_OUT, mt5.DEAL_ENTRY_INOUT):
+            v['out_profit'] += d.profit + d.swap + d.commission
+            v['out_price'] = d.price
+            v['out_time'] = d.time
+    result = {}
+    for pid, v in by_position.items():
+        if v['out_profit'] != 0 or v['out_price'] != 0:
+            din = v['in']
+            is_buy = din and din.type == mt5.DEAL_TYPE_BUY
+            close_time = datetime.utcfromtimestamp(v['out_time']).strftime('%Y-%m-%d %H:%M:%S') if v['out_time'] else None
+            result[pid] = (v['out_profit'], v['out_price'], din.symbol if din else '', din.volume if din else 0,
+                           mt5.ORDER_TYPE_BUY if is_buy else mt5.ORDER_TYPE_SELL, din.price if din else 0, close_time)
+    return result, len(deals or ())
+
+
+def trade(sim, rnd, db, logged):
+    """1 bước bot giả: mở lệnh mới (một số được log vào orders như bot), đóng / đóng một phần lệnh đang có."""
+    tick = mt5.symbol_info_tick("XAUUSD")
+    for pos in mt5.positions_get() or ():
+        r = rnd.random()
+        if r < 0.15 or (r < 0.25 and pos.volume > 0.01):
+            volume = pos.volume if r < 0.15 else 0.01
+            side = mt5.ORDER_TYPE_SELL if pos.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
+            mt5.order_send({"action": mt5.TRADE_ACTION_DEAL, "symbol": "XAUUSD", "volume": volume, "type": side,
+                            "position": pos.ticket, "price": tick.bid if side == mt5.ORDER_TYPE_SELL else tick.ask,
+                            "magic": pos.magic, "type_filling": mt5.ORDER_FILLING_FOK})
+    if rnd.random() < 0.6:
+        side = rnd.choice([mt5.ORDER_TYPE_BUY, mt5.ORDER_TYPE_SELL])
+        price = tick.ask if side == mt5.ORDER_TYPE_BUY else tick.bid
+        sign = 1 if side == mt5.ORDER_TYPE_BUY else -1
+        magic = rnd.choice([MAGIC, MAGIC, OTHER_MAGIC])
+        result = mt5.order_send({"action": mt5.TRADE_ACTION_DEAL, "symbol": "XAUUSD", "volume": 0.02, "type": side,
+                                 "price": price, "sl": round(price - sign * 5, 2), "tp": round(price + sign * 5, 2),
+                                 "magic": magic, "comment": "GridStep", "type_filling": mt5.ORDER_FILLING_FOK})
+        if magic == MAGIC and result.retcode == mt5.TRADE_RETCODE_DONE and rnd.random() < 0.7:
+            row = (result.order, "Grid_Step", "XAUUSD", "BUY" if side == mt5.ORDER_TYPE_BUY else "SELL",
+                   0.02, price, price - sign * 5, price + sign * 5, "GridStep", CONFIG["account"])
+            db.log_order(*row)
+            logged.append(row)
+
+
+def orders(path):
+    store = update_db.Database(path)._store
+    return store.query("SELECT ticket, strategy_name, order_type, volume, open_price, close_price, profit, close_time "
+                       "FROM orders ORDER BY ticket")
+
+
+def run_update(db, history):
+    with contextlib.redirect_stdout(io.StringIO()):
+        update_db.update_trades_for_strategy(db, CONFIG, "Grid_Step", history)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=float, default=10, help="số ngày giả lập")
+    parser.add_argument("--interval", type=float, default=10, help="phút giữa 2 lần update_db")
+    args = parser.parse_args()
+
+    bars = int(args.days * 1440) + 200
+    sim = SimTerminal(login=CONFIG["account"])
+    sim.load_bars("XAUUSD", synthetic_rates(bars, step=0.5), spread_points=20)
+    mt5.install(sim)
+    sim.start(warmup_bars=100)
+    restore = patch_clock(sim, history_sync, sys.modules[__name__])
+    rnd = random.Random(11)
+
+    work = tempfile.mkdtemp()
+    path = os.path.join(work, "trades.db")
+    db = update_db.Database(path)
+    logged = []
+    ok = True
+    cycles = fetched_new = fetched_old = 0
+    t_new = t_old = 0.0
+    try:
+        while True:
+            for _ in range(int(args.interval)):
+                trade(sim, rnd, db, logged)
+                sim.advance_to(sim.now + 60)
+            history = history_sync.HistorySync(path)       # như main(): 1 HistorySync mỗi vòng
+            t0 = time.perf_counter()
+            run_update(db, history)
+            t1 = time.perf_counter()
+            legacy, n_old = legacy_closed_positions(MAGIC)
+            t_old += time.perf_counter() - t1
+            t_new += t1 - t0
+            fetched_new += history.stats[CONFIG["account"]]["fetched"]
+            fetched_old += n_old
+            cycles += 1
+            if history.closed_positions(CONFIG["account"], MAGIC) != legacy:
+                ok = False
+                print(f"❌ vòng {cycles}: closed_positions lệch cách gộp cũ")
+    except SimulationFinished:
+        pass
+
+    print(f"1. {'✅' if ok else '❌'} {cycles} vòng update_db, {len(sim.deals)} deal: closed_positions từ mt5_deals "
+          f"== gộp 90 ngày history như bản cũ")
+
+    # vòng không có deal mới: chỉ hỏi lại vùng overlap, không ghi order nào
+    # (giả lập có thể dừng giữa --interval → 1 vòng update_db lấy nốt deal còn lại trước)
+    run_update(db, history_sync.HistorySync(path))
+    history = history_sync.HistorySync(path)
+    before = db._store.conn.total_changes
+    run_update(db, history)
+    st = history.stats[CONFIG["account"]]
+    idle_ok = st["new"] == 0 and st["positions"] == 0
+    idle_ok = idle_ok and db._store.conn.total_changes - before == 1       # chỉ mt5_sync_state.synced_at
+    ok = ok and idle_ok
+    print(f"   {'✅' if idle_ok else '❌'} vòng không có deal mới: {st['fetched']} deal vùng overlap, 0 deal mới, 0 order ghi")
+
+    incremental = orders(path)
+    full_path = os.path.join(work, "full.db")
+    full_db = update_db.Database(full_path)
+    for row in logged:
+        full_db.log_order(*row)
+    with contextlib.redirect_stdout(io.StringIO()):
+        update_db.update_trades_for_strategy(full_db, CONFIG, "Grid_Step", history_sync.HistorySync(full_path), full=True)
+    same = orders(full_path) == incremental
+    ok = ok and same
+    closed = sum(1 for r in incremental if r[6] is not None)
+    print(f"2. {'✅' if same else '❌'} orders sau {cycles} vòng tăng dần == 1 lần --full: {len(incremental)} order, "
+          f"{closed} đã đóng")
+    restore()
+
+    print(f"3. deal hỏi terminal mỗi vòng: lấy lại 90 ngày {fetched_old / max(cycles, 1):,.1f} → high-water mark "
+          f"{fetched_new / max(cycles, 1):,.1f} | thời gian gộp: {t_old * 1e3 / max(cycles, 1):.2f} ms (chỉ gộp) "
+          f"vs {t_new * 1e3 / max(cycles, 1):.2f} ms (sync + ghi DB)")
+
+    print("\n✅ history_sync OK" if ok else "\n❌ history_sync lệch")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
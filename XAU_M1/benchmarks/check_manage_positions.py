@@ -0,0 +1,217 @@
+"""
+So tradecore.orders.manage_positions (1 snapshot tick / symbol_info / ATR cho cả rổ lệnh) với vòng lặp
+manage_position từng ticket trước khi gộp, trên fake_mt5: --cases trạng thái ngẫu nhiên (BUY / SELL, SL 0 /
+sát entry / xa, atr / fixed, trigger "auto", initial_sl_map có / thiếu ticket) — request SL/TP gửi đi phải
+trùng từng lệnh; đếm lời gọi terminal của 2 cách.
+
+Chạy: python benchmarks/check_manage_positions.py [--cases 400]
+"""
+import io
+import os
+import sys
+import random
+import argparse
+import contextlib
+from collections import Counter
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+os.environ["TELEGRAM_API_BASE"] = "http://127.0.0.1:9"   # không gửi Telegram thật
+
+from tradecore import fake_mt5 as mt5
+from tradecore.fake_mt5 import SimTerminal, synthetic_rates, patch_clock
+
+mt5.install()
+from tradecore import orders, data, bar_cache  # noqa: E402 — sau install() để thấy MT5 giả
+from tradecore.data import get_data  # noqa: E402
+from tradecore.indicators import calculate_atr  # noqa: E402
+
+SYMBOL = "XAUUSD"
+MAGIC = 4
+COUNTED = ("positions_get", "symbol_info_tick", "symbol_info", "copy_rates_from_pos", "order_send")
+calls = Counter()
+sent = []
+DRY = {"on": False}
+
+
+def _counting(name, fn):
+    def wrapper(*args, **kwargs):
+        calls[name] += 1
+        if name == "order_send" and DRY["on"]:
+            sent.append(dict(args[0]))
+            return mt5.OrderSendResult(mt5.TRADE_RETCODE_DONE, 0, 0, 0.0, 0.0, 0.0, 0.0, "dry", 0, 0, args[0])
+        return fn(*args, **kwargs)
+    return wrapper
+
+
+for _name in COUNTED:
+    setattr(mt5, _name, _counting(_name, getattr(mt5, _name)))
+
+
+def manage_position_legacy(order_ticket, symbol, magic, config, initial_sl_map=None):
+    """manage_position trước khi gộp (mỗi ticket tự hỏi tick / symbol_info / ATR) — giữ lại để so kết quả."""
+    params = config.get('parameters', {})
+    trailing_enabled = params.get('trailing_enabled', True)
+    breakeven_enabled = params.get('breakeven_enabled', True)
+    if not trailing_enabled and not breakeven_enabled:
+        return
+    positions = mt5.positions_get(ticket=int(order_ticket))
+    if not positions:
+        return
+    pos = positions[0]
+    current_price = mt5.symbol_info_tick(symbol).bid if pos.type == mt5.ORDER_TYPE_BUY else mt5.symbol_info_tick(symbol).ask
+    point = mt5.symbol_info(symbol).point
+    symbol_info = mt5.symbol_info(symbol)
+    pip_size = point * 10
+    if symbol_info and ('XAU' in symbol.upper() or 'GOLD' in symbol.upper()):
+        pip_size = point if point >= 0.01 else point * 10
+    sign = 1 if pos.type == mt5.ORDER_TYPE_BUY else -1
+    profit_points = sign * (current_price - pos.price_open) / point
+    if initial_sl_map and isinstance(initial_sl_map, dict) and int(order_ticket) in initial_sl_map:
+        initial_sl_distance_pips = float(initial_sl_map[int(order_ticket)])
+    else:
+        sl_distance_from_entry = sign * (pos.price_open - pos.sl) / pip_size if pos.sl > 0 else 0
+        initial_sl_distance_pips = 100 if sl_distance_from_entry < 5 else max(sl_distance_from_entry, 50)
+    request = None
+    if breakeven_enabled:
+        trigger = params.get('breakeven_trigger_pips', 30)
+        percent = params.get('breakeven_trigger_percent', 0.5)
+        if isinstance(trigger, str) and trigger.lower() == 'auto':
+            trigger_calc = initial_sl_distance_pips * percent
+        else:
+            trigger_calc = max(trigger, initial_sl_distance_pips * percent)
+        if profit_points > trigger_calc * pip_size / point:
+            if pos.type == mt5.ORDER_TYPE_BUY:
+                is_breakeven = pos.sl >= pos.price_open
+            else:
+                is_breakeven = pos.sl > 0 and pos.sl <= pos.price_open
+            if not is_breakeven:
+                request = {"action": mt5.TRADE_ACTION_SLTP, "position": pos.ticket, "symbol": symbol,
+                           "sl": pos.price_open, "tp": pos.tp}
+    if trailing_enabled and request is None:
+        trigger = params.get('trailing_trigger_pips', 50)
+        multiplier = params.get('trailing_trigger_multiplier', 1.2)
+        if isinstance(trigger, str) and trigger.lower() == 'auto':
+            trigger_calc = initial_sl_distance_pips * multiplier
+        else:
+            trigger_calc = max(trigger, initial_sl_distance_pips * multiplier)
+        if profit_points > trigger_calc * pip_size / point:
+            mode = params.get('trailing_mode', 'atr')
+            distance_pips = params.get('trailing_distance_pips', 50)
+            trail_dist = distance_pips * pip_size
+            if mode == 'atr':
+                timeframe = {'M1': mt5.TIMEFRAME_M1, 'M5': mt5.TIMEFRAME_M5, 'M15': mt5.TIMEFRAME_M15}.get(
+                    params.get('trailing_atr_timeframe', 'M5'), mt5.TIMEFRAME_M5)
+                df = get_data(symbol, timeframe, 50)
+                if df is not None and len(df) > 14:
+                    atr_value = calculate_atr(df, period=14).iloc[-1]
+                    if not pd.isna(atr_value) and atr_value > 0:
+                        trail_pips = atr_value * params.get('trailing_atr_multiplier', 1.5) / pip_size
+                        trail_pips = max(params.get('trailing_min_pips', 30),
+                                         min(trail_pips, params.get('trailing_max_pips', 100)))
+                        trail_dist = trail_pips * pip_size
+            if pos.type == mt5.ORDER_TYPE_BUY:
+                new_sl = current_price - trail_dist
+                if new_sl > pos.sl:
+                    request = {"action": mt5.TRADE_ACTION_SLTP, "position": pos.ticket, "symbol": symbol,
+                               "sl": new_sl, "tp": pos.tp}
+            else:
+                new_sl = current_price + trail_dist
+                if pos.sl == 0 or new_sl < pos.sl:
+                    request = {"action": mt5.TRADE_ACTION_SLTP, "position": pos.ticket, "symbol": symbol,
+                               "sl": new_sl, "tp": pos.tp}
+    if request:
+        mt5.order_send(request)
+
+
+def random_config(rnd):
+    params = {
+        "trailing_enabled": rnd.random() < 0.85, "breakeven_enabled": rnd.random() < 0.7,
+        "breakeven_trigger_pips": rnd.choice([10, 30, "auto"]), "breakeven_trigger_percent": rnd.choice([0.3, 0.5]),
+        "trailing_trigger_pips": rnd.choice([20, 50, "auto"]), "trailing_trigger_multiplier": rnd.choice([0.5, 1.2]),
+        "trailing_mode": rnd.choice(["atr", "fixed"]), "trailing_atr_timeframe": rnd.choice(["M1", "M5", "M15"]),
+        "trailing_distance_pips": rnd.choice([20, 50]), "trailing_atr_multiplier": rnd.choice([1.0, 1.5]),
+        "trailing_min_pips": 30, "trailing_max_pips": 100,
+    }
+    return {"parameters": params}
+
+
+def open_position(rnd):
+    tick = mt5.symbol_info_tick(SYMBOL)
+    side = rnd.choice([mt5.ORDER_TYPE_BUY, mt5.ORDER_TYPE_SELL])
+    price = tick.ask if side == mt5.ORDER_TYPE_BUY else tick.bid
+    sign = 1 if side == mt5.ORDER_TYPE_BUY else -1
+    sl = rnd.choice([0.0, round(price - sign * 0.03, 2), round(price - sign * rnd.uniform(1, 4), 2)])
+    mt5.order_send({"action": mt5.TRADE_ACTION_DEAL, "symbol": SYMBOL, "volume": 0.01, "type": side,
+                    "price": price, "sl": sl, "tp": 0.0, "magic": rnd.choice([MAGIC, MAGIC, MAGIC + 1]),
+                    "type_filling": mt5.ORDER_FILLING_FOK})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=400)
+    args = parser.parse_args()
+
+    sim = SimTerminal(seed=3)
+    sim.load_bars(SYMBOL, synthetic_rates(args.cases * 3 + 400, step=0.5), spread_points=20)
+    mt5.install(sim)
+    sim.start(warmup_bars=200)
+    restore = patch_clock(sim, orders, data, bar_cache)
+    rnd = random.Random(7)
+    mismatches = requests = 0
+    old_calls, new_calls = Counter(), Counter()
+    for case in range(args.cases):
+        for _ in range(rnd.randint(0, 2)):
+            open_position(rnd)
+        sim.advance_to(sim.now + 60 * rnd.randint(1, 3))
+        config = random_config(rnd)
+        mine = [p for p in mt5.positions_get(symbol=SYMBOL) or () if p.magic == MAGIC]
+        sl_map = {int(p.ticket): rnd.choice([20.0, 80.0]) for p in mine if rnd.random() < 0.5} or None
+
+        DRY["on"] = True
+        with contextlib.redirect_stdout(io.StringIO()):
+            calls.clear()
+            orders.manage_positions(SYMBOL, MAGIC, config, initial_sl_map=sl_map)
+            new_sent, new_count = list(sent), Counter(calls)
+            sent.clear()
+            calls.clear()
+            for pos in mt5.positions_get(symbol=SYMBOL) or ():     # vòng lặp của strategy trước khi gộp
+                if pos.magic == MAGIC:
+                    manage_position_legacy(pos.ticket, SYMBOL, MAGIC, config, sl_map)
+            old_sent, old_count = list(sent), Counter(calls)
+            sent.clear()
+        DRY["on"] = False
+
+        new_calls.update(new_count)
+        old_calls.update(old_count)
+        requests += len(new_sent)
+        if new_sent != old_sent:
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"❌ case {case}: {len(new_sent)} request mới vs {len(old_sent)} request cũ")
+        with contextlib.redirect_stdout(io.StringIO()):
+            for request in new_sent:                               # áp SL thật để trạng thái lần sau khác đi
+                mt5.order_send(request)
+        for pos in mt5.positions_get(symbol=SYMBOL) or ():
+            if rnd.random() < 0.08:
+                side = mt5.ORDER_TYPE_SELL if pos.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
+                tick = mt5.symbol_info_tick(SYMBOL)
+                mt5.order_send({"action": mt5.TRADE_ACTION_DEAL, "symbol": SYMBOL, "volume": pos.volume,
+                                "type": side, "position": pos.ticket, "magic": pos.magic,
+                                "price": tick.bid if side == mt5.ORDER_TYPE_SELL else tick.ask,
+                                "type_filling": mt5.ORDER_FILLING_FOK})
+    restore()
+
+    ok = mismatches == 0
+    print(f"{'✅' if ok else '❌'} {args.cases - mismatches}/{args.cases} case: request SL/TP của manage_positions "
+          f"== vòng manage_position từng ticket ({requests} request)")
+    fmt = lambda c: ", ".join(f"{name} {c[name]}" for name in COUNTED if c[name])
+    print(f"   lời gọi terminal: từng ticket {sum(old_calls.values())} ({fmt(old_calls)}) → "
+          f"manage_positions {sum(new_calls.values())} ({fmt(new_calls)})")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""
+Kiểm tra tradecore.position_index (position đã đóng giữ trong RAM, cập nhật tăng dần) trên fake_mt5: bot giả mở /
+đóng / đóng một phần lệnh của 2 magic, comment GridStep_V5 / GridZone / trống (deal OUT thường trống comment,
+đôi khi mang tag), SL / TP do terminal đóng. Mỗi --interval phút giả lập gọi mọi hàm GridStep đọc history và so
+với cách gộp cũ (history_deals_get lại cả cửa sổ mỗi lần):
+
+1. utils: get_last_n_closed_profits_bot / _summaries_bot / get_recent_closed_entry_prices_bot / get_closed_deals_bot
+2. grid_step_common: get_last_n_closed_profits_by_symbol / get_closed_from_mt5_history
+3. strategy_grid_step_v5: _fetch_closed_positions_list / _v5_peek_any_out_deal_after
+4. grid_zone_reentry_fsm: _find_latest_sl_loss_deal
+5. số deal hỏi terminal mỗi vòng: cũ (mỗi hàm 1 lần cả cửa sổ) vs position_index (chỉ deal mới); thời gian
+   mỗi vòng chỉ để tham khảo — fake_mt5 trả deal từ RAM không tốn IPC nên position_index (lọc trong Python)
+   chậm hơn bản cũ ở đây; lợi ích là số deal terminal thật phải gửi qua IPC
+6. giờ server chậm hơn local 3 giờ: deal đầu tiên sau các lần hỏi chưa có deal nào không bị sót
+
+Các hàm GridStep chỉ đi qua index khi TRADECORE_POSITION_INDEX=1 — check bật biến này cho process của nó.
+
+Strategy GridStep tạo Database() khi import → trades_db.redirect sang thư mục tạm (không ghi trades.db của repo).
+
+Chạy: python benchmarks/check_position_index.py [--days 3] [--interval 5]
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+import argparse
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(ROOT)
+sys.path.insert(0, os.path.join(ROOT, "GridStep"))
+os.environ["TELEGRAM_API_BASE"] = "http://127.0.0.1:9"   # không gửi Telegram thật
+os.environ["TRADECORE_POSITION_INDEX"] = "1"              # hàm GridStep đi qua position_index (opt-in)
+
+from tradecore import fake_mt5 as mt5
+from tradecore.fake_mt5 import SimTerminal, synthetic_rates, patch_clock, SimulationFinished
+
+mt5.install()
+from tradecore import position_index, trades_db  # noqa: E402 — sau install() để thấy MT5 giả
+
+with trades_db.redirect(os.path.join(tempfile.mkdtemp(), "trades.db")):
+    import utils  # noqa: E402
+    import grid_step_common  # noqa: E402
+    import grid_zone_reentry_fsm  # noqa: E402
+    import strategy_grid_step_v5  # noqa: E402
+
+SYMBOL = "XAUUSD"
+MAGICS = (7, 8)
+TAGS = ("GridStep_V5", "GridZone", "")
+PREFIXES = (None, "GridStep", "GridZone")
+legacy_fetched = 0
+
+
+def history(days_back):
+    """Cửa sổ history như các hàm cũ: now − days_back → now."""
+    global legacy_fetched
+    now = datetime.now()
+    deals = mt5.history_deals_get(now - timedelta(days=days_back), now) or ()
+    legacy_fetched += len(deals)
+    return deals
+
+
+def _pid(d):
+    return getattr(d, "position_id", None) or getattr(d, "position", None)
+
+
+def legacy_positions(deals, symbol, magic, prefix):
+    """utils cũ: position tính nếu BẤT KỲ deal nào có comment khớp prefix; OUT cộng dồn, OUT cuối, IN cuối."""
+    by_position = {}
+    for d in deals:
+        if int(d.magic) != int(magic) or d.symbol != symbol or not _pid(d):
+            continue
+        v = by_position.setdefault(_pid(d), {"out_profit": 0.0, "out_price": 0.0, "out_time": None,
+                                             "in_price": None, "tag": False})
+        if prefix is None or (d.comment or "").strip().startswith(prefix):
+            v["tag"] = True
+        if d.entry == mt5.DEAL_ENTRY_IN:
+            v["in_price"] = d.price
+        elif d.entry == mt5.DEAL_ENTRY_OUT:
+            v["out_profit"] += d.profit + d.swap + d.commission
+            v["out_price"] = d.price
+            v["out_time"] = d.time
+    return {pid: v for pid, v in by_position.items() if v["tag"]}
+
+
+def utc(ts):
+    return datetime.utcfromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S") if ts else None
+
+
+def legacy_utils(n, days_back, prefix, lookback_minutes):
+    positions = legacy_positions(history(days_back), SYMBOL, MAGICS[0], prefix)
+    rows = sorted(((v["out_profit"], v["out_time"]) for v in positions.values() if v["out_time"] is not None),
+                  key=lambda x: x[1], reverse=True)
+    cutoff = datetime.now().timestamp() - lookback_minutes * 60
+    entries = sorted(((float(v["in_price"]), v["out_time"]) for v in positions.values()
+                      if v["out_time"] is not None and v["in_price"] is not None and v["out_time"] >= cutoff),
+                     key=lambda x: x[1], reverse=True)
+    closed = {pid: (v["out_profit"], v["out_price"], utc(v["out_time"])) for pid, v in positions.items()
+              if v["out_profit"] != 0 or v["out_price"] != 0}
+    return ([p for p, _ in rows[:n]], utc(rows[0][1]) if rows else None,
+            [(float(p), utc(t)) for p, t in rows[:n]], [e for e, _ in entries], closed)
+
+
+def new_utils(n, days_back, prefix, lookback_minutes):
+    profits, last = utils.get_last_n_closed_profits_bot(SYMBOL, MAGICS[0], n, days_back, prefix)
+    return (profits, last, utils.get_last_n_closed_summaries_bot(SYMBOL, MAGICS[0], n, days_back, prefix),
+            utils.get_recent_closed_entry_prices_bot(SYMBOL, MAGICS[0], lookback_minutes, days_back, prefix),
+            utils.get_closed_deals_bot(SYMBOL, MAGICS[0], days_back, prefix))
+
+
+def legacy_common(n, days_back, prefix):
+    """grid_step_common cũ: chỉ gom deal có comment khớp prefix; get_closed_from_mt5_history chỉ lọc magic."""
+    deals = history(days_back)
+    by_position = {}
+    for d in deals:
+        if d.magic != MAGICS[0] or d.symbol != SYMBOL or not _pid(d):
+            continue
+        if prefix is not None and not (d.comment or "").strip().startswith(prefix):
+            continue
+        v = by_position.setdefault(_pid(d), [0.0, None])
+        if d.entry == mt5.DEAL_ENTRY_OUT:
+            v[0] += d.profit + d.swap + d.commission
+            v[1] = d.time
+    rows = sorted((tuple(v) for v in by_position.values() if v[1] is not None), key=lambda x: x[1], reverse=True)
+    closed = {}
+    for d in deals:
+        if d.magic != MAGICS[0] or not _pid(d):
+            continue
+        v = closed.setdefault(_pid(d), [0.0, 0.0, None])
+        if d.entry == mt5.DEAL_ENTRY_OUT:
+            v[0] += d.profit + d.swap + d.commission
+            v[1], v[2] = d.price, d.time
+    closed = {pid: (v[0], v[1], utc(v[2])) for pid, v in closed.items() if v[0] != 0 or v[1] != 0}
+    return [p for p, _ in rows[:n]], utc(rows[0][1]) if rows else None, closed
+
+
+def new_common(n, days_back, prefix):
+    profits, last = grid_step_common.get_last_n_closed_profits_by_symbol(SYMBOL, MAGICS[0], n, days_back, prefix)
+    return profits, last, grid_step_common.get_closed_from_mt5_history({"magic": MAGICS[0]}, days_back)
+
+
+def legacy_v5(days_back, prefix, since_ts):
+    """strategy_grid_step_v5 cũ: deal khớp prefix, IN sớm nhất + OUT cuối (net chỉ của deal OUT cuối)."""
+    by_pos = {}
+    for d in history(max(1, int(days_back))):
+        if d.magic != MAGICS[0] or d.symbol != SYMBOL or not _pid(d):
+            continue
+        if prefix and not (d.comment or "").strip().startswith(prefix):
+            continue
+        row = by_pos.setdefault(_pid(d), {"in": None, "out": None})
+        if d.entry == mt5.DEAL_ENTRY_IN and (row["in"] is None or d.time <= row["in"].time):
+            row["in"] = d
+        elif d.entry == mt5.DEAL_ENTRY_OUT and (row["out"] is None or d.time >= row["out"].time):
+            row["out"] = d
+    closed = []
+    for pid, r in by_pos.items():
+        din, dout = r["in"], r["out"]
+        if din is None or dout is None:
+            continue
+        closed.append({"position_id": int(pid), "type": "BUY" if din.type == mt5.DEAL_TYPE_BUY else "SELL",
+                       "volume": float(din.volume), "open_time": int(din.time), "open_price": float(din.price),
+                       "close_time": int(dout.time), "close_price": float(dout.price), "profit": float(dout.profit),
+                       "commission": float(dout.commission), "swap": float(dout.swap),
+                       "net_profit": float(dout.profit + dout.commission + dout.swap)})
+    closed.sort(key=lambda x: x["close_time"], reverse=True)
+    peek = any(d.magic == MAGICS[0] and d.symbol == SYMBOL and d.entry == mt5.DEAL_ENTRY_OUT and d.time > since_ts
+               and (not prefix or (d.comment or "").strip().startswith(prefix)) for d in history(1))
+    return closed[:500], peek
+
+
+def new_v5(days_back, prefix, since_ts):
+    return (strategy_grid_step_v5._fetch_closed_positions_list(SYMBOL, MAGICS[0], prefix, days_back),
+            strategy_grid_step_v5._v5_peek_any_out_deal_after(SYMBOL, MAGICS[0], prefix, since_ts))
+
+
+def legacy_fsm(magic, prefix, days_back=2):
+    """grid_zone_reentry_fsm cũ: position lỗ (tổng OUT < 0) đã đóng hẳn, OUT cuối muộn nhất."""
+    positions = {}
+    for d in history(max(1, int(days_back))):
+        if d.symbol != SYMBOL or int(d.magic) != int(magic) or _pid(d) is None:
+            continue
+        v = positions.setdefault(int(_pid(d)), {"tag": False, "net": 0.0, "t": -1.0, "deal": None})
+        if (d.comment or "").strip().startswith(prefix):
+            v["tag"] = True
+        if d.entry == mt5.DEAL_ENTRY_OUT:
+            v["net"] += d.profit + d.swap + d.commission
+            if d.time >= v["t"]:
+                v["t"], v["deal"] = d.time, d
+    best_t, best = -1.0, None
+    for pid, v in positions.items():
+        if v["tag"] and v["net"] < 0 and grid_zone_reentry_fsm._position_fully_closed(SYMBOL, pid) and v["t"] > best_t:
+            best_t, best = v["t"], v["deal"]
+    return best
+
+
+def trade(rnd):
+    """1 phút bot giả: đóng / đóng một phần (OUT đôi khi mang tag), mở lệnh mới có SL / TP."""
+    tick = mt5.symbol_info_tick(SYMBOL)
+    for pos in mt5.positions_get() or ():
+        r = rnd.random()
+        if r < 0.12 or (r < 0.2 and pos.volume > 0.01):
+            side = mt5.ORDER_TYPE_SELL if pos.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY
+            mt5.order_send({"action": mt5.TRADE_ACTION_DEAL, "symbol": SYMBOL, "type": side,
+                            "volume": pos.volume if r < 0.12 else 0.01, "position": pos.ticket,
+                            "price": tick.bid if side == mt5.ORDER_TYPE_SELL else tick.ask, "magic": pos.magic,
+                            "comment": pos.comment if rnd.random() < 0.3 else "",
+                            "type_filling": mt5.ORDER_FILLING_FOK})
+    if rnd.random() < 0.5:
+        side = rnd.choice([mt5.ORDER_TYPE_BUY, mt5.ORDER_TYPE_SELL])
+        price = tick.ask if side == mt5.ORDER_TYPE_BUY else tick.bid
+        sign = 1 if side == mt5.ORDER_TYPE_BUY else -1
+        mt5.order_send({"action": mt5.TRADE_ACTION_DEAL, "symbol": SYMBOL, "volume": 0.02, "type": side,
+                        "price": price, "sl": round(price - sign * 3, 2), "tp": round(price + sign * 4, 2),
+                        "magic": rnd.choice(MAGICS), "comment": rnd.choice(TAGS),
+                        "type_filling": mt5.ORDER_FILLING_FOK})
+
+
+def check_server_behind(hours=3):
+    """Đồng hồ local đi trước giờ server `hours` giờ: index hỏi khi chưa có deal rồi mới có lệnh đóng."""
+    sim = SimTerminal(seed=9)
+    sim.load_bars(SYMBOL, synthetic_rates(600, step=0.5), spread_points=20)
+    mt5.install(sim)
+    sim.start(warmup_bars=100)
+    restore = patch_clock(sim, position_index)
+    server_clock = position_index.datetime
+
+    class LocalAhead(server_clock):
+        @classmethod
+        def now(cls, tz=None):
+            return cls.fromtimestamp(sim.now + hours * 3600, tz)
+
+    position_index.datetime = LocalAhead
+    try:
+        index = position_index.PositionIndex()
+        for _ in range(3):
+            index.refresh(1)                    # chưa có deal nào
+            sim.advance_to(sim.now + 60)
+        tick = mt5.symbol_info_tick(SYMBOL)
+        result = mt5.order_send({"action": mt5.TRADE_ACTION_DEAL, "symbol": SYMBOL, "volume": 0.01,
+                                 "type": mt5.ORDER_TYPE_BUY, "price": tick.ask, "magic": MAGICS[0],
+                                 "type_filling": mt5.ORDER_FILLING_FOK})
+        sim.advance_to(sim.now + 60)
+        tick = mt5.symbol_info_tick(SYMBOL)
+        mt5.order_send({"action": mt5.TRADE_ACTION_DEAL, "symbol": SYMBOL, "volume": 0.01,
+                        "type": mt5.ORDER_TYPE_SELL, "position": result.order, "price": tick.bid,
+                        "magic": MAGICS[0], "type_filling": mt5.ORDER_FILLING_FOK})
+        sim.advance_to(sim.now + 60)
+        return len(index.closed(SYMBOL, MAGICS[0], days_back=1))
+    finally:
+        position_index.datetime = server_clock
+        restore()
+
+
+def main():
+    global legacy_fetched
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=float, default=3, help="số ngày giả lập")
+    parser.add_argument("--interval", type=float, default=5, help="phút giữa 2 vòng đọc history")
+    args = parser.parse_args()
+
+    bars = int(args.days * 1440) + 200
+    sim = SimTerminal()
+    sim.load_bars(SYMBOL, synthetic_rates(bars, step=0.5), spread_points=20)
+    mt5.install(sim)
+    sim.start(warmup_bars=100)
+    restore = patch_clock(sim, position_index, utils, grid_step_common, grid_zone_reentry_fsm,
+                          strategy_grid_step_v5, sys.modules[__name__])
+    index = position_index.get_index()
+    index.reset()
+    rnd = random.Random(5)
+    names = ("utils", "grid_step_common", "strategy_grid_step_v5", "grid_zone_reentry_fsm")
+    mismatches = dict.fromkeys(names, 0)
+    cycles = fetched_new = fetched_old = 0
+    t_new = t_old = 0.0
+    try:
+        while True:
+            for _ in range(int(args.interval)):
+                trade(rnd)
+                sim.advance_to(sim.now + 60)
+            n, days_back = rnd.randint(1, 6), rnd.choice([1, 1, 2, 3])
+            prefix = rnd.choice(PREFIXES)
+            lookback, since_ts = rnd.choice([5, 30, 240]), int(sim.now) - rnd.randint(0, 1800)
+            fsm_args = (rnd.choice(MAGICS), rnd.choice(["GridZone", "GridStep", ""]))
+            before = index.stats["fetched"]
+            t0 = time.perf_counter()
+            got = (new_utils(n, days_back, prefix, lookback), new_common(n, days_back, prefix),
+                   new_v5(days_back, prefix, since_ts), grid_zone_reentry_fsm._find_latest_sl_loss_deal(
+                       SYMBOL, fsm_args[0], fsm_args[1]))
+            t1 = time.perf_counter()
+            legacy_fetched = 0
+            want = (legacy_utils(n, days_back, prefix, lookback), legacy_common(n, days_back, prefix),
+                    legacy_v5(days_back, prefix, since_ts), legacy_fsm(fsm_args[0], fsm_args[1] or "GridZone"))
+            t_old += time.perf_counter() - t1
+            t_new += t1 - t0
+            fetched_new += index.stats["fetched"] - before
+            fetched_old += legacy_fetched
+            cycles += 1
+            for name, a, b in zip(names, got, want):
+                if a != b:
+                    mismatches[name] += 1
+                    if mismatches[name] <= 3:
+                        print(f"❌ vòng {cycles} {name} (n={n} days_back={days_back} prefix={prefix!r}): lệch bản cũ")
+    except SimulationFinished:
+        pass
+    restore()
+
+    ok = not any(mismatches.values())
+    closed = sum(1 for d in sim.deals if d.entry == mt5.DEAL_ENTRY_OUT)
+    print(f"{cycles} vòng, {len(sim.deals)} deal ({closed} OUT, {sim.counters['sl']} SL, {sim.counters['tp']} TP)")
+    for i, name in enumerate(names, 1):
+        print(f"{i}. {'✅' if not mismatches[name] else '❌'} {name}: {cycles - mismatches[name]}/{cycles} vòng "
+              f"== cách gộp cũ")
+    print(f"5. deal hỏi terminal mỗi vòng: cũ {fetched_old / max(cycles, 1):,.1f} → position_index "
+          f"{fetched_new / max(cycles, 1):,.1f} ({index.stats['fetches']} lần hỏi, {len(index.deals)} position "
+          f"trong RAM)")
+    ms_old, ms_new = t_old * 1e3 / max(cycles, 1), t_new * 1e3 / max(cycles, 1)
+    print(f"   thời gian mỗi vòng: cũ {ms_old:.2f} ms, position_index {ms_new:.2f} ms "
+          f"({'chậm' if ms_new > ms_old else 'nhanh'} hơn ×{max(ms_new, ms_old) / max(min(ms_new, ms_old), 1e-9):.1f} "
+          f"trên fake_mt5 — history_deals_get giả không tốn IPC, chỉ số deal ở dòng trên phản ánh terminal thật)")
+
+    found = check_server_behind()
+    ok = ok and found == 1
+    print(f"6. {'✅' if found == 1 else '❌'} giờ server chậm hơn local 3 giờ: {found}/1 position đóng sau các lần hỏi "
+          f"chưa có deal")
+
+    print("\n✅ position_index OK" if ok else "\n❌ position_index lệch")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Kiểm tra schema versioning + index của trades.db (tradecore.trades_db.MIGRATIONS):
+
+1. DB cũ (user_version 0, chưa có account_id / close_time, có dữ liệu) → Database() nâng lên SCHEMA_VERSION,
+   giữ nguyên dữ liệu; khởi động lại với schema đã mới chỉ chạy đúng 1 câu PRAGMA user_version.
+2. Query plan: mọi truy vấn nóng (Database.get_last_closed_orders* / get_grid_pending_by_status, lệnh đang mở
+   của update_db, truy vấn dashboard) phải SEARCH qua đúng index, không SCAN bảng, không TEMP B-TREE để sắp xếp.
+   Truy vấn của Database được lấy từ chính hàm (trace_callback) → sửa SQL mà mất index là check báo ngay.
+3. Đo thời gian các truy vấn đó trên DB lớn (--signals / --orders dòng) trước / sau khi có index.
+
+Chạy: python benchmarks/check_query_plans.py [--signals 300000] [--orders 30000]
+"""
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tradecore import trades_db
+
+STRATEGIES = [f"Strategy_{i}" for i in range(1, 6)] + ["Grid_Step", "Grid_Step_V11"]
+RANGE = ("2024-03-01 00:00:00", "2024-03-08 00:00:00")
+
+# (tên, SQL, index phải dùng) — bản sao truy vấn của update_db.py / DashBoardMain/dashboard.py
+EXTERNAL_QUERIES = [
+    ("update_db: lệnh đang mở",
+     "SELECT ticket FROM orders WHERE strategy_name = 'Strategy_1' AND profit IS NULL AND account_id = 1",
+     "idx_orders_open"),
+    ("update_db: lệnh đang mở (account 0)",
+     "SELECT ticket FROM orders WHERE strategy_name = 'Strategy_1' AND profit IS NULL AND (account_id = 1 OR account_id = 0)",
+     "idx_orders_open"),
+    ("dashboard: orders theo khoảng thời gian",
+     f"SELECT * FROM orders WHERE COALESCE(close_time, open_time) >= '{RANGE[0]}' AND COALESCE(close_time, open_time) <= '{RANGE[1]}' "
+     "ORDER BY COALESCE(close_time, open_time) DESC",
+     "idx_orders_time"),
+    ("dashboard: orders đã đóng từ ngày",
+     f"SELECT * FROM orders WHERE COALESCE(close_time, open_time) >= '{RANGE[0]}' AND profit IS NOT NULL "
+     "ORDER BY COALESCE(close_time, open_time) DESC",
+     "idx_orders_time"),
+    ("dashboard: ghép signal → order",
+     "SELECT * FROM orders WHERE strategy_name = 'Strategy_1' AND symbol = 'XAUUSD' AND order_type = 'BUY' "
+     f"AND open_time BETWEEN '{RANGE[0]}' AND '2024-03-01 00:01:00' LIMIT 1",
+     "idx_orders_match"),
+    ("dashboard: 50 signal mới nhất",
+     f"SELECT * FROM signals WHERE timestamp >= '{RANGE[0]}' AND timestamp <= '{RANGE[1]}' ORDER BY timestamp DESC LIMIT 50",
+     "idx_signals_time"),
+    ("dashboard: signals của 1 strategy theo khoảng thời gian",
+     "SELECT timestamp, symbol, signal_type, indicators FROM signals "
+     f"WHERE strategy_name = 'Strategy_1' AND timestamp >= '{RANGE[0]}' AND timestamp <= '{RANGE[1]}'",
+     "idx_signals_strategy_time"),
+]
+
+
+def legacy_db(path):
+    """trades.db trước khi có account_id / close_time / user_version (schema gốc của db.py)."""
+    conn = sqlite3.connect(path)
+    conn.execute('''CREATE TABLE signals (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        strategy_name TEXT, symbol TEXT, signal_type TEXT, price REAL, sl REAL, tp REAL, indicators TEXT, status TEXT)''')
+    conn.execute('''CREATE TABLE orders (ticket INTEGER PRIMARY KEY, strategy_name TEXT, symbol TEXT, order_type TEXT,
+        volume REAL, open_price REAL, sl REAL, tp REAL, open_time DATETIME, close_price REAL, profit REAL, comment TEXT)''')
+    conn.execute("INSERT INTO signals (strategy_name, symbol, signal_type, price) VALUES ('Strategy_1', 'XAUUSD', 'BUY', 2350)")
+    conn.execute("INSERT INTO orders VALUES (1, 'Strategy_1', 'XAUUSD', 'BUY', 0.01, 2350, 2349, 2352, '2024-01-01 00:00:00', 2352, 2.0, '')")
+    conn.commit()
+    conn.close()
+
+
+def check_migration():
+    path = os.path.join(tempfile.mkdtemp(), "trades.db")
+    legacy_db(path)
+    db = trades_db.Database(path)
+    q = db._store.query
+    assert q("PRAGMA user_version")[0][0] == trades_db.SCHEMA_VERSION
+    assert {"account_id", "close_time"} <= {r[1] for r in q("PRAGMA table_info(orders)")}
+    assert "account_id" in {r[1] for r in q("PRAGMA table_info(signals)")}
+    assert db.get_last_closed_orders("Strategy_1") == [{"profit": 2.0, "open_time": "2024-01-01 00:00:00", "close_time": None}]
+    assert q("SELECT COUNT(*) FROM signals")[0][0] == 1
+    indexes = {r[0] for r in q("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")}
+    print(f"1. DB cũ v0 → v{trades_db.SCHEMA_VERSION}: thêm cột, {len(indexes)} index, giữ dữ liệu OK")
+
+    # process mới mở DB đã mới: chỉ đọc user_version
+    fresh = trades_db.Store(path)
+    statements = []
+    fresh.conn.set_trace_callback(statements.append)
+    fresh.migrate(trades_db.MIGRATIONS)
+    fresh.migrate(trades_db.MIGRATIONS)
+    assert statements == ["PRAGMA user_version"], statements
+    fresh.conn.close()
+    print("   khởi động lại (schema đã mới): 1 câu PRAGMA user_version, không table_info / ALTER OK")
+
+
+def database_queries(db):
+    """(tên, SQL đã gắn tham số, index phải dùng) của các hàm đọc trong Database."""
+    calls = [
+        ("get_last_closed_orders", lambda: db.get_last_closed_orders("Strategy_1", limit=5), "idx_orders_closed"),
+        ("get_last_closed_orders (account)", lambda: db.get_last_closed_orders("Strategy_1", limit=5, account_id=1),
+         "idx_orders_closed"),
+        ("get_last_closed_orders_with_entry", lambda: db.get_last_closed_orders_with_entry("Strategy_1"), "idx_orders_closed"),
+        ("get_last_closed_orders_with_sl", lambda: db.get_last_closed_orders_with_sl("Strategy_1", account_id=1),
+         "idx_orders_closed"),
+        ("get_grid_pending_by_status", lambda: db.get_grid_pending_by_status("Grid_Step", "XAUUSD"), "idx_grid_pending_status"),
+    ]
+    out = []
+    for name, call, index in calls:
+        statements = []
+        db._store.conn.set_trace_callback(statements.append)
+        try:
+            call()
+        finally:
+            db._store.conn.set_trace_callback(None)
+        selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+        assert len(selects) == 1, (name, statements)
+        out.append((name, selects[0], index))
+    return out
+
+
+def fill(db, n_signals, n_orders):
+    rnd = random.Random(5)
+    base = time.mktime(time.strptime("2024-01-01", "%Y-%m-%d"))
+    stamp = lambda t: time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t))
+    span = 180 * 86400
+    conn = db._store.conn
+    conn.executemany(
+        "INSERT INTO signals (timestamp, strategy_name, symbol, signal_type, price, sl, tp, indicators, status, account_id) "
+        "VALUES (?, ?, 'XAUUSD', ?, 2350, 2349, 2352, '{\"rsi\": 55}', 'PENDING', 1)",
+        ((stamp(base + span * i / n_signals), rnd.choice(STRATEGIES), rnd.choice(["BUY", "SELL"]))
+         for i in range(n_signals)))
+    rows = []
+    for i in range(n_orders):
+        t = base + span * i / n_orders
+        is_open = i >= n_orders - 20
+        rows.append((i + 1, rnd.choice(STRATEGIES), rnd.choice(["BUY", "SELL"]), stamp(t),
+                     None if is_open else 2351.0, None if is_open else rnd.uniform(-5, 5),
+                     None if is_open else stamp(t + rnd.randint(60, 7200)), rnd.choice([0, 1])))
+    conn.executemany(
+        "INSERT INTO orders (ticket, strategy_name, symbol, order_type, volume, open_price, sl, tp, open_time, "
+        "close_price, profit, close_time, account_id) VALUES (?, ?, 'XAUUSD', ?, 0.01, 2350, 2349, 2352, ?, ?, ?, ?, ?)", rows)
+    conn.executemany(
+        "INSERT INTO grid_pending_orders (ticket, strategy_name, symbol, order_type, price, status) VALUES (?, ?, 'XAUUSD', 'BUY_STOP', 2350, ?)",
+        ((i + 1, rnd.choice(STRATEGIES), rnd.choice(["PENDING", "FILLED", "CANCELLED", "CANCELLED"])) for i in range(n_orders)))
+    conn.commit()
+
+
+def plan(conn, sql):
+    return [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+
+
+def timed(conn, sql, repeat):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(sql).fetchall()
+    return (time.perf_counter() - t0) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--signals", type=int, default=300_000)
+    parser.add_argument("--orders", type=int, default=30_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    check_migration()
+
+    path = os.path.join(tempfile.mkdtemp(), "trades.db")
+    db = trades_db.Database(path)
+    fill(db, args.signals, args.orders)
+    queries = database_queries(db) + EXTERNAL_QUERIES
+    conn = sqlite3.connect(path)
+
+    print(f"2. query plan ({len(queries)} truy vấn):")
+    ok = True
+    for name, sql, index in queries:
+        steps = plan(conn, sql)
+        good = (any(index in s and s.startswith("SEARCH") for s in steps)
+                and not any(s.startswith("SCAN") or "TEMP B-TREE" in s for s in steps))
+        ok = ok and good
+        print(f"   {'✅' if good else '❌'} {name:<56} {' | '.join(steps)}")
+
+    print(f"3. thời gian ({args.signals:,} signal, {args.orders:,} order), không index → có index:")
+    after = {name: timed(conn, sql, args.repeat) for name, sql, _ in queries}
+    indexes = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name LIKE 'idx_%'")]
+    for name in indexes:
+        conn.execute(f"DROP INDEX {name}")
+    for name, sql, _ in queries:
+        before = timed(conn, sql, max(1, args.repeat // 4))
+        print(f"   {name:<56} {before * 1e3:8.2f} ms → {after[name] * 1e3:6.2f} ms ({before / max(after[name], 1e-9):6.0f}x)")
+    conn.close()
+
+    print("\n✅ query plan OK" if ok else "\n❌ truy vấn không dùng index")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+So tradecore.signal_matrix (ma trận tín hiệu vectorized) với strategy_1_logic / strategy_4_logic thật
+chạy từng nến qua fake_mt5: ở điểm giá cuối của mỗi nến M1 được chọn, gọi logic (không có lệnh mở,
+order_send bị từ chối để không mở lệnh) và ghi lại log_signal BUY / SELL → phải trùng cột signal của ma trận.
+
+Nến được so: 1 đoạn liên tục + mọi nến ma trận báo có tín hiệu (+ nến ngay trước / sau) trên toàn bộ dữ liệu.
+Đo thêm tốc độ ma trận trên 1 năm nến M1 (372k nến, --year-bars để đổi).
+
+Chạy: python benchmarks/check_signal_matrix.py [--bars 1500] [--csv xauusd_m1.csv]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import contextlib
+from collections import namedtuple
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+BOT_DIR = os.path.join(ROOT, "XAU_M1")
+sys.path.append(ROOT)
+sys.path.insert(0, BOT_DIR)
+from tradecore import fake_mt5
+
+fake_mt5.install()
+from tradecore import signal_matrix
+from tradecore.backtest import DEFAULT_WARMUP, _bot_modules
+from tradecore.runner import load_strategy
+
+Rejected = namedtuple("Rejected", "retcode comment order")
+
+
+class SignalRecorder:
+    """Thay Database của strategy: chỉ ghi lại các lần log_signal."""
+
+    db_path = os.devnull
+
+    def __init__(self):
+        self.signals = []
+
+    def log_signal(self, strategy, symbol, signal_type, *args, **kwargs):
+        self.signals.append(signal_type)
+
+    def log_order(self, *args, **kwargs):
+        pass
+
+
+def logic_signals(script, rates, bars):
+    """Gọi logic thật ở điểm giá cuối của từng nến trong `bars` → {chỉ số nến: 1 / -1 / 0}."""
+    from tradecore.bar_cache import bar_cache
+    from tradecore.indicator_cache import indicator_cache
+
+    sim = fake_mt5.SimTerminal()
+    sim.load_bars("XAUUSD", rates)
+    fake_mt5.install(sim)
+    sim.start(at=int(rates["time"][bars[0]]))
+    bar_cache.invalidate()
+    indicator_cache.invalidate()
+    with contextlib.redirect_stdout(open(os.devnull, "w")):
+        plugin = load_strategy(script, db_path=os.path.join(tempfile.mkdtemp(), "trades.db"))   # không mở XAU_M1/trades.db
+    recorder = SignalRecorder()
+    plugin.module.db = recorder
+    plugin.module.send_order = lambda request, *args, **kwargs: Rejected(fake_mt5.TRADE_RETCODE_REJECT, "check", 0)
+    restore = fake_mt5.patch_clock(sim, plugin.module, *_bot_modules(BOT_DIR))
+    feed = sim.feeds["XAUUSD"]
+    out = {}
+    t0 = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(open(os.devnull, "w")):
+            for i in bars:
+                sim.advance_to(float(feed.pt_time[feed.bar_first[i + 1] - 1]))
+                del recorder.signals[:]
+                plugin.logic(plugin.config, 0)
+                out[i] = {"BUY": 1, "SELL": -1}[recorder.signals[-1]] if recorder.signals else 0
+    finally:
+        restore()
+    return out, plugin.config, time.perf_counter() - t0
+
+
+def check(script, rates, n_bars):
+    name = os.path.splitext(os.path.basename(script))[0]
+    with open(os.path.join(BOT_DIR, "configs", f"config_{name.split('_')[1]}.json"), encoding="utf-8") as f:
+        params = json.load(f)["parameters"]
+    matrix = signal_matrix.matrix_for(script)(rates, params)
+    signal = matrix["signal"].to_numpy()
+    ready = np.flatnonzero(matrix["ready"].to_numpy())
+    first = int(ready[0])
+    hits = np.flatnonzero(signal != 0)
+    bars = set(range(first, min(first + n_bars, len(rates) - 1)))
+    for i in hits:
+        bars.update(j for j in (i - 1, i, i + 1) if first <= j < len(rates) - 1)
+    bars = sorted(bars)
+
+    logic, _, wall = logic_signals(script, rates, bars)
+    mismatch = [i for i in bars if logic[i] != signal[i]]
+    logic_hits = sum(1 for i in bars if logic[i])
+    print(f"{'✅' if not mismatch else '❌'} {name}: {len(bars)} nến so với logic ({wall / len(bars) * 1e3:.1f} ms/nến) | "
+          f"tín hiệu ma trận {len(hits)} (BUY {int((signal == 1).sum())} / SELL {int((signal == -1).sum())}), "
+          f"logic {logic_hits} | lệch {len(mismatch)}")
+    for i in mismatch[:10]:
+        print(f"   nến {i} ({matrix.index[i]}): ma trận {signal[i]} / logic {logic[i]}")
+        print("   " + matrix.iloc[i].to_string().replace("\n", " | "))
+    return not mismatch and len(hits) > 0
+
+
+def bench(rates):
+    print(f"\n⏱️ ma trận trên {len(rates):,} nến M1 (1 process):")
+    for script in ("strategy_1_trend_ha.py", "strategy_4_ut_bot.py"):
+        matrix = signal_matrix.matrix_for(os.path.join(BOT_DIR, script))
+        t0 = time.perf_counter()
+        result = matrix(rates)
+        cold = time.perf_counter() - t0
+        cache = {}
+        matrix(rates, cache=cache)
+        t0 = time.perf_counter()
+        for threshold in (50, 55, 60, 65):
+            matrix(rates, {"rsi_buy_threshold": threshold, "rsi_sell_threshold": 100 - threshold}, cache=cache)
+        warm = (time.perf_counter() - t0) / 4
+        print(f"   {script:<26} {cold:6.2f}s ({len(rates) / cold:>11,.0f} nến/s) | đổi ngưỡng (cache) "
+              f"{warm * 1e3:6.0f} ms ({len(rates) / warm:>13,.0f} nến/s) | tín hiệu {int((result['signal'] != 0).sum())}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bars", type=int, default=1500, help="số nến liên tục so với logic")
+    parser.add_argument("--csv", help="nến M1 thật (.csv / .npy) thay cho dữ liệu ngẫu nhiên")
+    parser.add_argument("--year-bars", type=int, default=372_000)
+    args = parser.parse_args()
+
+    rates = fake_mt5.read_rates(args.csv) if args.csv else fake_mt5.synthetic_rates(DEFAULT_WARMUP + 3 * args.bars)
+    ok = True
+    for script in ("strategy_1_trend_ha.py", "strategy_4_ut_bot.py"):
+        ok = check(os.path.join(BOT_DIR, script), rates, args.bars) and ok
+    bench(fake_mt5.synthetic_rates(args.year_bars, seed=11))
+    print("\n✅ signal_matrix OK" if ok else "\n❌ signal_matrix lệch logic")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
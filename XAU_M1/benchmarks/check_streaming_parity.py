@@ -0,0 +1,130 @@
+"""
+Kiểm tra streaming_indicators khớp với utils (pandas) trên từng nến:
+- seed IndicatorSet bằng `--seed` nến đầu, sau đó stream từng nến còn lại;
+  mỗi nến mới được "vá" vài lần (giả lập nến đang chạy) trước khi chốt giá cuối
+- giữa chừng snapshot → JSON → restore vào IndicatorSet mới và tiếp tục
+- sau mỗi nến so với calculate_rsi / calculate_adx / calculate_atr / rolling mean tính lại từ đầu
+
+Nguồn nến: --csv (cột time,open,high,low,close — vd export từ MT5) hoặc random walk.
+Chạy: python benchmarks/check_streaming_parity.py [--csv bars.csv] [--bars 1500]
+"""
+import os
+import sys
+import json
+import math
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tradecore import fake_mt5
+
+fake_mt5.install()   # utils import MetaTrader5 — chạy được cả trên Linux không có terminal
+from utils import calculate_rsi, calculate_adx, calculate_atr  # noqa: E402
+from streaming_indicators import IndicatorSet, SMA, EMA, WilderRSI, ATR, ADX, SMAChannel  # noqa: E402
+from bench_np_path import make_rates  # noqa: E402
+
+TOLERANCE = 1e-9
+
+
+def new_set():
+    return IndicatorSet({
+        "rsi": WilderRSI(14), "adx": ADX(14), "atr": ATR(14),
+        "sma200": SMA(200), "ema50": EMA(span=50), "channel": SMAChannel(55),
+    })
+
+
+def reference(df):
+    adx_df = calculate_adx(df, period=14)
+    return {
+        "rsi": calculate_rsi(df['close'], period=14).iloc[-1],
+        "adx": adx_df['adx'].iloc[-1],
+        "di_plus": adx_df['di_plus'].iloc[-1],
+        "atr": calculate_atr(df, period=14).iloc[-1],
+        "sma200": df['close'].rolling(window=200).mean().iloc[-1],
+        "ema50": df['close'].ewm(span=50, adjust=False).mean().iloc[-1],
+        "sma55_high": df['high'].rolling(window=55).mean().iloc[-1],
+        "sma55_low": df['low'].rolling(window=55).mean().iloc[-1],
+    }
+
+
+def streamed(ind):
+    sma_high, sma_low = ind["channel"].value
+    return {
+        "rsi": ind["rsi"].value, "adx": ind["adx"].value, "di_plus": ind["adx"].di_plus,
+        "atr": ind["atr"].value, "sma200": ind["sma200"].value, "ema50": ind["ema50"].value,
+        "sma55_high": sma_high, "sma55_low": sma_low,
+    }
+
+
+def same(a, b):
+    if math.isnan(a) or math.isnan(b):
+        return math.isnan(a) and math.isnan(b)
+    return abs(a - b) <= TOLERANCE * max(1.0, abs(b))
+
+
+def load_csv(path):
+    df = pd.read_csv(path)
+    rates = np.zeros(len(df), dtype=make_rates(1, 60, 0).dtype)
+    rates['time'] = pd.to_datetime(df['time']).astype('int64') // 10**9 if df['time'].dtype == object else df['time']
+    for col in ('open', 'high', 'low', 'close'):
+        rates[col] = df[col]
+    return rates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv")
+    parser.add_argument("--bars", type=int, default=1500)
+    parser.add_argument("--seed", type=int, default=200)
+    args = parser.parse_args()
+
+    rates = load_csv(args.csv) if args.csv else make_rates(args.bars, 60, 7)
+    rng = np.random.default_rng(0)
+    ind = new_set()
+    ind.sync(rates[:args.seed])
+    mismatches = 0
+    restore_at = (args.seed + len(rates)) // 2
+
+    for i in range(args.seed, len(rates)):
+        bar = rates[i:i + 1].copy()
+        final = bar.copy()
+        # Nến đang chạy: vài lần cập nhật giá trước khi đóng
+        for _ in range(3):
+            bar['close'] = final['close'] + rng.normal(0, 0.5)
+            bar['high'] = max(float(final['high'][0]), float(bar['close'][0]))
+            bar['low'] = min(float(final['low'][0]), float(bar['close'][0]))
+            ind.sync(bar)
+        ind.sync(final)
+
+        if i == restore_at:
+            snap = json.loads(json.dumps(ind.snapshot()))
+            ind = new_set()
+            ind.restore(snap)
+
+        # Indicator dạng cửa sổ: so với pandas trên 400 nến cuối
+        expected = reference(pd.DataFrame(rates[max(0, i + 1 - 400):i + 1]))
+        got = streamed(ind)
+        for key, value in expected.items():
+            if key in ("rsi", "ema50"):
+                continue
+            if not same(got[key], float(value)):
+                mismatches += 1
+                print(f"❌ bar {i} {key}: stream={got[key]} pandas={value}")
+        # RSI/EMA phụ thuộc toàn bộ lịch sử → so với pandas tính từ nến 0
+        full = pd.DataFrame(rates[:i + 1])
+        for key, value in (("rsi", calculate_rsi(full['close'], 14).iloc[-1]),
+                           ("ema50", full['close'].ewm(span=50, adjust=False).mean().iloc[-1])):
+            if not same(got[key], float(value)):
+                mismatches += 1
+                print(f"❌ bar {i} {key}: stream={got[key]} pandas={value}")
+
+    checked = len(rates) - args.seed
+    print(f"{'✅' if mismatches == 0 else '❌'} {checked} nến, {mismatches} sai lệch (tolerance {TOLERANCE})")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
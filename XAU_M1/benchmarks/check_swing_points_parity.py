@@ -0,0 +1,109 @@
+"""
+So swing_points (rolling max/min căn giữa + SwingPointTracker) với vòng lặp df.iloc cũ của
+find_swing_points: index/price swing high/low phải trùng. Tracker được chạy như vòng lặp
+live — cửa sổ 300 nến trượt từng nến, nến cuối (forming) được sửa giá nhiều lần trước khi đóng.
+
+Nguồn nến: --csv (cột time,open,high,low,close) hoặc random walk (giá làm tròn để có nến bằng nhau).
+Chạy: python benchmarks/check_swing_points_parity.py [--csv bars.csv] [--bars 2000] [--window 300]
+"""
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tradecore import fake_mt5
+
+fake_mt5.install()   # check_streaming_parity / bench_np_path import utils → MetaTrader5
+from swing_points import swing_points_from_df, SwingPointTracker  # noqa: E402
+from bench_np_path import make_rates  # noqa: E402
+from check_streaming_parity import load_csv  # noqa: E402
+
+
+def find_swing_points_legacy(df, lookback=5):
+    """Bản cũ (vòng lặp df.iloc) — giữ lại để so kết quả"""
+    swing_highs = []
+    swing_lows = []
+    for i in range(lookback, len(df) - lookback):
+        is_swing_high = True
+        for j in range(i - lookback, i + lookback + 1):
+            if j != i and df.iloc[j]['high'] >= df.iloc[i]['high']:
+                is_swing_high = False
+                break
+        if is_swing_high:
+            swing_highs.append({'index': i, 'price': df.iloc[i]['high'], 'time': df.index[i]})
+        is_swing_low = True
+        for j in range(i - lookback, i + lookback + 1):
+            if j != i and df.iloc[j]['low'] <= df.iloc[i]['low']:
+                is_swing_low = False
+                break
+        if is_swing_low:
+            swing_lows.append({'index': i, 'price': df.iloc[i]['low'], 'time': df.index[i]})
+    return swing_highs, swing_lows
+
+
+def to_df(rates):
+    df = pd.DataFrame(rates)
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv")
+    parser.add_argument("--bars", type=int, default=2000)
+    parser.add_argument("--window", type=int, default=300)
+    args = parser.parse_args()
+
+    rates = load_csv(args.csv) if args.csv else make_rates(args.bars, 60, 7)
+    if not args.csv:
+        # Làm tròn để có high/low bằng nhau (kiểm tra bất đẳng thức chặt)
+        for col in ('open', 'high', 'low', 'close'):
+            rates[col] = np.round(rates[col], 0)
+    ok = True
+    rng = np.random.default_rng(3)
+    for lookback in (3, 5):
+        # 1) Toàn bộ cửa sổ 1 lần
+        df = to_df(rates[-args.window:])
+        t0 = time.perf_counter()
+        ref = find_swing_points_legacy(df, lookback)
+        t_legacy = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        new = swing_points_from_df(df, lookback)
+        t_new = time.perf_counter() - t0
+        same_full = ref == new
+
+        # 2) Tracker chạy như vòng lặp live, forming bar sửa giá 3 lần mỗi nến
+        tracker = SwingPointTracker(lookback, max_bars=args.window * 2)
+        same_live = True
+        steps = 0
+        t_tracker = 0.0
+        for end in range(args.window, len(rates) + 1):
+            for _ in range(3):
+                window = rates[end - args.window:end].copy()
+                window['high'][-1] += np.round(rng.random() * 2, 0)
+                window['low'][-1] -= np.round(rng.random() * 2, 0)
+                df = to_df(window)
+                t0 = time.perf_counter()
+                got = swing_points_from_df(df, lookback, tracker)
+                t_tracker += time.perf_counter() - t0
+                steps += 1
+                if got != swing_points_from_df(df, lookback):
+                    same_live = False
+            if end % 251 == 0 and got != find_swing_points_legacy(df, lookback):
+                same_live = False
+
+        passed = same_full and same_live
+        ok = ok and passed
+        print(f"{'✅' if passed else '❌'} lookback={lookback}: full={same_full} ({len(new[0])} highs, {len(new[1])} lows) "
+              f"live={same_live} | legacy {t_legacy * 1e3:.0f} ms → {t_new * 1e3:.2f} ms, "
+              f"tracker {t_tracker / steps * 1e3:.2f} ms/lần")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
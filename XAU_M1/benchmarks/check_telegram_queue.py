@@ -0,0 +1,128 @@
+"""
+Kiểm tra tradecore.telegram với 1 server HTTP local đóng vai api.telegram.org (không cần mạng):
+1. API chậm (1 giây / request): enqueue 20 tin liên tiếp phải trả về ngay (< 5 ms), tin được gom
+   thành ít request, đủ nội dung, đúng thứ tự
+2. 429 retry_after: request đầu bị 429 → đợi đúng retry_after rồi gửi lại thành công
+3. Hàng đợi đầy: API treo, maxsize=5 → nhận đúng 5 tin (tính cả lô đang gửi), tin thừa bị bỏ, đếm dropped_overflow
+4. 400 (chat_id sai): không thử lại, on_result(False, ...), đếm dropped_failed
+5. 400 trên khối gom (1 tin HTML hỏng): gửi lại từng tin riêng → chỉ bỏ tin hỏng
+
+Chạy: python benchmarks/check_telegram_queue.py
+"""
+import os
+import sys
+import time
+import json
+import threading
+from urllib.parse import parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from tradecore.telegram import TelegramNotifier
+
+SERVER = {"delay": 0.0, "script": [], "received": [], "reject": None}
+
+
+class FakeTelegram(BaseHTTPRequestHandler):
+    def do_POST(self):
+        body = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8"))
+        time.sleep(SERVER["delay"])
+        status, payload = SERVER["script"].pop(0) if SERVER["script"] else (200, {"ok": True, "result": {}})
+        if SERVER["reject"] and SERVER["reject"] in body["text"][0]:
+            status, payload = 400, {"ok": False, "error_code": 400,
+                                    "description": "Bad Request: can't parse entities"}
+        if status == 200:
+            SERVER["received"].append((time.monotonic(), body["chat_id"][0], body["text"][0]))
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def reset(delay=0.0, script=(), reject=None):
+    SERVER["delay"] = delay
+    SERVER["script"] = list(script)
+    SERVER["received"] = []
+    SERVER["reject"] = reject
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeTelegram)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_base = f"http://127.0.0.1:{server.server_port}"
+
+    # 1. API chậm: trading loop chỉ trả giá enqueue
+    reset(delay=1.0)
+    notifier = TelegramNotifier(api_base=api_base, coalesce_window=0.2)
+    costs = []
+    for i in range(20):
+        t0 = time.perf_counter()
+        notifier.enqueue(f"msg {i}", "TOKEN", 123)
+        costs.append((time.perf_counter() - t0) * 1e3)
+        time.sleep(0.05)
+    assert notifier.flush(15)
+    texts = "\n\n".join(text for _, _, text in SERVER["received"])
+    assert texts == "\n\n".join(f"msg {i}" for i in range(20)), texts
+    stats = notifier.stats()
+    print(f"1. enqueue max {max(costs):.3f} ms | 20 tin → {stats['requests_sent']} request "
+          f"(coalesced {stats['coalesced']})")
+    assert max(costs) < 5 and stats["requests_sent"] < 20
+
+    # 2. 429 retry_after
+    reset(script=[(429, {"ok": False, "error_code": 429, "description": "Too Many Requests: retry after 1",
+                         "parameters": {"retry_after": 1}})])
+    notifier = TelegramNotifier(api_base=api_base, coalesce_window=0.05)
+    t0 = time.monotonic()
+    notifier.enqueue("after 429", "TOKEN", 123)
+    assert notifier.flush(10)
+    waited = SERVER["received"][0][0] - t0
+    stats = notifier.stats()
+    print(f"2. 429: retries_429={stats['retries_429']}, gửi thành công sau {waited:.2f}s")
+    assert stats["retries_429"] == 1 and stats["sent_messages"] == 1 and waited >= 1.0
+
+    # 3. Hàng đợi đầy
+    reset(delay=3.0)
+    notifier = TelegramNotifier(api_base=api_base, maxsize=5, coalesce_window=0.05)
+    t0 = time.perf_counter()
+    accepted = sum(notifier.enqueue(f"burst {i}", "TOKEN", 123) for i in range(50))
+    elapsed = (time.perf_counter() - t0) * 1e3
+    stats = notifier.stats()
+    print(f"3. overflow: 50 tin trong {elapsed:.2f} ms, nhận {accepted}, dropped_overflow={stats['dropped_overflow']}")
+    assert stats["dropped_overflow"] == 50 - accepted and accepted == 5
+    notifier.close(10)   # gửi nốt phần đã nhận trước khi đổi kịch bản server
+
+    # 4. 400: không thử lại
+    reset(script=[(400, {"ok": False, "error_code": 400, "description": "Bad Request: chat not found"})])
+    notifier = TelegramNotifier(api_base=api_base, coalesce_window=0.05)
+    results = []
+    notifier.enqueue("bad chat", "TOKEN", 999, on_result=lambda ok, desc: results.append((ok, desc)))
+    assert notifier.flush(10)
+    stats = notifier.stats()
+    print(f"4. 400: on_result={results[0]}, requests={stats['requests_sent']}, dropped_failed={stats['dropped_failed']}")
+    assert results[0][0] is False and stats["requests_sent"] == 1 and stats["dropped_failed"] == 1
+
+    # 5. 400 trên khối gom: tách gửi từng tin
+    reset(reject="<b>broken")
+    notifier = TelegramNotifier(api_base=api_base, coalesce_window=0.3)
+    results = []
+    for text in ("<b>ok 1</b>", "<b>broken", "<b>ok 2</b>"):
+        notifier.enqueue(text, "TOKEN", 123, on_result=lambda ok, desc, t=text: results.append((t, ok)))
+    assert notifier.flush(10)
+    stats = notifier.stats()
+    received = [text for _, _, text in SERVER["received"]]
+    print(f"5. 400 trên khối gom: {stats['requests_sent']} request, gửi {received}, "
+          f"dropped_failed={stats['dropped_failed']}")
+    assert received == ["<b>ok 1</b>", "<b>ok 2</b>"] and stats["dropped_failed"] == 1
+    assert sorted(results) == [("<b>broken", False), ("<b>ok 1</b>", True), ("<b>ok 2</b>", True)]
+
+    server.shutdown()
+    print("✅ telegram queue OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+So calculate_ut_bot (kernel mảng) với bản df.at cũ: x_atr_trailing_stop, pos và tín hiệu
+flip BUY/SELL phải trùng từng nến; kiểm tra thêm ut_bot_next (cập nhật nến mới nhất)
+và calculate_ut_bot_np (bản thuần mảng cho nghiên cứu lịch sử).
+
+Nguồn nến: --csv (cột time,open,high,low,close — vd export từ MT5) hoặc random walk.
+Chạy: python benchmarks/check_ut_bot_parity.py [--csv bars.csv] [--bars 5000]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+# strategy_4_ut_bot tạo Database() và import MetaTrader5 khi load → DB tạm + MT5 giả
+from tradecore import fake_mt5, trades_db
+
+fake_mt5.install()
+with trades_db.redirect(os.path.join(tempfile.mkdtemp(), "trades.db")):
+    from strategy_4_ut_bot import calculate_ut_bot  # noqa: E402
+from indicators_np import ut_bot_next, calculate_ut_bot_np  # noqa: E402
+from bench_np_path import make_rates  # noqa: E402
+from check_streaming_parity import load_csv  # noqa: E402
+
+
+def calculate_ut_bot_legacy(df, sensitivity=2, period=10):
+    """Bản cũ (vòng lặp df.at) — giữ lại để so kết quả"""
+    df['atr'] = df['high'].combine(df['close'].shift(1), max) - df['low'].combine(df['close'].shift(1), min)
+    df['atr'] = df['atr'].rolling(window=period).mean()
+    df['n_loss'] = sensitivity * df['atr']
+    df['x_atr_trailing_stop'] = 0.0
+    df['pos'] = 0
+    for i in range(1, len(df)):
+        if df.at[i, 'close'] > df.at[i-1, 'x_atr_trailing_stop'] and df.at[i-1, 'close'] > df.at[i-1, 'x_atr_trailing_stop']:
+            df.at[i, 'x_atr_trailing_stop'] = max(df.at[i-1, 'x_atr_trailing_stop'], df.at[i, 'close'] - df.at[i, 'n_loss'])
+        elif df.at[i, 'close'] < df.at[i-1, 'x_atr_trailing_stop'] and df.at[i-1, 'close'] < df.at[i-1, 'x_atr_trailing_stop']:
+            df.at[i, 'x_atr_trailing_stop'] = min(df.at[i-1, 'x_atr_trailing_stop'], df.at[i, 'close'] + df.at[i, 'n_loss'])
+        elif df.at[i, 'close'] > df.at[i-1, 'x_atr_trailing_stop']:
+            df.at[i, 'x_atr_trailing_stop'] = df.at[i, 'close'] - df.at[i, 'n_loss']
+        else:
+            df.at[i, 'x_atr_trailing_stop'] = df.at[i, 'close'] + df.at[i, 'n_loss']
+        prev_pos = df.at[i-1, 'pos']
+        if df.at[i, 'close'] > df.at[i-1, 'x_atr_trailing_stop'] and df.at[i-1, 'close'] < df.at[i-1, 'x_atr_trailing_stop']:
+            df.at[i, 'pos'] = 1
+        elif df.at[i, 'close'] < df.at[i-1, 'x_atr_trailing_stop'] and df.at[i-1, 'close'] > df.at[i-1, 'x_atr_trailing_stop']:
+            df.at[i, 'pos'] = -1
+        else:
+            df.at[i, 'pos'] = prev_pos if prev_pos != 0 else (1 if df.at[i, 'close'] > df.at[i, 'x_atr_trailing_stop'] else -1)
+    return df
+
+
+def flips(pos):
+    pos = np.asarray(pos)
+    return np.flatnonzero((pos[1:] != pos[:-1]) & (pos[:-1] != 0)) + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv")
+    parser.add_argument("--bars", type=int, default=5000)
+    args = parser.parse_args()
+
+    rates = load_csv(args.csv) if args.csv else make_rates(args.bars, 60, 5)
+    ok = True
+    for sensitivity, period in ((2, 10), (1, 14), (3, 5)):
+        t0 = time.perf_counter()
+        ref = calculate_ut_bot_legacy(pd.DataFrame(rates), sensitivity, period)
+        t_legacy = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        new = calculate_ut_bot(pd.DataFrame(rates), sensitivity, period)
+        t_new = time.perf_counter() - t0
+
+        same_stop = np.array_equal(ref['x_atr_trailing_stop'].to_numpy(), new['x_atr_trailing_stop'].to_numpy(), equal_nan=True)
+        same_pos = np.array_equal(ref['pos'].to_numpy(), new['pos'].to_numpy())
+        same_flips = np.array_equal(flips(ref['pos']), flips(new['pos']))
+
+        # Cập nhật nến cuối từ trạng thái nến trước
+        i = len(rates) - 1
+        stop_last, pos_last = ut_bot_next(float(new.at[i, 'close']), float(new.at[i, 'n_loss']), float(new.at[i - 1, 'close']),
+                                          float(new.at[i - 1, 'x_atr_trailing_stop']), int(new.at[i - 1, 'pos']))
+        same_next = stop_last == new.at[i, 'x_atr_trailing_stop'] and pos_last == new.at[i, 'pos']
+
+        # Bản thuần mảng (SMA numpy có thể lệch ~1e-12 so với rolling pandas) → so tín hiệu
+        _, pos_np, _ = calculate_ut_bot_np(rates['high'], rates['low'], rates['close'], sensitivity, period)
+        np_signals = np.array_equal(flips(pos_np), flips(new['pos']))
+
+        passed = same_stop and same_pos and same_flips and same_next
+        ok = ok and passed
+        print(f"{'✅' if passed else '❌'} sensitivity={sensitivity} period={period}: "
+              f"stop={same_stop} pos={same_pos} flips={len(flips(new['pos']))} same={same_flips} "
+              f"next={same_next} np_signals={np_signals} | legacy {t_legacy * 1e3:.0f} ms → {t_new * 1e3:.1f} ms")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
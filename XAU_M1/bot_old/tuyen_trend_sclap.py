@@ -8,7 +8,7 @@ from datetime import datetime
 # Import local modules
 sys.path.append('..') 
 from db import Database
-from utils import load_config, connect_mt5, get_data, send_telegram, manage_position, get_mt5_error_message, calculate_rsi
+from utils import load_config, connect_mt5, get_data, send_telegram, manage_positions, get_mt5_error_message, calculate_rsi
 
 # Initialize Database
 db = Database()
@@ -121,8 +121,7 @@ def m1_scalp_logic(config, error_count=0):
         # --- 1. Manage Existing Positions ---
         positions = mt5.positions_get(symbol=symbol, magic=magic)
         if positions:
-            for pos in positions:
-                manage_position(pos.ticket, symbol, magic, config)
+            manage_positions(symbol, magic, config, positions)
             if len(positions) >= max_positions:
                 return error_count, 0
 
@@ -8,6 +8,9 @@ import io
 import MetaTrader5 as mt5
 from utils import connect_mt5, load_config
 from update_db import load_strategy_configs
+from tradecore.execution_stats import execution_histograms, LATENCY_LABELS, SLIPPAGE_LABELS
+from tradecore.governor import fetch_stats as fetch_governor_stats
+from tradecore.profiler import latest_profile
 
 # Use absolute path for templates folder
 dashboard_dir = os.path.dirname(os.path.abspath(__file__))
@@ -215,6 +218,10 @@ def index():
     # --- HOURLY STATS (VIETNAM TIME) ---
     hourly_stats = process_hourly_stats(orders)
 
+    # --- ORDER EXECUTION: latency / slippage histogram (tradecore.execution) ---
+    execution_stats = execution_histograms(get_db(), cutoff_str, end_str if parsed else None)
+    cycle_profile = latest_profile(get_db())
+
     return render_template('index.html', 
                            orders=orders, 
                            signals=signals, 
@@ -225,6 +232,10 @@ def index():
                            losses=losses,
                            bot_stats=bot_stats,
                            hourly_stats=hourly_stats,
+                           execution_stats=execution_stats,
+                           cycle_profile=cycle_profile,
+                           latency_labels=LATENCY_LABELS,
+                           slippage_labels=SLIPPAGE_LABELS,
                            current_filter=current_filter,
                            filter_label=filter_label,
                            from_date=from_date_param if from_date_param else '',
@@ -494,6 +505,14 @@ def signals_page():
                          filter_label=filter_label,
                          strategies=strategies)
 
+@app.route('/api/governor')
+def governor_stats():
+    """Counters của governor exposure / tốc độ lệnh (tradecore.governor). ?address=host:port"""
+    stats = fetch_governor_stats(request.args.get('address') or None)
+    if stats is None:
+        return jsonify({'error': 'Governor is not running'}), 503
+    return jsonify(stats)
+
 @app.route('/api/check_signal/<int:signal_id>')
 def check_signal(signal_id):
     """Check signal result via MT5"""
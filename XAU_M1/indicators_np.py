@@ -0,0 +1,6 @@
+"""Shim: module đã chuyển sang package dùng chung tradecore.indicators_np (thư mục gốc repo)."""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tradecore.indicators_np import *  # noqa: F401,F403
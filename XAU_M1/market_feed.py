@@ -0,0 +1,15 @@
+"""
+Shim: market data hub đã chuyển sang package dùng chung tradecore.market_feed (thư mục gốc repo).
+Chạy: python market_feed.py configs/config_1.json [--interval 0.25]
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tradecore.market_feed import (
+    RATES_DTYPE, MAX_TF, DEFAULT_CAPACITY, STALE_AFTER_SECONDS, RETRY_ATTACH_SECONDS, FeedTick,
+    FeedWriter, FeedReader, segment_name, get_reader, get_data, get_data_np, get_tick, run_feeder, main
+)
+
+if __name__ == "__main__":
+    main()
@@ -26,6 +26,18 @@ def parse_indicators(ind_str):
     except Exception:
         return {}
 
+# Cot chi bao co kieu trong CSV export moi cua dashboard (tu bang signal_indicators)
+TYPED_COLUMNS = {"rsi": "RSI", "adx": "ADX", "atr": "ATR"}
+
+def row_indicator(row, key):
+    """Chi bao `key` cua 1 dong: cot co kieu neu CSV co, CSV cu thi parse Signal Indicators (1 lan / dong)."""
+    column = TYPED_COLUMNS.get(key)
+    if column in row:
+        return safe_float(row[column])
+    if "_indicators" not in row:
+        row["_indicators"] = parse_indicators(row.get("Signal Indicators", ""))
+    return safe_float(row["_indicators"].get(key))
+
 def get_session(hour_utc):
     """Map hour (0-23) to session name. Assume server time ~ UTC+0 or UTC+2."""
     if 0 <= hour_utc < 8:
@@ -76,8 +88,7 @@ def analyze_one_bot(closed, out):
     rsi_wins = []
     rsi_losses = []
     for r in closed:
-        ind = parse_indicators(r.get("Signal Indicators", ""))
-        rsi = safe_float(ind.get("rsi"))
+        rsi = row_indicator(r, "rsi")
         if rsi is not None:
             (rsi_wins if r.get("Win/Loss") == "Win" else rsi_losses).append(rsi)
     if rsi_wins or rsi_losses:
@@ -96,8 +107,7 @@ def analyze_one_bot(closed, out):
     adx_wins = []
     adx_losses = []
     for r in closed:
-        ind = parse_indicators(r.get("Signal Indicators", ""))
-        adx = safe_float(ind.get("adx"))
+        adx = row_indicator(r, "adx")
         if adx is not None:
             (adx_wins if r.get("Win/Loss") == "Win" else adx_losses).append(adx)
     if adx_wins or adx_losses:
@@ -116,8 +126,7 @@ def analyze_one_bot(closed, out):
     atr_wins = []
     atr_losses = []
     for r in closed:
-        ind = parse_indicators(r.get("Signal Indicators", ""))
-        atr = safe_float(ind.get("atr"))
+        atr = row_indicator(r, "atr")
         if atr is not None:
             (atr_wins if r.get("Win/Loss") == "Win" else atr_losses).append(atr)
     if atr_wins or atr_losses:
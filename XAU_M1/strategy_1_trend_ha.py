@@ -9,7 +9,8 @@ from datetime import datetime
 sys.path.append('..') # Add parent directory to path to find XAU_M1 modules if running from sub-folder
 from db import Database
 from db import Database
-from utils import load_config, connect_mt5, get_data, calculate_heiken_ashi, send_telegram, is_doji, manage_position, get_mt5_error_message, calculate_rsi, calculate_adx
+from utils import load_config, connect_mt5, get_data, get_tick, calculate_heiken_ashi, send_telegram, is_doji, manage_positions, get_mt5_error_message, calculate_rsi, calculate_adx
+from tradecore.execution import send_order
 
 # Initialize Database
 db = Database()
@@ -26,8 +27,7 @@ def strategy_1_logic(config, error_count=0):
     #positions = mt5.positions_get(symbol=symbol, magic=magic)
     if positions:
         # Manage Trailing SL for all open positions of this strategy
-        for pos in positions:
-            manage_position(pos.ticket, symbol, magic, config)
+        manage_positions(symbol, magic, config, positions)
             
         if len(positions) >= max_positions:
             # Silent return to avoid spam
@@ -86,7 +86,8 @@ def strategy_1_logic(config, error_count=0):
 
     # 3. Check Signals
     signal = None
-    price = mt5.symbol_info_tick(symbol).ask if current_trend == "BULLISH" else mt5.symbol_info_tick(symbol).bid
+    tick = get_tick(symbol)
+    price = tick.ask if current_trend == "BULLISH" else tick.bid
     
     # Detailed Logging
     print(f"\n{'='*80}")
@@ -285,7 +286,7 @@ def strategy_1_logic(config, error_count=0):
             "type_filling": mt5.ORDER_FILLING_FOK,
         }
         
-        result = mt5.order_send(request)
+        result = send_order(request, "Strategy_1_Trend_HA", db_path=db.db_path)
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             print(f"✅ Order Executed: {result.order}")
             db.log_order(result.order, "Strategy_1_Trend_HA", symbol, signal, volume, price, sl, tp, result.comment, account_id=config['account'])
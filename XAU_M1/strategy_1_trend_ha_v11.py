@@ -17,7 +17,8 @@ _script_dir = os.path.dirname(os.path.abspath(__file__))
 if _script_dir not in sys.path:
     sys.path.insert(0, _script_dir)
 from db import Database
-from utils import load_config, connect_mt5, get_data, calculate_heiken_ashi, send_telegram, is_doji, manage_position, get_mt5_error_message, calculate_rsi, calculate_adx
+from utils import load_config, connect_mt5, get_data, calculate_heiken_ashi, send_telegram, is_doji, manage_positions, get_mt5_error_message, calculate_rsi, calculate_adx
+from tradecore.execution import send_order
 
 # Initialize Database
 db = Database()
@@ -76,8 +77,7 @@ def strategy_1_logic(config, error_count=0):
     all_positions = mt5.positions_get(symbol=symbol)
     positions = [pos for pos in (all_positions or []) if pos.magic == magic]
     if positions:
-        for pos in positions:
-            manage_position(pos.ticket, symbol, magic, config)
+        manage_positions(symbol, magic, config, positions)
         if len(positions) >= max_positions:
             return error_count, 0
 
@@ -259,7 +259,7 @@ def strategy_1_logic(config, error_count=0):
             "type_time": mt5.ORDER_TIME_GTC,
             "type_filling": mt5.ORDER_FILLING_FOK,
         }
-        result = mt5.order_send(request)
+        result = send_order(request, STRATEGY_NAME, db_path=db.db_path)
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             print(f"✅ Order: {result.order}")
             db.log_order(result.order, STRATEGY_NAME, symbol, signal, volume, price, sl, tp, result.comment, account_id=config['account'])
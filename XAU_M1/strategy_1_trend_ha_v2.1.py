@@ -10,7 +10,9 @@ from datetime import datetime, timedelta
 # Import local modules
 sys.path.append('..')
 from db import Database
-from utils import load_config, connect_mt5, get_data, calculate_heiken_ashi, send_telegram, is_doji, manage_position, get_mt5_error_message, calculate_rsi, calculate_adx, calculate_atr
+from utils import load_config, connect_mt5, get_data, calculate_heiken_ashi, send_telegram, is_doji, manage_positions, get_mt5_error_message, calculate_rsi, calculate_adx, calculate_atr
+from tradecore.execution import send_order
+from swing_points import swing_point_indices
 
 # Initialize Database
 db = Database()
@@ -96,27 +98,12 @@ def check_chop_range(df_m1, atr_val, lookback=10, body_threshold=0.5, overlap_th
     return False, f"Not CHOP: body_avg={body_avg:.2f}, overlap={avg_overlap:.1%}"
 
 def find_swing_points(df, lookback=5):
-    """Find swing highs and lows"""
-    swing_highs = []
-    swing_lows = []
-    
-    for i in range(lookback, len(df) - lookback):
-        is_swing_high = True
-        for j in range(i - lookback, i + lookback + 1):
-            if j != i and df.iloc[j]['high'] >= df.iloc[i]['high']:
-                is_swing_high = False
-                break
-        if is_swing_high:
-            swing_highs.append({'index': i, 'price': df.iloc[i]['high']})
-        
-        is_swing_low = True
-        for j in range(i - lookback, i + lookback + 1):
-            if j != i and df.iloc[j]['low'] <= df.iloc[i]['low']:
-                is_swing_low = False
-                break
-        if is_swing_low:
-            swing_lows.append({'index': i, 'price': df.iloc[i]['low']})
-    
+    """Find swing highs and lows (rolling max/min căn giữa, bất đẳng thức chặt như cũ)"""
+    idx_high, idx_low = swing_point_indices(df['high'].to_numpy(), df['low'].to_numpy(), lookback)
+    high = df['high'].to_numpy()
+    low = df['low'].to_numpy()
+    swing_highs = [{'index': int(i), 'price': high[i]} for i in idx_high]
+    swing_lows = [{'index': int(i), 'price': low[i]} for i in idx_low]
     return swing_highs, swing_lows
 
 def get_last_swing_range(df_m1, signal_type, lookback=30):
@@ -546,9 +533,8 @@ def strategy_1_logic_v21(config, error_count=0):
     if positions:
         # V2.1: Only manage trailing SL/breakeven, do NOT allow manual/script close
         # Exit only via TP or SL (handled by MT5)
-        for pos in positions:
-            # Only manage trailing SL, not close positions
-            manage_position(pos.ticket, symbol, magic, config)
+        # Only manage trailing SL, not close positions
+        manage_positions(symbol, magic, config, positions)
         if len(positions) >= max_positions:
             return error_count, 0
     
@@ -840,7 +826,7 @@ def strategy_1_logic_v21(config, error_count=0):
             "type_filling": mt5.ORDER_FILLING_FOK,
         }
         
-        result = mt5.order_send(request)
+        result = send_order(request, "Strategy_1_Trend_HA_V2.1", db_path=db.db_path)
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             print(f"✅ Order Executed: {result.order}")
             db.log_order(result.order, "Strategy_1_Trend_HA_V2.1", symbol, signal_type, volume, execution_price, sl, tp, result.comment, account_id=config['account'])
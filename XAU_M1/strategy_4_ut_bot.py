@@ -7,46 +7,27 @@ import pandas as pd
 # Import local modules
 sys.path.append('..')
 from db import Database
-from utils import load_config, connect_mt5, get_data, send_telegram, calculate_adx, manage_position, get_mt5_error_message, calculate_rsi
+from utils import load_config, connect_mt5, get_data, send_telegram, calculate_adx, manage_positions, get_mt5_error_message, calculate_rsi
+from tradecore.execution import send_order
+from indicators_np import ut_bot_trailing_stop_np
 from datetime import datetime, timedelta
 
 # Initialize Database
 db = Database()
 
 def calculate_ut_bot(df, sensitivity=2, period=10):
-    # ... (Keep existing implementation)
     """
-    Approximate UT Bot Logic:
-    ATR Trailing Stop logic basically.
+    UT Bot Logic: ATR Trailing Stop.
+    Thêm cột atr, n_loss, x_atr_trailing_stop, pos vào df (kernel: indicators_np.ut_bot_trailing_stop_np).
     """
-    df['atr'] = df['high'].combine(df['close'].shift(1), max) - df['low'].combine(df['close'].shift(1), min)
+    prev_close = df['close'].shift(1)
+    df['atr'] = np.fmax(df['high'], prev_close) - np.fmin(df['low'], prev_close)
     df['atr'] = df['atr'].rolling(window=period).mean()
     df['n_loss'] = sensitivity * df['atr']
-    
-    # Initialize Stop Logic columns
-    df['x_atr_trailing_stop'] = 0.0
-    df['pos'] = 0 # 1 for Buy, -1 for Sell
-    
-    for i in range(1, len(df)):
-        # Calculate trailing stop
-        if df.at[i, 'close'] > df.at[i-1, 'x_atr_trailing_stop'] and df.at[i-1, 'close'] > df.at[i-1, 'x_atr_trailing_stop']:
-            df.at[i, 'x_atr_trailing_stop'] = max(df.at[i-1, 'x_atr_trailing_stop'], df.at[i, 'close'] - df.at[i, 'n_loss'])
-        elif df.at[i, 'close'] < df.at[i-1, 'x_atr_trailing_stop'] and df.at[i-1, 'close'] < df.at[i-1, 'x_atr_trailing_stop']:
-            df.at[i, 'x_atr_trailing_stop'] = min(df.at[i-1, 'x_atr_trailing_stop'], df.at[i, 'close'] + df.at[i, 'n_loss'])
-        elif df.at[i, 'close'] > df.at[i-1, 'x_atr_trailing_stop']:
-            df.at[i, 'x_atr_trailing_stop'] = df.at[i, 'close'] - df.at[i, 'n_loss']
-        else:
-            df.at[i, 'x_atr_trailing_stop'] = df.at[i, 'close'] + df.at[i, 'n_loss']
-            
-        # Determine Position
-        prev_pos = df.at[i-1, 'pos']
-        if df.at[i, 'close'] > df.at[i-1, 'x_atr_trailing_stop'] and df.at[i-1, 'close'] < df.at[i-1, 'x_atr_trailing_stop']:
-             df.at[i, 'pos'] = 1 # BUY Signal transition
-        elif df.at[i, 'close'] < df.at[i-1, 'x_atr_trailing_stop'] and df.at[i-1, 'close'] > df.at[i-1, 'x_atr_trailing_stop']:
-             df.at[i, 'pos'] = -1 # SELL Signal transition
-        else:
-             df.at[i, 'pos'] = prev_pos if prev_pos != 0 else (1 if df.at[i, 'close'] > df.at[i, 'x_atr_trailing_stop'] else -1)
 
+    stop, pos = ut_bot_trailing_stop_np(df['close'].to_numpy(), df['n_loss'].to_numpy())
+    df['x_atr_trailing_stop'] = stop
+    df['pos'] = pos  # 1 for Buy, -1 for Sell
     return df
 
 def strategy_4_logic(config, error_count=0):
@@ -58,8 +39,7 @@ def strategy_4_logic(config, error_count=0):
     # 2. Check Global Max Positions & Manage Existing
     positions = mt5.positions_get(symbol=symbol, magic=magic)
     if positions:
-        for pos in positions:
-            manage_position(pos.ticket, symbol, magic, config)
+        manage_positions(symbol, magic, config, positions)
             
         if len(positions) >= max_positions:
             return error_count, 0
@@ -361,7 +341,7 @@ def strategy_4_logic(config, error_count=0):
             "type_filling": mt5.ORDER_FILLING_FOK,
         }
         
-        result = mt5.order_send(request)
+        result = send_order(request, "Strategy_4_UT_Bot", db_path=db.db_path)
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             print(f"✅ Order Success: {result.order}")
             db.log_order(result.order, "Strategy_4_UT_Bot", symbol, signal, volume, price, sl, tp, result.comment, account_id=config['account'])
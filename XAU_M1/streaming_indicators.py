@@ -0,0 +1,6 @@
+"""Shim: module đã chuyển sang package dùng chung tradecore.streaming_indicators (thư mục gốc repo)."""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tradecore.streaming_indicators import *  # noqa: F401,F403
@@ -10,7 +10,8 @@ from datetime import datetime, timedelta
 # Import local modules
 sys.path.append('..')
 from db import Database
-from utils import load_config, connect_mt5, get_data, calculate_heiken_ashi, send_telegram, is_doji, manage_position, get_mt5_error_message, calculate_rsi, calculate_adx, calculate_atr
+from utils import load_config, connect_mt5, get_data, calculate_heiken_ashi, send_telegram, is_doji, manage_positions, get_mt5_error_message, calculate_rsi, calculate_adx, calculate_atr
+from tradecore.execution import send_order
 
 # Initialize Database
 db = Database()
@@ -546,9 +547,8 @@ def strategy_1_logic_v21(config, error_count=0):
     if positions:
         # V2.1: Only manage trailing SL/breakeven, do NOT allow manual/script close
         # Exit only via TP or SL (handled by MT5)
-        for pos in positions:
-            # Only manage trailing SL, not close positions
-            manage_position(pos.ticket, symbol, magic, config)
+        # Only manage trailing SL, not close positions
+        manage_positions(symbol, magic, config, positions)
         if len(positions) >= max_positions:
             return error_count, 0
     
@@ -840,7 +840,7 @@ def strategy_1_logic_v21(config, error_count=0):
             "type_filling": mt5.ORDER_FILLING_FOK,
         }
         
-        result = mt5.order_send(request)
+        result = send_order(request, "Strategy_1_Trend_HA_V2.1", db_path=db.db_path)
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             print(f"✅ Order Executed: {result.order}")
             db.log_order(result.order, "Strategy_1_Trend_HA_V2.1", symbol, signal_type, volume, execution_price, sl, tp, result.comment, account_id=config['account'])
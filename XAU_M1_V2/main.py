@@ -20,6 +20,17 @@ def main():
 
     ]
 
+    # Mặc định: 1 process nạp mọi strategy như plugin (1 kết nối MT5, cache nến dùng chung,
+    # chu kỳ riêng + cô lập lỗi từng strategy, xem tradecore/runner.py).
+    # --subprocess: chế độ cũ, mỗi strategy 1 interpreter riêng.
+    if "--subprocess" not in sys.argv[1:]:
+        sys.path.append(os.path.dirname(base_dir))
+        from tradecore.runner import run_folder
+        print(f"🚀 Starting {len(scripts)} strategies in one process...")
+        print(f"📂 Execution Directory: {base_dir}")
+        run_folder(base_dir, scripts)
+        return
+
     processes = []
     
     print("🚀 Starting all 5 XAU_M1 Bots...")
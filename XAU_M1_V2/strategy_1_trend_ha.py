@@ -12,7 +12,8 @@ _script_dir = os.path.dirname(os.path.abspath(__file__))
 if _script_dir not in sys.path:
     sys.path.insert(0, _script_dir)
 from db import Database
-from utils import load_config, connect_mt5, get_data, calculate_heiken_ashi, send_telegram, is_doji_ha, manage_position, get_mt5_error_message, calculate_rsi, calculate_adx, calculate_atr
+from utils import load_config, connect_mt5, get_data, calculate_heiken_ashi, send_telegram, is_doji_ha, manage_positions, get_mt5_error_message, calculate_rsi, calculate_adx, calculate_atr
+from tradecore.execution import send_order
 
 # Initialize Database
 db = Database()
@@ -63,6 +64,14 @@ def _save_initial_sl_map(ticket, initial_sl_pips):
     except Exception as e:
         print(f"⚠️ Write initial_sl_map: {e}")
 
+def tick_logic(config):
+    """Event mode (tradecore.runner): giữa 2 lần đóng nến chỉ trailing/breakeven, giữ initial_sl_map"""
+    symbol = config['symbol']
+    magic = config['magic']
+    positions = [pos for pos in (mt5.positions_get(symbol=symbol) or []) if pos.magic == magic]
+    if positions:
+        manage_positions(symbol, magic, config, positions, initial_sl_map=_load_initial_sl_map())
+
 def strategy_1_logic(config, error_count=0):
     symbol = config['symbol']
     volume = config['volume']
@@ -75,8 +84,7 @@ def strategy_1_logic(config, error_count=0):
     #positions = mt5.positions_get(symbol=symbol, magic=magic)
     if positions:
         initial_sl_map = _load_initial_sl_map()
-        for pos in positions:
-            manage_position(pos.ticket, symbol, magic, config, initial_sl_map=initial_sl_map)
+        manage_positions(symbol, magic, config, positions, initial_sl_map=initial_sl_map)
             
         if len(positions) >= max_positions:
             # Silent return to avoid spam
@@ -391,7 +399,7 @@ def strategy_1_logic(config, error_count=0):
             "type_filling": mt5.ORDER_FILLING_FOK,
         }
         
-        result = mt5.order_send(request)
+        result = send_order(request, "Strategy_1_Trend_HA", db_path=db.db_path)
         if result.retcode == mt5.TRADE_RETCODE_DONE:
             # Cập nhật last_trade_time ổn định (file) để spam filter 120s hoạt động đúng
             tick_after = mt5.symbol_info_tick(symbol)
@@ -19,7 +19,8 @@ import pandas as pd
 # Import local modules (chạy từ thư mục XAU_M1_V2)
 sys.path.append('..')
 from db import Database
-from utils import load_config, connect_mt5, get_data, send_telegram, manage_position, get_mt5_error_message, calculate_rsi, calculate_adx
+from utils import load_config, connect_mt5, get_data, send_telegram, manage_positions, get_mt5_error_message, calculate_rsi, calculate_adx
+from tradecore.execution import send_order
 from datetime import datetime, timedelta
 
 db = Database()
@@ -34,8 +35,7 @@ def strategy_5_logic(config, error_count=0):
 
     positions = mt5.positions_get(symbol=symbol, magic=magic)
     if positions:
-        for pos in positions:
-            manage_position(pos.ticket, symbol, magic, config)
+        manage_positions(symbol, magic, config, positions)
         if len(positions) >= max_positions:
             return error_count, 0
 
@@ -369,7 +369,7 @@ def strategy_5_logic(config, error_count=0):
         "type_time": mt5.ORDER_TIME_GTC,
         "type_filling": mt5.ORDER_FILLING_FOK,
     }
-    result = mt5.order_send(request)
+    result = send_order(request, STRATEGY_NAME, db_path=db.db_path)
     if result.retcode == mt5.TRADE_RETCODE_DONE:
         print(f"✅ Order Success: {result.order}")
         db.log_order(result.order, STRATEGY_NAME, symbol, signal, volume, price, sl, tp, result.comment, account_id=config['account'])
@@ -0,0 +1,68 @@
+"""
+tradecore — thư viện dùng chung cho mọi thư mục bot (XAU_M1, XAU_M1_V2, XAU_M1_REAL, BTC_M1,
+ETH_M1, EUR_M1_REAL, EURUSD_M1_REAL_TUYEN, GridStep, GridStepReal).
+
+- indicators           : indicator pandas (Heiken Ashi, ATR, ADX, RSI, doji) — bản chuẩn duy nhất
+- indicator_cache      : memo LRU cho indicator theo (symbol, timeframe, số nến, time nến cuối)
+- indicators_np        : kernel NumPy trên structured array (không tạo DataFrame)
+- streaming_indicators : indicator cập nhật O(1) mỗi nến
+- swing_points         : swing high/low (rolling max/min + tracker incremental)
+- bar_cache            : cache nến theo (symbol, timeframe), chỉ hỏi terminal vài nến cuối
+- data                 : config, kết nối MT5, Telegram, get_data / get_data_np
+- market_feed          : feeder nến / tick qua shared memory cho main.py --subprocess; get_data / get_tick ưu tiên feed
+- trades_db            : Database của trades.db — 1 kết nối WAL / process, hàng đợi write-behind cho signal
+- history_sync         : deal history MT5 → trades.db theo high-water mark mỗi account (update_db chỉ lấy deal mới)
+- position_index       : position đã đóng gom từ deal MT5, giữ trong RAM / process (last-N, chuỗi thua, SL gần nhất) — bật bằng TRADECORE_POSITION_INDEX=1
+- signal_stats         : RSI / ADX của signal gần mỗi order + bucket thắng / thua bằng SQL (dashboard)
+- telegram             : hàng đợi Telegram + thread nền (gom tin, 429 retry_after, đếm tin bỏ)
+- orders               : manage_position / manage_positions (1 snapshot cho mọi lệnh), helper lệnh chờ / đóng lệnh theo magic, mã lỗi MT5
+- execution            : send_order — cache filling mode, gửi lại khi requote, đo latency / slippage
+- execution_stats      : bảng order_executions + histogram latency / slippage cho dashboard
+- governor             : governor exposure toàn tài khoản + token bucket tốc độ lệnh (TCP localhost, nhiều process)
+- profiler             : đo thời gian từng stage của vòng strategy (ring buffer, p50/p95/p99 → cycle_profile)
+- mt5_accounting       : (opt-in, TRADECORE_MT5_ACCOUNTING=1) đếm / đo lời gọi MT5 API theo hàm và call site
+- fake_mt5             : MetaTrader5 giả lập (replay nến / tick, lệnh, SL/TP, history deal, retcode, đồng hồ giả) cho Linux
+- backtest             : chạy nguyên *_logic trên nến M1 lịch sử qua fake_mt5 → trades.db cùng schema (song song theo đoạn)
+- signal_matrix        : điều kiện vào lệnh Strategy 1 / 4 dạng mảng trên toàn lịch sử (lọc tham số trước khi backtest)
+- bar_events           : phát hiện nến mới từ tick (event mode: phân tích khi đóng nến)
+- runner               : chạy mọi strategy của 1 thư mục bot trong 1 process (asyncio, 1 kết nối MT5)
+
+`utils.py` của từng thư mục bot là shim re-export từ đây, chỉ giữ các hàm riêng của bot đó;
+`db.py` là shim của trades_db (chỉ giữ đường dẫn trades.db mặc định của thư mục).
+Mọi thay đổi số học phải qua golden check (từ thư mục gốc repo): python -m tradecore.golden_check
+(hoặc python tradecore/golden_check.py)
+
+Phiên bản:
+- 1.0.0: gộp utils của 9 thư mục bot; golden fixtures cho indicator
+- 1.1.0: indicator_cache (HA/ATR/ADX/RSI memo, manage_position dùng ATR cache)
+- 1.2.0: orders.manage_positions — breakeven/trailing theo lô, gửi SL cùng lúc
+- 1.3.0: runner — strategy plugin trên 1 event loop, thay main.py spawn subprocess
+- 1.4.0: bar_events — event mode "bar_close" cho runner và vòng lặp tuyen_trend
+- 1.5.0: telegram — send_telegram không chặn (hàng đợi + thread nền)
+- 1.6.0: execution — send_order (filling cache, requote retry, histogram latency/slippage)
+- 1.7.0: governor — exposure / tốc độ lệnh dùng chung giữa các process bot
+- 1.8.0: profiler — thời gian stage của vòng strategy (runner, GridStep v5), bảng Cycle Profile trên dashboard
+- 1.9.0: mt5_accounting — proxy MetaTrader5 đếm lời gọi / dòng / byte / lặp lại theo call site
+- 1.10.0: fake_mt5 — terminal mô phỏng chạy *_logic trên Linux, tất định, nhanh hơn thời gian thực
+- 1.11.0: backtest — event-driven trên fake_mt5, kết quả đọc bằng dashboard; HA/ATR/ADX/RSI và rates_to_df
+          tính phần từng phần tử bằng NumPy (kết quả giống từng bit, nhanh 4-9 lần khi cache miss)
+- 1.12.0: signal_matrix — ma trận tín hiệu vectorized cho Strategy 1 / 4, cùng cửa sổ nến với logic
+          (nến M5 / H1 forming, RSI / EMA / UT Bot theo cửa sổ); check_signal_matrix so với logic qua fake_mt5
+- 1.13.0: trades_db — gộp db.py của các thư mục bot; kết nối WAL dùng chung, log_signal / order_executions
+          ghi theo lô ở thread nền, lệnh ghi đồng bộ
+- 1.14.0: trades_db.MIGRATIONS — schema theo PRAGMA user_version (khởi động với schema mới không còn
+          table_info / ALTER), index cho truy vấn bot / dashboard; check_query_plans kiểm query plan
+- 1.15.0: trades_db v4 — bảng signal_indicators (chỉ báo có kiểu, trigger + backfill); signal_stats thay
+          json.loads từng signal trong dashboard bằng SQL
+- 1.16.0: history_sync + trades_db v5 (mt5_deals / mt5_sync_state) — GridStep/update_db.py chỉ hỏi deal mới
+          từ high-water mark, ghi order thay đổi trong 1 transaction; --interval cho vòng lặp, --full để resync
+- 1.17.0: position_index — các hàm GridStep đọc history (utils, grid_step_common, v5, grid_zone_reentry_fsm), opt-in qua TRADECORE_POSITION_INDEX=1
+          dùng chung 1 index cập nhật tăng dần; history_sync gộp deal bằng cùng summarize()
+"""
+__version__ = "1.17.0"
+
+import os as _os
+
+if _os.environ.get("TRADECORE_MT5_ACCOUNTING"):
+    from .mt5_accounting import install_from_env
+    install_from_env()
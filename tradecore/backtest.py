@@ -0,0 +1,595 @@
+"""
+Backtest event-driven: chạy nguyên hàm strategy_*_logic / tuyen_trend_logic (không sửa file strategy)
+trên nến M1 lịch sử qua terminal giả lập (fake_mt5), ghi kết quả ra trades.db cùng schema để dashboard đọc được.
+
+    python -m tradecore.backtest XAU_M1/strategy_1_trend_ha.py --bars XAUUSD=data/xauusd_m1_2024.npy --jobs 8
+    python -m tradecore.backtest EURUSD_M1_REAL_TUYEN/tuyen_trend.py --logic tuyen_trend_logic \\
+        --config EURUSD_M1_REAL_TUYEN/configs/config_tuyen.json --bars EURUSD=eurusd_m1.csv --from 2024-01-01
+    python -m tradecore.backtest XAU_M1/strategy_4_ut_bot.py --synthetic 20000      # thử nhanh, không cần dữ liệu
+
+Vòng sự kiện (như event mode "bar_close" của runner):
+- điểm giá đầu của mỗi nến M1 mới → logic(config, error_count) 1 lần; get_data đi qua bar_cache /
+  indicator_cache như bot thật nên mỗi lần gọi chỉ hỏi terminal vài nến cuối
+- các điểm giá còn lại của nến (L / H / C, hoặc tick thật): terminal giả khớp SL / TP / lệnh chờ; strategy
+  có lệnh mở thì chạy việc mức tick (tick_logic của file hoặc manage_positions) như runner;
+  không có lệnh / lệnh chờ thì nhảy thẳng tới nến kế tiếp
+- --logic-on point: gọi logic ở mọi điểm giá (gần với vòng 1 giây của bot không dùng event mode, chậm ~4 lần)
+- exception → backoff 2^n giây giả; 5 lệnh lỗi liên tiếp → tạm dừng 120 giây giả như runner
+- time.time / sleep / datetime.now của module strategy, utils / db của bot và tradecore theo đồng hồ giả;
+  Telegram bị tắt (chỉ đếm số tin)
+
+trades.db kết quả (Database của chính thư mục bot, cùng schema): signals / orders / grid_pending_orders /
+order_executions; mốc thời gian là giờ giả UTC (như CURRENT_TIMESTAMP / datetime('now') khi chạy thật);
+lệnh đóng được điền close_price / profit / close_time từ history deal như update_db.py (profit = tổng
+profit + swap + commission của deal OUT) ngay sau khi đóng → strategy đọc get_last_closed_orders thấy đúng.
+Xem trên dashboard: thêm đường dẫn vào "databases" của DashBoardMain/config.json (hoặc TRADES_DB_PATH=...),
+lọc theo from_date / to_date của khoảng backtest.
+
+--jobs N: chia khoảng thời gian thành N đoạn (theo ngày) chạy song song, mỗi đoạn 1 process với toàn bộ
+lịch sử trước đó làm warmup; hết đoạn thì không mở lệnh mới, chỉ quản lý nốt lệnh đang mở rồi gộp các
+trades.db con (ticket mỗi đoạn cách nhau TICKET_BLOCK). Balance mỗi đoạn bắt đầu lại từ --balance,
+trạng thái trong module (streak, cooldown) và max_positions không nối qua biên đoạn → lệch nhẹ quanh
+biên; --jobs 1 (mặc định) là chạy tuần tự chính xác.
+"""
+import os
+import sys
+import json
+import time
+import sqlite3
+import inspect
+import argparse
+import traceback
+import contextlib
+from datetime import datetime, timezone
+
+import numpy as np
+
+from . import fake_mt5, trades_db
+
+PAUSE_AFTER_ERRORS = 5
+PAUSE_SECONDS = 120
+MAX_BACKOFF = 60
+TICKET_BLOCK = 10_000_000        # khoảng ticket order / deal riêng của mỗi đoạn --jobs
+MAX_DRAIN_SECONDS = 7 * 86400    # hết đoạn: quản lý nốt lệnh mở tối đa 7 ngày giả
+PRINT_EXCEPTIONS = 3
+DEFAULT_WARMUP = 12000           # 200 nến H1: strategy đọc get_data(H1, 200)
+
+# (bảng, cột, điều kiện) — ghi lại mốc thời gian theo đồng hồ giả sau các hàm ghi của Database
+_TIME_FIXUPS = {
+    "log_signal": ("signals", "timestamp", "id = (SELECT MAX(id) FROM signals)"),
+    "log_order": ("orders", "open_time", "ticket = ?"),
+    "log_grid_pending": ("grid_pending_orders", "placed_at", "ticket = ?"),
+    "update_grid_pending_status": ("grid_pending_orders", "filled_at", "ticket = ? AND filled_at IS NOT NULL"),
+}
+# module của tradecore giữ đồng hồ thật (đo thời gian chạy / thread nền)
+_REAL_CLOCK = {"fake_mt5", "backtest", "telegram", "governor", "profiler", "mt5_accounting"}
+
+
+def _utc(ts):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(ts))
+
+
+def _parse_date(value):
+    """'YYYY-MM-DD' / 'YYYY-MM-DD HH:MM' (UTC) hoặc epoch giây."""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(value, fmt).replace(tzinfo=timezone.utc).timestamp()
+        except ValueError:
+            continue
+    raise SystemExit(f"ngày không hợp lệ: {value}")
+
+
+class _SimClockDatabase:
+    """
+    Bọc Database của bot: gọi nguyên hàm gốc rồi ghi lại mốc thời gian (CURRENT_TIMESTAMP / datetime('now')
+    là giờ máy) theo đồng hồ giả. Thuộc tính / hàm khác trả thẳng từ Database gốc.
+    """
+
+    def __init__(self, db, sim):
+        self.__dict__["_db"] = db
+        self.__dict__["_sim"] = sim
+        self.__dict__["_conn"] = sqlite3.connect(db.db_path)
+        self.__dict__["writes"] = 0
+
+    def __getattr__(self, name):
+        value = getattr(self._db, name)
+        fixup = _TIME_FIXUPS.get(name)
+        if fixup is not None and callable(value):
+            value = self._stamped(value, *fixup)
+        self.__dict__[name] = value
+        return value
+
+    def __setattr__(self, name, value):
+        setattr(self._db, name, value)
+
+    def _stamped(self, fn, table, column, where):
+        def call(*args, **kwargs):
+            result = fn(*args, **kwargs)
+            flush = getattr(self._db, "flush", None)
+            if flush is not None:
+                flush()        # log_signal đi qua hàng đợi write-behind: ghi trước khi sửa dòng MAX(id)
+            self.__dict__["writes"] += 1
+            params = [_utc(self._sim.now)]
+            if "?" in where:
+                params.append(kwargs.get("ticket", args[0] if args else None))
+            try:
+                self._conn.execute(f"UPDATE {table} SET {column} = ? WHERE {where}", params)
+                self._conn.commit()
+            except sqlite3.OperationalError:
+                pass   # bảng / cột không có trong schema của bot này
+            return result
+        call.__name__ = fn.__name__
+        return call
+
+
+class Backtest:
+    """1 strategy trên 1 SimTerminal đã start(): vòng sự kiện theo nến, đồng bộ lệnh đóng vào trades.db."""
+
+    def __init__(self, sim, plugin, logic_on="bar"):
+        self.sim = sim
+        self.plugin = plugin
+        self.config = plugin.config
+        self.symbol = plugin.config['symbol']
+        self.magic = plugin.config['magic']
+        self.feed = sim.feeds[self.symbol]
+        self.every_point = logic_on == "point"
+        self.db = plugin.module.db
+        self.raw_db = getattr(self.db, "_db", self.db)
+        self._profit_has_close_time = "close_time" in inspect.signature(self.raw_db.update_order_profit).parameters
+        self._conn = sqlite3.connect(self.raw_db.db_path)
+        self._deal_index = 0
+        self._position_deals = {}     # position_id -> [TradeDeal] của magic này
+        self.error_count = 0
+        self.last_error_code = 0
+        self.exceptions = 0
+        self.retry_at = 0.0
+        self.paused_until = 0.0
+        self.pauses = 0
+        self.logic_calls = 0
+        self.tick_calls = 0
+        self.closed_synced = 0
+        self.logic_seconds = 0.0
+
+    # ----- việc của strategy -----
+
+    def _logic(self):
+        t0 = time.perf_counter()
+        try:
+            self.error_count, self.last_error_code = self.plugin.logic(self.config, self.error_count)
+        except Exception as e:
+            self.exceptions += 1
+            self.retry_at = self.sim.now + min(MAX_BACKOFF, 2 ** min(self.exceptions, 6))
+            if self.exceptions <= PRINT_EXCEPTIONS:
+                sys.__stderr__.write(f"❌ [{self.plugin.name}] {_utc(self.sim.now)} Exception: {e}\n"
+                                     f"{traceback.format_exc()}")
+            return False
+        finally:
+            self.logic_calls += 1
+            self.logic_seconds += time.perf_counter() - t0
+        if self.error_count >= PAUSE_AFTER_ERRORS:
+            self.error_count = 0
+            self.paused_until = self.sim.now + PAUSE_SECONDS
+            self.pauses += 1
+        return True
+
+    def _tick_work(self):
+        from .runner import manage_open_positions
+        try:
+            tick_logic = getattr(self.plugin.module, 'tick_logic', None)
+            if tick_logic is not None:
+                tick_logic(self.config)
+            else:
+                manage_open_positions(self.plugin.module, self.config)
+        except Exception as e:
+            self.exceptions += 1
+            if self.exceptions <= PRINT_EXCEPTIONS:
+                sys.__stderr__.write(f"⚠️ [{self.plugin.name}] Tick work error: {e}\n")
+        self.tick_calls += 1
+
+    def _busy(self):
+        """Strategy có lệnh mở / lệnh chờ → phải đi từng điểm giá."""
+        magic = self.magic
+        for pos in self.sim.positions.values():
+            if pos["magic"] == magic:
+                return True
+        for order in self.sim.orders.values():
+            if order["magic"] == magic:
+                return True
+        return False
+
+    def _has_positions(self):
+        magic = self.magic
+        return any(pos["magic"] == magic for pos in self.sim.positions.values())
+
+    # ----- đồng bộ lệnh đóng (như update_db.py) -----
+
+    def sync_closed(self):
+        deals = self.sim.deals
+        if self._deal_index == len(deals):
+            return
+        closed = []
+        for deal in deals[self._deal_index:]:
+            if deal.magic != self.magic and deal.position_id not in self._position_deals:
+                continue
+            self._position_deals.setdefault(deal.position_id, []).append(deal)
+            if deal.entry in (fake_mt5.DEAL_ENTRY_OUT, fake_mt5.DEAL_ENTRY_OUT_BY):
+                closed.append(deal.position_id)
+        self._deal_index = len(deals)
+        for position_id in dict.fromkeys(closed):
+            if position_id in self.sim.positions:
+                continue   # mới đóng một phần
+            outs = [d for d in self._position_deals.pop(position_id)
+                    if d.entry in (fake_mt5.DEAL_ENTRY_OUT, fake_mt5.DEAL_ENTRY_OUT_BY)]
+            profit = round(sum(d.profit + d.swap + d.commission for d in outs), 2)
+            close_time = _utc(outs[-1].time)
+            if self._profit_has_close_time:
+                self.raw_db.update_order_profit(position_id, outs[-1].price, profit, close_time)
+            else:
+                self.raw_db.update_order_profit(position_id, outs[-1].price, profit)
+                try:
+                    self._conn.execute("UPDATE orders SET close_time = ? WHERE ticket = ?", (close_time, position_id))
+                    self._conn.commit()
+                except sqlite3.OperationalError:
+                    pass
+            self.closed_synced += 1
+
+    # ----- vòng sự kiện -----
+
+    def _advance(self, q):
+        """Đồng hồ tới điểm giá q của symbol strategy (False khi hết dữ liệu)."""
+        if q >= len(self.feed.pt_time):
+            return False
+        try:
+            self.sim.advance_to(float(self.feed.pt_time[q]), finish=False)
+        except fake_mt5.SimulationFinished:
+            return False
+        self.sync_closed()
+        return self.sim.now < self.sim.end_time or self.feed.p + 1 < len(self.feed.pt_time)
+
+    def run(self, end=None):
+        """Chạy tới `end` (epoch, mặc định hết dữ liệu)."""
+        feed, sim = self.feed, self.sim
+        pt_bar, bar_first = feed.pt_bar, feed.bar_first
+        end = sim.end_time if end is None else min(end, sim.end_time)
+        last_bar = -1
+        while sim.now < end:
+            p = max(feed.p, 0)
+            bar = int(pt_bar[p])
+            if sim.now >= self.paused_until:
+                if (bar != last_bar or self.every_point) and sim.now >= self.retry_at:
+                    if self._logic():
+                        last_bar = bar
+                elif self._has_positions():
+                    self._tick_work()
+            if self._busy() or self.every_point or bar != last_bar:
+                q = max(feed.p + 1, p + 1)
+            else:
+                q = int(bar_first[bar + 1])
+            if not self._advance(q):
+                break
+        self.sync_closed()
+
+    def drain(self, limit=MAX_DRAIN_SECONDS):
+        """Hết đoạn (--jobs): huỷ lệnh chờ, không mở lệnh mới, chỉ quản lý lệnh mở tới khi đóng hết."""
+        sim = self.sim
+        for ticket, order in list(sim.orders.items()):
+            if order["magic"] == self.magic:
+                sim._finish_order(ticket, fake_mt5.ORDER_STATE_CANCELED)
+        stop = sim.now + limit
+        while self._has_positions() and sim.now < stop:
+            self._tick_work()
+            if not self._advance(self.feed.p + 1):
+                break
+        self.sync_closed()
+
+    def stats(self):
+        return {"logic_calls": self.logic_calls, "tick_calls": self.tick_calls, "exceptions": self.exceptions,
+                "pauses": self.pauses, "closed_synced": self.closed_synced,
+                "logic_ms_avg": round(self.logic_seconds / max(self.logic_calls, 1) * 1e3, 3)}
+
+
+# ----- nạp strategy / chạy 1 đoạn -----
+
+def _bot_modules(bot_dir):
+    """Module đã import từ thư mục bot và tradecore (trừ module cần đồng hồ thật)."""
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    roots = (os.path.abspath(bot_dir) + os.sep, package_dir + os.sep)
+    out = []
+    for module in {id(m): m for m in list(sys.modules.values())}.values():
+        path = getattr(module, "__file__", None)
+        if not path or not os.path.abspath(path).startswith(roots):
+            continue
+        # theo __name__ của module, không theo key sys.modules ("MetaTrader5" là fake_mt5 sau install())
+        if getattr(module, "__name__", "").rpartition(".")[2] in _REAL_CLOCK:
+            continue
+        out.append(module)
+    return out
+
+
+class _TelegramCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+        return True
+
+
+def load_bars(spec):
+    """(symbol, nguồn) → structured array M1. Nguồn: đường dẫn (.npy / .csv) hoặc ("synthetic", số nến)."""
+    symbol, source = spec
+    if isinstance(source, tuple):
+        preset = fake_mt5.symbol_preset(symbol)
+        price = 1.085 if preset["digits"] >= 4 else 2350.0
+        return fake_mt5.synthetic_rates(source[1], price=price, step=price * 0.00015, digits=preset["digits"])
+    return fake_mt5.read_rates(source)
+
+
+def run_segment(job):
+    """
+    Chạy 1 đoạn trong process hiện tại (process con của --jobs, hoặc chính CLI khi --jobs 1).
+    job: dict script, logic, config, bars [(symbol, rates)], start, end, drain, db_path, index, balance, ...
+    """
+    os.environ.setdefault("TELEGRAM_API_BASE", "http://127.0.0.1:9")
+    from .runner import load_strategy
+
+    sim = fake_mt5.SimTerminal(balance=job["balance"], slippage_points=job["slippage_points"],
+                               commission_per_lot=job["commission"], latency_ms=job["latency_ms"],
+                               seed=job["seed"] + job["index"])
+    sim._next_order += job["index"] * TICKET_BLOCK
+    sim._next_deal += job["index"] * TICKET_BLOCK
+    for symbol, rates in job["bars"]:
+        sim.load_bars(symbol, rates)
+    fake_mt5.install(sim)
+    sim.start(at=job["start"])
+    from .bar_cache import bar_cache
+    from .indicator_cache import indicator_cache
+    from . import execution
+    bar_cache.invalidate()          # lần chạy trước trong cùng process (benchmark, --jobs 1 nhiều lần)
+    indicator_cache.invalidate()
+    execution._filling_cache.clear()
+
+    script = os.path.abspath(job["script"])
+    bot_dir = os.path.dirname(script)
+    if bot_dir not in sys.path:
+        sys.path.insert(0, bot_dir)
+    quiet = open(os.devnull, "w") if job["quiet"] else None
+    with contextlib.redirect_stdout(quiet or sys.stdout):
+        plugin = load_strategy(script, job["logic"], job["config"], db_path=job["db_path"])
+    db = plugin.module.db
+    if plugin.config.get('account'):
+        sim.login_id = int(plugin.config['account'])
+    plugin.module.db = _SimClockDatabase(db, sim)
+
+    telegram = _TelegramCounter()
+    modules = [plugin.module] + _bot_modules(bot_dir)
+    restore = fake_mt5.patch_clock(sim, *modules)
+    from .data import send_telegram as real_send_telegram
+    silenced = []
+    for module in modules:
+        if module.__dict__.get("send_telegram") is real_send_telegram:
+            silenced.append(module)
+            module.send_telegram = telegram
+
+    bt = Backtest(sim, plugin, logic_on=job["logic_on"])
+    wall = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(quiet or sys.stdout):
+            bt.run(job["end"])
+            if job["drain"]:
+                bt.drain()
+    finally:
+        trades_db.flush_all()
+        restore()
+        for module in silenced:
+            module.send_telegram = real_send_telegram
+        if quiet is not None:
+            quiet.close()
+    summary = sim.summary()
+    summary.update(bt.stats())
+    summary.update(index=job["index"], start=job["start"], end=job["end"], telegram=telegram.count,
+                   bars=int(np.searchsorted(sim.feeds[plugin.config['symbol']].m1["time"], job["end"], side="right")
+                            - np.searchsorted(sim.feeds[plugin.config['symbol']].m1["time"], job["start"])),
+                   wall_seconds=round(time.perf_counter() - wall, 2), db_path=job["db_path"])
+    return summary
+
+
+# ----- gộp / báo cáo -----
+
+def merge_databases(target, sources):
+    """Chép mọi bảng của các trades.db con vào target (bỏ cột id tự tăng để id nối tiếp theo thứ tự đoạn)."""
+    conn = sqlite3.connect(target)
+    try:
+        for source in sources:
+            conn.execute("ATTACH DATABASE ? AS part", (source,))
+            tables = conn.execute("SELECT name, sql FROM part.sqlite_master "
+                                  "WHERE type = 'table' AND name NOT LIKE 'sqlite_%'").fetchall()
+            for name, sql in tables:
+                if not conn.execute("SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+                                    (name,)).fetchone():
+                    conn.execute(sql)
+                main_columns = {row[1] for row in conn.execute(f'PRAGMA main.table_info("{name}")')}
+                columns = [row[1] for row in conn.execute(f'PRAGMA part.table_info("{name}")')
+                           if row[1] in main_columns and not (row[5] and row[1] == "id")]
+                column_list = ", ".join(f'"{c}"' for c in columns)
+                conn.execute(f'INSERT OR REPLACE INTO main."{name}" ({column_list}) '
+                             f'SELECT {column_list} FROM part."{name}"')
+            conn.commit()
+            conn.execute("DETACH DATABASE part")
+    finally:
+        conn.close()
+
+
+def trade_report(db_path):
+    """Thống kê lệnh đã đóng trong trades.db: số lệnh, win rate, lãi ròng, profit factor, max drawdown."""
+    conn = sqlite3.connect(db_path)
+    try:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(orders)")}
+        order_by = "COALESCE(close_time, open_time)" if "close_time" in columns else "open_time"
+        rows = conn.execute(f"SELECT profit FROM orders WHERE profit IS NOT NULL "
+                            f"ORDER BY {order_by}, ticket").fetchall()
+        signals = conn.execute("SELECT COUNT(*) FROM signals").fetchone()[0]
+    finally:
+        conn.close()
+    profits = np.array([r[0] for r in rows], dtype=float)
+    if not len(profits):
+        return {"trades": 0, "signals": signals}
+    equity = np.cumsum(profits)
+    gross_win, gross_loss = profits[profits > 0].sum(), -profits[profits < 0].sum()
+    return {
+        "trades": len(profits), "signals": signals,
+        "win_rate": round(100.0 * (profits > 0).mean(), 1), "net_profit": round(float(equity[-1]), 2),
+        "profit_factor": round(float(gross_win / gross_loss), 2) if gross_loss else None,
+        "max_drawdown": round(float((np.maximum.accumulate(np.r_[0.0, equity]) - np.r_[0.0, equity]).max()), 2),
+        "avg_trade": round(float(profits.mean()), 2),
+    }
+
+
+def split_range(start, end, jobs):
+    """Chia [start, end) thành tối đa `jobs` đoạn, biên tròn ngày (UTC)."""
+    if jobs <= 1:
+        return [(start, end)]
+    step = max(86400.0, np.ceil((end - start) / jobs / 86400.0) * 86400.0)
+    edges = [start]
+    edge = (start // 86400.0 + 1) * 86400.0 + step - 86400.0
+    while edge < end:
+        edges.append(edge)
+        edge += step
+    edges.append(end)
+    return list(zip(edges[:-1], edges[1:]))
+
+
+def run(script, bars, logic=None, config=None, out=None, start=None, end=None, jobs=1, warmup=DEFAULT_WARMUP,
+        balance=10000.0, slippage_points=0, commission=0.0, latency_ms=0.0, seed=0, logic_on="bar", quiet=True):
+    """
+    Chạy backtest, trả về (db_path, report, [summary từng đoạn]).
+    bars: [(symbol, đường dẫn | ("synthetic", số nến))] — symbol đầu tiên nên là symbol của strategy.
+    """
+    script = os.path.abspath(script)
+    name = os.path.splitext(os.path.basename(script))[0]
+    if out is None:
+        out = os.path.join(os.path.dirname(script), "backtest", name, "trades.db")
+    out = os.path.abspath(out)
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    for suffix in ("", "-wal", "-shm", "-journal"):
+        if os.path.exists(out + suffix):
+            os.remove(out + suffix)   # kết quả backtest cũ của cùng strategy
+
+    loaded = [(symbol, load_bars((symbol, source))) for symbol, source in bars]
+    times = loaded[0][1]["time"]
+    first = float(times[min(warmup, len(times) - 1)])
+    start = max(first, start) if start is not None else first
+    end = min(float(times[-1]) + 60, end) if end is not None else float(times[-1]) + 60
+    if end <= start:
+        raise SystemExit("khoảng thời gian rỗng (thiếu dữ liệu hoặc --from / --to ngoài dữ liệu)")
+
+    segments = split_range(start, end, jobs)
+    common = dict(script=script, logic=logic, config=config, bars=loaded, balance=balance,
+                  slippage_points=slippage_points, commission=commission, latency_ms=latency_ms, seed=seed,
+                  logic_on=logic_on, quiet=quiet)
+    if len(segments) == 1:
+        summaries = [run_segment(dict(common, index=0, start=start, end=end, drain=False, db_path=out))]
+    else:
+        import concurrent.futures
+        import multiprocessing
+        parts_dir = os.path.join(os.path.dirname(out), "parts")
+        os.makedirs(parts_dir, exist_ok=True)
+        jobs_list = []
+        for index, (seg_start, seg_end) in enumerate(segments):
+            path = os.path.join(parts_dir, f"part_{index:03d}.db")
+            if os.path.exists(path):
+                os.remove(path)
+            jobs_list.append(dict(common, index=index, start=seg_start, end=seg_end,
+                                  drain=index < len(segments) - 1, db_path=path))
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=jobs, mp_context=context) as pool:
+            summaries = list(pool.map(run_segment, jobs_list))
+        merge_databases(out, [s["db_path"] for s in summaries])
+        for s in summaries:
+            os.remove(s["db_path"])
+        os.rmdir(parts_dir)
+    return out, trade_report(out), summaries
+
+
+def _bar_sources(values):
+    out = []
+    for value in values or []:
+        symbol, _, path = value.partition("=")
+        if not path:
+            raise SystemExit(f"cần SYMBOL=đường_dẫn, nhận: {value}")
+        out.append((symbol, path))
+    return out
+
+
+def main():
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("script", help="file strategy (strategy_*.py, tuyen_trend.py...)")
+    parser.add_argument("--logic", help="tên hàm logic (mặc định: hàm strategy_*_logic duy nhất trong file)")
+    parser.add_argument("--config", help="file config (mặc định: configs/config_*.json ghi trong file)")
+    parser.add_argument("--bars", action="append", metavar="SYMBOL=PATH", help="nến M1 (.npy / .csv MT5 export)")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="N nến M1 ngẫu nhiên cho symbol của config")
+    parser.add_argument("--from", dest="date_from", help="bắt đầu (UTC, YYYY-MM-DD[ HH:MM])")
+    parser.add_argument("--to", dest="date_to", help="kết thúc (UTC)")
+    parser.add_argument("--out", help="trades.db kết quả (mặc định <thư mục bot>/backtest/<strategy>/trades.db)")
+    parser.add_argument("--jobs", type=int, default=1, help="số process chạy song song theo đoạn thời gian")
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP, help="số nến M1 lịch sử trước điểm bắt đầu")
+    parser.add_argument("--logic-on", choices=("bar", "point"), default="bar",
+                        help="gọi logic mỗi nến M1 mới (mặc định) hoặc mỗi điểm giá")
+    parser.add_argument("--balance", type=float, default=10000.0)
+    parser.add_argument("--slippage-points", type=int, default=0)
+    parser.add_argument("--commission", type=float, default=0.0, help="commission mỗi lot mỗi deal")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true", help="hiện print của strategy")
+    args = parser.parse_args()
+    fake_mt5.install()   # backtest không bao giờ chạm terminal thật
+
+    bars = _bar_sources(args.bars)
+    if args.synthetic:
+        from .runner import _CONFIG_RE
+        config_path = args.config
+        if config_path is None:
+            with open(args.script, 'r', encoding='utf-8') as f:
+                found = _CONFIG_RE.findall(f.read())
+            if not found:
+                parser.error("không tìm thấy config_*.json, truyền --config")
+            config_path = os.path.join(os.path.dirname(os.path.abspath(args.script)), "configs", found[-1])
+        try:
+            with open(config_path, 'r', encoding='utf-8') as f:
+                symbol = json.load(f).get('symbol')
+        except (OSError, ValueError):
+            symbol = None
+        if not symbol:
+            parser.error(f"không đọc được symbol từ {config_path}")
+        bars.insert(0, (symbol, ("synthetic", args.synthetic)))
+    if not bars:
+        parser.error("cần --bars SYMBOL=PATH hoặc --synthetic N")
+
+    t0 = time.perf_counter()
+    out, report, summaries = run(
+        args.script, bars, logic=args.logic, config=args.config, out=args.out,
+        start=_parse_date(args.date_from), end=_parse_date(args.date_to), jobs=args.jobs, warmup=args.warmup,
+        balance=args.balance, slippage_points=args.slippage_points, commission=args.commission,
+        latency_ms=args.latency_ms, seed=args.seed, logic_on=args.logic_on, quiet=not args.verbose)
+    wall = time.perf_counter() - t0
+    n_bars = sum(s["bars"] for s in summaries)
+    for s in summaries:
+        print(f"   đoạn {s['index']}: {_utc(s['start'])} → {_utc(s['end'])} | {s['bars']} nến | "
+              f"logic {s['logic_calls']} lần ({s['logic_ms_avg']} ms) | tick {s['tick_calls']} | "
+              f"lỗi {s['exceptions']} | {s['wall_seconds']}s")
+    print(f"⏱️ {n_bars} nến M1 trong {wall:.1f}s ({n_bars / wall:,.0f} nến/s, "
+          f"1 năm ≈ {372_000 / max(n_bars / wall, 1e-9) / 60:.1f} phút / {args.jobs} job)")
+    print("📊 " + " | ".join(f"{k}={v}" for k, v in report.items()))
+    print(f"💾 {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Cache nến theo (symbol, timeframe) cho data.get_data (mọi bot dùng chung qua tradecore).
+
+Mỗi vòng lặp strategy gọi get_data(M1/M5/H1, 200) mỗi giây, nhưng giữa 2 lần gọi
+thường chỉ nến đang chạy (forming) thay đổi. Cache giữ ring buffer các nến đã lấy;
+lần gọi sau chỉ hỏi terminal vài nến cuối (copy_rates_from_pos(0, FETCH_TAIL)),
+ghép theo `time`: nến trùng time → vá tại chỗ (forming bar), nến mới → append.
+Nếu khoảng hở lớn hơn FETCH_TAIL (mất kết nối, bot ngủ lâu) → tải lại toàn bộ.
+
+Ring buffer lưu trong mảng dài 2×capacity để lát cắt n nến cuối luôn liên tục (copy ra
+1 lần memcpy); khi đầy thì dời capacity nến cuối về đầu mảng (O(1) khấu hao). Mảng trả về là
+bản copy: lần gọi sau vá buffer tại chỗ nên view sẽ đổi ngầm dưới tay caller đang giữ nó.
+"""
+import MetaTrader5 as mt5
+import numpy as np
+
+# Số nến cuối hỏi terminal mỗi lần cập nhật (forming bar + nến vừa đóng + dự phòng)
+FETCH_TAIL = 3
+
+
+class BarRing:
+    """Ring buffer nến của một cặp (symbol, timeframe)."""
+
+    def __init__(self, dtype, capacity):
+        self.capacity = capacity
+        self._buf = np.zeros(capacity * 2, dtype=dtype)
+        self._end = 0
+        self._start = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def last_time(self):
+        return int(self._buf['time'][self._end - 1]) if len(self) else None
+
+    def reset(self, rates):
+        rates = rates[-self.capacity:]
+        self._start = 0
+        self._end = len(rates)
+        self._buf[:self._end] = rates
+
+    def merge(self, rates):
+        """
+        Ghép các nến cuối mới lấy. Trả về False nếu không nối được (hở dữ liệu) → caller tải lại.
+        """
+        if not len(self):
+            return False
+        times = self._buf['time'][self._start:self._end]
+        first_new = int(rates['time'][0])
+        # Vị trí của nến đầu tiên vừa lấy trong buffer (phải trùng time, nếu không là hở dữ liệu)
+        idx = int(np.searchsorted(times, first_new))
+        if idx >= len(times) or int(times[idx]) != first_new:
+            return False
+        overlap = len(times) - idx
+        if overlap > len(rates):
+            return False
+        # Vá các nến trùng time (forming bar / nến vừa đóng được chốt giá cuối)
+        self._buf[self._start + idx:self._end] = rates[:overlap]
+        for bar in rates[overlap:]:
+            self._append(bar)
+        return True
+
+    def _append(self, bar):
+        if self._end == len(self._buf):
+            keep = self.capacity - 1
+            self._buf[:keep] = self._buf[self._end - keep:self._end]
+            self._start = 0
+            self._end = keep
+        self._buf[self._end] = bar
+        self._end += 1
+        if len(self) > self.capacity:
+            self._start += 1
+
+    def tail(self, n):
+        """Copy n nến cuối (cũ → mới), cùng dtype với copy_rates_from_pos."""
+        return self._buf[max(self._start, self._end - n):self._end].copy()
+
+
+class BarCache:
+    """Cache nến cho nhiều (symbol, timeframe) trong một process."""
+
+    def __init__(self, capacity=500):
+        self.capacity = capacity
+        self._rings = {}
+        self.full_fetches = 0
+        self.tail_fetches = 0
+
+    def get_rates(self, symbol, timeframe, n=100):
+        """
+        Trả về n nến gần nhất (structured array như mt5.copy_rates_from_pos) hoặc None.
+        Mảng trả về là bản copy của caller — giữ qua nhiều lần gọi / ghi vào không ảnh hưởng cache.
+        """
+        key = (symbol, timeframe)
+        ring = self._rings.get(key)
+
+        if ring is not None and n <= ring.capacity and len(ring) >= n:
+            rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, FETCH_TAIL)
+            if rates is None or len(rates) == 0:
+                return None
+            self.tail_fetches += 1
+            if ring.merge(rates):
+                return ring.tail(n)
+
+        # Lần đầu, cần nhiều nến hơn cache đang giữ, hoặc hở dữ liệu → tải lại toàn bộ
+        capacity = max(self.capacity, n)
+        rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, capacity)
+        if rates is None or len(rates) == 0:
+            return None
+        self.full_fetches += 1
+        if ring is None or ring.capacity < capacity or ring._buf.dtype != rates.dtype:
+            ring = BarRing(rates.dtype, capacity)
+            self._rings[key] = ring
+        ring.reset(rates)
+        return ring.tail(n)
+
+    def invalidate(self, symbol=None, timeframe=None):
+        """Xóa cache (vd. sau khi reconnect MT5). Không truyền gì → xóa hết."""
+        for key in list(self._rings):
+            if (symbol is None or key[0] == symbol) and (timeframe is None or key[1] == timeframe):
+                del self._rings[key]
+
+    def stats(self):
+        return {"keys": len(self._rings), "full_fetches": self.full_fetches, "tail_fetches": self.tail_fetches}
+
+
+# Cache dùng chung cho mọi get_data trong process
+bar_cache = BarCache()
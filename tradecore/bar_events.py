@@ -0,0 +1,90 @@
+"""
+Sự kiện đóng nến: phát hiện nến mới theo (symbol, timeframe) từ thời gian tick server.
+
+Vòng lặp strategy chạy mỗi giây nhưng điều kiện vào lệnh chỉ đổi khi có nến mới. Ở chế độ
+event (config "event_mode": "bar_close"), phần phân tích nặng (get_data + HA/ADX/RSI...)
+chỉ chạy 1 lần ở tick đầu tiên của nến mới; các giây còn lại chỉ làm việc mức tick
+(quản lý lệnh: breakeven / trailing).
+
+Nến mới = floor(tick.time / số giây timeframe) đổi giá trị (tick.time là giờ server,
+cùng mốc với nến MT5 nên biên nến M1..D1 khớp). Không có tick → không có nến mới, giống terminal.
+
+Lưu ý: strategy đọc nến đang chạy (iloc[-1]) sẽ quyết định trên nến mới chỉ có vài tick
+thay vì theo dõi cả nến — vì vậy event mode là tùy chọn theo từng config.
+"""
+import MetaTrader5 as mt5
+
+TIMEFRAME_NAMES = {
+    'M1': mt5.TIMEFRAME_M1, 'M5': mt5.TIMEFRAME_M5, 'M15': mt5.TIMEFRAME_M15,
+    'M30': mt5.TIMEFRAME_M30, 'H1': mt5.TIMEFRAME_H1, 'H4': mt5.TIMEFRAME_H4,
+    'D1': mt5.TIMEFRAME_D1,
+}
+TIMEFRAME_SECONDS = {
+    mt5.TIMEFRAME_M1: 60, mt5.TIMEFRAME_M5: 300, mt5.TIMEFRAME_M15: 900,
+    mt5.TIMEFRAME_M30: 1800, mt5.TIMEFRAME_H1: 3600, mt5.TIMEFRAME_H4: 14400,
+    mt5.TIMEFRAME_D1: 86400,
+}
+
+
+class BarClock:
+    """Theo dõi nến hiện tại của nhiều timeframe trên 1 symbol."""
+
+    def __init__(self, symbol, timeframes=(mt5.TIMEFRAME_M1,)):
+        self.symbol = symbol
+        self.timeframes = tuple(timeframes)
+        self._bar_index = {tf: None for tf in self.timeframes}
+        self.last_tick_time = None
+
+    def update(self, tick_time):
+        """Đưa thời gian tick (epoch giây server) vào → tập timeframe vừa sang nến mới."""
+        self.last_tick_time = tick_time
+        closed = set()
+        for tf in self.timeframes:
+            index = int(tick_time) // TIMEFRAME_SECONDS[tf]
+            if index != self._bar_index[tf]:
+                self._bar_index[tf] = index
+                closed.add(tf)
+        return closed
+
+    def poll(self, tick=None):
+        """Lấy tick (hoặc tick truyền vào) rồi update; không có tick → tập rỗng."""
+        if tick is None:
+            tick = mt5.symbol_info_tick(self.symbol)
+        if tick is None:
+            return set()
+        return self.update(tick.time)
+
+
+class BarCloseGate:
+    """
+    Cổng cho phần phân tích nặng của 1 strategy: due() True ở lần gọi đầu tiên
+    và ở tick đầu của mỗi nến mới trên timeframe tín hiệu, False trong lúc nến đang chạy.
+    """
+
+    def __init__(self, symbol, timeframe=mt5.TIMEFRAME_M1):
+        if isinstance(timeframe, str):
+            timeframe = TIMEFRAME_NAMES[timeframe.upper()]
+        self.timeframe = timeframe
+        self.clock = BarClock(symbol, (timeframe,))
+        self._pending = True
+        self.bar_events = 0
+
+    def due(self, tick=None):
+        if self.clock.poll(tick):
+            self._pending = True
+            self.bar_events += 1
+        if self._pending:
+            self._pending = False
+            return True
+        return False
+
+    def retry(self):
+        """Phân tích của nến hiện tại lỗi → chạy lại ở lần due() kế tiếp."""
+        self._pending = True
+
+
+def gate_from_config(config):
+    """BarCloseGate nếu config bật "event_mode": "bar_close" (timeframe: "event_timeframe", mặc định M1)."""
+    if config.get('event_mode') != 'bar_close':
+        return None
+    return BarCloseGate(config['symbol'], config.get('event_timeframe', 'M1'))
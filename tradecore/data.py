@@ -0,0 +1,100 @@
+"""
+Truy cập dữ liệu dùng chung: đọc config, kết nối MT5, Telegram (qua hàng đợi telegram.py), lấy nến.
+
+get_data / get_data_np đi qua bar_cache (chỉ hỏi terminal vài nến cuối mỗi lần gọi).
+tradecore.market_feed bọc các hàm này để ưu tiên shared memory của feeder (utils.py của XAU_M1, BTC_M1, ETH_M1, EUR_M1_REAL).
+"""
+import os
+import json
+
+import MetaTrader5 as mt5
+import numpy as np
+import pandas as pd
+
+from .bar_cache import bar_cache
+from .telegram import telegram_notifier
+
+
+def load_config(config_path):
+    """Load configuration from JSON file"""
+    if not os.path.exists(config_path):
+        print(f"❌ Config file not found: {config_path}")
+        return None
+    try:
+        with open(config_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"❌ Error loading config: {e}")
+        return None
+
+def connect_mt5(config):
+    """Initialize MT5 connection using config"""
+    login = config.get("account")
+    password = config.get("password")
+    server = config.get("server")
+    path = config.get("mt5_path") # Optional custom path
+
+    if not all([login, password, server]):
+        print("❌ Missing MT5 credentials in config")
+        return False
+
+    try:
+        if path:
+            if not mt5.initialize(path=path, login=login, password=password, server=server):
+                print(f"❌ MT5 Init failed with path: {mt5.last_error()}")
+                return False
+        else:
+            if not mt5.initialize(login=login, password=password, server=server):
+                print(f"❌ MT5 Init failed: {mt5.last_error()}")
+                return False
+
+        print(f"✅ Connected to MT5 Account: {login}")
+        return True
+    except Exception as e:
+        print(f"❌ Connection error: {e}")
+        return False
+
+def send_telegram(message, token, chat_id):
+    """
+    Send message to Telegram — không chặn: chỉ đưa vào hàng đợi của telegram_notifier,
+    thread nền gửi (gom tin, xử lý 429). Trả về False nếu thiếu token/chat_id hoặc hàng đợi đầy.
+    """
+    return telegram_notifier.enqueue(message, token, chat_id)
+
+# dtype mà pd.to_datetime(..., unit='s') trả về (datetime64[s] từ pandas 3, [ns] trước đó)
+_TIME_DTYPE = pd.to_datetime(np.array([0], dtype=np.int64), unit='s').dtype
+
+def rates_to_df(rates, symbol=None, timeframe=None):
+    """
+    Structured array (copy_rates_from_pos) → DataFrame với cột time kiểu datetime.
+    df.attrs giữ symbol/timeframe để indicator_cache gom khóa theo cặp nến.
+    """
+    # dựng từ dict cột với time đã đổi sẵn: ~2 lần nhanh hơn DataFrame(rates) + gán lại cột time
+    columns = {name: rates[name] for name in rates.dtype.names}
+    columns['time'] = rates['time'].astype('datetime64[s]').astype(_TIME_DTYPE)
+    df = pd.DataFrame(columns)
+    df.attrs['symbol'] = symbol
+    df.attrs['timeframe'] = timeframe
+    return df
+
+def get_data(symbol, timeframe, n=100):
+    """Fetch recent candles from MT5 (qua bar_cache)"""
+    rates = get_data_np(symbol, timeframe, n)
+    if rates is None:
+        return None
+    return rates_to_df(rates, symbol, timeframe)
+
+def get_data_np(symbol, timeframe, n=100):
+    """
+    Như get_data nhưng trả về structured array thô (time: int64 epoch giây, open/high/low/close...)
+    thay vì DataFrame. Dùng cột trực tiếp: rates['close'], rates['time']. Mảng trả về là bản copy riêng
+    (giữ lại so với lần gọi sau được).
+    """
+    rates = bar_cache.get_rates(symbol, timeframe, n)
+    if rates is None or len(rates) == 0:
+        return None
+    return rates
+
+def get_tick(symbol):
+    """Tick mới nhất (bid/ask/last/time)"""
+    return mt5.symbol_info_tick(symbol)
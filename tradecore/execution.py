@@ -0,0 +1,148 @@
+"""
+Gửi lệnh dùng chung cho các strategy (thay cho mt5.order_send gọi tay với ORDER_FILLING_FOK cố định).
+
+send_order(request, strategy_name, db_path):
+- Filling mode: nhớ mode broker đã chấp nhận theo symbol; gặp 10030 (unsupported filling)
+  thì thử các mode trong symbol_info.filling_mode (FOK, IOC) rồi RETURN, mode nào khớp được lưu lại
+- Requote / price changed / price off (10004 / 10020 / 10021) với lệnh thị trường: lấy lại
+  giá ask/bid và gửi lại, tối đa max_reprices lần trong `deadline` giây tính từ lần gửi đầu.
+  SL/TP giữ nguyên mức strategy đã tính
+- Governor (tradecore.governor, nếu cấu hình): lệnh mở mới xin phép trước khi gửi; bị chặn
+  (exposure / tốc độ lệnh) thì không gửi, trả về kết quả giả retcode 10034 / 10024
+- Ghi latency send→result (cả các lần gửi lại) và slippage (point, dương = bất lợi) vào
+  bảng order_executions của db_path (xem execution_stats) cho dashboard vẽ histogram
+
+Trả về kết quả order_send cuối cùng (hoặc None) nên caller giữ nguyên phần kiểm tra retcode.
+"""
+import time
+from types import SimpleNamespace
+from collections import deque
+
+import MetaTrader5 as mt5
+
+from .execution_stats import record_execution, REQUOTE_RETCODES, FILL_RETCODES
+from .governor import get_client, RETCODE_TOO_MANY_REQUESTS, RETCODE_LIMIT_VOLUME
+
+INVALID_FILL_RETCODE = 10030
+DEFAULT_DEADLINE = 1.5
+MAX_REPRICES = 3
+
+# symbol → filling mode broker đã chấp nhận
+_filling_cache = {}
+# symbol → point (symbol_info chỉ hỏi 1 lần)
+_point_cache = {}
+# Các lần gửi gần nhất trong process (runner / debug)
+recent_executions = deque(maxlen=200)
+
+
+def _filling_candidates(symbol, current):
+    """Thứ tự thử: mode đang dùng, các mode symbol hỗ trợ (bitmask 1 = FOK, 2 = IOC), RETURN."""
+    modes = [current]
+    info = mt5.symbol_info(symbol)
+    flags = getattr(info, 'filling_mode', 0) if info else 0
+    if flags & 1:
+        modes.append(mt5.ORDER_FILLING_FOK)
+    if flags & 2:
+        modes.append(mt5.ORDER_FILLING_IOC)
+    modes.append(mt5.ORDER_FILLING_RETURN)
+    return [m for i, m in enumerate(modes) if m is not None and m not in modes[:i]]
+
+
+def _point(symbol):
+    if symbol not in _point_cache:
+        info = mt5.symbol_info(symbol)
+        if info is None:
+            return None
+        _point_cache[symbol] = info.point
+    return _point_cache[symbol]
+
+
+def filling_mode_for(symbol, default=None):
+    """Filling mode đã được broker chấp nhận cho symbol (None nếu chưa gửi lệnh nào)."""
+    return _filling_cache.get(symbol, default)
+
+
+def send_order(request, strategy_name=None, db_path=None, deadline=DEFAULT_DEADLINE, max_reprices=MAX_REPRICES):
+    req = dict(request)
+    symbol = req['symbol']
+    is_market = req.get('action') == mt5.TRADE_ACTION_DEAL
+    is_buy = req.get('type') == mt5.ORDER_TYPE_BUY
+    requested_price = req.get('price')
+    if symbol in _filling_cache:
+        req['type_filling'] = _filling_cache[symbol]
+
+    governor = get_client() if is_market and not req.get('position') else None
+    intent_id = None
+    if governor is not None:
+        decision = governor.reserve(symbol, "BUY" if is_buy else "SELL", req.get('volume', 0.0),
+                                    strategy_name or req.get('comment'))
+        if not decision.get("allowed"):
+            retcode = RETCODE_TOO_MANY_REQUESTS if decision.get("reason") == "order rate" else RETCODE_LIMIT_VOLUME
+            print(f"   🚦 Governor chặn lệnh {symbol}: {decision.get('reason')}")
+            return SimpleNamespace(retcode=retcode, comment=f"governor: {decision.get('reason')}",
+                                   order=0, deal=0, volume=0.0, price=0.0, request=request)
+        intent_id = decision.get("intent_id")
+
+    tried_fillings = {req.get('type_filling')}
+    attempts = 0
+    reprices = 0
+    started = time.perf_counter()
+    while True:
+        attempts += 1
+        result = mt5.order_send(req)
+        if result is None:
+            break
+        if result.retcode == INVALID_FILL_RETCODE:
+            untried = [m for m in _filling_candidates(symbol, req.get('type_filling')) if m not in tried_fillings]
+            if not untried:
+                break
+            print(f"   🔁 Filling mode {req.get('type_filling')} bị từ chối, thử {untried[0]}")
+            req['type_filling'] = untried[0]
+            tried_fillings.add(untried[0])
+            continue
+        if (is_market and result.retcode in REQUOTE_RETCODES and reprices < max_reprices
+                and time.perf_counter() - started < deadline):
+            tick = mt5.symbol_info_tick(symbol)
+            if tick is None:
+                break
+            reprices += 1
+            new_price = tick.ask if is_buy else tick.bid
+            print(f"   🔁 Requote ({result.retcode}): {req.get('price')} → {new_price} (lần {reprices})")
+            req['price'] = new_price
+            continue
+        break
+    latency_ms = (time.perf_counter() - started) * 1e3
+
+    retcode = result.retcode if result is not None else None
+    if intent_id is not None:
+        governor.release(intent_id, filled=retcode in FILL_RETCODES)
+    if retcode in FILL_RETCODES and 'type_filling' in req:
+        _filling_cache[symbol] = req['type_filling']
+
+    fill_price = None
+    slippage_points = None
+    if retcode in FILL_RETCODES and is_market and requested_price:
+        fill_price = getattr(result, 'price', 0.0) or req.get('price')
+        point = _point(symbol)
+        if point:
+            diff = fill_price - requested_price if is_buy else requested_price - fill_price
+            slippage_points = round(diff / point, 1)
+
+    row = {
+        "strategy_name": strategy_name or req.get('comment'),
+        "symbol": symbol,
+        "order_type": req.get('type'),
+        "retcode": retcode,
+        "attempts": attempts,
+        "reprices": reprices,
+        "filling_mode": req.get('type_filling'),
+        "requested_price": requested_price,
+        "fill_price": fill_price,
+        "latency_ms": round(latency_ms, 2),
+        "slippage_points": slippage_points,
+        "ticket": getattr(result, 'order', None) if result is not None else None,
+    }
+    recent_executions.append(row)
+    if db_path:
+        record_execution(db_path, row)
+    return result
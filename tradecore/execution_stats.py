@@ -0,0 +1,116 @@
+"""
+Lưu và tổng hợp số liệu khớp lệnh (latency send→result, trượt giá) của tradecore.execution.
+
+Mỗi lần gửi lệnh thị trường ghi 1 dòng vào bảng order_executions trong trades.db của bot
+(cùng file các dashboard đang đọc) qua hàng đợi write-behind của trades_db (không chặn luồng lệnh). Dashboard gọi execution_histograms() để dựng histogram
+latency / slippage theo strategy. Module này chỉ dùng sqlite3 (không cần MetaTrader5)
+nên DashBoardMain import được.
+"""
+import sqlite3
+from bisect import bisect_left
+
+import numpy as np
+
+from .trades_db import store, utc_now
+
+# Biên trên từng bucket (bucket cuối: lớn hơn biên cuối)
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000)
+# Slippage theo point, dương = bất lợi (BUY khớp cao hơn / SELL khớp thấp hơn giá mong muốn)
+SLIPPAGE_BUCKETS_POINTS = (-10, -3, -1, 0, 1, 3, 10)
+
+FILL_RETCODES = (10008, 10009, 10010)
+REQUOTE_RETCODES = (10004, 10020, 10021)
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS order_executions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        strategy_name TEXT,
+        symbol TEXT,
+        order_type INTEGER,
+        retcode INTEGER,
+        attempts INTEGER,
+        reprices INTEGER,
+        filling_mode INTEGER,
+        requested_price REAL,
+        fill_price REAL,
+        latency_ms REAL,
+        slippage_points REAL,
+        ticket INTEGER
+    )
+'''
+
+
+def record_execution(db_path, row):
+    """Ghi 1 lần gửi lệnh (dict theo cột của order_executions). Lỗi DB không được chặn luồng lệnh."""
+    try:
+        row = dict(row)
+        row.setdefault("timestamp", utc_now())
+        target = store(db_path)
+        target.ensure("order_executions", [SCHEMA])
+        columns = ", ".join(row)
+        target.enqueue(f"INSERT INTO order_executions ({columns}) VALUES ({', '.join('?' * len(row))})",
+                       tuple(row.values()))
+    except Exception as e:
+        print(f"⚠️ Execution stats write error: {e}")
+
+
+def bucket_labels(edges, unit):
+    labels = [f"≤{edges[0]}{unit}"]
+    labels += [f"{lo}–{hi}{unit}" for lo, hi in zip(edges, edges[1:])]
+    labels.append(f">{edges[-1]}{unit}")
+    return labels
+
+
+LATENCY_LABELS = bucket_labels(LATENCY_BUCKETS_MS, "ms")
+SLIPPAGE_LABELS = bucket_labels(SLIPPAGE_BUCKETS_POINTS, "pt")
+
+
+def _histogram(values, edges):
+    counts = [0] * (len(edges) + 1)
+    for v in values:
+        counts[bisect_left(edges, v)] += 1
+    return counts
+
+
+def execution_histograms(conn, since=None, until=None):
+    """
+    Histogram latency / slippage theo strategy từ order_executions (since/until: chuỗi UTC
+    'YYYY-MM-DD HH:MM:SS' như cột timestamp). Bảng chưa có (bot chưa gửi lệnh nào) → [].
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='order_executions'").fetchone()
+    if not exists:
+        return []
+    sql = "SELECT strategy_name, retcode, reprices, latency_ms, slippage_points FROM order_executions WHERE 1=1"
+    params = []
+    if since:
+        sql += " AND timestamp >= ?"
+        params.append(since)
+    if until:
+        sql += " AND timestamp <= ?"
+        params.append(until)
+    by_strategy = {}
+    for name, retcode, reprices, latency, slippage in conn.execute(sql, params).fetchall():
+        by_strategy.setdefault(name or "Unknown", []).append((retcode, reprices or 0, latency, slippage))
+
+    stats = []
+    for name in sorted(by_strategy):
+        rows = by_strategy[name]
+        latencies = [r[2] for r in rows if r[2] is not None]
+        fills = [r for r in rows if r[0] in FILL_RETCODES]
+        slippages = [r[3] for r in fills if r[3] is not None]
+        stats.append({
+            "strategy": name,
+            "sends": len(rows),
+            "fills": len(fills),
+            "rejects": len(rows) - len(fills),
+            "repriced": sum(1 for r in rows if r[1] > 0),
+            "requotes_final": sum(1 for r in rows if r[0] in REQUOTE_RETCODES),
+            "latency_hist": _histogram(latencies, LATENCY_BUCKETS_MS),
+            "slippage_hist": _histogram(slippages, SLIPPAGE_BUCKETS_POINTS),
+            "latency_p50": float(np.percentile(latencies, 50)) if latencies else None,
+            "latency_p95": float(np.percentile(latencies, 95)) if latencies else None,
+            "slippage_avg": float(np.mean(slippages)) if slippages else None,
+        })
+    return stats
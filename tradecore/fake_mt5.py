@@ -0,0 +1,1522 @@
+"""
+MetaTrader5 giả lập (terminal mô phỏng) để chạy strategy / GridStep / benchmark / regression trên Linux,
+không cần terminal Windows. Module này thay được `import MetaTrader5 as mt5`: cùng tên hàm, hằng số
+(giá trị thật của MT5), namedtuple (TradePosition, TradeDeal, OrderSendResult...) và numpy dtype của copy_rates_*.
+
+Dùng trong code (backtest, kiểm thử):
+    from tradecore import fake_mt5
+    term = fake_mt5.install()                        # sys.modules["MetaTrader5"] = fake_mt5 (gọi TRƯỚC khi import bot)
+    term.load_bars("XAUUSD", "xauusd_m1.csv")        # nến M1 đã ghi: csv MT5 export / csv time,open,... / .npy copy_rates
+    term.load_ticks("XAUUSD", "xauusd_ticks.csv")    # (tuỳ chọn) tick thật thay cho đường giá 4 điểm của nến
+    term.start(warmup_bars=1500)
+    fake_mt5.patch_clock(term, strategy_module, utils_module)   # time.time / sleep / datetime.now theo đồng hồ giả
+    while True:
+        strategy_module.strategy_1_logic(config, 0)
+        term.sleep(1)          # hết dữ liệu → SimulationFinished
+
+Chạy nguyên script bot (vòng while True + time.sleep của bot chạy theo đồng hồ giả, Telegram không gửi ra ngoài;
+Database() của bot vẫn ghi vào trades.db cạnh script → chạy trên bản copy thư mục bot):
+    python -m tradecore.fake_mt5 --bars XAUUSD=xauusd_m1.csv /tmp/XAU_M1_copy/strategy_1_trend_ha.py
+Ghi dữ liệu từ terminal thật (Windows): python -m tradecore.fake_mt5 --record XAUUSD=xauusd_m1.npy --count 500000
+
+Mô phỏng:
+- giá: mỗi nến M1 → 4 điểm (O, L, H, C nếu nến tăng / O, H, L, C nếu nến giảm) hoặc tick thật;
+  ask = bid + spread (cột spread của nến, hoặc spread_points của symbol)
+- copy_rates_*: mọi timeframe gộp từ M1; nến đang chạy chỉ có dữ liệu tới đồng hồ hiện tại (không nhìn trước)
+- lệnh thị trường (mở, đóng theo position, đóng một phần), lệnh chờ BUY/SELL STOP/LIMIT (+ hết hạn),
+  SLTP / MODIFY / REMOVE; SL/TP và lệnh chờ khớp trên từng điểm giá, gap (mở nến / tick) → khớp giá gap
+- history_deals_get (entry IN/OUT, reason SL/TP/EXPERT, profit, commission), history_orders_get
+- retcode như MT5 thật: 10004 (trade_exemode instant + deviation), 10014/10015/10016, 10019, 10022, 10025,
+  10030 (filling không hỗ trợ), 10035, 10036; fail_next(retcode) để ép lỗi cho lần gửi kế tiếp
+- latency_ms của order_send (+ call_latency_ms mọi hàm khác): mặc định ảo — đồng hồ chạy tiếp trong lúc
+  "gửi lệnh" nên giá khớp có thể đổi; realtime_latency=True thì sleep thật
+- slippage_points (seed cố định → chạy lại ra cùng kết quả), commission_per_lot mỗi deal
+Giới hạn: tài khoản hedging, lợi nhuận quy về tiền tài khoản theo tên symbol (XXXUSD / USDXXX),
+không swap, không STOP_LIMIT / CLOSE_BY / market book.
+"""
+import os
+import sys
+import time
+import types
+import bisect
+import random
+import fnmatch
+import argparse
+import datetime as _dt
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+# ----- hằng số (giá trị thật của MetaTrader5) -----
+
+TIMEFRAME_M1, TIMEFRAME_M2, TIMEFRAME_M3, TIMEFRAME_M4, TIMEFRAME_M5, TIMEFRAME_M6 = 1, 2, 3, 4, 5, 6
+TIMEFRAME_M10, TIMEFRAME_M12, TIMEFRAME_M15, TIMEFRAME_M20, TIMEFRAME_M30 = 10, 12, 15, 20, 30
+TIMEFRAME_H1, TIMEFRAME_H2, TIMEFRAME_H3, TIMEFRAME_H4 = 16385, 16386, 16387, 16388
+TIMEFRAME_H6, TIMEFRAME_H8, TIMEFRAME_H12 = 16390, 16392, 16396
+TIMEFRAME_D1, TIMEFRAME_W1, TIMEFRAME_MN1 = 16408, 32769, 49153
+
+ORDER_TYPE_BUY, ORDER_TYPE_SELL = 0, 1
+ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_SELL_LIMIT, ORDER_TYPE_BUY_STOP, ORDER_TYPE_SELL_STOP = 2, 3, 4, 5
+ORDER_TYPE_BUY_STOP_LIMIT, ORDER_TYPE_SELL_STOP_LIMIT, ORDER_TYPE_CLOSE_BY = 6, 7, 8
+
+TRADE_ACTION_DEAL, TRADE_ACTION_PENDING, TRADE_ACTION_SLTP = 1, 5, 6
+TRADE_ACTION_MODIFY, TRADE_ACTION_REMOVE, TRADE_ACTION_CLOSE_BY = 7, 8, 10
+
+ORDER_FILLING_FOK, ORDER_FILLING_IOC, ORDER_FILLING_RETURN, ORDER_FILLING_BOC = 0, 1, 2, 3
+ORDER_TIME_GTC, ORDER_TIME_DAY, ORDER_TIME_SPECIFIED, ORDER_TIME_SPECIFIED_DAY = 0, 1, 2, 3
+
+ORDER_STATE_STARTED, ORDER_STATE_PLACED, ORDER_STATE_CANCELED, ORDER_STATE_PARTIAL = 0, 1, 2, 3
+ORDER_STATE_FILLED, ORDER_STATE_REJECTED, ORDER_STATE_EXPIRED = 4, 5, 6
+
+POSITION_TYPE_BUY, POSITION_TYPE_SELL = 0, 1
+DEAL_TYPE_BUY, DEAL_TYPE_SELL, DEAL_TYPE_BALANCE = 0, 1, 2
+DEAL_ENTRY_IN, DEAL_ENTRY_OUT, DEAL_ENTRY_INOUT, DEAL_ENTRY_OUT_BY = 0, 1, 2, 3
+DEAL_REASON_CLIENT, DEAL_REASON_MOBILE, DEAL_REASON_WEB, DEAL_REASON_EXPERT = 0, 1, 2, 3
+DEAL_REASON_SL, DEAL_REASON_TP, DEAL_REASON_SO = 4, 5, 6
+ORDER_REASON_CLIENT, ORDER_REASON_EXPERT, ORDER_REASON_SL, ORDER_REASON_TP = 0, 3, 4, 5
+POSITION_REASON_CLIENT, POSITION_REASON_EXPERT = 0, 3
+
+SYMBOL_FILLING_FOK, SYMBOL_FILLING_IOC = 1, 2
+SYMBOL_TRADE_MODE_FULL = 4
+SYMBOL_TRADE_EXECUTION_REQUEST, SYMBOL_TRADE_EXECUTION_INSTANT = 0, 1
+SYMBOL_TRADE_EXECUTION_MARKET, SYMBOL_TRADE_EXECUTION_EXCHANGE = 2, 3
+ACCOUNT_TRADE_MODE_DEMO = 0
+ACCOUNT_MARGIN_MODE_RETAIL_HEDGING = 2
+COPY_TICKS_ALL, COPY_TICKS_INFO, COPY_TICKS_TRADE = -1, 1, 2
+
+TRADE_RETCODE_REQUOTE = 10004
+TRADE_RETCODE_REJECT = 10006
+TRADE_RETCODE_CANCEL = 10007
+TRADE_RETCODE_PLACED = 10008
+TRADE_RETCODE_DONE = 10009
+TRADE_RETCODE_DONE_PARTIAL = 10010
+TRADE_RETCODE_ERROR = 10011
+TRADE_RETCODE_TIMEOUT = 10012
+TRADE_RETCODE_INVALID = 10013
+TRADE_RETCODE_INVALID_VOLUME = 10014
+TRADE_RETCODE_INVALID_PRICE = 10015
+TRADE_RETCODE_INVALID_STOPS = 10016
+TRADE_RETCODE_TRADE_DISABLED = 10017
+TRADE_RETCODE_MARKET_CLOSED = 10018
+TRADE_RETCODE_NO_MONEY = 10019
+TRADE_RETCODE_PRICE_CHANGED = 10020
+TRADE_RETCODE_PRICE_OFF = 10021
+TRADE_RETCODE_INVALID_EXPIRATION = 10022
+TRADE_RETCODE_ORDER_CHANGED = 10023
+TRADE_RETCODE_TOO_MANY_REQUESTS = 10024
+TRADE_RETCODE_NO_CHANGES = 10025
+TRADE_RETCODE_SERVER_DISABLES_AT = 10026
+TRADE_RETCODE_CLIENT_DISABLES_AT = 10027
+TRADE_RETCODE_LOCKED = 10028
+TRADE_RETCODE_FROZEN = 10029
+TRADE_RETCODE_INVALID_FILL = 10030
+TRADE_RETCODE_CONNECTION = 10031
+TRADE_RETCODE_ONLY_REAL = 10032
+TRADE_RETCODE_LIMIT_ORDERS = 10033
+TRADE_RETCODE_LIMIT_VOLUME = 10034
+TRADE_RETCODE_INVALID_ORDER = 10035
+TRADE_RETCODE_POSITION_CLOSED = 10036
+
+RES_S_OK, RES_E_FAIL, RES_E_INVALID_PARAMS, RES_E_NOT_FOUND = 1, -1, -2, -4
+RES_E_INTERNAL_FAIL, RES_E_NO_IPC_CONNECTION = -10001, -10004
+
+RETCODE_COMMENTS = {
+    TRADE_RETCODE_REQUOTE: "Requote", TRADE_RETCODE_REJECT: "Request rejected",
+    TRADE_RETCODE_DONE: "Request executed", TRADE_RETCODE_INVALID: "Invalid request",
+    TRADE_RETCODE_INVALID_VOLUME: "Invalid volume", TRADE_RETCODE_INVALID_PRICE: "Invalid price",
+    TRADE_RETCODE_INVALID_STOPS: "Invalid stops", TRADE_RETCODE_MARKET_CLOSED: "Market closed",
+    TRADE_RETCODE_NO_MONEY: "No money", TRADE_RETCODE_PRICE_OFF: "Off quotes",
+    TRADE_RETCODE_INVALID_EXPIRATION: "Invalid expiration", TRADE_RETCODE_TOO_MANY_REQUESTS: "Too many requests",
+    TRADE_RETCODE_NO_CHANGES: "No changes", TRADE_RETCODE_INVALID_FILL: "Unsupported filling mode",
+    TRADE_RETCODE_CONNECTION: "No connection", TRADE_RETCODE_LIMIT_VOLUME: "Volume limit reached",
+    TRADE_RETCODE_INVALID_ORDER: "Invalid order", TRADE_RETCODE_POSITION_CLOSED: "Position doesn't exist",
+}
+
+__version__ = "5.0.4000"
+__author__ = "tradecore (simulated terminal)"
+
+# ----- kiểu dữ liệu trả về -----
+
+RATES_DTYPE = np.dtype([("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+                        ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8")])
+TICKS_DTYPE = np.dtype([("time", "<i8"), ("bid", "<f8"), ("ask", "<f8"), ("last", "<f8"), ("volume", "<u8"),
+                        ("time_msc", "<i8"), ("flags", "<u4"), ("volume_real", "<f8")])
+
+Tick = namedtuple("Tick", "time bid ask last volume time_msc flags volume_real")
+TradePosition = namedtuple("TradePosition", "ticket time time_msc time_update time_update_msc type magic "
+                           "identifier reason volume price_open sl tp price_current swap profit symbol "
+                           "comment external_id")
+TradeOrder = namedtuple("TradeOrder", "ticket time_setup time_setup_msc time_done time_done_msc time_expiration "
+                        "type type_time type_filling state magic position_id position_by_id reason "
+                        "volume_initial volume_current price_open sl tp price_current price_stoplimit symbol "
+                        "comment external_id")
+TradeDeal = namedtuple("TradeDeal", "ticket order time time_msc type entry magic position_id reason volume price "
+                       "commission swap profit fee symbol comment external_id")
+TradeRequest = namedtuple("TradeRequest", "action magic order symbol volume price stoplimit sl tp deviation "
+                          "type type_filling type_time expiration comment position position_by")
+OrderSendResult = namedtuple("OrderSendResult", "retcode deal order volume price bid ask comment request_id "
+                             "retcode_external request")
+OrderCheckResult = namedtuple("OrderCheckResult", "retcode balance equity profit margin margin_free margin_level "
+                              "comment request")
+AccountInfo = namedtuple("AccountInfo", "login trade_mode leverage limit_orders margin_so_mode trade_allowed "
+                         "trade_expert margin_mode currency_digits fifo_close balance credit profit equity margin "
+                         "margin_free margin_level margin_so_call margin_so_so margin_initial margin_maintenance "
+                         "assets liabilities commission_blocked name server currency company")
+TerminalInfo = namedtuple("TerminalInfo", "community_account community_connection connected dlls_allowed "
+                          "trade_allowed tradeapi_disabled email_enabled ftp_enabled notifications_enabled mqid "
+                          "build maxbars codepage ping_last community_balance retransmission company name "
+                          "language path data_path commondata_path")
+SYMBOL_FIELDS = (
+    "custom chart_mode select visible session_deals session_buy_orders session_sell_orders volume volumehigh "
+    "volumelow time digits spread spread_float ticks_bookdepth trade_calc_mode trade_mode start_time "
+    "expiration_time trade_stops_level trade_freeze_level trade_exemode swap_mode swap_rollover3days "
+    "margin_hedged_use_leg expiration_mode filling_mode order_mode order_gtc_mode option_mode option_right bid "
+    "bidhigh bidlow ask askhigh asklow last lasthigh lastlow volume_real volumehigh_real volumelow_real "
+    "option_strike point trade_tick_value trade_tick_value_profit trade_tick_value_loss trade_tick_size "
+    "trade_contract_size trade_accrued_interest trade_face_value trade_liquidity_rate volume_min volume_max "
+    "volume_step volume_limit swap_long swap_short margin_initial margin_maintenance session_volume "
+    "session_turnover session_interest session_buy_orders_volume session_sell_orders_volume session_open "
+    "session_close session_aw session_price_settlement session_price_limit_min session_price_limit_max "
+    "margin_hedged price_change price_volatility price_theoretical price_greeks_delta price_greeks_theta "
+    "price_greeks_gamma price_greeks_vega price_greeks_rho price_greeks_omega price_sensitivity basis category "
+    "currency_base currency_profit currency_margin bank description exchange formula isin name page path"
+).split()
+SymbolInfo = namedtuple("SymbolInfo", SYMBOL_FIELDS)
+_SYMBOL_STR_FIELDS = {"basis", "category", "currency_base", "currency_profit", "currency_margin", "bank",
+                      "description", "exchange", "formula", "isin", "name", "page", "path"}
+
+# (tiền tố tên symbol, digits, contract size, spread mặc định theo point)
+SYMBOL_PRESETS = (("XAU", 2, 100.0, 20), ("XAG", 3, 5000.0, 25), ("BTC", 2, 1.0, 1500),
+                  ("ETH", 2, 1.0, 150), ("US30", 1, 1.0, 30), ("NAS", 1, 1.0, 20))
+DEFAULT_ACCOUNT_CURRENCY = "USD"
+
+# giây trong 1 nến cho timeframe cố định (W1 / MN1 tính riêng)
+TIMEFRAME_SECONDS = {TIMEFRAME_M1: 60, TIMEFRAME_M2: 120, TIMEFRAME_M3: 180, TIMEFRAME_M4: 240,
+                     TIMEFRAME_M5: 300, TIMEFRAME_M6: 360, TIMEFRAME_M10: 600, TIMEFRAME_M12: 720,
+                     TIMEFRAME_M15: 900, TIMEFRAME_M20: 1200, TIMEFRAME_M30: 1800, TIMEFRAME_H1: 3600,
+                     TIMEFRAME_H2: 7200, TIMEFRAME_H3: 10800, TIMEFRAME_H4: 14400, TIMEFRAME_H6: 21600,
+                     TIMEFRAME_H8: 28800, TIMEFRAME_H12: 43200, TIMEFRAME_D1: 86400}
+# OHLC → 4 điểm giá trong 1 nến M1, lệch giây so với giờ mở nến
+OHLC_POINT_OFFSETS = np.array([0.0, 20.0, 40.0, 59.0])
+MAX_COMMENT = 31
+
+_real_time = time.time
+_real_sleep = time.sleep
+
+
+class SimulationFinished(BaseException):
+    """Hết dữ liệu. BaseException (như KeyboardInterrupt) để `except Exception` trong vòng lặp bot không nuốt mất."""
+
+
+def _ts(value):
+    """datetime / pandas.Timestamp / số giây → float giây (datetime naive hiểu theo giờ local, như fromtimestamp)."""
+    if value is None:
+        return None
+    if isinstance(value, _dt.datetime):
+        return value.timestamp()
+    if isinstance(value, _dt.date):
+        return _dt.datetime(value.year, value.month, value.day).timestamp()
+    return float(value)
+
+
+def _group_match(name, group):
+    """Cú pháp group của MT5: "*XAU*", "EUR*,GBP*", "*,!BTC*"."""
+    if not group:
+        return True
+    matched = False
+    for pattern in str(group).split(","):
+        pattern = pattern.strip()
+        if pattern.startswith("!"):
+            if fnmatch.fnmatchcase(name, pattern[1:]):
+                return False
+        elif pattern and fnmatch.fnmatchcase(name, pattern):
+            matched = True
+    return matched
+
+
+def _bucket(times, timeframe):
+    """Giờ mở nến timeframe cho từng giờ mở nến M1."""
+    seconds = TIMEFRAME_SECONDS.get(timeframe)
+    if seconds is not None:
+        return times // seconds * seconds
+    if timeframe == TIMEFRAME_W1:   # tuần MT5 bắt đầu Chủ nhật 00:00 (1970-01-01 là thứ Năm → +3 ngày)
+        week, sunday = 7 * 86400, 3 * 86400
+        return (times - sunday) // week * week + sunday
+    if timeframe == TIMEFRAME_MN1:
+        months = times.astype("datetime64[s]").astype("datetime64[M]")
+        return months.astype("datetime64[s]").astype(np.int64)
+    raise ValueError(f"timeframe không hỗ trợ: {timeframe}")
+
+
+def symbol_preset(name, account_currency=DEFAULT_ACCOUNT_CURRENCY):
+    """Thông số mặc định theo tên symbol (XAUUSD, XAUUSDm, EURUSD, USDJPY, BTCUSD...)."""
+    upper = name.upper()
+    spec = None
+    for prefix, digits, contract, spread in SYMBOL_PRESETS:
+        if upper.startswith(prefix):
+            spec = dict(digits=digits, trade_contract_size=contract, spread_points=spread)
+            break
+    if spec is None:
+        digits = 3 if "JPY" in upper else 5
+        spec = dict(digits=digits, trade_contract_size=100000.0, spread_points=12)
+    letters = "".join(ch for ch in upper if ch.isalpha())
+    base, profit = (letters[:3], letters[3:6]) if len(letters) >= 6 else (letters[:3], account_currency)
+    spec.update(name=name, point=round(10.0 ** -spec["digits"], spec["digits"]), currency_base=base,
+                currency_profit=profit or account_currency, currency_margin=base,
+                volume_min=0.01, volume_max=200.0, volume_step=0.01, volume_limit=0.0,
+                trade_stops_level=0, trade_freeze_level=0,
+                filling_mode=SYMBOL_FILLING_FOK | SYMBOL_FILLING_IOC, allow_return=False,
+                trade_exemode=SYMBOL_TRADE_EXECUTION_MARKET, trade_mode=SYMBOL_TRADE_MODE_FULL,
+                description=name, path=f"Sim\\{name}")
+    spec["trade_tick_size"] = spec["point"]
+    return spec
+
+
+def rates_from_frame(frame):
+    """DataFrame / dict cột (time, open, high, low, close[, tick_volume, spread, real_volume]) → mảng RATES_DTYPE."""
+    times = np.asarray(frame["time"])
+    if np.issubdtype(times.dtype, np.datetime64):
+        times = times.astype("datetime64[s]").astype(np.int64)
+    elif times.dtype == object:
+        times = np.array([int(_ts(t)) for t in times], dtype=np.int64)
+    rates = np.zeros(len(times), dtype=RATES_DTYPE)
+    rates["time"] = times
+    for col in ("open", "high", "low", "close"):
+        rates[col] = np.asarray(frame[col], dtype=np.float64)
+    for col in ("tick_volume", "spread", "real_volume"):
+        if col in frame:
+            rates[col] = np.asarray(frame[col])
+    return rates
+
+
+def read_rates(path):
+    """.npy (copy_rates đã lưu) / csv MT5 export (<DATE> <TIME> <OPEN>...) / csv có header time,open,..."""
+    if path.endswith(".npy"):
+        raw = np.load(path)
+        return rates_from_frame({name: raw[name] for name in raw.dtype.names})
+    import pandas as pd
+    with open(path, encoding="utf-8-sig") as f:
+        header = f.readline()
+    if header.startswith("<DATE>"):
+        df = pd.read_csv(path, sep="\t")
+        df.columns = [c.strip("<>").lower() for c in df.columns]
+        df["time"] = pd.to_datetime(df["date"] + " " + df["time"], format="%Y.%m.%d %H:%M:%S")
+        df = df.rename(columns={"tickvol": "tick_volume", "vol": "real_volume"})
+    else:
+        df = pd.read_csv(path, float_precision="round_trip")
+        if df["time"].dtype == object:
+            df["time"] = pd.to_datetime(df["time"])
+    return rates_from_frame(df)
+
+
+def read_ticks(path):
+    """csv tick MT5 export (<DATE> <TIME> <BID> <ASK>..., ô trống = giữ giá cũ) / csv time|time_msc,bid,ask / .npy."""
+    if path.endswith(".npy"):
+        raw = np.load(path)
+        return {name: raw[name] for name in raw.dtype.names}
+    import pandas as pd
+    with open(path, encoding="utf-8-sig") as f:
+        header = f.readline()
+    if header.startswith("<DATE>"):
+        df = pd.read_csv(path, sep="\t")
+        df.columns = [c.strip("<>").lower() for c in df.columns]
+        stamp = pd.to_datetime(df["date"] + " " + df["time"], format="%Y.%m.%d %H:%M:%S.%f")
+        df["time_msc"] = stamp.to_numpy().astype("datetime64[ms]").astype(np.int64)
+        df[["bid", "ask"]] = df[["bid", "ask"]].ffill()
+        df = df.dropna(subset=["bid", "ask"])
+    else:
+        df = pd.read_csv(path, float_precision="round_trip")
+    return {col: df[col].to_numpy() for col in df.columns}
+
+
+class _Feed:
+    """Đường giá của 1 symbol: nến M1 + các điểm giá (time, bid, ask) theo thứ tự, con trỏ tới điểm hiện tại."""
+
+    __slots__ = ("symbol", "m1", "pt_time", "pt_bid", "pt_ask", "pt_bar", "bar_first", "from_ticks", "p", "tf")
+
+    def __init__(self, symbol, m1, pt_time, pt_bid, pt_ask, pt_bar, bar_first, from_ticks):
+        self.symbol = symbol
+        self.m1 = m1
+        self.pt_time = pt_time
+        self.pt_bid = pt_bid
+        self.pt_ask = pt_ask
+        self.pt_bar = pt_bar
+        self.bar_first = bar_first      # điểm đầu của từng nến, phần tử cuối = số điểm
+        self.from_ticks = from_ticks
+        self.p = -1
+        self.tf = {}                    # timeframe -> (nến, chỉ số M1 đầu mỗi nến, chỉ số nến của từng M1)
+
+    def timeframe(self, timeframe):
+        cached = self.tf.get(timeframe)
+        if cached is not None:
+            return cached
+        m1 = self.m1
+        n = len(m1)
+        if timeframe == TIMEFRAME_M1:
+            index = np.arange(n)
+            cached = (m1, index, index)
+        else:
+            bucket = _bucket(m1["time"], timeframe)
+            first = np.r_[True, bucket[1:] != bucket[:-1]]
+            starts = np.flatnonzero(first)
+            ends = np.r_[starts[1:] - 1, n - 1]
+            bars = np.zeros(len(starts), dtype=RATES_DTYPE)
+            bars["time"] = bucket[starts]
+            bars["open"] = m1["open"][starts]
+            bars["high"] = np.maximum.reduceat(m1["high"], starts)
+            bars["low"] = np.minimum.reduceat(m1["low"], starts)
+            bars["close"] = m1["close"][ends]
+            bars["tick_volume"] = np.add.reduceat(m1["tick_volume"], starts)
+            bars["spread"] = m1["spread"][starts]
+            bars["real_volume"] = np.add.reduceat(m1["real_volume"], starts)
+            cached = (bars, starts, np.cumsum(first) - 1)
+        self.tf[timeframe] = cached
+        return cached
+
+    def series(self, timeframe):
+        """(nến đã đóng, nến đang chạy dạng mảng 1 phần tử) tại điểm giá hiện tại; None nếu chưa có giá."""
+        p = self.p
+        if p < 0:
+            return None
+        bars, starts, index = self.timeframe(timeframe)
+        i = self.pt_bar[p]
+        s = self.bar_first[i]
+        k = index[i]
+        j = starts[k]
+        m1 = self.m1
+        seen = self.pt_bid[s:p + 1]
+        forming = np.zeros(1, dtype=RATES_DTYPE)
+        row = forming[0]
+        row["time"] = bars["time"][k]
+        row["open"] = m1["open"][j]
+        high, low = seen.max(), seen.min()
+        volume = int(round(int(m1["tick_volume"][i]) * (p - s + 1) / (self.bar_first[i + 1] - s)))
+        if i > j:
+            high = max(high, m1["high"][j:i].max())
+            low = min(low, m1["low"][j:i].min())
+            volume += int(m1["tick_volume"][j:i].sum())
+        row["high"], row["low"], row["close"] = high, low, self.pt_bid[p]
+        row["tick_volume"] = volume
+        row["spread"] = bars["spread"][k]
+        return bars[:k], forming
+
+
+class SimTerminal:
+    """
+    Terminal mô phỏng: dữ liệu giá, đồng hồ giả, tài khoản, positions / lệnh chờ / lịch sử deal.
+    Mọi hàm API của MetaTrader5 (initialize, copy_rates_from_pos, order_send...) là method cùng tên;
+    module fake_mt5 chuyển lời gọi `mt5.<hàm>` sang terminal đang cài (install()).
+    """
+
+    def __init__(self, balance=10000.0, leverage=100, currency=DEFAULT_ACCOUNT_CURRENCY, login=1000001,
+                 server="Sim-Server", latency_ms=0.0, latency_jitter_ms=0.0, call_latency_ms=0.0,
+                 realtime_latency=False, slippage_points=0, slippage_mode="adverse", commission_per_lot=0.0,
+                 max_idle=300.0, seed=0):
+        self.balance = float(balance)
+        self.leverage = int(leverage)
+        self.currency = currency
+        self.login_id = int(login)
+        self.server = server
+        self.latency_ms = float(latency_ms)
+        self.latency_jitter_ms = float(latency_jitter_ms)
+        self.call_latency_ms = float(call_latency_ms)
+        self.realtime_latency = realtime_latency
+        self.slippage_points = int(slippage_points)
+        self.slippage_mode = slippage_mode
+        self.commission_per_lot = float(commission_per_lot)
+        self.max_idle = max_idle          # khoảng trống dữ liệu dài hơn (cuối tuần) → sleep nhảy tới điểm giá kế tiếp
+        self.rng = random.Random(seed)
+        self.symbols = {}                 # name -> spec dict
+        self.feeds = {}                   # name -> _Feed
+        self.now = 0.0
+        self.start_time = None
+        self.end_time = None
+        self.connected = False
+        self.error = (RES_S_OK, "Success")
+        self.positions = {}               # ticket -> dict
+        self.orders = {}                  # ticket -> dict (lệnh chờ đang chờ)
+        self.deals = []                   # TradeDeal theo thời gian
+        self._deal_times = []
+        self.history_orders = []          # TradeOrder đã xong (khớp / huỷ / hết hạn)
+        self._history_order_times = []
+        self._next_order = 100000000
+        self._next_deal = 50000000
+        self._request_id = 0
+        self._forced = []                 # [(retcode, actions)] cho fail_next
+        self._driver = None
+        self._datetime = None
+        self.counters = {"points": 0, "order_send": 0, "rejected": 0, "sl": 0, "tp": 0, "pending_filled": 0,
+                         "expired": 0}
+        self.peak_balance = self.balance
+        self.max_drawdown = 0.0
+        self.wall_started = None
+
+    # ----- dữ liệu -----
+
+    def add_symbol(self, name, **spec):
+        """Đăng ký symbol (thông số preset theo tên, ghi đè bằng spec: digits, trade_contract_size, spread_points...)."""
+        base = self.symbols.get(name) or symbol_preset(name, self.currency)
+        base.update(spec)
+        if "digits" in spec and "point" not in spec:
+            base["point"] = round(10.0 ** -base["digits"], base["digits"])
+            base["trade_tick_size"] = base["point"]
+        self.symbols[name] = base
+        return base
+
+    def load_bars(self, symbol, source, **spec):
+        """Nến M1 (đường dẫn / mảng copy_rates / DataFrame) → đường giá 4 điểm mỗi nến."""
+        info = self.add_symbol(symbol, **spec)
+        if isinstance(source, str):
+            m1 = read_rates(source)
+        elif isinstance(source, np.ndarray) and source.dtype.names:
+            m1 = rates_from_frame({name: source[name] for name in source.dtype.names})
+        else:
+            m1 = rates_from_frame(source)
+        m1 = m1[np.argsort(m1["time"], kind="stable")]
+        point, digits = info["point"], info["digits"]
+        m1["spread"] = np.where(m1["spread"] > 0, m1["spread"], info["spread_points"])
+        n = len(m1)
+        up = m1["close"] >= m1["open"]
+        path = np.column_stack([m1["open"], np.where(up, m1["low"], m1["high"]),
+                                np.where(up, m1["high"], m1["low"]), m1["close"]])
+        bid = path.ravel()
+        ask = np.round(bid + np.repeat(m1["spread"], 4) * point, digits)
+        pt_time = (m1["time"][:, None] + OHLC_POINT_OFFSETS).ravel()
+        self.feeds[symbol] = _Feed(symbol, m1, pt_time, bid, ask, np.repeat(np.arange(n), 4),
+                                   np.arange(n + 1) * 4, from_ticks=False)
+        return len(m1)
+
+    def load_ticks(self, symbol, source, **spec):
+        """Tick (đường dẫn / dict cột / mảng copy_ticks) → điểm giá = tick, nến M1 gộp từ bid."""
+        info = self.add_symbol(symbol, **spec)
+        if isinstance(source, str):
+            cols = read_ticks(source)
+        elif isinstance(source, np.ndarray) and source.dtype.names:
+            cols = {name: source[name] for name in source.dtype.names}
+        else:
+            cols = {col: np.asarray(source[col]) for col in source}
+        if "time_msc" in cols:
+            pt_time = np.asarray(cols["time_msc"], dtype=np.int64) / 1000.0
+        else:
+            pt_time = np.asarray(cols["time"], dtype=np.float64)
+        order = np.argsort(pt_time, kind="stable")
+        pt_time = pt_time[order]
+        bid = np.asarray(cols["bid"], dtype=np.float64)[order]
+        ask = np.asarray(cols["ask"], dtype=np.float64)[order]
+        minute = (pt_time // 60).astype(np.int64) * 60
+        first = np.r_[True, minute[1:] != minute[:-1]]
+        starts = np.flatnonzero(first)
+        m1 = np.zeros(len(starts), dtype=RATES_DTYPE)
+        m1["time"] = minute[starts]
+        m1["open"] = bid[starts]
+        m1["high"] = np.maximum.reduceat(bid, starts)
+        m1["low"] = np.minimum.reduceat(bid, starts)
+        m1["close"] = bid[np.r_[starts[1:] - 1, len(bid) - 1]]
+        m1["tick_volume"] = np.diff(np.r_[starts, len(bid)])
+        m1["spread"] = np.round((ask[starts] - bid[starts]) / info["point"])
+        self.feeds[symbol] = _Feed(symbol, m1, pt_time, bid, ask, np.cumsum(first) - 1,
+                                   np.r_[starts, len(bid)], from_ticks=True)
+        return len(bid)
+
+    # ----- đồng hồ -----
+
+    def start(self, at=None, warmup_bars=0):
+        """Đặt đồng hồ ở `at` (mặc định: nến thứ warmup_bars, đủ lịch sử cho mọi symbol), kết nối sẵn."""
+        if not self.feeds:
+            raise ValueError("chưa có dữ liệu: gọi load_bars / load_ticks trước")
+        if at is None:
+            at = max(feed.m1["time"][min(warmup_bars, len(feed.m1) - 1)] for feed in self.feeds.values())
+        at = _ts(at)
+        for feed in self.feeds.values():
+            feed.p = int(np.searchsorted(feed.pt_time, at, side="right")) - 1
+        self.now = self.start_time = at
+        self.end_time = max(float(feed.pt_time[-1]) for feed in self.feeds.values())
+        self.connected = True
+        self._driver = threading.get_ident()
+        self.wall_started = time.perf_counter()
+        return self
+
+    def time(self):
+        return self.now
+
+    def time_ns(self):
+        return int(self.now * 1e9)
+
+    def sleep(self, seconds):
+        """time.sleep của bot: đồng hồ giả chạy tiếp (thread khác ngoài thread driver vẫn sleep thật)."""
+        if self._driver is not None and threading.get_ident() != self._driver:
+            _real_sleep(seconds)
+            return
+        self.advance_to(self.now + max(float(seconds), 0.0))
+
+    def step(self):
+        """Nhảy tới điểm giá kế tiếp (của bất kỳ symbol nào). False khi hết dữ liệu."""
+        upcoming = self._next_point_time()
+        if upcoming is None:
+            return False
+        self.advance_to(upcoming)
+        return True
+
+    def advance_to(self, target, finish=True):
+        """Chạy đồng hồ tới target: xử lý lệnh chờ / SL / TP trên từng điểm giá đi qua."""
+        if self.end_time is None:
+            raise ValueError("chưa start()")
+        if self.now >= self.end_time:
+            if finish:
+                raise SimulationFinished(f"hết dữ liệu ({_dt.datetime.fromtimestamp(self.end_time)})")
+            return
+        upcoming = self._next_point_time()
+        if upcoming is not None and upcoming > target and self.max_idle and upcoming - self.now > self.max_idle:
+            target = upcoming
+        target = min(target, self.end_time)
+        feeds = list(self.feeds.values())
+        while True:
+            best, best_time = None, None
+            for feed in feeds:
+                q = feed.p + 1
+                if q < len(feed.pt_time) and feed.pt_time[q] <= target and (best is None or feed.pt_time[q] < best_time):
+                    best, best_time = feed, feed.pt_time[q]
+            if best is None:
+                break
+            if not self._watching(best.symbol):
+                last = int(np.searchsorted(best.pt_time, target, side="right")) - 1
+                self.counters["points"] += last - best.p
+                best.p = last
+                continue
+            best.p += 1
+            self.counters["points"] += 1
+            self.now = float(best_time)
+            self._on_point(best, best.p)
+        self.now = max(self.now, target)
+
+    def _next_point_time(self):
+        upcoming = None
+        for feed in self.feeds.values():
+            q = feed.p + 1
+            if q < len(feed.pt_time) and (upcoming is None or feed.pt_time[q] < upcoming):
+                upcoming = float(feed.pt_time[q])
+        return upcoming
+
+    def _delay(self, ms):
+        if ms <= 0:
+            return
+        if self.realtime_latency or self.end_time is None:
+            _real_sleep(ms / 1000.0)
+        else:
+            self.advance_to(self.now + ms / 1000.0, finish=False)
+
+    @property
+    def datetime(self):
+        """Lớp datetime có now() / today() / utcnow() theo đồng hồ giả (cho patch_clock)."""
+        if self._datetime is None:
+            terminal = self
+
+            class SimDatetime(_dt.datetime):
+                @classmethod
+                def now(cls, tz=None):
+                    return cls.fromtimestamp(terminal.now, tz)
+
+                @classmethod
+                def today(cls):
+                    return cls.fromtimestamp(terminal.now)
+
+                @classmethod
+                def utcnow(cls):
+                    return cls.fromtimestamp(terminal.now, _dt.timezone.utc).replace(tzinfo=None)
+
+            class SimDate(_dt.date):
+                @classmethod
+                def today(cls):
+                    return cls.fromtimestamp(terminal.now)
+
+            self._datetime = (SimDatetime, SimDate)
+        return self._datetime[0]
+
+    # ----- giá -----
+
+    def _price(self, symbol):
+        feed = self.feeds.get(symbol)
+        if feed is None or feed.p < 0:
+            return None
+        return feed.pt_bid[feed.p], feed.pt_ask[feed.p]
+
+    def _slippage(self, spec):
+        if not self.slippage_points:
+            return 0.0
+        if self.slippage_mode == "symmetric":
+            points = self.rng.randint(-self.slippage_points, self.slippage_points)
+        else:
+            points = self.rng.randint(0, self.slippage_points)
+        return points * spec["point"]
+
+    def _profit(self, spec, side, volume, price_open, price_close):
+        diff = price_close - price_open if side == ORDER_TYPE_BUY else price_open - price_close
+        profit = diff * volume * spec["trade_contract_size"]
+        if spec["currency_profit"] != self.currency and spec["currency_base"] == self.currency and price_close:
+            profit /= price_close
+        return round(profit, 2)
+
+    def _margin(self, spec, volume, price):
+        notional = volume * spec["trade_contract_size"]
+        if spec["currency_base"] != self.currency:
+            notional *= price
+        return notional / self.leverage
+
+    def _floating(self):
+        profit = margin = 0.0
+        for pos in self.positions.values():
+            spec = self.symbols[pos["symbol"]]
+            bid, ask = self._price(pos["symbol"])
+            close = bid if pos["type"] == ORDER_TYPE_BUY else ask
+            profit += self._profit(spec, pos["type"], pos["volume"], pos["price_open"], close)
+            margin += self._margin(spec, pos["volume"], pos["price_open"])
+        return round(profit, 2), round(margin, 2)
+
+    # ----- sự kiện trên từng điểm giá -----
+
+    def _watching(self, symbol):
+        for order in self.orders.values():
+            if order["symbol"] == symbol:
+                return True
+        for pos in self.positions.values():
+            if pos["symbol"] == symbol and (pos["sl"] or pos["tp"]):
+                return True
+        return False
+
+    def _on_point(self, feed, q):
+        symbol = feed.symbol
+        bid, ask = feed.pt_bid[q], feed.pt_ask[q]
+        gap = feed.from_ticks or q == feed.bar_first[feed.pt_bar[q]]
+        spec = self.symbols[symbol]
+        for ticket, order in list(self.orders.items()):
+            if order["symbol"] != symbol:
+                continue
+            if order["type_time"] in (ORDER_TIME_SPECIFIED, ORDER_TIME_SPECIFIED_DAY) and \
+                    order["time_expiration"] and self.now >= order["time_expiration"]:
+                self._finish_order(ticket, ORDER_STATE_EXPIRED)
+                self.counters["expired"] += 1
+                continue
+            kind, level = order["type"], order["price_open"]
+            if kind == ORDER_TYPE_BUY_STOP and ask >= level:
+                fill = (ask if gap else level) + self._slippage(spec)
+            elif kind == ORDER_TYPE_SELL_STOP and bid <= level:
+                fill = (bid if gap else level) - self._slippage(spec)
+            elif kind == ORDER_TYPE_BUY_LIMIT and ask <= level:
+                fill = min(level, ask) if gap else level
+            elif kind == ORDER_TYPE_SELL_LIMIT and bid >= level:
+                fill = max(level, bid) if gap else level
+            else:
+                continue
+            self._fill_pending(ticket, round(fill, spec["digits"]))
+        for ticket, pos in list(self.positions.items()):
+            if pos["symbol"] != symbol or not (pos["sl"] or pos["tp"]):
+                continue
+            sl, tp = pos["sl"], pos["tp"]
+            if pos["type"] == ORDER_TYPE_BUY:
+                if sl and bid <= sl:
+                    self._close(pos, pos["volume"], round((bid if gap else sl) - self._slippage(spec), spec["digits"]),
+                                DEAL_REASON_SL, f"[sl {sl:.{spec['digits']}f}]")
+                elif tp and bid >= tp:
+                    self._close(pos, pos["volume"], bid if gap else tp, DEAL_REASON_TP,
+                                f"[tp {tp:.{spec['digits']}f}]")
+            else:
+                if sl and ask >= sl:
+                    self._close(pos, pos["volume"], round((ask if gap else sl) + self._slippage(spec), spec["digits"]),
+                                DEAL_REASON_SL, f"[sl {sl:.{spec['digits']}f}]")
+                elif tp and ask <= tp:
+                    self._close(pos, pos["volume"], ask if gap else tp, DEAL_REASON_TP,
+                                f"[tp {tp:.{spec['digits']}f}]")
+
+    # ----- sổ lệnh -----
+
+    def _new_order_ticket(self):
+        self._next_order += 1
+        return self._next_order
+
+    def _add_deal(self, symbol, side, entry, volume, price, order, position_id, magic, reason, comment, profit=0.0):
+        self._next_deal += 1
+        commission = -round(self.commission_per_lot * volume, 2)
+        deal = TradeDeal(ticket=self._next_deal, order=order, time=int(self.now), time_msc=int(self.now * 1000),
+                         type=side, entry=entry, magic=magic, position_id=position_id, reason=reason,
+                         volume=volume, price=float(price), commission=commission, swap=0.0, profit=profit,
+                         fee=0.0, symbol=symbol, comment=comment, external_id="")
+        self.deals.append(deal)
+        self._deal_times.append(deal.time)
+        self.balance = round(self.balance + profit + commission, 2)
+        if self.balance > self.peak_balance:
+            self.peak_balance = self.balance
+        self.max_drawdown = max(self.max_drawdown, self.peak_balance - self.balance)
+        return deal
+
+    def _add_history_order(self, ticket, symbol, kind, volume, price, state, magic, position_id, reason, comment,
+                           time_setup=None, type_time=ORDER_TIME_GTC, type_filling=ORDER_FILLING_FOK,
+                           expiration=0, sl=0.0, tp=0.0):
+        setup = self.now if time_setup is None else time_setup
+        order = TradeOrder(ticket=ticket, time_setup=int(setup), time_setup_msc=int(setup * 1000),
+                           time_done=int(self.now), time_done_msc=int(self.now * 1000),
+                           time_expiration=int(expiration or 0), type=kind, type_time=type_time,
+                           type_filling=type_filling, state=state, magic=magic, position_id=position_id,
+                           position_by_id=0, reason=reason, volume_initial=volume,
+                           volume_current=0.0 if state == ORDER_STATE_FILLED else volume, price_open=float(price),
+                           sl=sl, tp=tp, price_current=float(price), price_stoplimit=0.0, symbol=symbol,
+                           comment=comment, external_id="")
+        self.history_orders.append(order)
+        self._history_order_times.append(order.time_done)
+
+    def _open(self, symbol, side, volume, price, sl, tp, magic, comment, order_ticket, reason):
+        pos = dict(ticket=order_ticket, time=int(self.now), time_msc=int(self.now * 1000), time_update=int(self.now),
+                   time_update_msc=int(self.now * 1000), type=side, magic=magic, identifier=order_ticket,
+                   reason=POSITION_REASON_EXPERT if reason == DEAL_REASON_EXPERT else POSITION_REASON_CLIENT,
+                   volume=volume, price_open=float(price), sl=float(sl or 0.0), tp=float(tp or 0.0),
+                   symbol=symbol, comment=comment)
+        self.positions[order_ticket] = pos
+        return self._add_deal(symbol, side, DEAL_ENTRY_IN, volume, price, order_ticket, order_ticket, magic,
+                              reason, comment)
+
+    def _close(self, pos, volume, price, reason, comment, order_ticket=None, magic=None):
+        spec = self.symbols[pos["symbol"]]
+        side = ORDER_TYPE_SELL if pos["type"] == ORDER_TYPE_BUY else ORDER_TYPE_BUY
+        if order_ticket is None:     # SL / TP: server tạo lệnh đóng
+            order_ticket = self._new_order_ticket()
+            self._add_history_order(order_ticket, pos["symbol"], side, volume, price, ORDER_STATE_FILLED,
+                                    pos["magic"], pos["ticket"], reason, comment)
+            self.counters["sl" if reason == DEAL_REASON_SL else "tp"] += 1
+        profit = self._profit(spec, pos["type"], volume, pos["price_open"], price)
+        deal = self._add_deal(pos["symbol"], side, DEAL_ENTRY_OUT, volume, price, order_ticket, pos["ticket"],
+                              pos["magic"] if magic is None else magic, reason, comment, profit)
+        remaining = round(pos["volume"] - volume, 8)
+        if remaining <= 1e-9:
+            del self.positions[pos["ticket"]]
+        else:
+            pos["volume"] = remaining
+            pos["time_update"], pos["time_update_msc"] = int(self.now), int(self.now * 1000)
+        return deal
+
+    def _fill_pending(self, ticket, price):
+        order = self.orders.pop(ticket)
+        side = ORDER_TYPE_BUY if order["type"] in (ORDER_TYPE_BUY_STOP, ORDER_TYPE_BUY_LIMIT) else ORDER_TYPE_SELL
+        reason = DEAL_REASON_EXPERT if order["magic"] else DEAL_REASON_CLIENT
+        self._add_history_order(ticket, order["symbol"], order["type"], order["volume_initial"], order["price_open"],
+                                ORDER_STATE_FILLED, order["magic"], ticket, order["reason"], order["comment"],
+                                time_setup=order["time_setup"], type_time=order["type_time"],
+                                type_filling=order["type_filling"], expiration=order["time_expiration"],
+                                sl=order["sl"], tp=order["tp"])
+        self._open(order["symbol"], side, order["volume_initial"], price, order["sl"], order["tp"], order["magic"],
+                   order["comment"], ticket, reason)
+        self.counters["pending_filled"] += 1
+
+    def _finish_order(self, ticket, state):
+        order = self.orders.pop(ticket)
+        self._add_history_order(ticket, order["symbol"], order["type"], order["volume_initial"], order["price_open"],
+                                state, order["magic"], 0, order["reason"], order["comment"],
+                                time_setup=order["time_setup"], type_time=order["type_time"],
+                                type_filling=order["type_filling"], expiration=order["time_expiration"],
+                                sl=order["sl"], tp=order["tp"])
+
+    # ----- kiểm tra request -----
+
+    def _volume_ok(self, spec, volume):
+        if volume < spec["volume_min"] - 1e-9 or volume > spec["volume_max"] + 1e-9:
+            return False
+        steps = volume / spec["volume_step"]
+        return abs(steps - round(steps)) < 1e-6
+
+    def _stops_ok(self, spec, buy, reference, sl, tp):
+        """SL/TP cách giá tham chiếu ít nhất max(stops level, 1 point), đúng phía."""
+        distance = max(spec["trade_stops_level"], 1) * spec["point"] - 1e-9
+        if buy:
+            return (not sl or reference - sl >= distance) and (not tp or tp - reference >= distance)
+        return (not sl or sl - reference >= distance) and (not tp or reference - tp >= distance)
+
+    def _filling_ok(self, spec, filling):
+        if filling == ORDER_FILLING_FOK:
+            return bool(spec["filling_mode"] & SYMBOL_FILLING_FOK)
+        if filling == ORDER_FILLING_IOC:
+            return bool(spec["filling_mode"] & SYMBOL_FILLING_IOC)
+        if filling == ORDER_FILLING_RETURN:
+            return bool(spec.get("allow_return")) or spec["trade_exemode"] != SYMBOL_TRADE_EXECUTION_MARKET
+        return False
+
+    # ----- API MetaTrader5 -----
+
+    def initialize(self, path=None, login=None, password=None, server=None, timeout=None, portable=False):
+        if login:
+            self.login_id = int(login)
+        if server:
+            self.server = server
+        self.connected = True
+        self.error = (RES_S_OK, "Success")
+        return True
+
+    def login(self, login, password=None, server=None, timeout=None):
+        return self.initialize(login=login, server=server)
+
+    def shutdown(self):
+        self.connected = False
+        return True
+
+    def last_error(self):
+        return self.error
+
+    def version(self):
+        return (500, 4000, "01 Jan 2024")
+
+    def account_info(self):
+        profit, margin = self._floating()
+        equity = round(self.balance + profit, 2)
+        return AccountInfo(login=self.login_id, trade_mode=ACCOUNT_TRADE_MODE_DEMO, leverage=self.leverage,
+                           limit_orders=200, margin_so_mode=0, trade_allowed=True, trade_expert=True,
+                           margin_mode=ACCOUNT_MARGIN_MODE_RETAIL_HEDGING, currency_digits=2, fifo_close=False,
+                           balance=self.balance, credit=0.0, profit=profit, equity=equity, margin=margin,
+                           margin_free=round(equity - margin, 2),
+                           margin_level=round(equity / margin * 100, 2) if margin else 0.0,
+                           margin_so_call=60.0, margin_so_so=0.0, margin_initial=0.0, margin_maintenance=0.0,
+                           assets=0.0, liabilities=0.0, commission_blocked=0.0, name="Simulated account",
+                           server=self.server, currency=self.currency, company="tradecore")
+
+    def terminal_info(self):
+        return TerminalInfo(community_account=False, community_connection=False, connected=self.connected,
+                            dlls_allowed=False, trade_allowed=True, tradeapi_disabled=False, email_enabled=False,
+                            ftp_enabled=False, notifications_enabled=False, mqid=False, build=4000,
+                            maxbars=100000000, codepage=0, ping_last=int(self.latency_ms * 1000),
+                            community_balance=0.0, retransmission=0.0, company="tradecore",
+                            name="Simulated MetaTrader 5", language="English", path="", data_path="",
+                            commondata_path="")
+
+    def symbol_info(self, symbol):
+        spec = self.symbols.get(symbol)
+        if spec is None:
+            self.error = (RES_E_NOT_FOUND, "Terminal: Not found")
+            return None
+        price = self._price(symbol)
+        bid, ask = price if price is not None else (0.0, 0.0)
+        values = {field: ("" if field in _SYMBOL_STR_FIELDS else 0) for field in SYMBOL_FIELDS}
+        values.update({k: v for k, v in spec.items() if k in values})
+        tick_value = spec["trade_contract_size"] * spec["point"]
+        if spec["currency_profit"] != self.currency and spec["currency_base"] == self.currency and bid:
+            tick_value /= bid
+        values.update(select=True, visible=True, time=int(self.now), bid=float(bid), ask=float(ask),
+                      bidhigh=float(bid), bidlow=float(bid), askhigh=float(ask), asklow=float(ask),
+                      spread=int(round((ask - bid) / spec["point"])) if price is not None else spec["spread_points"],
+                      spread_float=True, trade_tick_value=tick_value, trade_tick_value_profit=tick_value,
+                      trade_tick_value_loss=tick_value, margin_hedged=spec["trade_contract_size"] / 2,
+                      order_mode=127, expiration_mode=15, order_gtc_mode=0)
+        return SymbolInfo(**values)
+
+    def symbol_info_tick(self, symbol):
+        feed = self.feeds.get(symbol)
+        if feed is None or feed.p < 0:
+            self.error = (RES_E_NOT_FOUND, "Terminal: Not found")
+            return None
+        p = feed.p
+        t = float(feed.pt_time[p])
+        return Tick(time=int(t), bid=float(feed.pt_bid[p]), ask=float(feed.pt_ask[p]), last=0.0, volume=0,
+                    time_msc=int(t * 1000), flags=6, volume_real=0.0)
+
+    def symbol_select(self, symbol, enable=True):
+        return symbol in self.symbols
+
+    def symbols_total(self):
+        return len(self.symbols)
+
+    def symbols_get(self, group=None):
+        return tuple(self.symbol_info(name) for name in self.symbols if _group_match(name, group))
+
+    def copy_rates_from_pos(self, symbol, timeframe, start_pos, count):
+        feed = self.feeds.get(symbol)
+        series = feed.series(timeframe) if feed is not None else None
+        if series is None:
+            self.error = (RES_E_INVALID_PARAMS, "Terminal: Invalid params")
+            return None
+        closed, forming = series
+        need = int(start_pos) + int(count)
+        if need <= 0:
+            return None
+        head = closed[max(0, len(closed) - need + 1):]
+        full = np.concatenate([head, forming])
+        end = len(full) - int(start_pos)
+        if end <= 0:
+            self.error = (RES_E_INVALID_PARAMS, "Terminal: Invalid params")
+            return None
+        return full[max(0, end - int(count)):end].copy()
+
+    def copy_rates_from(self, symbol, timeframe, date_from, count):
+        feed = self.feeds.get(symbol)
+        series = feed.series(timeframe) if feed is not None else None
+        if series is None:
+            return None
+        closed, forming = series
+        until = _ts(date_from)
+        parts = []
+        if forming["time"][0] <= until:
+            head = closed[max(0, len(closed) - int(count) + 1):]
+            parts = [head, forming]
+        else:
+            end = int(np.searchsorted(closed["time"], until, side="right"))
+            parts = [closed[max(0, end - int(count)):end]]
+        rates = np.concatenate(parts)
+        return rates[-int(count):].copy() if len(rates) else rates
+
+    def copy_rates_range(self, symbol, timeframe, date_from, date_to):
+        feed = self.feeds.get(symbol)
+        series = feed.series(timeframe) if feed is not None else None
+        if series is None:
+            return None
+        closed, forming = series
+        start, end = _ts(date_from), _ts(date_to)
+        lo = int(np.searchsorted(closed["time"], start, side="left"))
+        hi = int(np.searchsorted(closed["time"], end, side="right"))
+        parts = [closed[lo:hi]]
+        if start <= forming["time"][0] <= end:
+            parts.append(forming)
+        return np.concatenate(parts).copy()
+
+    def _ticks(self, symbol, lo_time, hi_time=None, count=None):
+        feed = self.feeds.get(symbol)
+        if feed is None or feed.p < 0:
+            return None
+        lo = int(np.searchsorted(feed.pt_time, lo_time, side="left"))
+        hi = feed.p + 1
+        if hi_time is not None:
+            hi = min(hi, int(np.searchsorted(feed.pt_time, hi_time, side="right")))
+        if count is not None:
+            hi = min(hi, lo + int(count))
+        lo = min(lo, hi)
+        ticks = np.zeros(hi - lo, dtype=TICKS_DTYPE)
+        ticks["time"] = feed.pt_time[lo:hi].astype(np.int64)
+        ticks["time_msc"] = (feed.pt_time[lo:hi] * 1000).astype(np.int64)
+        ticks["bid"] = feed.pt_bid[lo:hi]
+        ticks["ask"] = feed.pt_ask[lo:hi]
+        ticks["flags"] = 6
+        return ticks
+
+    def copy_ticks_from(self, symbol, date_from, count, flags=COPY_TICKS_ALL):
+        return self._ticks(symbol, _ts(date_from), count=count)
+
+    def copy_ticks_range(self, symbol, date_from, date_to, flags=COPY_TICKS_ALL):
+        return self._ticks(symbol, _ts(date_from), _ts(date_to))
+
+    def positions_total(self):
+        return len(self.positions)
+
+    def positions_get(self, symbol=None, group=None, ticket=None, **_ignored):
+        out = []
+        for pos in self.positions.values():
+            if ticket is not None and pos["ticket"] != int(ticket):
+                continue
+            if symbol is not None and pos["symbol"] != symbol:
+                continue
+            if group is not None and not _group_match(pos["symbol"], group):
+                continue
+            spec = self.symbols[pos["symbol"]]
+            bid, ask = self._price(pos["symbol"])
+            current = float(bid if pos["type"] == ORDER_TYPE_BUY else ask)
+            out.append(TradePosition(price_current=current, swap=0.0, external_id="",
+                                     profit=self._profit(spec, pos["type"], pos["volume"], pos["price_open"], current),
+                                     **pos))
+        return tuple(out)
+
+    def orders_total(self):
+        return len(self.orders)
+
+    def orders_get(self, symbol=None, group=None, ticket=None, **_ignored):
+        out = []
+        for order in self.orders.values():
+            if ticket is not None and order["ticket"] != int(ticket):
+                continue
+            if symbol is not None and order["symbol"] != symbol:
+                continue
+            if group is not None and not _group_match(order["symbol"], group):
+                continue
+            bid, ask = self._price(order["symbol"])
+            buy = order["type"] in (ORDER_TYPE_BUY_STOP, ORDER_TYPE_BUY_LIMIT)
+            out.append(TradeOrder(price_current=float(ask if buy else bid), **order))
+        return tuple(out)
+
+    def _history(self, items, times, date_from, date_to, group, ticket, position, ticket_field):
+        if ticket is not None:
+            return tuple(item for item in items if getattr(item, ticket_field) == int(ticket))
+        if position is not None:
+            return tuple(item for item in items if item.position_id == int(position))
+        if date_from is None or date_to is None:
+            self.error = (RES_E_INVALID_PARAMS, "Terminal: Invalid params")
+            return None
+        lo = bisect.bisect_left(times, _ts(date_from))
+        hi = bisect.bisect_right(times, _ts(date_to))
+        return tuple(item for item in items[lo:hi] if group is None or _group_match(item.symbol, group))
+
+    def history_deals_get(self, date_from=None, date_to=None, group=None, ticket=None, position=None):
+        """ticket = lọc theo ticket lệnh (DEAL_ORDER) như MT5; position = theo position_id."""
+        return self._history(self.deals, self._deal_times, date_from, date_to, group, ticket, position, "order")
+
+    def history_deals_total(self, date_from, date_to):
+        deals = self.history_deals_get(date_from, date_to)
+        return len(deals) if deals is not None else None
+
+    def history_orders_get(self, date_from=None, date_to=None, group=None, ticket=None, position=None):
+        return self._history(self.history_orders, self._history_order_times, date_from, date_to, group, ticket,
+                             position, "ticket")
+
+    def history_orders_total(self, date_from, date_to):
+        orders = self.history_orders_get(date_from, date_to)
+        return len(orders) if orders is not None else None
+
+    def history_select(self, date_from=None, date_to=None):
+        return True
+
+    def order_calc_profit(self, action, symbol, volume, price_open, price_close):
+        spec = self.symbols.get(symbol)
+        if spec is None:
+            return None
+        return self._profit(spec, action, volume, price_open, price_close)
+
+    def order_calc_margin(self, action, symbol, volume, price):
+        spec = self.symbols.get(symbol)
+        if spec is None:
+            return None
+        return round(self._margin(spec, volume, price), 2)
+
+    def fail_next(self, retcode, count=1, actions=None):
+        """Ép `count` lần order_send kế tiếp (chỉ các action trong `actions` nếu có) trả về retcode."""
+        for _ in range(count):
+            self._forced.append((int(retcode), set(actions) if actions else None))
+
+    def _request(self, request):
+        values = {field: request.get(field, 0) for field in TradeRequest._fields}
+        values["symbol"] = request.get("symbol", "")
+        values["comment"] = request.get("comment", "")
+        return TradeRequest(**values)
+
+    def _result(self, retcode, req, deal=0, order=0, volume=0.0, price=0.0, comment=None):
+        self._request_id += 1
+        tick = self._price(req.symbol) if req.symbol else None
+        bid, ask = tick if tick is not None else (0.0, 0.0)
+        if retcode != TRADE_RETCODE_DONE:
+            self.counters["rejected"] += 1
+        return OrderSendResult(retcode=retcode, deal=deal, order=order, volume=volume, price=float(price),
+                               bid=float(bid), ask=float(ask),
+                               comment=comment or RETCODE_COMMENTS.get(retcode, str(retcode)),
+                               request_id=self._request_id, retcode_external=0, request=req)
+
+    def order_send(self, request):
+        if not isinstance(request, dict) or "action" not in request:
+            self.error = (RES_E_INVALID_PARAMS, "Invalid arguments")
+            return None
+        if len(str(request.get("comment", ""))) > MAX_COMMENT:
+            self.error = (RES_E_INVALID_PARAMS, 'Invalid "comment" argument')
+            return None
+        req = self._request(request)
+        self.counters["order_send"] += 1
+        jitter = self.rng.uniform(-self.latency_jitter_ms, self.latency_jitter_ms) if self.latency_jitter_ms else 0.0
+        self._delay(self.latency_ms + jitter)
+        if self._forced and (self._forced[0][1] is None or req.action in self._forced[0][1]):
+            retcode = self._forced.pop(0)[0]
+            return self._result(retcode, req)
+        return self._execute(req, dry=False)
+
+    def order_check(self, request):
+        if not isinstance(request, dict) or "action" not in request:
+            self.error = (RES_E_INVALID_PARAMS, "Invalid arguments")
+            return None
+        req = self._request(request)
+        result = self._execute(req, dry=True)
+        account = self.account_info()
+        spec = self.symbols.get(req.symbol)
+        tick = self._price(req.symbol)
+        need = self._margin(spec, req.volume, tick[1]) if spec and tick and req.action == TRADE_ACTION_DEAL \
+            and not req.position else 0.0
+        margin = account.margin + need
+        retcode = 0 if result.retcode == TRADE_RETCODE_DONE else result.retcode
+        return OrderCheckResult(retcode=retcode, balance=account.balance, equity=account.equity,
+                                profit=account.profit, margin=round(margin, 2),
+                                margin_free=round(account.equity - margin, 2),
+                                margin_level=round(account.equity / margin * 100, 2) if margin else 0.0,
+                                comment="Done" if retcode == 0 else result.comment, request=req)
+
+    def _execute(self, req, dry):
+        if not self.connected:
+            return self._result(TRADE_RETCODE_CONNECTION, req)
+        action = req.action
+        if action == TRADE_ACTION_DEAL:
+            return self._deal_request(req, dry)
+        if action == TRADE_ACTION_PENDING:
+            return self._pending_request(req, dry)
+        if action == TRADE_ACTION_SLTP:
+            return self._sltp_request(req, dry)
+        if action == TRADE_ACTION_MODIFY:
+            return self._modify_request(req, dry)
+        if action == TRADE_ACTION_REMOVE:
+            if req.order not in self.orders:
+                return self._result(TRADE_RETCODE_INVALID_ORDER, req)
+            if not dry:
+                self._finish_order(req.order, ORDER_STATE_CANCELED)
+            return self._result(TRADE_RETCODE_DONE, req, order=req.order)
+        return self._result(TRADE_RETCODE_INVALID, req)
+
+    def _deal_request(self, req, dry):
+        position = self.positions.get(req.position) if req.position else None
+        if req.position and position is None:
+            return self._result(TRADE_RETCODE_POSITION_CLOSED, req)
+        symbol = position["symbol"] if position is not None else req.symbol
+        spec = self.symbols.get(symbol)
+        tick = self._price(symbol) if spec else None
+        if tick is None:
+            return self._result(TRADE_RETCODE_MARKET_CLOSED if spec else TRADE_RETCODE_INVALID, req)
+        if req.type not in (ORDER_TYPE_BUY, ORDER_TYPE_SELL):
+            return self._result(TRADE_RETCODE_INVALID, req)
+        volume = float(req.volume)
+        if not self._volume_ok(spec, volume) or (position is not None and volume > position["volume"] + 1e-9):
+            return self._result(TRADE_RETCODE_INVALID_VOLUME, req)
+        if not self._filling_ok(spec, req.type_filling):
+            return self._result(TRADE_RETCODE_INVALID_FILL, req)
+        if position is not None and req.type == position["type"]:
+            return self._result(TRADE_RETCODE_INVALID, req)
+        bid, ask = tick
+        buy = req.type == ORDER_TYPE_BUY
+        market = ask if buy else bid
+        if spec["trade_exemode"] == SYMBOL_TRADE_EXECUTION_INSTANT and req.price and \
+                abs(req.price - market) > max(int(req.deviation or 0), 0) * spec["point"] + 1e-9:
+            return self._result(TRADE_RETCODE_REQUOTE, req)
+        slip = self._slippage(spec)
+        price = round(market + slip if buy else market - slip, spec["digits"])
+        if position is None:
+            if not self._stops_ok(spec, buy, bid if buy else ask, req.sl, req.tp):
+                return self._result(TRADE_RETCODE_INVALID_STOPS, req)
+            profit, margin = self._floating()
+            if self._margin(spec, volume, price) > self.balance + profit - margin:
+                return self._result(TRADE_RETCODE_NO_MONEY, req)
+        if dry:
+            return self._result(TRADE_RETCODE_DONE, req, volume=volume, price=price)
+        ticket = self._new_order_ticket()
+        reason = DEAL_REASON_EXPERT if req.magic else DEAL_REASON_CLIENT
+        if position is None:
+            deal = self._open(symbol, req.type, volume, price, req.sl, req.tp, req.magic, req.comment, ticket,
+                              reason)
+            position_id = ticket
+        else:
+            position_id = position["ticket"]
+            deal = self._close(position, volume, price, reason, req.comment, order_ticket=ticket, magic=req.magic)
+        self._add_history_order(ticket, symbol, req.type, volume, price, ORDER_STATE_FILLED, req.magic,
+                                position_id, reason, req.comment, type_filling=req.type_filling)
+        return self._result(TRADE_RETCODE_DONE, req, deal=deal.ticket, order=ticket, volume=volume, price=price)
+
+    def _pending_ok(self, spec, kind, price, sl, tp):
+        """retcode lỗi của lệnh chờ (giá so với thị trường, SL/TP so với giá lệnh) hoặc None."""
+        bid, ask = self._price(spec["name"])
+        distance = max(spec["trade_stops_level"], 1) * spec["point"] - 1e-9
+        valid = {ORDER_TYPE_BUY_STOP: price - ask >= distance, ORDER_TYPE_BUY_LIMIT: ask - price >= distance,
+                 ORDER_TYPE_SELL_STOP: bid - price >= distance, ORDER_TYPE_SELL_LIMIT: price - bid >= distance}
+        if kind not in valid:
+            return TRADE_RETCODE_INVALID
+        if not valid[kind]:
+            return TRADE_RETCODE_INVALID_PRICE
+        if not self._stops_ok(spec, kind in (ORDER_TYPE_BUY_STOP, ORDER_TYPE_BUY_LIMIT), price, sl, tp):
+            return TRADE_RETCODE_INVALID_STOPS
+        return None
+
+    def _pending_request(self, req, dry):
+        spec = self.symbols.get(req.symbol)
+        if spec is None or self._price(req.symbol) is None:
+            return self._result(TRADE_RETCODE_MARKET_CLOSED if spec else TRADE_RETCODE_INVALID, req)
+        volume = float(req.volume)
+        if not self._volume_ok(spec, volume):
+            return self._result(TRADE_RETCODE_INVALID_VOLUME, req)
+        price = round(float(req.price), spec["digits"])
+        error = self._pending_ok(spec, req.type, price, req.sl, req.tp)
+        if error is not None:
+            return self._result(error, req)
+        expiration = _ts(req.expiration) if req.expiration else 0
+        if req.type_time in (ORDER_TIME_SPECIFIED, ORDER_TIME_SPECIFIED_DAY) and expiration <= self.now:
+            return self._result(TRADE_RETCODE_INVALID_EXPIRATION, req)
+        if dry:
+            return self._result(TRADE_RETCODE_DONE, req, volume=volume, price=price)
+        ticket = self._new_order_ticket()
+        self.orders[ticket] = dict(
+            ticket=ticket, time_setup=int(self.now), time_setup_msc=int(self.now * 1000), time_done=0,
+            time_done_msc=0, time_expiration=int(expiration), type=req.type, type_time=req.type_time,
+            type_filling=req.type_filling, state=ORDER_STATE_PLACED, magic=req.magic, position_id=0,
+            position_by_id=0, reason=ORDER_REASON_EXPERT if req.magic else ORDER_REASON_CLIENT,
+            volume_initial=volume, volume_current=volume, price_open=price, sl=float(req.sl or 0.0),
+            tp=float(req.tp or 0.0), price_stoplimit=0.0, symbol=req.symbol, comment=req.comment, external_id="")
+        return self._result(TRADE_RETCODE_DONE, req, order=ticket, volume=volume, price=price)
+
+    def _sltp_request(self, req, dry):
+        position = self.positions.get(req.position)
+        if position is None:
+            return self._result(TRADE_RETCODE_POSITION_CLOSED, req)
+        spec = self.symbols[position["symbol"]]
+        sl, tp = float(req.sl or 0.0), float(req.tp or 0.0)
+        if abs(sl - position["sl"]) < 1e-9 and abs(tp - position["tp"]) < 1e-9:
+            return self._result(TRADE_RETCODE_NO_CHANGES, req)
+        bid, ask = self._price(position["symbol"])
+        buy = position["type"] == ORDER_TYPE_BUY
+        if not self._stops_ok(spec, buy, bid if buy else ask, sl, tp):
+            return self._result(TRADE_RETCODE_INVALID_STOPS, req)
+        if not dry:
+            position["sl"], position["tp"] = sl, tp
+            position["time_update"], position["time_update_msc"] = int(self.now), int(self.now * 1000)
+        return self._result(TRADE_RETCODE_DONE, req)
+
+    def _modify_request(self, req, dry):
+        order = self.orders.get(req.order)
+        if order is None:
+            return self._result(TRADE_RETCODE_INVALID_ORDER, req)
+        spec = self.symbols[order["symbol"]]
+        price = round(float(req.price or order["price_open"]), spec["digits"])
+        sl, tp = float(req.sl or 0.0), float(req.tp or 0.0)
+        expiration = _ts(req.expiration) if req.expiration else order["time_expiration"]
+        if abs(price - order["price_open"]) < 1e-9 and abs(sl - order["sl"]) < 1e-9 and \
+                abs(tp - order["tp"]) < 1e-9 and expiration == order["time_expiration"]:
+            return self._result(TRADE_RETCODE_NO_CHANGES, req)
+        error = self._pending_ok(spec, order["type"], price, sl, tp)
+        if error is not None:
+            return self._result(error, req)
+        if not dry:
+            order.update(price_open=price, sl=sl, tp=tp, time_expiration=int(expiration or 0))
+            if req.type_time:
+                order["type_time"] = req.type_time
+        return self._result(TRADE_RETCODE_DONE, req, order=req.order, price=price)
+
+    # ----- kết quả -----
+
+    def summary(self):
+        """Tóm tắt lần chạy: số deal đóng, thắng / thua, lãi ròng, drawdown (theo balance), tốc độ so với thời gian thực."""
+        closed = [d for d in self.deals if d.entry == DEAL_ENTRY_OUT]
+        wins = sum(1 for d in closed if d.profit > 0)
+        net = round(sum(d.profit + d.commission for d in self.deals), 2)
+        simulated = (self.now - self.start_time) if self.start_time is not None else 0.0
+        wall = time.perf_counter() - self.wall_started if self.wall_started else 0.0
+        return {
+            "balance": self.balance, "equity": self.account_info().equity, "closed_deals": len(closed),
+            "wins": wins, "losses": len(closed) - wins, "net_profit": net,
+            "max_drawdown": round(self.max_drawdown, 2), "open_positions": len(self.positions),
+            "pending_orders": len(self.orders), "simulated_hours": round(simulated / 3600, 1),
+            "wall_seconds": round(wall, 2), "speedup": round(simulated / wall, 1) if wall else None,
+            **self.counters,
+        }
+
+
+# ----- module MetaTrader5: hàm cấp module chuyển sang terminal đang cài -----
+
+API_FUNCTIONS = (
+    "initialize", "login", "shutdown", "last_error", "version", "account_info", "terminal_info",
+    "symbol_info", "symbol_info_tick", "symbol_select", "symbols_total", "symbols_get",
+    "copy_rates_from_pos", "copy_rates_from", "copy_rates_range", "copy_ticks_from", "copy_ticks_range",
+    "positions_total", "positions_get", "orders_total", "orders_get",
+    "history_deals_get", "history_deals_total", "history_orders_get", "history_orders_total", "history_select",
+    "order_calc_profit", "order_calc_margin", "order_check", "order_send",
+)
+_NO_CONNECTION_OK = {"initialize", "login", "shutdown", "last_error", "version"}
+
+_terminal = SimTerminal()
+
+
+def _forward(name):
+    def call(*args, **kwargs):
+        terminal = _terminal
+        if name not in _NO_CONNECTION_OK:
+            if not terminal.connected:
+                terminal.error = (RES_E_NO_IPC_CONNECTION, "No IPC connection")
+                return None
+            if terminal.call_latency_ms and name != "order_send":
+                terminal._delay(terminal.call_latency_ms)
+        return getattr(terminal, name)(*args, **kwargs)
+    call.__name__ = name
+    call.__qualname__ = name
+    call.__doc__ = getattr(SimTerminal, name).__doc__
+    return call
+
+
+for _name in API_FUNCTIONS:
+    globals()[_name] = _forward(_name)
+del _name
+
+
+def terminal():
+    """Terminal đang cài."""
+    return _terminal
+
+
+def install(sim=None):
+    """
+    Dùng module này làm MetaTrader5 cho cả process: sys.modules["MetaTrader5"] = fake_mt5, biến trỏ tới
+    MetaTrader5 thật trong các module đã import (nếu có) được đổi sang fake. Trả về terminal đang cài.
+    """
+    global _terminal
+    if sim is not None:
+        _terminal = sim
+    module = sys.modules[__name__]
+    previous = sys.modules.get("MetaTrader5")
+    sys.modules["MetaTrader5"] = module
+    if previous is not None and previous is not module:
+        for mod in list(sys.modules.values()):
+            namespace = getattr(mod, "__dict__", None)
+            if not isinstance(namespace, dict) or mod is module:
+                continue
+            for key, value in list(namespace.items()):
+                if value is previous:
+                    namespace[key] = module
+    return _terminal
+
+
+class _ClockModule(types.ModuleType):
+    """Module time / datetime thay thế: vài hàm theo đồng hồ giả, còn lại lấy từ module thật."""
+
+    def __init__(self, real, overrides):
+        super().__init__(real.__name__, real.__doc__)
+        self.__dict__["_real"] = real
+        self.__dict__.update(overrides)
+
+    def __getattr__(self, name):
+        return getattr(self.__dict__["_real"], name)
+
+
+def _clock_modules(sim):
+    SimDatetime, SimDate = sim.datetime, sim._datetime[1]
+    time_module = _ClockModule(time, {
+        "time": sim.time, "time_ns": sim.time_ns, "sleep": sim.sleep,
+        "localtime": lambda secs=None: time.localtime(sim.now if secs is None else secs),
+        "gmtime": lambda secs=None: time.gmtime(sim.now if secs is None else secs),
+        "ctime": lambda secs=None: time.ctime(sim.now if secs is None else secs),
+        "strftime": lambda fmt, t=None: time.strftime(fmt, time.localtime(sim.now) if t is None else t),
+    })
+    datetime_module = _ClockModule(_dt, {"datetime": SimDatetime, "date": SimDate})
+    return time_module, datetime_module
+
+
+def patch_clock(sim, *modules):
+    """
+    Đổi time / datetime trong các module cho trước sang đồng hồ giả của terminal (module time, time.time,
+    time.sleep, datetime, datetime.datetime, datetime.date import kiểu nào cũng được).
+    Trả về hàm restore() để trả lại như cũ.
+    """
+    time_module, datetime_module = _clock_modules(sim)
+    replacements = {id(time): time_module, id(_dt): datetime_module, id(_dt.datetime): sim.datetime,
+                    id(_dt.date): sim._datetime[1], id(_real_time): sim.time, id(_real_sleep): sim.sleep}
+    changed = []
+    for module in modules:
+        namespace = module.__dict__
+        for key, value in list(namespace.items()):
+            replacement = replacements.get(id(value))
+            if replacement is not None:
+                changed.append((namespace, key, value))
+                namespace[key] = replacement
+
+    def restore():
+        for namespace, key, value in changed:
+            namespace[key] = value
+    return restore
+
+
+def patch_clock_globally(sim):
+    """
+    Cho CLI: time.time / time.sleep của cả process và module datetime import SAU lời gọi này theo đồng hồ giả
+    (pandas / numpy phải import trước). Thread ngoài thread driver vẫn sleep thật. Trả về restore().
+    """
+    _, datetime_module = _clock_modules(sim)
+    saved = (time.time, time.time_ns, time.sleep, sys.modules["datetime"])
+    time.time = sim.time
+    time.time_ns = sim.time_ns
+    time.sleep = sim.sleep
+    sys.modules["datetime"] = datetime_module
+
+    def restore():
+        time.time, time.time_ns, time.sleep, sys.modules["datetime"] = saved
+    return restore
+
+
+def synthetic_rates(bars, start=1_717_200_000, price=2350.0, step=0.35, digits=2, seed=7):
+    """Nến M1 ngẫu nhiên (cùng cách sinh với golden_check.make_synthetic) khi chưa có dữ liệu ghi thật."""
+    rng = np.random.default_rng(seed)
+    close = price + np.cumsum(rng.normal(0, step, bars))
+    open_ = np.r_[price, close[:-1]] + rng.normal(0, step * 0.2, bars)
+    high = np.maximum(open_, close) + rng.exponential(step * 0.5, bars)
+    low = np.minimum(open_, close) - rng.exponential(step * 0.5, bars)
+    return rates_from_frame({
+        "time": start + np.arange(bars, dtype=np.int64) * 60,
+        "open": np.round(open_, digits), "high": np.round(high, digits),
+        "low": np.round(low, digits), "close": np.round(close, digits),
+        "tick_volume": rng.integers(20, 400, bars),
+    })
+
+
+def record(symbol, path, count=100000):
+    """Ghi `count` nến M1 cuối từ terminal MetaTrader5 thật (Windows, đã initialize) ra .npy / .csv."""
+    import MetaTrader5 as real
+    rates = real.copy_rates_from_pos(symbol, real.TIMEFRAME_M1, 0, count)
+    if rates is None:
+        raise RuntimeError(f"copy_rates_from_pos({symbol}) lỗi: {real.last_error()}")
+    if path.endswith(".npy"):
+        np.save(path, rates)
+    else:
+        import pandas as pd
+        pd.DataFrame(rates).to_csv(path, index=False, float_format="%.17g")
+    return len(rates)
+
+
+def _pairs(values):
+    out = []
+    for value in values or []:
+        symbol, _, path = value.partition("=")
+        if not path:
+            raise SystemExit(f"cần SYMBOL=đường_dẫn, nhận: {value}")
+        out.append((symbol, path))
+    return out
+
+
+def main():
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description="Chạy script bot trên MetaTrader5 giả lập (đồng hồ giả, dữ liệu ghi sẵn)")
+    parser.add_argument("--bars", action="append", metavar="SYMBOL=PATH", help="nến M1 (.csv / .npy)")
+    parser.add_argument("--ticks", action="append", metavar="SYMBOL=PATH", help="tick (.csv / .npy)")
+    parser.add_argument("--record", action="append", metavar="SYMBOL=PATH",
+                        help="ghi nến M1 từ terminal thật ra file rồi thoát")
+    parser.add_argument("--count", type=int, default=100000, help="số nến khi --record")
+    parser.add_argument("--warmup", type=int, default=1500, help="số nến M1 lịch sử trước khi bắt đầu")
+    parser.add_argument("--balance", type=float, default=10000.0)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--slippage-points", type=int, default=0)
+    parser.add_argument("--commission", type=float, default=0.0, help="commission mỗi lot mỗi deal")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--telegram", action="store_true", help="cho phép gửi Telegram thật (mặc định chặn)")
+    parser.add_argument("script", nargs="?")
+    parser.add_argument("script_args", nargs=argparse.REMAINDER)
+    args = parser.parse_args()
+
+    if args.record:
+        for symbol, path in _pairs(args.record):
+            print(f"📝 {symbol}: {record(symbol, path, args.count)} nến → {path}")
+        return
+    if not args.script or not (args.bars or args.ticks):
+        parser.error("cần script và --bars / --ticks")
+
+    import runpy
+    import pandas   # noqa: F401 — import trước khi đổi module datetime
+    sim = SimTerminal(balance=args.balance, latency_ms=args.latency_ms, slippage_points=args.slippage_points,
+                      commission_per_lot=args.commission, seed=args.seed)
+    for symbol, path in _pairs(args.bars):
+        print(f"📈 {symbol}: {sim.load_bars(symbol, path)} nến M1 từ {path}")
+    for symbol, path in _pairs(args.ticks):
+        print(f"📈 {symbol}: {sim.load_ticks(symbol, path)} tick từ {path}")
+    if not args.telegram:
+        os.environ["TELEGRAM_API_BASE"] = "http://127.0.0.1:9"   # cổng discard: bot vẫn chạy, tin không ra ngoài
+    install(sim)
+    sim.start(warmup_bars=args.warmup)
+    print(f"⏱️ Bắt đầu {_dt.datetime.fromtimestamp(sim.start_time)} → {_dt.datetime.fromtimestamp(sim.end_time)}")
+    restore = patch_clock_globally(sim)
+    script = os.path.abspath(args.script)
+    sys.path.insert(0, os.path.dirname(script))
+    sys.argv = [script] + args.script_args
+    try:
+        runpy.run_path(script, run_name="__main__")
+    except SimulationFinished as e:
+        print(f"🏁 {e}")
+    finally:
+        restore()
+        summary = sim.summary()
+        print("📊 " + " | ".join(f"{k}={v}" for k, v in summary.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+"""
+Golden check: chạy mọi bản indicator trên nến fixture cố định và so với giá trị đã chốt.
+
+- fixtures/ohlc_<tên>.csv   : nến OHLC (time,open,high,low,close,tick_volume)
+- fixtures/golden_<tên>.csv : giá trị chuẩn (ghi bằng --record từ tradecore.indicators)
+
+Các bản được so: tradecore.indicators (pandas, cả lần tính và lần lấy từ indicator_cache),
+indicators_np, streaming_indicators (đẩy từng nến), swing_points (kernel + tracker) và utils.py
+của từng thư mục bot (không có MetaTrader5 — Linux / CI — thì nạp qua tradecore.fake_mt5). Kernel tối ưu mới chỉ cần qua check này là dùng được cho mọi bot.
+
+Chạy (từ thư mục gốc repo; `python tradecore/golden_check.py ...` cũng được):
+    python -m tradecore.golden_check                    # kiểm tra, exit 1 nếu sai lệch
+    python -m tradecore.golden_check --record           # ghi lại golden (chỉ khi cố ý đổi số học)
+    python -m tradecore.golden_check --fetch configs/config_1.json --symbol XAUUSDm --name xau_m1_live
+                                                        # ghi fixture OHLC từ terminal MT5 (M1)
+    python -m tradecore.golden_check --synthetic        # tạo lại fixture tổng hợp synthetic_*
+"""
+import os
+import sys
+import math
+import argparse
+import importlib.util
+
+if not __package__:
+    # chạy dạng file (python tradecore/golden_check.py): thư mục gốc repo thay cho tradecore/ trên sys.path
+    sys.path[0] = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+from tradecore import __version__
+from tradecore.indicators import calculate_heiken_ashi, calculate_atr, calculate_adx, calculate_rsi
+from tradecore.indicators_np import (
+    calculate_heiken_ashi_np, calculate_atr_np, calculate_adx_np, calculate_rsi_np, calculate_ut_bot_np,
+)
+from tradecore.streaming_indicators import IndicatorSet, HeikenAshi, ATR, ADX, WilderRSI
+from tradecore.swing_points import swing_point_indices, SwingPointTracker
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BOT_FOLDERS = ["XAU_M1", "XAU_M1_V2", "XAU_M1_REAL", "BTC_M1", "ETH_M1", "EUR_M1_REAL",
+               "EURUSD_M1_REAL_TUYEN", "GridStep", "GridStepReal"]
+TOLERANCE = 1e-9
+SWING_LOOKBACKS = (3, 5)
+# Cột so sánh đúng tuyệt đối (số nguyên / cờ)
+EXACT_COLUMNS = {"ut_pos"} | {f"swing_{kind}_{lb}" for kind in ("high", "low") for lb in SWING_LOOKBACKS}
+
+
+def load_ohlc(name):
+    df = pd.read_csv(os.path.join(FIXTURE_DIR, f"ohlc_{name}.csv"), float_precision="round_trip")
+    df['time'] = pd.to_datetime(df['time'], unit='s')
+    return df
+
+
+def fixture_names():
+    if not os.path.isdir(FIXTURE_DIR):
+        return []
+    return sorted(f[len("ohlc_"):-len(".csv")] for f in os.listdir(FIXTURE_DIR)
+                  if f.startswith("ohlc_") and f.endswith(".csv"))
+
+
+def swing_flags(n, idx):
+    flags = np.zeros(n, dtype=np.int64)
+    flags[idx] = 1
+    return flags
+
+
+def compute_pandas(df):
+    """Giá trị chuẩn: tradecore.indicators (cùng tham số bot dùng)."""
+    ha = calculate_heiken_ashi(df)
+    adx = calculate_adx(df, period=14)
+    out = {
+        "ha_open": ha['ha_open'], "ha_close": ha['ha_close'], "ha_high": ha['ha_high'], "ha_low": ha['ha_low'],
+        "atr_14": calculate_atr(df, period=14),
+        "adx_14": adx['adx'], "di_plus_14": adx['di_plus'], "di_minus_14": adx['di_minus'],
+        "rsi_14": calculate_rsi(df['close'], period=14),
+    }
+    stop, pos, _ = calculate_ut_bot_np(df['high'], df['low'], df['close'], 2, 10)
+    out["ut_stop"], out["ut_pos"] = stop, pos
+    out.update(compute_swings(df))
+    return {k: np.asarray(v) for k, v in out.items()}
+
+
+def compute_swings(df):
+    out = {}
+    for lb in SWING_LOOKBACKS:
+        idx_h, idx_l = swing_point_indices(df['high'].to_numpy(), df['low'].to_numpy(), lb)
+        out[f"swing_high_{lb}"] = swing_flags(len(df), idx_h)
+        out[f"swing_low_{lb}"] = swing_flags(len(df), idx_l)
+    return out
+
+
+def compute_numpy(df):
+    o, h, l, c = (df[col].to_numpy() for col in ('open', 'high', 'low', 'close'))
+    ha_open, ha_close, ha_high, ha_low = calculate_heiken_ashi_np(o, h, l, c)
+    adx, di_plus, di_minus = calculate_adx_np(h, l, c, 14)
+    stop, pos, _ = calculate_ut_bot_np(h, l, c, 2, 10)
+    return {"ha_open": ha_open, "ha_close": ha_close, "ha_high": ha_high, "ha_low": ha_low,
+            "atr_14": calculate_atr_np(h, l, c, 14), "adx_14": adx, "di_plus_14": di_plus,
+            "di_minus_14": di_minus, "rsi_14": calculate_rsi_np(c, 14), "ut_stop": stop, "ut_pos": pos}
+
+
+def compute_streaming(df):
+    """Đẩy từng nến vào IndicatorSet và ghi lại giá trị sau mỗi nến."""
+    ind = IndicatorSet({"ha": HeikenAshi(), "atr": ATR(14), "adx": ADX(14), "rsi": WilderRSI(14)})
+    rates = df_to_rates(df)
+    cols = {k: np.empty(len(df)) for k in ("ha_open", "ha_close", "ha_high", "ha_low",
+                                            "atr_14", "adx_14", "di_plus_14", "di_minus_14", "rsi_14")}
+    for i in range(len(rates)):
+        ind.sync(rates[i:i + 1])
+        cols["ha_open"][i], cols["ha_close"][i], cols["ha_high"][i], cols["ha_low"][i] = ind["ha"].value
+        cols["atr_14"][i] = ind["atr"].value
+        cols["adx_14"][i] = ind["adx"].value
+        cols["di_plus_14"][i] = ind["adx"].di_plus
+        cols["di_minus_14"][i] = ind["adx"].di_minus
+        cols["rsi_14"][i] = ind["rsi"].value
+    return cols
+
+
+def compute_swing_tracker(df):
+    """SwingPointTracker cập nhật từng nến như vòng lặp live (mỗi lần thêm 1 nến)."""
+    out = {}
+    times = df['time'].to_numpy()
+    high, low = df['high'].to_numpy(), df['low'].to_numpy()
+    for lb in SWING_LOOKBACKS:
+        tracker = SwingPointTracker(lb, max_bars=len(df))
+        for end in range(1, len(df) + 1):
+            idx_h, idx_l = tracker.update(times[:end], high[:end], low[:end])
+        out[f"swing_high_{lb}"] = swing_flags(len(df), idx_h)
+        out[f"swing_low_{lb}"] = swing_flags(len(df), idx_l)
+    return out
+
+
+def df_to_rates(df):
+    rates = np.zeros(len(df), dtype=[('time', '<i8'), ('open', '<f8'), ('high', '<f8'),
+                                     ('low', '<f8'), ('close', '<f8')])
+    rates['time'] = df['time'].to_numpy().astype('datetime64[s]').astype(np.int64)
+    for col in ('open', 'high', 'low', 'close'):
+        rates[col] = df[col].to_numpy()
+    return rates
+
+
+def load_bot_utils(folder):
+    """Import utils.py của 1 thư mục bot dưới tên riêng (không đụng module utils khác)."""
+    path = os.path.join(ROOT, folder, "utils.py")
+    sys.path.insert(0, os.path.join(ROOT, folder))
+    try:
+        spec = importlib.util.spec_from_file_location(f"utils_{folder}", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return module
+    finally:
+        sys.path.pop(0)
+
+
+def compute_bot_utils(module, df):
+    out = {}
+    ha = module.calculate_heiken_ashi(df)
+    for col in ("ha_open", "ha_close", "ha_high", "ha_low"):
+        out[col] = ha[col]
+    if hasattr(module, "calculate_atr"):
+        atr = module.calculate_atr(df.copy(), period=14)
+        out["atr_14"] = atr['atr'] if isinstance(atr, pd.DataFrame) else atr
+    adx = module.calculate_adx(df, period=14)
+    out["adx_14"], out["di_plus_14"], out["di_minus_14"] = adx['adx'], adx['di_plus'], adx['di_minus']
+    out["rsi_14"] = module.calculate_rsi(df['close'], period=14)
+    return {k: np.asarray(v, dtype=np.float64) for k, v in out.items()}
+
+
+def compare(golden, got):
+    """Trả về list (cột, số nến lệch, sai lệch lớn nhất)."""
+    bad = []
+    for col, values in got.items():
+        expected = golden[col].to_numpy()
+        values = np.asarray(values)
+        if col in EXACT_COLUMNS:
+            diff = np.flatnonzero(values.astype(np.int64) != expected.astype(np.int64))
+            if len(diff):
+                bad.append((col, len(diff), math.inf))
+            continue
+        values = values.astype(np.float64)
+        nan_mismatch = np.isnan(values) != np.isnan(expected)
+        both = ~np.isnan(values) & ~np.isnan(expected)
+        err = np.zeros(len(values))
+        err[both] = np.abs(values[both] - expected[both]) / np.maximum(1.0, np.abs(expected[both]))
+        wrong = nan_mismatch | (err > TOLERANCE)
+        if wrong.any():
+            bad.append((col, int(wrong.sum()), float(err.max()) if not nan_mismatch.any() else math.nan))
+    return bad
+
+
+def record(names):
+    for name in names:
+        df = load_ohlc(name)
+        values = compute_pandas(df)
+        out = pd.DataFrame({"time": df_to_rates(df)['time']})
+        for col, v in values.items():
+            out[col] = v
+        path = os.path.join(FIXTURE_DIR, f"golden_{name}.csv")
+        out.to_csv(path, index=False, float_format="%.17g")
+        print(f"📝 {path}: {len(out)} nến, {len(values)} cột (tradecore {__version__})")
+
+
+def fetch(config_path, symbol, name, bars):
+    """Ghi fixture OHLC M1 từ terminal MT5."""
+    import MetaTrader5 as mt5
+    from tradecore.data import load_config, connect_mt5
+
+    config = load_config(config_path)
+    if not config or not connect_mt5(config):
+        sys.exit(1)
+    rates = mt5.copy_rates_from_pos(symbol, mt5.TIMEFRAME_M1, 1, bars)  # bỏ nến đang chạy
+    mt5.shutdown()
+    if rates is None or len(rates) == 0:
+        print(f"❌ Không lấy được nến {symbol}")
+        sys.exit(1)
+    df = pd.DataFrame(rates)[['time', 'open', 'high', 'low', 'close', 'tick_volume']]
+    path = os.path.join(FIXTURE_DIR, f"ohlc_{name}.csv")
+    df.to_csv(path, index=False, float_format="%.17g")
+    print(f"📝 {path}: {len(df)} nến {symbol} M1 — chạy --record --name {name} để ghi golden")
+
+
+# Fixture tổng hợp (random walk, làm tròn theo digits) khi chưa có nến ghi từ MT5:
+# tên → (giá đầu, độ lệch mỗi nến, digits, seed)
+SYNTHETIC = {
+    "synthetic_xau": (2350.0, 0.6, 2, 11),
+    "synthetic_eur": (1.0850, 0.00012, 5, 12),
+    "synthetic_btc": (64000.0, 35.0, 2, 13),
+}
+
+
+def make_synthetic(bars):
+    for name, (price, step, digits, seed) in SYNTHETIC.items():
+        rng = np.random.default_rng(seed)
+        close = price + np.cumsum(rng.normal(0, step, bars))
+        open_ = np.r_[price, close[:-1]] + rng.normal(0, step * 0.2, bars)
+        high = np.maximum(open_, close) + rng.exponential(step * 0.5, bars)
+        low = np.minimum(open_, close) - rng.exponential(step * 0.5, bars)
+        df = pd.DataFrame({
+            "time": 1_717_200_000 + np.arange(bars) * 60,
+            "open": np.round(open_, digits), "high": np.round(high, digits),
+            "low": np.round(low, digits), "close": np.round(close, digits),
+            "tick_volume": rng.integers(20, 400, bars),
+        })
+        path = os.path.join(FIXTURE_DIR, f"ohlc_{name}.csv")
+        df.to_csv(path, index=False, float_format="%.17g")
+        print(f"📝 {path}: {bars} nến")
+
+
+def check(names, with_bots=True):
+    ok = True
+    bots = {}
+    if with_bots:
+        try:
+            import MetaTrader5  # noqa: F401
+        except ImportError:
+            # utils.py của bot import MetaTrader5 khi load; indicator không gọi terminal nên MT5 giả là đủ
+            from tradecore import fake_mt5
+            fake_mt5.install()
+            print("ℹ️ MetaTrader5 chưa cài → nạp utils.py của các thư mục bot qua tradecore.fake_mt5")
+        for folder in BOT_FOLDERS:
+            bots[folder] = load_bot_utils(folder)
+
+    for name in names:
+        df = load_ohlc(name)
+        golden = pd.read_csv(os.path.join(FIXTURE_DIR, f"golden_{name}.csv"), float_precision="round_trip")
+        if len(golden) != len(df):
+            print(f"❌ {name}: golden {len(golden)} dòng ≠ fixture {len(df)} nến")
+            ok = False
+            continue
+        # Gọi compute_pandas 2 lần: lần 2 đi qua nhánh hit của indicator_cache
+        impls = [("indicators", lambda: compute_pandas(df)), ("indicators (cache hit)", lambda: compute_pandas(df)),
+                 ("indicators_np", lambda: compute_numpy(df)),
+                 ("streaming", lambda: compute_streaming(df)), ("swing_tracker", lambda: compute_swing_tracker(df))]
+        impls += [(f"{folder}/utils", lambda m=m: compute_bot_utils(m, df)) for folder, m in bots.items()]
+        for label, fn in impls:
+            bad = compare(golden, fn())
+            ok = ok and not bad
+            detail = ", ".join(f"{col} ({n} nến, max {err:.1e})" for col, n, err in bad)
+            print(f"{'✅' if not bad else '❌'} {name:<12} {label:<28} {detail}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--record", action="store_true", help="Ghi lại golden từ tradecore.indicators")
+    parser.add_argument("--name", action="append", help="Chỉ fixture này (lặp lại được)")
+    parser.add_argument("--no-bots", action="store_true", help="Không kiểm tra utils.py của các thư mục bot")
+    parser.add_argument("--fetch", metavar="CONFIG", help="Ghi fixture OHLC từ MT5 theo config JSON")
+    parser.add_argument("--symbol")
+    parser.add_argument("--bars", type=int, default=400)
+    parser.add_argument("--synthetic", action="store_true", help="Tạo lại các fixture tổng hợp (SYNTHETIC)")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        os.makedirs(FIXTURE_DIR, exist_ok=True)
+        make_synthetic(args.bars)
+        return
+
+    if args.fetch:
+        if not args.symbol or not args.name:
+            parser.error("--fetch cần --symbol và --name")
+        fetch(args.fetch, args.symbol, args.name[0], args.bars)
+        return
+    names = args.name or fixture_names()
+    if not names:
+        print(f"❌ Không có fixture trong {FIXTURE_DIR}")
+        sys.exit(1)
+    if args.record:
+        record(names)
+        return
+    print(f"tradecore {__version__} — {len(names)} fixture, tolerance {TOLERANCE}")
+    sys.exit(0 if check(names, with_bots=not args.no_bots) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,382 @@
+"""
+Governor dùng chung cho mọi process bot trên 1 tài khoản: khống chế exposure toàn tài khoản
+và tốc độ gửi lệnh (token bucket) — mỗi process chỉ thấy positions của magic mình nên 5 bot XAU
++ GridStep có thể cộng dồn khối lượng và bắn order_send dồn dập tới mức broker throttle.
+
+Server (1 process / tài khoản, TCP localhost, mỗi request là 1 dòng JSON như IPC của GridStep v5):
+    python -m tradecore.governor XAU_M1/configs/config_1.json --port 5590
+- Exposure thật: thread nền đọc mt5.positions_get() (mọi magic) mỗi refresh_interval giây
+- Intent: bot gọi reserve trước khi gửi lệnh; khối lượng được giữ chỗ tới khi release (hoặc hết
+  intent_ttl); lệnh đã khớp được giữ tới snapshot positions kế tiếp để không đếm hụt
+- Giới hạn: max_net_volume (theo symbol, |BUY - SELL|), max_total_volume (tổng lot đang mở),
+  rate / burst (lệnh / giây). Lệnh làm giảm |net| luôn được phép; lệnh chờ chỉ tính rate
+
+Client (bot): send_order / place_pending_order hỏi governor qua get_client() — địa chỉ lấy từ
+biến môi trường TRADECORE_GOVERNOR=host:port hoặc configure(); không cấu hình → không làm gì.
+Governor không chạy / timeout → cho qua (fail_open) để bot không đứng vì governor.
+Kết nối giữ mở, 1 lượt reserve ~0.1 ms trên localhost.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import socketserver
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5590
+ENV_ADDRESS = "TRADECORE_GOVERNOR"
+
+# retcode trả về cho caller khi governor chặn (cùng ý nghĩa mã MT5)
+RETCODE_TOO_MANY_REQUESTS = 10024
+RETCODE_LIMIT_VOLUME = 10034
+
+
+class GovernorState:
+    """Trạng thái governor (không I/O). Mọi hàm public đều thread-safe."""
+
+    def __init__(self, max_total_volume=None, max_net_volume=None, symbol_limits=None,
+                 rate=5.0, burst=10, intent_ttl=10.0):
+        self.max_total_volume = max_total_volume
+        self.max_net_volume = max_net_volume
+        self.symbol_limits = dict(symbol_limits or {})
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.intent_ttl = float(intent_ttl)
+        self._lock = threading.Lock()
+        self._tokens = self.burst
+        self._refill_at = time.monotonic()
+        self._exposure = {}        # symbol -> [buy_volume, sell_volume] từ snapshot MT5
+        self._snapshot_at = None   # monotonic
+        self._intents = {}         # id -> dict(symbol, signed, strategy, expires, filled_at)
+        self._next_id = 1
+        self.counters = {"allowed": 0, "denied_rate": 0, "denied_net": 0, "denied_total": 0,
+                         "released": 0, "expired": 0, "snapshots": 0}
+        self.per_strategy = {}
+
+    # ----- positions -----
+
+    def set_positions(self, rows, now=None):
+        """
+        rows: [(symbol, side, volume)] với side 'BUY'/'SELL' — toàn bộ positions của tài khoản.
+        now: thời điểm bắt đầu đọc positions (monotonic).
+        """
+        now = time.monotonic() if now is None else now
+        exposure = {}
+        for symbol, side, volume in rows:
+            bucket = exposure.setdefault(symbol, [0.0, 0.0])
+            bucket[0 if side == "BUY" else 1] += float(volume)
+        with self._lock:
+            self._exposure = exposure
+            self._snapshot_at = now
+            self.counters["snapshots"] += 1
+            # lệnh đã khớp trước snapshot này đã nằm trong positions
+            for intent_id in [i for i, it in self._intents.items()
+                              if it["filled_at"] is not None and it["filled_at"] <= now]:
+                del self._intents[intent_id]
+
+    def _expire(self, now):
+        for intent_id in [i for i, it in self._intents.items() if it["expires"] <= now]:
+            del self._intents[intent_id]
+            self.counters["expired"] += 1
+
+    def _net(self, symbol):
+        buy, sell = self._exposure.get(symbol, (0.0, 0.0))
+        net = buy - sell
+        net += sum(it["signed"] for it in self._intents.values() if it["symbol"] == symbol)
+        return net
+
+    def _total(self):
+        total = sum(buy + sell for buy, sell in self._exposure.values())
+        return total + sum(abs(it["signed"]) for it in self._intents.values())
+
+    def _net_limit(self, symbol):
+        return self.symbol_limits.get(symbol, self.max_net_volume)
+
+    def _take_token(self, now):
+        self._tokens = min(self.burst, self._tokens + (now - self._refill_at) * self.rate)
+        self._refill_at = now
+        if self._tokens < 1.0:
+            return (1.0 - self._tokens) / self.rate if self.rate > 0 else None
+        self._tokens -= 1.0
+        return 0.0
+
+    # ----- API -----
+
+    def reserve(self, symbol, side, volume, strategy=None, kind="market", now=None):
+        """
+        Xin phép gửi 1 lệnh. side 'BUY'/'SELL'; kind 'market' (tính exposure) hoặc 'pending'
+        (chỉ tính rate). Trả về dict: allowed, reason, intent_id, retry_after, net, total.
+        """
+        now = time.monotonic() if now is None else now
+        volume = float(volume)
+        signed = volume if side == "BUY" else -volume
+        with self._lock:
+            stats = self.per_strategy.setdefault(strategy or "Unknown", {"allowed": 0, "denied": 0})
+            self._expire(now)
+            net = self._net(symbol)
+            total = self._total()
+            reason = None
+            retry_after = None
+            if kind == "market":
+                limit = self._net_limit(symbol)
+                new_net = net + signed
+                if limit is not None and abs(new_net) > limit + 1e-9 and abs(new_net) > abs(net):
+                    reason, key = f"net {symbol} {new_net:+.2f} > {limit}", "denied_net"
+                elif (self.max_total_volume is not None and total + volume > self.max_total_volume + 1e-9
+                        and abs(new_net) > abs(net)):
+                    reason, key = f"total {total + volume:.2f} > {self.max_total_volume}", "denied_total"
+            if reason is None:
+                wait = self._take_token(now)
+                if wait is None or wait > 0:
+                    reason, key = "order rate", "denied_rate"
+                    retry_after = wait
+            if reason is not None:
+                self.counters[key] += 1
+                stats["denied"] += 1
+                return {"allowed": False, "reason": reason, "intent_id": None,
+                        "retry_after": retry_after, "net": net, "total": total}
+            intent_id = None
+            if kind == "market":
+                intent_id = self._next_id
+                self._next_id += 1
+                self._intents[intent_id] = {"symbol": symbol, "signed": signed, "strategy": strategy,
+                                            "expires": now + self.intent_ttl, "filled_at": None}
+            self.counters["allowed"] += 1
+            stats["allowed"] += 1
+            return {"allowed": True, "reason": "", "intent_id": intent_id, "retry_after": None,
+                    "net": net + (signed if kind == "market" else 0.0), "total": total}
+
+    def release(self, intent_id, filled=False, now=None):
+        """Kết thúc 1 intent. filled=True: giữ tới snapshot positions kế tiếp (TTL vẫn áp dụng)."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            intent = self._intents.get(intent_id)
+            if intent is None:
+                return False
+            self.counters["released"] += 1
+            if filled:
+                intent["filled_at"] = now
+            else:
+                del self._intents[intent_id]
+            return True
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            symbols = set(self._exposure) | {it["symbol"] for it in self._intents.values()}
+            return {
+                "limits": {"max_total_volume": self.max_total_volume, "max_net_volume": self.max_net_volume,
+                           "symbol_limits": self.symbol_limits, "rate": self.rate, "burst": self.burst},
+                "exposure": {s: {"buy": round(self._exposure.get(s, (0.0, 0.0))[0], 2),
+                                 "sell": round(self._exposure.get(s, (0.0, 0.0))[1], 2),
+                                 "net_with_intents": round(self._net(s), 2)} for s in sorted(symbols)},
+                "total_volume": round(self._total(), 2),
+                "open_intents": len(self._intents),
+                "tokens": round(min(self.burst, self._tokens + (now - self._refill_at) * self.rate), 2),
+                "snapshot_age": round(now - self._snapshot_at, 2) if self._snapshot_at is not None else None,
+                "counters": dict(self.counters),
+                "per_strategy": {k: dict(v) for k, v in self.per_strategy.items()},
+            }
+
+
+# ---------------------------------------------------------------- server
+
+class _Handler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def handle(self):
+        state = self.server.state
+        for line in self.rfile:
+            try:
+                msg = json.loads(line)
+                op = msg.pop("op")
+                if op == "reserve":
+                    reply = state.reserve(**msg)
+                elif op == "release":
+                    reply = {"ok": state.release(**msg)}
+                elif op == "positions":
+                    state.set_positions(msg["rows"])
+                    reply = {"ok": True}
+                elif op == "stats":
+                    reply = state.stats()
+                else:
+                    reply = {"error": f"unknown op {op}"}
+            except Exception as e:
+                reply = {"error": f"{type(e).__name__}: {e}"}
+            self.wfile.write(json.dumps(reply).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class GovernorServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, state, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        super().__init__((host, port), _Handler)
+        self.state = state
+
+
+def refresh_positions_loop(state, interval=1.0, stop_event=None):
+    """Thread nền của server: snapshot positions toàn tài khoản từ MT5."""
+    import MetaTrader5 as mt5
+    while stop_event is None or not stop_event.is_set():
+        started = time.monotonic()   # lệnh khớp sau mốc này có thể chưa có trong snapshot
+        positions = mt5.positions_get()
+        if positions is not None:
+            state.set_positions([(p.symbol, "BUY" if p.type == mt5.POSITION_TYPE_BUY else "SELL", p.volume)
+                                 for p in positions], now=started)
+        time.sleep(interval)
+
+
+# ---------------------------------------------------------------- client
+
+class GovernorClient:
+    """Kết nối giữ mở tới GovernorServer. Lỗi kết nối → fail_open (cho qua), thử lại sau retry_every giây."""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=0.05, fail_open=True, retry_every=5.0,
+                 verbose=True):
+        self.host = host
+        self.port = int(port)
+        self.timeout = timeout
+        self.fail_open = fail_open
+        self.retry_every = retry_every
+        self.verbose = verbose
+        self._sock = None
+        self._reader = None
+        self._down_until = 0.0
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock, self._reader = sock, sock.makefile("rb")
+
+    def _close(self):
+        for obj in (self._reader, self._sock):
+            try:
+                if obj is not None:
+                    obj.close()
+            except OSError:
+                pass
+        self._sock = self._reader = None
+
+    def call(self, op, **kwargs):
+        """1 request/1 reply. None nếu governor không liên lạc được."""
+        with self._lock:
+            if self._sock is None:
+                if time.monotonic() < self._down_until:
+                    return None
+                try:
+                    self._connect()
+                except OSError as e:
+                    self._down_until = time.monotonic() + self.retry_every
+                    if self.verbose:
+                        print(f"⚠️ Governor {self.host}:{self.port} không kết nối được ({e}), "
+                              f"{'cho qua' if self.fail_open else 'chặn'} lệnh trong {self.retry_every:.0f}s")
+                    return None
+            try:
+                self._sock.sendall(json.dumps(dict(kwargs, op=op)).encode("utf-8") + b"\n")
+                line = self._reader.readline()
+                if not line:
+                    raise OSError("connection closed")
+                return json.loads(line)
+            except (OSError, ValueError) as e:
+                if self.verbose:
+                    print(f"⚠️ Governor lỗi: {e}")
+                self._close()
+                self._down_until = time.monotonic() + self.retry_every
+                return None
+
+    def reserve(self, symbol, side, volume, strategy=None, kind="market"):
+        reply = self.call("reserve", symbol=symbol, side=side, volume=volume, strategy=strategy, kind=kind)
+        if reply is None or "error" in reply:
+            return {"allowed": self.fail_open, "reason": "governor unavailable", "intent_id": None}
+        return reply
+
+    def release(self, intent_id, filled=False):
+        if intent_id is not None:
+            self.call("release", intent_id=intent_id, filled=filled)
+
+    def stats(self):
+        return self.call("stats")
+
+
+_client = None
+_client_address = None
+
+
+def configure(address=None, **kwargs):
+    """Đặt địa chỉ governor cho process ('host:port' hoặc None để tắt)."""
+    global _client, _client_address
+    _client_address = address
+    if not address:
+        _client = None
+        return None
+    host, _, port = address.rpartition(":")
+    _client = GovernorClient(host or DEFAULT_HOST, int(port), **kwargs)
+    return _client
+
+
+def get_client():
+    """Client của process (None nếu không cấu hình governor)."""
+    if _client is None and _client_address is None and os.environ.get(ENV_ADDRESS):
+        configure(os.environ[ENV_ADDRESS])
+    return _client
+
+
+def fetch_stats(address=None, timeout=0.5):
+    """Counters của governor cho dashboard (kết nối riêng, không dùng client của bot). None nếu không chạy."""
+    address = address or os.environ.get(ENV_ADDRESS) or f"{DEFAULT_HOST}:{DEFAULT_PORT}"
+    host, _, port = address.rpartition(":")
+    client = GovernorClient(host or DEFAULT_HOST, int(port), timeout=timeout, retry_every=0, verbose=False)
+    try:
+        return client.stats()
+    finally:
+        client._close()
+
+
+def main():
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    parser = argparse.ArgumentParser(description="Governor exposure + tốc độ lệnh cho mọi bot của 1 tài khoản")
+    parser.add_argument("config", help="config bot (account/password/server) — block 'governor' tùy chọn")
+    parser.add_argument("--host", default=None)
+    parser.add_argument("--port", type=int, default=None)
+    args = parser.parse_args()
+
+    from tradecore.data import load_config, connect_mt5
+    config = load_config(args.config)
+    if not config:
+        return
+    opts = config.get("governor") or {}
+    state = GovernorState(
+        max_total_volume=opts.get("max_total_volume"),
+        max_net_volume=opts.get("max_net_volume"),
+        symbol_limits=opts.get("symbol_limits"),
+        rate=opts.get("rate", 5.0),
+        burst=opts.get("burst", 10),
+        intent_ttl=opts.get("intent_ttl", 10.0),
+    )
+    if not connect_mt5(config):
+        return
+    threading.Thread(target=refresh_positions_loop, args=(state, opts.get("refresh_interval", 1.0)),
+                     name="governor-positions", daemon=True).start()
+    host = args.host or opts.get("host", DEFAULT_HOST)
+    port = args.port or opts.get("port", DEFAULT_PORT)
+    server = GovernorServer(state, host, port)
+    print(f"✅ Governor listening on {host}:{port} | limits: {state.stats()['limits']}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("🛑 Governor stopped")
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Đồng bộ deal history MT5 vào trades.db theo high-water mark (thay cho hỏi lại 90 ngày history mỗi vòng update_db).
+
+- mt5_deals (trades_db v5): bản sao mọi deal đã lấy về của từng account, khoá (account_id, ticket)
+- mt5_sync_state: deal mới nhất đã lưu (ticket / time) của mỗi account
+- sync(account_id): chỉ hỏi terminal từ deal mới nhất − overlap tới hiện tại, INSERT OR IGNORE (deal trùng
+  vùng overlap bỏ qua), trả về position có deal mới → update_db chỉ tính lại các position đó
+- closed_positions(): lệnh đã đóng tính từ deal trong DB (gộp IN / OUT bằng position_index.summarize, như update_db cũ)
+
+Lần đầu (chưa có high-water mark) và sync(full=True) lấy lại full_days ngày như bản cũ — lệnh sửa chữa khi
+history / DB lệch: python update_db.py --full --once. Kiểm tra: XAU_M1/benchmarks/check_history_sync.py.
+"""
+import json
+from datetime import datetime, timedelta, timezone
+from itertools import groupby
+
+import MetaTrader5 as mt5
+
+from .position_index import Deal, summarize
+from .trades_db import MIGRATIONS, store, utc_now
+
+FULL_DAYS = 90                  # cửa sổ history khi chưa có high-water mark / khi resync
+OVERLAP_SECONDS = 3600          # lấy lùi lại trước deal mới nhất (deal tới trễ cùng mốc giây, lệch đồng hồ)
+
+DEAL_COLUMNS = ("account_id", "ticket", "position_id", "magic", "type", "entry", "symbol", "volume", "price",
+                "profit", "swap", "commission", "time", "comment")
+
+
+def _deal_row(account_id, deal):
+    pid = getattr(deal, 'position_id', None) or getattr(deal, 'position', None)
+    try:
+        pid = int(pid) if pid is not None else None
+    except (TypeError, ValueError):
+        pid = None
+    return (account_id, int(deal.ticket), pid, getattr(deal, 'magic', 0), getattr(deal, 'type', None),
+            getattr(deal, 'entry', None), getattr(deal, 'symbol', ''), getattr(deal, 'volume', 0),
+            getattr(deal, 'price', 0), getattr(deal, 'profit', 0), getattr(deal, 'swap', 0),
+            getattr(deal, 'commission', 0), int(getattr(deal, 'time', 0) or 0), getattr(deal, 'comment', ''))
+
+
+class HistorySync:
+    """Deal history MT5 của các account trong 1 file trades.db. touched: position có deal mới ở lần sync gần nhất."""
+
+    def __init__(self, db_path, overlap_seconds=OVERLAP_SECONDS, full_days=FULL_DAYS):
+        self.store = store(db_path)
+        self.store.migrate(MIGRATIONS)
+        self.overlap_seconds = overlap_seconds
+        self.full_days = full_days
+        self.touched = {}
+        self.stats = {}
+
+    def state(self, account_id):
+        rows = self.store.query("SELECT last_deal_ticket, last_deal_time, synced_at, full_synced_at "
+                                "FROM mt5_sync_state WHERE account_id = ?", (account_id,))
+        if not rows:
+            return None
+        return dict(zip(("last_deal_ticket", "last_deal_time", "synced_at", "full_synced_at"), rows[0]))
+
+    def _fetch(self, date_from, date_to):
+        # MT5 thường cần history_select trước khi history_deals_get trả deal (giống utils._history_deals_select_and_get).
+        try:
+            mt5.history_select(date_from, date_to)
+        except (TypeError, ValueError, AttributeError):
+            pass
+        deals = mt5.history_deals_get(date_from, date_to)
+        if deals is None:
+            deals = mt5.history_deals_get(date_from, date_to, group="*")
+        return deals
+
+    def sync(self, account_id, full=False):
+        """
+        Lấy deal mới của account đang đăng nhập vào mt5_deals. Trả về set position_id có deal mới
+        (full=True: mọi position trong cửa sổ full_days ngày). Terminal trả None → giữ nguyên high-water mark.
+        """
+        state = self.state(account_id)
+        now = datetime.now()
+        if full or state is None or not state["last_deal_time"]:
+            date_from = now - timedelta(days=self.full_days)
+        else:
+            date_from = datetime.fromtimestamp(state["last_deal_time"] - self.overlap_seconds)
+        # deal.time là giờ server (thường đi trước giờ local) → chừa thêm 1 ngày phía sau
+        date_to = now + timedelta(days=1)
+        deals = self._fetch(date_from, date_to)
+        if deals is None:
+            print(f"⚠️ history_deals_get failed (account {account_id}): {mt5.last_error()}")
+            self.touched[account_id] = set()
+            return set()
+
+        rows = [_deal_row(account_id, d) for d in deals]
+        known = set()
+        if rows and not full:
+            known = {r[0] for r in self.store.query(
+                "SELECT ticket FROM mt5_deals WHERE account_id = ? AND ticket IN (SELECT value FROM json_each(?))",
+                (account_id, json.dumps([r[1] for r in rows])))}
+        new_rows = [r for r in rows if r[1] not in known]
+        touched = {r[2] for r in (rows if full else new_rows) if r[2] is not None}
+
+        last_ticket = max((r[1] for r in rows), default=None)
+        last_time = max((r[12] for r in rows), default=None)
+        items = [(f"INSERT OR IGNORE INTO mt5_deals ({', '.join(DEAL_COLUMNS)}) "
+                  f"VALUES ({', '.join('?' * len(DEAL_COLUMNS))})", r) for r in new_rows]
+        items.append(('''
+            INSERT INTO mt5_sync_state (account_id, last_deal_ticket, last_deal_time, synced_at, full_synced_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (account_id) DO UPDATE SET
+                last_deal_ticket = MAX(COALESCE(last_deal_ticket, 0), COALESCE(excluded.last_deal_ticket, 0)),
+                last_deal_time = MAX(COALESCE(last_deal_time, 0), COALESCE(excluded.last_deal_time, 0)),
+                synced_at = excluded.synced_at,
+                full_synced_at = COALESCE(excluded.full_synced_at, full_synced_at)
+        ''', (account_id, last_ticket, last_time, utc_now(), utc_now() if full or state is None else None)))
+        self.store.transaction(items)
+
+        self.touched[account_id] = touched
+        self.stats[account_id] = {"fetched": len(rows), "new": len(new_rows), "positions": len(touched),
+                                  "from": date_from.strftime("%Y-%m-%d %H:%M:%S"), "full": bool(full or state is None)}
+        return touched
+
+    def closed_positions(self, account_id, magic, positions=None):
+        """
+        dict position_id → (profit, close_price, symbol, volume, type, open_price, close_time_str) từ mt5_deals,
+        chỉ position đã có deal OUT (profit = tổng profit + swap + commission các deal OUT / INOUT,
+        giá / giờ đóng theo deal OUT cuối). positions=None → mọi position của magic.
+        """
+        sql = (f"SELECT {', '.join(Deal._fields)} FROM mt5_deals "
+               "WHERE account_id = ? AND magic = ? AND position_id IS NOT NULL")
+        params = [account_id, magic]
+        if positions is not None:
+            if not positions:
+                return {}
+            sql += " AND position_id IN (SELECT value FROM json_each(?))"
+            params.append(json.dumps(sorted(int(p) for p in positions)))
+        rows = self.store.query(sql + " ORDER BY position_id, time, ticket", params)
+
+        result = {}
+        for pid, deals in groupby(map(Deal._make, rows), key=lambda d: d.position_id):
+            s = summarize(deals, inout=True)
+            out_price = s.last_out.price if s.last_out else 0.0
+            if s.out_net == 0 and out_price == 0:
+                continue
+            din = s.last_in
+            is_buy = din is not None and din.type == getattr(mt5, 'DEAL_TYPE_BUY', 0)
+            close_time_str = None
+            if s.last_out and s.last_out.time:
+                try:
+                    close_time_str = datetime.fromtimestamp(s.last_out.time, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+                except (TypeError, OSError, ValueError):
+                    pass
+            result[int(pid)] = (
+                s.out_net,
+                out_price,
+                din.symbol if din else '',
+                din.volume if din else 0,
+                mt5.ORDER_TYPE_BUY if is_buy else mt5.ORDER_TYPE_SELL,
+                din.price if din else 0,
+                close_time_str,
+            )
+        return result
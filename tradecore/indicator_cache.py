@@ -0,0 +1,132 @@
+"""
+Memo indicator theo nến: trong 1 vòng lặp cùng một indicator trên cùng khung nến bị tính
+nhiều lần (manage_position tính ATR M5 cho từng lệnh, strategy tính lại ATR/ADX/RSI,
+nhiều strategy chung process). Lần đầu tính xong → các lần gọi sau lấy từ cache.
+
+Khóa: (indicator, symbol, timeframe, số nến, time nến cuối, tham số, digest cột đầu vào).
+- symbol/timeframe lấy từ df.attrs (data.get_data gắn sẵn); thiếu thì None
+- digest = hash bytes các cột đầu vào → nến đang chạy đổi giá (cùng time) hoặc caller
+  truyền dữ liệu đã chỉnh sửa thì khóa khác, không bao giờ trả giá trị cũ
+LRU theo OrderedDict, đếm hit/miss/eviction theo từng indicator.
+
+Cache chỉ giữ các cột indicator tính ra; lần hit ghép lại vào bản copy của df đầu vào,
+nên caller vẫn nhận object riêng (sửa thoải mái) với đủ cột gốc như khi tính trực tiếp.
+"""
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+
+class IndicatorCache:
+    """LRU memo cho indicator pandas."""
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._by_name = {}
+
+    @staticmethod
+    def _last_time(data):
+        if isinstance(data, pd.DataFrame) and 'time' in data.columns:
+            return data['time'].iloc[-1]
+        return data.index[-1]
+
+    def make_key(self, name, data, columns, params):
+        if isinstance(data, pd.Series):
+            arrays = [data.to_numpy()]
+        else:
+            arrays = [data[col].to_numpy() for col in columns]
+        digest = hash(b"".join(np.ascontiguousarray(a, dtype=np.float64).tobytes() for a in arrays))
+        attrs = data.attrs
+        return (name, attrs.get('symbol'), attrs.get('timeframe'), len(data),
+                self._last_time(data), params, digest)
+
+    def _count(self, name, hit):
+        counts = self._by_name.setdefault(name, [0, 0])
+        counts[0 if hit else 1] += 1
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        self._count(key[0], entry is not None)
+        return entry
+
+    def put(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def memoize(self, name, columns=(), adds=None):
+        """
+        Decorator cho fn(data, *params):
+        - data là DataFrame (columns = các cột đầu vào) hoặc Series (columns bỏ trống)
+        - adds = các cột fn thêm vào bản copy của df (HA, ADX) → cache chỉ giữ các cột này;
+          không có adds thì fn trả về Series
+        """
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(data, *args, **kwargs):
+                if len(data) == 0:
+                    return fn(data, *args, **kwargs)
+                params = args + tuple(sorted(kwargs.items()))
+                key = self.make_key(name, data, columns, params)
+                cached = self.get(key)
+                if cached is None:
+                    result = fn(data, *args, **kwargs)
+                    if adds is None:
+                        cached = (result.to_numpy().copy(), result.name)
+                    else:
+                        # 1 lần chọn nhiều cột (mảng 2 chiều) thay vì result[col] từng cột
+                        block = result[list(adds)].to_numpy(copy=True)
+                        if block.dtype == object:
+                            cached = {col: result[col].to_numpy().copy() for col in adds}
+                        else:
+                            cached = {col: block[:, i] for i, col in enumerate(adds)}
+                    self.put(key, cached)
+                    return result
+                if adds is None:
+                    values, series_name = cached
+                    return pd.Series(values.copy(), index=data.index, name=series_name)
+                added = pd.DataFrame({col: cached[col].copy() for col in adds}, index=data.index)
+                if data.columns.isin(adds).any():
+                    out = data.copy()
+                    for col in adds:
+                        out[col] = added[col]
+                    return out
+                out = pd.concat([data, added], axis=1)
+                out.attrs = dict(data.attrs)
+                return out
+            wrapper.uncached = fn
+            return wrapper
+        return decorator
+
+    def invalidate(self, symbol=None, timeframe=None):
+        """Xóa entry (vd. sau reconnect MT5). Không truyền gì → xóa hết."""
+        for key in list(self._entries):
+            if (symbol is None or key[1] == symbol) and (timeframe is None or key[2] == timeframe):
+                del self._entries[key]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries), "maxsize": self.maxsize,
+            "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "by_indicator": {name: {"hits": h, "misses": m} for name, (h, m) in self._by_name.items()},
+        }
+
+
+# Cache dùng chung cho mọi indicator trong process
+indicator_cache = IndicatorCache()
@@ -0,0 +1,200 @@
+"""
+Bản NumPy của các indicator trong tradecore.indicators, chạy trực tiếp trên cột của structured array
+từ data.get_data_np (rates['high'], rates['close'], ...) — không tạo DataFrame.
+
+Giá trị khớp với bản pandas tương ứng (cùng vị trí NaN warm-up, cùng công thức):
+- sma_np                  ↔ series.rolling(window=period).mean()
+- calculate_atr_np        ↔ indicators.calculate_atr
+- calculate_adx_np        ↔ indicators.calculate_adx (cột adx, di_plus, di_minus)
+- calculate_rsi_np        ↔ indicators.calculate_rsi
+- calculate_heiken_ashi_np ↔ indicators.calculate_heiken_ashi (ha_open, ha_close, ha_high, ha_low)
+
+ha_open là bộ lọc IIR bậc 1 trên ha_close: ha_open[i] = 0.5*ha_open[i-1] + 0.5*ha_close[i-1].
+Có scipy thì chạy bằng scipy.signal.lfilter, không thì vòng lặp float thuần; cả 2 cho kết quả
+trùng từng bit với vòng lặp df.at cũ (nhân/chia 2 là phép tính chính xác trong float64).
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    from scipy.signal import lfilter
+except ImportError:
+    lfilter = None
+
+
+def _rolling(x, period, fn):
+    out = np.full(len(x), np.nan)
+    if period <= len(x):
+        out[period - 1:] = fn(sliding_window_view(x, period), axis=1)
+    return out
+
+
+def sma_np(x, period):
+    """Rolling mean (NaN cho period-1 phần tử đầu)"""
+    return _rolling(np.asarray(x, dtype=np.float64), period, np.mean)
+
+
+def _prev(x):
+    prev = np.empty(len(x))
+    prev[0] = np.nan
+    prev[1:] = x[:-1]
+    return prev
+
+
+def _ewm_wilder(x, period):
+    """ewm(alpha=1/period, adjust=False, min_periods=period).mean() khi x không có NaN"""
+    alpha = 1.0 / period
+    out = np.empty(len(x))
+    acc = None
+    for i, v in enumerate(x.tolist()):
+        acc = v if acc is None else (1 - alpha) * acc + alpha * v
+        out[i] = acc
+    out[:period - 1] = np.nan
+    return out
+
+
+def true_range_np(high, low, close):
+    """TR như indicators.calculate_atr (nến đầu: high - low)"""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    prev_close = _prev(np.asarray(close, dtype=np.float64))
+    tr = np.abs(high - low)
+    tr[1:] = np.maximum(tr[1:], np.maximum(np.abs(high[1:] - prev_close[1:]), np.abs(low[1:] - prev_close[1:])))
+    return tr
+
+
+def calculate_atr_np(high, low, close, period=14):
+    """ATR = SMA(TR, period)"""
+    return sma_np(true_range_np(high, low, close), period)
+
+
+def calculate_adx_np(high, low, close, period=14):
+    """Trả về (adx, di_plus, di_minus)"""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    up = high - _prev(high)
+    down = _prev(low) - low
+    with np.errstate(invalid='ignore'):
+        dm_plus = np.where((up > down) & (up > 0), up, 0.0)
+        dm_minus = np.where((down > up) & (down > 0), down, 0.0)
+    prev_close = _prev(np.asarray(close, dtype=np.float64))
+    # Như bản pandas: TR nến đầu là NaN (np.maximum lan truyền NaN)
+    tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+
+    tr_s = _rolling(tr, period, np.sum)
+    dm_plus_s = _rolling(dm_plus, period, np.sum)
+    dm_minus_s = _rolling(dm_minus, period, np.sum)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        di_plus = 100 * (dm_plus_s / tr_s)
+        di_minus = 100 * (dm_minus_s / tr_s)
+        dx = 100 * np.abs(di_plus - di_minus) / (di_plus + di_minus)
+    # rolling().mean() của pandas bỏ qua cửa sổ có NaN → mean trên view cho NaN tương ứng
+    adx = _rolling(dx, period, np.mean)
+    return adx, di_plus, di_minus
+
+
+def calculate_rsi_np(close, period=14):
+    """RSI Wilder's Smoothing, như indicators.calculate_rsi"""
+    close = np.asarray(close, dtype=np.float64)
+    delta = np.empty(len(close))
+    delta[0] = 0.0
+    delta[1:] = np.diff(close)
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    avg_gain = _ewm_wilder(gain, period)
+    avg_loss = _ewm_wilder(loss, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        return 100 - (100 / (1 + rs))
+
+
+def ha_open_recurrence(ha_close, first_open):
+    """ha_open[0] = first_open, ha_open[i] = (ha_open[i-1] + ha_close[i-1]) / 2"""
+    ha_close = np.asarray(ha_close, dtype=np.float64)
+    ha_open = np.empty(len(ha_close))
+    if len(ha_close) == 0:
+        return ha_open
+    ha_open[0] = first_open
+    if len(ha_close) == 1:
+        return ha_open
+    if lfilter is not None:
+        ha_open[1:] = lfilter([0.5], [1.0, -0.5], ha_close[:-1], zi=[0.5 * first_open])[0]
+    else:
+        prev = first_open
+        for i, c in enumerate(ha_close[:-1].tolist(), start=1):
+            prev = (prev + c) / 2
+            ha_open[i] = prev
+    return ha_open
+
+
+def calculate_heiken_ashi_np(open_, high, low, close):
+    """Trả về (ha_open, ha_close, ha_high, ha_low)"""
+    open_ = np.asarray(open_, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    ha_close = (open_ + high + low + close) / 4
+    ha_open = ha_open_recurrence(ha_close, (open_[0] + close[0]) / 2 if len(close) else 0.0)
+    ha_high = np.maximum(np.maximum(high, ha_open), ha_close)
+    ha_low = np.minimum(np.minimum(low, ha_open), ha_close)
+    return ha_open, ha_close, ha_high, ha_low
+
+
+def heiken_ashi_next(prev_ha_open, prev_ha_close, open_, high, low, close):
+    """
+    HA của 1 nến mới từ HA nến trước (stream: append 1 nến, không tính lại cả chuỗi).
+    Nến đầu tiên: truyền prev_ha_open=None. Trả về (ha_open, ha_close, ha_high, ha_low).
+    """
+    ha_close = (open_ + high + low + close) / 4
+    ha_open = (open_ + close) / 2 if prev_ha_open is None else (prev_ha_open + prev_ha_close) / 2
+    return ha_open, ha_close, max(high, ha_open, ha_close), min(low, ha_open, ha_close)
+
+
+def ut_bot_next(close, n_loss, prev_close, prev_stop, prev_pos):
+    """
+    1 bước UT Bot (ATR trailing stop) cho nến mới từ trạng thái nến trước.
+    Trả về (x_atr_trailing_stop, pos). Dùng max/min của Python như bản df.at cũ
+    để xử lý NaN (giai đoạn warm-up ATR) giống hệt.
+    """
+    if close > prev_stop and prev_close > prev_stop:
+        stop = max(prev_stop, close - n_loss)
+    elif close < prev_stop and prev_close < prev_stop:
+        stop = min(prev_stop, close + n_loss)
+    elif close > prev_stop:
+        stop = close - n_loss
+    else:
+        stop = close + n_loss
+
+    if close > prev_stop and prev_close < prev_stop:
+        pos = 1  # BUY Signal transition
+    elif close < prev_stop and prev_close > prev_stop:
+        pos = -1  # SELL Signal transition
+    else:
+        pos = prev_pos if prev_pos != 0 else (1 if close > stop else -1)
+    return stop, pos
+
+
+def ut_bot_trailing_stop_np(close, n_loss):
+    """
+    Kernel UT Bot trên mảng float: trả về (x_atr_trailing_stop, pos), nến đầu = (0.0, 0).
+    Vòng lặp trên list float thuần thay cho đọc/ghi df.at từng ô.
+    """
+    close = np.asarray(close, dtype=np.float64).tolist()
+    n_loss = np.asarray(n_loss, dtype=np.float64).tolist()
+    n = len(close)
+    stop = [0.0] * n
+    pos = [0] * n
+    for i in range(1, n):
+        stop[i], pos[i] = ut_bot_next(close[i], n_loss[i], close[i - 1], stop[i - 1], pos[i - 1])
+    return np.array(stop, dtype=np.float64), np.array(pos, dtype=np.int64)
+
+
+def calculate_ut_bot_np(high, low, close, sensitivity=2, period=10):
+    """UT Bot trên mảng (nghiên cứu lịch sử): trả về (x_atr_trailing_stop, pos, atr)"""
+    close = np.asarray(close, dtype=np.float64)
+    prev_close = _prev(close)
+    # fmax/fmin bỏ qua NaN ở nến đầu, như Series.combine(..., max/min) của bản cũ
+    tr = np.fmax(np.asarray(high, dtype=np.float64), prev_close) - np.fmin(np.asarray(low, dtype=np.float64), prev_close)
+    atr = sma_np(tr, period)
+    stop, pos = ut_bot_trailing_stop_np(close, sensitivity * atr)
+    return stop, pos, atr
@@ -0,0 +1,293 @@
+"""
+Market data hub: 1 process giữ session MT5, đọc nến M1/M5/H1 + tick của symbol và
+publish qua multiprocessing.shared_memory cho các strategy process do main.py --subprocess khởi chạy
+(XAU_M1, BTC_M1, ETH_M1, EUR_M1_REAL). Runner 1 process (mặc định) không cần feeder: các strategy đã
+dùng chung 1 session MT5 và bar_cache.
+
+get_data / get_data_np / get_tick: bản của tradecore.data ưu tiên snapshot của feeder (đang chạy và còn
+mới), nếu không thì hỏi MT5 trực tiếp — utils.py của các thư mục trên import từ đây.
+
+Layout segment (tên "mt5feed_<SYMBOL>"):
+- header int64[HEADER_SLOTS]: seq, updated_at_ms, tick.time_msc, n_tf, (tf, count) × MAX_TF
+- tick float64[4]: bid, ask, last, volume
+- rates: MAX_TF khối, mỗi khối `capacity` nến RATES_DTYPE
+
+Đồng bộ kiểu seqlock, không khóa: writer tăng seq lên số lẻ → ghi → tăng lên số chẵn.
+Reader đọc seq, copy dữ liệu, đọc lại seq; seq lẻ hoặc đổi giữa chừng → đọc lại.
+Mọi reader nhận cùng một snapshot; tải lên terminal không phụ thuộc số strategy.
+
+Chạy: python -m tradecore.market_feed XAU_M1/configs/config_1.json [--interval 0.25]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Cùng dtype với kết quả mt5.copy_rates_from_pos
+RATES_DTYPE = np.dtype([
+    ('time', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'),
+    ('tick_volume', '<u8'), ('spread', '<i4'), ('real_volume', '<u8'),
+])
+
+MAX_TF = 4
+DEFAULT_CAPACITY = 500
+HEADER_SLOTS = 4 + 2 * MAX_TF
+# Feed không cập nhật quá lâu (feeder chết / treo) → reader bỏ qua, get_data / get_tick tự lấy từ MT5.
+# Tick dùng để đặt giá lệnh nên chỉ chấp nhận trễ vài chu kỳ publish (--interval mặc định 0.25s)
+STALE_AFTER_SECONDS = 0.75
+
+FeedTick = namedtuple("FeedTick", ["time", "time_msc", "bid", "ask", "last", "volume"])
+
+
+def segment_name(symbol):
+    return "mt5feed_" + re.sub(r"[^A-Za-z0-9]", "_", symbol)
+
+
+def _segment_size(capacity):
+    return HEADER_SLOTS * 8 + 4 * 8 + MAX_TF * capacity * RATES_DTYPE.itemsize
+
+
+class _Segment:
+    """View numpy lên vùng shared memory."""
+
+    def __init__(self, shm, capacity):
+        self.shm = shm
+        self.capacity = capacity
+        buf = shm.buf
+        self.header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=buf)
+        self.tick = np.ndarray((4,), dtype=np.float64, buffer=buf, offset=HEADER_SLOTS * 8)
+        self.rates = np.ndarray((MAX_TF, capacity), dtype=RATES_DTYPE, buffer=buf,
+                                offset=HEADER_SLOTS * 8 + 4 * 8)
+
+    def close(self):
+        # Bỏ tham chiếu tới buffer trước khi đóng (tránh BufferError)
+        self.header = self.tick = self.rates = None
+        self.shm.close()
+
+
+class FeedWriter:
+    """Phía feeder: tạo segment và publish snapshot."""
+
+    def __init__(self, symbol, timeframes, capacity=DEFAULT_CAPACITY):
+        if len(timeframes) > MAX_TF:
+            raise ValueError(f"Tối đa {MAX_TF} timeframe mỗi symbol")
+        self.symbol = symbol
+        self.timeframes = list(timeframes)
+        name = segment_name(symbol)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=_segment_size(capacity))
+        except FileExistsError:
+            # Segment cũ còn sót lại (feeder trước bị kill) → dọn và tạo lại
+            old = shared_memory.SharedMemory(name=name)
+            old.close()
+            old.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=_segment_size(capacity))
+        self._seg = _Segment(shm, capacity)
+        header = self._seg.header
+        header[:] = 0
+        header[3] = len(self.timeframes)
+        for i, tf in enumerate(self.timeframes):
+            header[4 + 2 * i] = tf
+
+    def publish(self, rates_by_tf, tick):
+        seg = self._seg
+        header = seg.header
+        header[0] += 1  # seq lẻ: đang ghi
+        for i, tf in enumerate(self.timeframes):
+            rates = rates_by_tf.get(tf)
+            if rates is None:
+                continue
+            rates = rates[-seg.capacity:]
+            seg.rates[i, :len(rates)] = rates
+            header[5 + 2 * i] = len(rates)
+        if tick is not None:
+            seg.tick[:] = (tick.bid, tick.ask, tick.last, tick.volume)
+            header[2] = tick.time_msc
+        header[1] = int(time.time() * 1000)
+        header[0] += 1  # seq chẵn: snapshot hoàn chỉnh
+
+    def close(self):
+        shm = self._seg.shm
+        self._seg.close()
+        shm.unlink()
+
+
+class FeedReader:
+    """Phía strategy: attach segment của feeder và đọc snapshot không khóa."""
+
+    def __init__(self, symbol):
+        name = segment_name(symbol)
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13: không có track=False → gỡ khỏi resource_tracker để
+            # reader thoát không unlink segment của feeder
+            shm = shared_memory.SharedMemory(name=name)
+            if os.name == "posix":
+                from multiprocessing import resource_tracker
+                resource_tracker.unregister(shm._name, "shared_memory")
+        capacity = (shm.size - HEADER_SLOTS * 8 - 4 * 8) // (MAX_TF * RATES_DTYPE.itemsize)
+        self._seg = _Segment(shm, capacity)
+        self.capacity = capacity
+
+    def seq(self):
+        return int(self._seg.header[0])
+
+    def is_fresh(self):
+        updated_ms = int(self._seg.header[1])
+        return updated_ms > 0 and time.time() - updated_ms / 1000.0 < STALE_AFTER_SECONDS
+
+    def _read(self, fn, retries=50):
+        header = self._seg.header
+        for _ in range(retries):
+            seq_before = int(header[0])
+            if seq_before % 2:
+                continue
+            out = fn()
+            if int(header[0]) == seq_before:
+                return out
+        return None
+
+    def get_rates(self, timeframe, n=100):
+        """Copy n nến cuối của timeframe, hoặc None nếu feeder không publish timeframe này."""
+        seg = self._seg
+        if n > seg.capacity:
+            return None
+        header = seg.header
+        slot = None
+        for i in range(int(header[3])):
+            if int(header[4 + 2 * i]) == timeframe:
+                slot = i
+                break
+        if slot is None:
+            return None
+
+        def copy():
+            count = int(header[5 + 2 * slot])
+            if count == 0:
+                return None
+            return seg.rates[slot, max(0, count - n):count].copy()
+        return self._read(copy)
+
+    def get_tick(self):
+        seg = self._seg
+
+        def copy():
+            time_msc = int(seg.header[2])
+            if time_msc == 0:
+                return None
+            bid, ask, last, volume = (float(x) for x in seg.tick)
+            return FeedTick(time_msc // 1000, time_msc, bid, ask, last, volume)
+        return self._read(copy)
+
+    def close(self):
+        self._seg.close()
+
+
+# Reader theo symbol trong process strategy; attach lại tối đa mỗi RETRY_ATTACH_SECONDS khi chưa có feeder
+# hoặc feed cũ (feeder khởi động lại tạo segment mới, mapping cũ không còn được ghi) — 1 lần shm_open hỏng
+# mỗi 2 giây khi không có feeder, strategy quay lại feed ≤ 2 giây sau khi feeder chạy lại
+RETRY_ATTACH_SECONDS = 2.0
+_readers = {}
+_attach_tried_at = {}
+
+
+def get_reader(symbol):
+    """FeedReader còn sống của symbol, hoặc None (không có feeder / feeder đã dừng)."""
+    reader = _readers.get(symbol)
+    if reader is not None and reader.is_fresh():
+        return reader
+    tried_at = _attach_tried_at.get(symbol)
+    if tried_at is not None and time.time() - tried_at < RETRY_ATTACH_SECONDS:
+        return None
+    _attach_tried_at[symbol] = time.time()
+    if reader is not None:
+        _readers.pop(symbol, None)
+        reader.close()
+    try:
+        reader = FeedReader(symbol)
+    except (FileNotFoundError, OSError, ValueError):
+        return None
+    _readers[symbol] = reader
+    return reader if reader.is_fresh() else None
+
+
+def get_data(symbol, timeframe, n=100):
+    """
+    Fetch recent candles: ưu tiên snapshot từ feeder (shared memory, nếu đang chạy),
+    nếu không có thì tradecore.data.get_data (qua bar_cache, chỉ hỏi terminal các nến cuối).
+    """
+    from . import data
+
+    reader = get_reader(symbol)
+    rates = reader.get_rates(timeframe, n) if reader else None
+    if rates is None or len(rates) == 0:
+        return data.get_data(symbol, timeframe, n)
+    return data.rates_to_df(rates, symbol, timeframe)
+
+
+def get_data_np(symbol, timeframe, n=100):
+    """Như get_data nhưng trả về structured array thô (xem tradecore.data.get_data_np)"""
+    from . import data
+
+    reader = get_reader(symbol)
+    rates = reader.get_rates(timeframe, n) if reader else None
+    if rates is None or len(rates) == 0:
+        return data.get_data_np(symbol, timeframe, n)
+    return rates
+
+
+def get_tick(symbol):
+    """Tick mới nhất (bid/ask/last/time): từ feeder nếu có, nếu không thì mt5.symbol_info_tick"""
+    from . import data
+
+    reader = get_reader(symbol)
+    tick = reader.get_tick() if reader else None
+    return tick if tick is not None else data.get_tick(symbol)
+
+
+def run_feeder(config, timeframes, interval=0.25, capacity=DEFAULT_CAPACITY):
+    """Vòng lặp feeder: lấy nến (qua bar_cache) + tick của symbol và publish."""
+    import MetaTrader5 as mt5
+    from .data import connect_mt5
+    from .bar_cache import bar_cache
+
+    if not connect_mt5(config):
+        return
+    symbol = config['symbol']
+    writer = FeedWriter(symbol, timeframes, capacity)
+    print(f"📡 Market feed {symbol} → shared memory '{segment_name(symbol)}' (TF: {timeframes}, {interval}s)")
+    try:
+        while True:
+            rates_by_tf = {tf: bar_cache.get_rates(symbol, tf, capacity) for tf in timeframes}
+            writer.publish(rates_by_tf, mt5.symbol_info_tick(symbol))
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("🛑 Market feed stopped")
+    finally:
+        writer.close()
+        mt5.shutdown()
+
+
+def main():
+    import MetaTrader5 as mt5
+    from .data import load_config
+
+    parser = argparse.ArgumentParser(description="MT5 market data hub (shared memory)")
+    parser.add_argument("config", help="Config JSON (account/password/server/symbol)")
+    parser.add_argument("--interval", type=float, default=0.25, help="Chu kỳ publish (giây)")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    if not config:
+        sys.exit(1)
+    run_feeder(config, [mt5.TIMEFRAME_M1, mt5.TIMEFRAME_M5, mt5.TIMEFRAME_H1], interval=args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Đếm / đo mọi lời gọi MetaTrader5 API (opt-in) để biết lời gọi thừa nào nên bỏ trước.
+
+Bật: biến môi trường TRADECORE_MT5_ACCOUNTING=1 (báo cáo mỗi 300 giây) hoặc =<số giây>;
+TRADECORE_MT5_ACCOUNTING_FILE=<đường dẫn .json> để ghi thêm báo cáo ra file.
+tradecore/__init__ gọi install_from_env() nên mọi bot dùng utils shim đều bật được, không sửa code.
+
+install():
+- thay sys.modules["MetaTrader5"] bằng proxy (các import sau nhận proxy) và thay biến `mt5`
+  (hoặc tên khác trỏ tới module MT5) trong các module đã import trước đó, kể cả __main__
+- hằng số (mt5.TIMEFRAME_M1, ORDER_TYPE_BUY...) đi thẳng, chỉ hàm được bọc
+- mỗi lời gọi ghi theo (hàm, call site "file:dòng hàm_gọi"): số lần, tổng / max thời gian,
+  số dòng trả về (tuple / ndarray), byte (ndarray.nbytes; tuple namedtuple ước lượng 8 byte / field),
+  số lần lặp lại cùng tham số trong REPEAT_WINDOW giây (ứng viên cache),
+  độ dài cửa sổ ngày của history_deals_get / history_orders_get (quét 7 ngày của GridStep)
+"""
+import os
+import sys
+import json
+import time
+import types
+import atexit
+import threading
+from datetime import datetime
+
+ENV_ENABLE = "TRADECORE_MT5_ACCOUNTING"
+ENV_FILE = "TRADECORE_MT5_ACCOUNTING_FILE"
+DEFAULT_REPORT_EVERY = 300.0
+REPEAT_WINDOW = 1.0
+HISTORY_FUNCS = ("history_deals_get", "history_orders_get", "history_deals_total", "history_orders_total")
+
+
+class CallStats:
+    __slots__ = ("calls", "total_ns", "max_ns", "rows", "bytes", "repeats", "none_results", "window_days")
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.rows = 0
+        self.bytes = 0
+        self.repeats = 0
+        self.none_results = 0
+        self.window_days = 0.0
+
+    def as_dict(self):
+        calls = self.calls or 1
+        return {
+            "calls": self.calls, "total_ms": round(self.total_ns / 1e6, 2),
+            "avg_ms": round(self.total_ns / calls / 1e6, 3), "max_ms": round(self.max_ns / 1e6, 2),
+            "rows": self.rows, "bytes": self.bytes, "repeats": self.repeats,
+            "none_results": self.none_results,
+            "avg_window_days": round(self.window_days / calls, 2) if self.window_days else None,
+        }
+
+
+def _result_size(result):
+    """(rows, bytes) của kết quả MT5."""
+    if result is None:
+        return 0, 0
+    nbytes = getattr(result, "nbytes", None)
+    if nbytes is not None:   # copy_rates_* / copy_ticks_* (numpy structured array)
+        return len(result), int(nbytes)
+    if isinstance(result, tuple):
+        if result and hasattr(result[0], "_fields"):
+            return len(result), len(result) * len(result[0]._fields) * 8
+        if hasattr(result, "_fields"):   # 1 namedtuple (symbol_info, account_info, tick...)
+            return 1, len(result._fields) * 8
+        return len(result), 0
+    return 1, 0
+
+
+def _window_days(args, kwargs):
+    date_from = kwargs.get("date_from", args[0] if len(args) > 0 else None)
+    date_to = kwargs.get("date_to", args[1] if len(args) > 1 else None)
+    try:
+        if isinstance(date_from, datetime) and isinstance(date_to, datetime):
+            return (date_to - date_from).total_seconds() / 86400.0
+        if date_from is not None and date_to is not None:
+            return (float(date_to) - float(date_from)) / 86400.0
+    except (TypeError, ValueError, OverflowError):
+        pass
+    return 0.0
+
+
+class MT5Accounting:
+    """Bộ đếm dùng chung cho proxy. Thread-safe (lock nhỏ quanh phần cập nhật)."""
+
+    def __init__(self):
+        self.stats = {}        # (func, site) -> CallStats
+        self._last_args = {}   # (func, args_key) -> monotonic lần gọi trước
+        self._lock = threading.Lock()
+        self.started = time.monotonic()
+
+    def record(self, func, site, elapsed_ns, result, args, kwargs):
+        rows, nbytes = _result_size(result)
+        try:
+            args_key = (func, repr(args), repr(sorted(kwargs.items())))
+        except Exception:
+            args_key = None
+        now = time.monotonic()
+        with self._lock:
+            stats = self.stats.get((func, site))
+            if stats is None:
+                stats = self.stats[(func, site)] = CallStats()
+            stats.calls += 1
+            stats.total_ns += elapsed_ns
+            if elapsed_ns > stats.max_ns:
+                stats.max_ns = elapsed_ns
+            stats.rows += rows
+            stats.bytes += nbytes
+            if result is None:
+                stats.none_results += 1
+            if func in HISTORY_FUNCS:
+                stats.window_days += _window_days(args, kwargs)
+            if args_key is not None:
+                last = self._last_args.get(args_key)
+                if last is not None and now - last < REPEAT_WINDOW:
+                    stats.repeats += 1
+                self._last_args[args_key] = now
+                if len(self._last_args) > 20000:
+                    self._last_args.clear()
+
+    def by_function(self):
+        """Gộp theo hàm: {func: dict}."""
+        totals = {}
+        with self._lock:
+            items = list(self.stats.items())
+        for (func, _site), s in items:
+            t = totals.setdefault(func, CallStats())
+            t.calls += s.calls
+            t.total_ns += s.total_ns
+            t.max_ns = max(t.max_ns, s.max_ns)
+            t.rows += s.rows
+            t.bytes += s.bytes
+            t.repeats += s.repeats
+            t.none_results += s.none_results
+            t.window_days += s.window_days
+        return {func: t.as_dict() for func, t in totals.items()}
+
+    def snapshot(self):
+        with self._lock:
+            sites = [dict(func=func, site=site, **s.as_dict()) for (func, site), s in self.stats.items()]
+        sites.sort(key=lambda r: -r["total_ms"])
+        return {"uptime_s": round(time.monotonic() - self.started, 1),
+                "functions": self.by_function(), "sites": sites}
+
+    def report(self, top=15):
+        snap = self.snapshot()
+        uptime = max(time.monotonic() - self.started, 1.0)
+        print(f"\n📞 MT5 API calls (uptime {uptime:.0f}s)")
+        print(f"   {'function':<24}{'calls':>8}{'/min':>8}{'total ms':>11}{'avg ms':>9}{'rows':>10}"
+              f"{'KB':>9}{'repeat<1s':>10}")
+        for func, r in sorted(snap["functions"].items(), key=lambda kv: -kv[1]["total_ms"]):
+            print(f"   {func:<24}{r['calls']:>8}{r['calls'] * 60 / uptime:>8.1f}{r['total_ms']:>11.1f}"
+                  f"{r['avg_ms']:>9.3f}{r['rows']:>10}{r['bytes'] / 1024:>9.1f}{r['repeats']:>10}")
+        print(f"   top {top} call sites theo tổng thời gian:")
+        for r in snap["sites"][:top]:
+            window = f" | cửa sổ {r['avg_window_days']:.1f} ngày" if r["avg_window_days"] else ""
+            print(f"   {r['func']:<24}{r['calls']:>8} lần {r['total_ms']:>9.1f} ms {r['rows']:>8} dòng "
+                  f"repeat {r['repeats']:<6} {r['site']}{window}")
+        return snap
+
+    def dump(self, path):
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(dict(self.snapshot(), updated=datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+                          f, indent=2, ensure_ascii=False)
+        except OSError as e:
+            print(f"⚠️ MT5 accounting dump error: {e}")
+
+
+class MT5Proxy(types.ModuleType):
+    """Module giả đứng trước MetaTrader5: hàm được bọc để đếm, thuộc tính khác trả nguyên."""
+
+    def __init__(self, target, accounting):
+        super().__init__(target.__name__, getattr(target, "__doc__", None))
+        self.__dict__["_target"] = target
+        self.__dict__["_accounting"] = accounting
+
+    def __getattr__(self, name):
+        target = self.__dict__["_target"]
+        value = getattr(target, name)
+        if callable(value) and not isinstance(value, type) and not name.startswith("_"):
+            value = self._wrap(name, value)
+        self.__dict__[name] = value   # lần sau lấy thẳng từ __dict__
+        return value
+
+    def _wrap(self, name, fn):
+        accounting = self.__dict__["_accounting"]
+
+        def wrapper(*args, **kwargs):
+            t0 = time.perf_counter_ns()
+            result = fn(*args, **kwargs)
+            elapsed = time.perf_counter_ns() - t0
+            frame = sys._getframe(1)
+            site = f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+            accounting.record(name, site, elapsed, result, args, kwargs)
+            return result
+        wrapper.__name__ = name
+        wrapper.__doc__ = getattr(fn, "__doc__", None)
+        return wrapper
+
+
+accounting = None
+_proxy = None
+
+
+def install(target=None, report_every=None, dump_path=None):
+    """
+    Bật đếm lời gọi MT5 cho cả process. Gọi lại nhiều lần không sao (chỉ cài 1 lần).
+    report_every: giây giữa 2 lần in báo cáo (None / 0 = không in định kỳ).
+    """
+    global accounting, _proxy
+    if _proxy is not None:
+        return accounting
+    if target is None:
+        import MetaTrader5 as target
+    accounting = MT5Accounting()
+    _proxy = MT5Proxy(target, accounting)
+    sys.modules[target.__name__] = _proxy
+    for module in list(sys.modules.values()):
+        if module is None or module is _proxy:
+            continue
+        namespace = getattr(module, "__dict__", None)
+        if not isinstance(namespace, dict):
+            continue
+        for name, value in list(namespace.items()):
+            if value is target:
+                namespace[name] = _proxy
+    if report_every:
+        def _loop():
+            while True:
+                time.sleep(report_every)
+                accounting.report()
+                if dump_path:
+                    accounting.dump(dump_path)
+        threading.Thread(target=_loop, name="mt5-accounting-report", daemon=True).start()
+    atexit.register(accounting.report)
+    if dump_path:
+        atexit.register(accounting.dump, dump_path)
+    print(f"📞 MT5 API accounting ON (report every {report_every or 0:g}s"
+          f"{', dump ' + dump_path if dump_path else ''})")
+    return accounting
+
+
+def install_from_env():
+    value = os.environ.get(ENV_ENABLE, "").strip()
+    if not value or value == "0":
+        return None
+    try:
+        report_every = float(value) if value not in ("1", "true", "yes") else DEFAULT_REPORT_EVERY
+    except ValueError:
+        report_every = DEFAULT_REPORT_EVERY
+    return install(report_every=report_every, dump_path=os.environ.get(ENV_FILE) or None)
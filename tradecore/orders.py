@@ -0,0 +1,445 @@
+"""
+Helper lệnh dùng chung: quản lý SL (breakeven / trailing), lệnh chờ và đóng lệnh theo magic/comment,
+mô tả mã lỗi MT5.
+
+manage_positions quản lý cả rổ lệnh của (symbol, magic) trên 1 PositionSnapshot; manage_position
+(1 ticket) giữ lại cho code cũ và dùng chung _sl_request.
+"""
+import MetaTrader5 as mt5
+import pandas as pd
+
+from .data import get_data
+from .indicators import calculate_atr
+from .governor import get_client as get_governor
+
+
+def manage_position(order_ticket, symbol, magic, config, initial_sl_map=None):
+    """
+    Manage an open position: Breakeven & Trailing SL (Improved V2)
+    
+    Config parameters:
+    - trailing_enabled: true/false - Enable/disable trailing SL
+    - breakeven_enabled: true/false - Enable/disable breakeven
+    - breakeven_trigger_pips: Fixed pips OR use "auto" for % of initial SL (default: 30)
+    - breakeven_trigger_percent: % of initial SL to trigger breakeven (default: 0.5 = 50%)
+    - trailing_trigger_pips: Fixed pips OR use "auto" for multiplier of initial SL (default: 50)
+    - trailing_trigger_multiplier: Multiplier of initial SL to start trailing (default: 1.2)
+    - trailing_mode: "atr" or "fixed" - Use ATR-based or fixed distance
+    - trailing_atr_timeframe: "M1" or "M5" - Timeframe for ATR calculation (default: "M5")
+    - trailing_distance_pips: Fixed trailing distance in pips (default: 50)
+    - trailing_atr_multiplier: ATR multiplier for trailing (default: 1.5)
+    - trailing_min_pips: Minimum trailing distance in pips (default: 30)
+    - trailing_max_pips: Maximum trailing distance in pips (default: 100)
+    - trailing_lock_on_pullback: Enable lock trailing when pullback > % (default: false)
+    - trailing_pullback_percent: % profit loss to lock trailing (default: 0.3 = 30%)
+
+    Xử lý nhiều lệnh cùng lúc: dùng manage_positions (1 snapshot tick/symbol_info/ATR cho cả vòng).
+    """
+    try:
+        trailing_enabled = config.get('parameters', {}).get('trailing_enabled', True)
+        breakeven_enabled = config.get('parameters', {}).get('breakeven_enabled', True)
+        if not trailing_enabled and not breakeven_enabled:
+            return  # Both disabled, skip
+
+        positions = mt5.positions_get(ticket=int(order_ticket))
+        if not positions:
+            return
+        snapshot = PositionSnapshot(symbol)
+        request = _sl_request(positions[0], snapshot, config, initial_sl_map)
+        if request:
+            _send_sl_requests([request])
+    except Exception as e:
+        print(f"⚠️ Error managing position {order_ticket}: {e}")
+
+def _sl_request(pos, snapshot, config, initial_sl_map=None):
+    """Breakeven / trailing cho 1 lệnh trên snapshot giá → request TRADE_ACTION_SLTP hoặc None."""
+    symbol = snapshot.symbol
+    trailing_enabled = config.get('parameters', {}).get('trailing_enabled', True)
+    breakeven_enabled = config.get('parameters', {}).get('breakeven_enabled', True)
+    current_price = snapshot.tick.bid if pos.type == mt5.ORDER_TYPE_BUY else snapshot.tick.ask
+    point = snapshot.point
+    pip_size = snapshot.pip_size
+    
+    # Calculate Profit in Points and Pips
+    if pos.type == mt5.ORDER_TYPE_BUY:
+        profit_points = (current_price - pos.price_open) / point
+        profit_pips = (current_price - pos.price_open) / pip_size
+    else:
+        profit_points = (pos.price_open - current_price) / point
+        profit_pips = (pos.price_open - current_price) / pip_size
+    
+    # Initial SL distance: ưu tiên từ initial_sl_map (lưu khi vào lệnh); ticket không có trong map → ước lượng
+    # từ SL hiện tại: SL < 5 pips (chưa đặt / đã dời về sát entry) thì coi là 100 pips, còn lại tối thiểu 50 pips
+    if initial_sl_map and isinstance(initial_sl_map, dict) and int(pos.ticket) in initial_sl_map:
+        initial_sl_distance_pips = float(initial_sl_map[int(pos.ticket)])
+    else:
+        if pos.type == mt5.ORDER_TYPE_BUY:
+            sl_distance_from_entry = (pos.price_open - pos.sl) / pip_size if pos.sl > 0 else 0
+        else:
+            sl_distance_from_entry = (pos.sl - pos.price_open) / pip_size if pos.sl > 0 else 0
+        if sl_distance_from_entry < 5:
+            initial_sl_distance_pips = 100
+        else:
+            initial_sl_distance_pips = max(sl_distance_from_entry, 50)
+        
+    request = None
+    
+    # Track peak profit for pullback detection
+    # Note: This requires storing peak in external storage or position comment
+    # For now, we'll use a simple approach: if profit decreases significantly, be more conservative
+    
+    # 1. Breakeven (Improved - based on Initial SL %)
+    if breakeven_enabled:
+        breakeven_trigger_pips = config.get('parameters', {}).get('breakeven_trigger_pips', 30)
+        breakeven_trigger_percent = config.get('parameters', {}).get('breakeven_trigger_percent', 0.5)
+        
+        # Use % of initial SL if breakeven_trigger_pips is "auto" or use the larger value
+        if isinstance(breakeven_trigger_pips, str) and breakeven_trigger_pips.lower() == 'auto':
+            breakeven_trigger_pips_calc = initial_sl_distance_pips * breakeven_trigger_percent
+        else:
+            # Use max of fixed pips or % of initial SL
+            breakeven_trigger_pips_calc = max(breakeven_trigger_pips, initial_sl_distance_pips * breakeven_trigger_percent)
+        
+        breakeven_trigger_points = breakeven_trigger_pips_calc * pip_size / point
+        
+        if profit_points > breakeven_trigger_points:
+            # Check if SL is already at or better than breakeven
+            is_breakeven = False
+            if pos.type == mt5.ORDER_TYPE_BUY:
+                if pos.sl >= pos.price_open: is_breakeven = True
+            else:
+                if pos.sl > 0 and pos.sl <= pos.price_open: is_breakeven = True
+            
+            if not is_breakeven:
+                request = {
+                    "action": mt5.TRADE_ACTION_SLTP,
+                    "position": pos.ticket,
+                    "symbol": symbol,
+                    "sl": pos.price_open,
+                    "tp": pos.tp
+                }
+                print(f"🛡️ Moved SL to Breakeven for Ticket {pos.ticket} (Profit: {profit_pips:.1f} pips, Trigger: {breakeven_trigger_pips_calc:.1f} pips)")
+
+    # 2. Trailing Stop (Improved - based on Initial SL, M5 ATR, min/max limits)
+    if trailing_enabled and request is None:
+        trailing_trigger_pips = config.get('parameters', {}).get('trailing_trigger_pips', 50)
+        trailing_trigger_multiplier = config.get('parameters', {}).get('trailing_trigger_multiplier', 1.2)
+        
+        # Calculate trailing trigger: use multiplier of initial SL or fixed, whichever is larger
+        if isinstance(trailing_trigger_pips, str) and trailing_trigger_pips.lower() == 'auto':
+            trailing_trigger_pips_calc = initial_sl_distance_pips * trailing_trigger_multiplier
+        else:
+            trailing_trigger_pips_calc = max(trailing_trigger_pips, initial_sl_distance_pips * trailing_trigger_multiplier)
+        
+        trailing_trigger_points = trailing_trigger_pips_calc * pip_size / point
+        
+        if profit_points > trailing_trigger_points:
+            trailing_mode = config.get('parameters', {}).get('trailing_mode', 'atr')
+            trailing_atr_timeframe = config.get('parameters', {}).get('trailing_atr_timeframe', 'M5')
+            trailing_atr_multiplier = config.get('parameters', {}).get('trailing_atr_multiplier', 1.5)
+            trailing_distance_pips = config.get('parameters', {}).get('trailing_distance_pips', 50)
+            trailing_min_pips = config.get('parameters', {}).get('trailing_min_pips', 30)
+            trailing_max_pips = config.get('parameters', {}).get('trailing_max_pips', 100)
+            
+            # Calculate trailing distance
+            if trailing_mode == 'atr':
+                # ATR-based trailing (Improved: Use M5 for consistency with Initial SL)
+                timeframe_map = {
+                    'M1': mt5.TIMEFRAME_M1,
+                    'M5': mt5.TIMEFRAME_M5,
+                    'M15': mt5.TIMEFRAME_M15
+                }
+                atr_timeframe = timeframe_map.get(trailing_atr_timeframe, mt5.TIMEFRAME_M5)
+                
+                # ATR lấy 1 lần cho cả snapshot (qua indicator_cache)
+                atr_value = snapshot.atr(atr_timeframe)
+                if atr_value is not None:
+                    if not pd.isna(atr_value) and atr_value > 0:
+                        trail_dist = atr_value * trailing_atr_multiplier
+                        trail_dist_pips = trail_dist / pip_size
+                        # Apply min/max limits
+                        trail_dist_pips = max(trailing_min_pips, min(trail_dist_pips, trailing_max_pips))
+                        trail_dist = trail_dist_pips * pip_size
+                    else:
+                        # Fallback to fixed
+                        trail_dist = trailing_distance_pips * pip_size
+                else:
+                    # Fallback to fixed
+                    trail_dist = trailing_distance_pips * pip_size
+            else:
+                # Fixed trailing distance
+                trail_dist = trailing_distance_pips * pip_size
+            
+            new_sl = 0.0
+            
+            if pos.type == mt5.ORDER_TYPE_BUY:
+                new_sl = current_price - trail_dist
+                # Only update if new_sl is higher than current SL
+                if new_sl > pos.sl:
+                    request = {
+                        "action": mt5.TRADE_ACTION_SLTP,
+                        "position": pos.ticket,
+                        "symbol": symbol,
+                        "sl": new_sl,
+                        "tp": pos.tp
+                    }
+            else:
+                new_sl = current_price + trail_dist
+                # Only update if new_sl is lower than current SL (or SL is 0)
+                if pos.sl == 0 or new_sl < pos.sl:
+                    request = {
+                        "action": mt5.TRADE_ACTION_SLTP,
+                        "position": pos.ticket,
+                        "symbol": symbol,
+                        "sl": new_sl,
+                        "tp": pos.tp
+                    }
+            
+            if request:
+                mode_str = f"ATR({trailing_atr_multiplier}x {trailing_atr_timeframe})" if trailing_mode == 'atr' else f"Fixed({trailing_distance_pips}pips)"
+                print(f"🏃 Trailing SL for {pos.ticket}: {pos.sl:.2f} -> {new_sl:.2f} ({mode_str}, Profit: {profit_pips:.1f} pips, Trigger: {trailing_trigger_pips_calc:.1f} pips)")
+
+    return request
+
+class PositionSnapshot:
+    """
+    Giá / thông số symbol chụp 1 lần cho cả vòng quản lý lệnh: 1 symbol_info_tick, 1 symbol_info,
+    ATR mỗi timeframe tính tối đa 1 lần (chỉ khi có lệnh cần trailing theo ATR).
+    """
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.tick = mt5.symbol_info_tick(symbol)
+        self.info = mt5.symbol_info(symbol)
+        self.point = self.info.point if self.info else None
+        self.pip_size = _pip_size(symbol, self.point) if self.info else None
+        self._atr = {}
+
+    def ok(self):
+        return self.tick is not None and self.info is not None
+
+    def atr(self, timeframe, period=14, bars=50):
+        """ATR(period) nến cuối của timeframe, None nếu không đủ nến."""
+        if timeframe not in self._atr:
+            df = get_data(self.symbol, timeframe, bars)
+            self._atr[timeframe] = calculate_atr(df, period=period).iloc[-1] if df is not None and len(df) > period else None
+        return self._atr[timeframe]
+
+
+def _pip_size(symbol, point):
+    pip_size = point * 10  # Default: 10 points = 1 pip
+    # For XAUUSD, pip might be 0.1 or 0.01 depending on broker
+    if 'XAU' in symbol.upper() or 'GOLD' in symbol.upper():
+        if point >= 0.01:
+            pip_size = point  # 1 point = 1 pip
+        else:
+            pip_size = point * 10  # 10 points = 1 pip
+    return pip_size
+
+
+def _send_sl_requests(requests):
+    """Gửi liên tiếp các request SL/TP đã tính xong (không đọc lại giá giữa các lệnh)."""
+    done = 0
+    for request in requests:
+        res = mt5.order_send(request)
+        if res is None or res.retcode != mt5.TRADE_RETCODE_DONE:
+            print(f"⚠️ Failed to update SL/TP: {res.comment if res else mt5.last_error()}")
+        else:
+            done += 1
+    return done
+
+
+def manage_positions(symbol, magic, config, positions=None, initial_sl_map=None):
+    """
+    Breakeven / trailing cho mọi lệnh (symbol, magic) trong 1 lượt — cùng logic manage_position,
+    nhưng 1 positions_get + 1 tick + 1 symbol_info + ATR 1 lần cho cả vòng, rồi gửi các
+    request SL/TP cùng lúc. positions: danh sách lệnh caller đã lấy (bỏ qua positions_get).
+    Trả về số lệnh đã dời SL.
+    """
+    try:
+        trailing_enabled = config.get('parameters', {}).get('trailing_enabled', True)
+        breakeven_enabled = config.get('parameters', {}).get('breakeven_enabled', True)
+        if not trailing_enabled and not breakeven_enabled:
+            return 0
+
+        if positions is None:
+            positions = [p for p in (mt5.positions_get(symbol=symbol) or []) if p.magic == magic]
+        if not positions:
+            return 0
+        snapshot = PositionSnapshot(symbol)
+        if not snapshot.ok():
+            return 0
+
+        requests = []
+        for pos in positions:
+            try:
+                request = _sl_request(pos, snapshot, config, initial_sl_map)
+            except Exception as e:
+                print(f"⚠️ Error managing position {pos.ticket}: {e}")
+                continue
+            if request:
+                requests.append(request)
+        return _send_sl_requests(requests) if requests else 0
+    except Exception as e:
+        print(f"⚠️ Error managing positions {symbol}/{magic}: {e}")
+        return 0
+
+def get_mt5_error_message(error_code):
+    """
+    Translate MT5 Error Codes to Human Readable Messages
+    """
+    error_map = {
+        10004: "Requote",
+        10006: "Request Rejected",
+        10013: "Invalid Request",
+        10014: "Invalid Volume",
+        10015: "Invalid Price",
+        10016: "Invalid Stops",
+        10018: "Market Closed",
+        10024: "Too Many Requests",
+        10027: "AutoTrading Disabled by Client",
+        10030: "Unsupported Filling Mode",
+        10031: "Connection Error",
+        10034: "Volume Limit Reached",
+        10036: "Request Timeout"
+    }
+    msg = error_map.get(error_code, "Unknown Error")
+    return f"{error_code} ({msg})"
+
+def check_autotrading_allowed():
+    """
+    Kiểm tra MT5 có bật AutoTrading (Algo Trading) không.
+    Trả về True nếu được phép đặt lệnh, False nếu đang tắt (sẽ bị lỗi 10027).
+    In cảnh báo ra console nếu đang tắt.
+    """
+    try:
+        ti = mt5.terminal_info()
+        if ti is None:
+            return True  # Không lấy được thì không chặn
+        allowed = getattr(ti, "trade_allowed", True)
+        if not allowed:
+            print("⚠️ AutoTrading đang TẮT trong MT5 → Lệnh sẽ bị từ chối (10027).")
+            print("   → Mở MT5, bật nút 'Algo Trading' / 'AutoTrading' trên toolbar (màu xanh = bật).")
+        return bool(allowed)
+    except Exception:
+        return True
+
+def get_positions_bot(symbol, magic, comment=None):
+    """
+    Lấy danh sách position đang mở chỉ của bot này.
+    Lọc theo symbol, magic; nếu comment không None thì chỉ giữ position có comment khớp exact.
+    Tránh lấy position của bot khác (magic/comment khác).
+    """
+    positions = mt5.positions_get(symbol=symbol, magic=magic) or []
+    if comment is not None:
+        positions = [p for p in positions if (getattr(p, "comment", "") or "").strip() == comment]
+    return positions
+
+def get_pending_orders_bot(symbol, magic, comment=None):
+    """
+    Lấy danh sách lệnh chờ (pending) chỉ của bot này.
+    Lọc theo symbol, magic; nếu comment không None thì chỉ giữ order có comment khớp exact.
+    Tránh lấy/hủy nhầm lệnh của bot khác.
+    """
+    orders = mt5.orders_get(symbol=symbol)
+    if not orders:
+        return []
+    orders = [o for o in orders if o.magic == magic]
+    if comment is not None:
+        orders = [o for o in orders if (getattr(o, "comment", "") or "").strip() == comment]
+    return orders
+
+def place_pending_order(symbol, volume, order_type, price, sl, tp, magic, comment, digits=None, type_filling=None):
+    """
+    Đặt 1 lệnh chờ BUY_STOP hoặc SELL_STOP. Chỉ của bot: dùng magic + comment để sau này lọc.
+    order_type: mt5.ORDER_TYPE_BUY_STOP hoặc mt5.ORDER_TYPE_SELL_STOP.
+    digits: số chữ số thập phân (nếu None lấy từ symbol_info).
+    type_filling: mt5.ORDER_FILLING_IOC / FOK / RETURN (None = tự chọn theo symbol).
+    Trả về kết quả mt5.order_send (hoặc None nếu lỗi / governor chặn).
+    """
+    info = mt5.symbol_info(symbol)
+    if not info:
+        return None
+    if digits is None:
+        digits = getattr(info, "digits", 2)
+    if type_filling is None:
+        type_filling = mt5.ORDER_FILLING_FOK
+        if getattr(info, "filling_mode", 0) & 2:
+            type_filling = mt5.ORDER_FILLING_IOC
+    req = {
+        "action": mt5.TRADE_ACTION_PENDING,
+        "symbol": symbol,
+        "volume": float(volume),
+        "type": order_type,
+        "price": round(float(price), digits),
+        "sl": round(float(sl), digits) if sl else 0.0,
+        "tp": round(float(tp), digits) if tp else 0.0,
+        "magic": magic,
+        "comment": (comment or "").strip(),
+        "type_time": mt5.ORDER_TIME_GTC,
+        "type_filling": type_filling,
+    }
+    governor = get_governor()
+    if governor is not None:
+        side = "BUY" if order_type in (mt5.ORDER_TYPE_BUY_STOP, mt5.ORDER_TYPE_BUY_LIMIT) else "SELL"
+        decision = governor.reserve(symbol, side, volume, req["comment"], kind="pending")
+        if not decision.get("allowed"):
+            print(f"   🚦 Governor chặn lệnh chờ {symbol}: {decision.get('reason')}")
+            return None
+    return mt5.order_send(req)
+
+def place_buy_stop(symbol, volume, price, sl, tp, magic, comment, digits=None, type_filling=None):
+    """Đặt lệnh BUY_STOP. Chỉ của bot (magic + comment). Trả về result của order_send."""
+    return place_pending_order(
+        symbol, volume, mt5.ORDER_TYPE_BUY_STOP, price, sl, tp, magic, comment,
+        digits=digits, type_filling=type_filling
+    )
+
+def place_sell_stop(symbol, volume, price, sl, tp, magic, comment, digits=None, type_filling=None):
+    """Đặt lệnh SELL_STOP. Chỉ của bot (magic + comment). Trả về result của order_send."""
+    return place_pending_order(
+        symbol, volume, mt5.ORDER_TYPE_SELL_STOP, price, sl, tp, magic, comment,
+        digits=digits, type_filling=type_filling
+    )
+
+def cancel_pending_orders_bot(symbol, magic, comment=None):
+    """
+    Hủy tất cả lệnh chờ chỉ của bot (symbol + magic + comment nếu có).
+    Trả về số lệnh đã hủy.
+    """
+    orders = get_pending_orders_bot(symbol, magic, comment=comment)
+    for o in orders:
+        mt5.order_send({"action": mt5.TRADE_ACTION_REMOVE, "order": o.ticket})
+    return len(orders)
+
+def close_positions_bot(symbol, magic, comment=None, type_filling=None):
+    """
+    Đóng tất cả position đang mở chỉ của bot (symbol + magic + comment nếu có).
+    Trả về số position đã gửi lệnh đóng.
+    """
+    positions = get_positions_bot(symbol, magic, comment=comment)
+    if type_filling is None:
+        info = mt5.symbol_info(symbol)
+        type_filling = mt5.ORDER_FILLING_IOC
+        if info and getattr(info, "filling_mode", 0) & 2:
+            type_filling = mt5.ORDER_FILLING_IOC
+    closed = 0
+    for p in positions:
+        tick = mt5.symbol_info_tick(symbol)
+        if not tick:
+            continue
+        price = tick.bid if p.type == mt5.ORDER_TYPE_BUY else tick.ask
+        r = mt5.order_send({
+            "action": mt5.TRADE_ACTION_DEAL,
+            "symbol": symbol,
+            "volume": p.volume,
+            "type": mt5.ORDER_TYPE_SELL if p.type == mt5.ORDER_TYPE_BUY else mt5.ORDER_TYPE_BUY,
+            "position": p.ticket,
+            "price": price,
+            "magic": magic,
+            "comment": "Close_Bot",
+            "type_filling": type_filling,
+        })
+        if r and r.retcode == mt5.TRADE_RETCODE_DONE:
+            closed += 1
+    return closed
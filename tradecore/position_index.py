@@ -0,0 +1,277 @@
+"""
+Position đã đóng dựng từ deal history MT5, giữ trong RAM và cập nhật tăng dần — dùng chung cho mọi code GridStep
+đọc history (utils.get_last_n_closed_* / get_closed_deals_bot / get_recent_closed_entry_prices_bot,
+grid_step_common, strategy_grid_step_v5, grid_zone_reentry_fsm; update_db gom deal trong trades.db bằng summarize()).
+
+Trước đây mỗi hàm tự gọi history_deals_get 1-3 ngày rồi gom deal theo position_id ở mỗi vòng bot. PositionIndex giữ
+deal theo position_id: mỗi lần hỏi chỉ lấy deal từ deal mới nhất − OVERLAP_SECONDS tới hiện tại (thêm phần cửa sổ
+còn thiếu khi days_back lớn hơn lần trước), bỏ deal trùng theo ticket. Truy vấn vẫn lọc theo cửa sổ days_back,
+symbol, magic, comment_prefix như bản cũ nên kết quả giữ nguyên:
+- match="position": position được tính nếu BẤT KỲ deal nào có comment bắt đầu bằng prefix (deal OUT thường trống)
+- match="deal": chỉ gom các deal có comment khớp prefix
+
+1 process = 1 tài khoản MT5 (như bot); đổi tài khoản thì reset(). Kiểm tra: XAU_M1/benchmarks/check_position_index.py.
+
+Opt-in: biến môi trường TRADECORE_POSITION_INDEX=1 (mặc định các hàm GridStep vẫn hỏi lại cả cửa sổ như cũ).
+Trên fake_mt5 index giảm số deal hỏi terminal nhưng chậm hơn vòng gom cũ (history_deals_get giả không tốn IPC);
+chỉ bật mặc định khi đo được lợi trên terminal thật.
+"""
+import os
+import threading
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import MetaTrader5 as mt5
+
+ENV_ENABLE = "TRADECORE_POSITION_INDEX"
+OVERLAP_SECONDS = 300           # lấy lùi lại trước deal mới nhất (deal tới trễ cùng mốc giây)
+PRUNE_INTERVAL = 3600           # giây giữa 2 lần bỏ position cũ hơn cửa sổ lớn nhất đã hỏi
+
+# deal đọc từ trades.db (mt5_deals) — cùng tên thuộc tính với TradeDeal của MetaTrader5
+Deal = namedtuple("Deal", "ticket position_id magic type entry symbol volume price profit swap commission time comment")
+Summary = namedtuple("Summary", "first_in last_in last_out out_net out_count")
+ClosedPosition = namedtuple("ClosedPosition", "position_id first_in last_in last_out net_profit close_time")
+
+
+def summarize(deals, inout=False):
+    """
+    deal của 1 position (theo thứ tự thời gian) → Summary: deal IN đầu / cuối, deal OUT cuối, tổng
+    profit + swap + commission các deal OUT. inout=True: deal INOUT tính cả là IN lẫn OUT (như update_db).
+    """
+    entry_in = getattr(mt5, "DEAL_ENTRY_IN", 0)
+    entry_out = getattr(mt5, "DEAL_ENTRY_OUT", 1)
+    entry_inout = getattr(mt5, "DEAL_ENTRY_INOUT", 2) if inout else None
+    first_in = last_in = last_out = None
+    out_net = 0.0
+    out_count = 0
+    for d in deals:
+        entry = d.entry
+        if entry == entry_in or entry == entry_inout:
+            if first_in is None:
+                first_in = d
+            last_in = d
+        if entry == entry_out or entry == entry_inout:
+            out_net += getattr(d, "profit", 0) + getattr(d, "swap", 0) + getattr(d, "commission", 0)
+            last_out = d
+            out_count += 1
+    return Summary(first_in, last_in, last_out, out_net, out_count)
+
+
+def _sort_key(deal):
+    return (deal.time, deal.ticket)
+
+
+class PositionIndex:
+    """Deal history của tài khoản đang đăng nhập, gom theo position_id. Mọi thao tác giữ self.lock."""
+
+    def __init__(self, overlap_seconds=OVERLAP_SECONDS):
+        self.lock = threading.RLock()
+        self.overlap_seconds = overlap_seconds
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.deals = {}             # position_id → [deal] theo (time, ticket)
+            self.tickets = set()
+            self.by_magic = {}          # magic → set(position_id) có deal mang magic đó
+            self.covered_from = None    # giây: đã có đủ deal từ mốc này
+            self.last_time = None       # time của deal mới nhất (giờ server)
+            self.max_days = 0
+            self.pruned_at = None
+            self.stats = {"fetches": 0, "fetched": 0, "added": 0}
+
+    # ----- nạp deal -----
+
+    def add(self, deals):
+        """Thêm deal (bỏ ticket đã có, deal không có position). Trả về set position_id có deal mới."""
+        touched = set()
+        unsorted = set()
+        with self.lock:
+            for d in deals:
+                ticket = int(d.ticket)
+                if ticket in self.tickets:
+                    continue
+                pid = getattr(d, "position_id", None) or getattr(d, "position", None)
+                if not pid:
+                    continue
+                pid = int(pid)
+                self.tickets.add(ticket)
+                rows = self.deals.setdefault(pid, [])
+                if rows and _sort_key(d) < _sort_key(rows[-1]):
+                    unsorted.add(pid)
+                rows.append(d)
+                self.by_magic.setdefault(int(getattr(d, "magic", 0) or 0), set()).add(pid)
+                if self.last_time is None or d.time > self.last_time:
+                    self.last_time = d.time
+                touched.add(pid)
+                self.stats["added"] += 1
+            for pid in unsorted:
+                self.deals[pid].sort(key=_sort_key)
+        return touched
+
+    def _fetch(self, date_from, date_to):
+        # MT5 thường cần history_select trước khi history_deals_get trả deal (giống utils._history_deals_select_and_get).
+        try:
+            mt5.history_select(date_from, date_to)
+        except (TypeError, ValueError, AttributeError, OSError):
+            pass
+        deals = mt5.history_deals_get(date_from, date_to)
+        if deals is None:
+            deals = mt5.history_deals_get(date_from, date_to, group="*")
+        self.stats["fetches"] += 1
+        if deals is not None:
+            self.stats["fetched"] += len(deals)
+        return deals
+
+    def refresh(self, days_back=1):
+        """
+        Có đủ deal của days_back ngày gần nhất + deal mới từ lần trước. Trả về mốc giây đầu cửa sổ
+        (now − days_back, như from_date của bản cũ). Terminal trả None → giữ nguyên, lần sau hỏi lại.
+        """
+        with self.lock:
+            now = datetime.now()
+            window_from = now - timedelta(days=days_back)
+            from_ts = window_from.timestamp()
+            # deal.time là giờ server (có thể đi trước giờ local) → chừa thêm 1 ngày phía sau
+            to_date = now + timedelta(days=1)
+            self.max_days = max(self.max_days, days_back)
+            if self.covered_from is None:
+                deals = self._fetch(window_from, to_date)
+                if deals is not None:
+                    self.add(deals)
+                    self.covered_from = from_ts
+                return from_ts
+            if from_ts < self.covered_from:
+                deals = self._fetch(window_from, datetime.fromtimestamp(self.covered_from + self.overlap_seconds))
+                if deals is not None:
+                    self.add(deals)
+                    self.covered_from = from_ts
+            if self.last_time is not None:
+                # mốc theo deal đã thấy (giờ server), không theo đồng hồ local
+                date_from = datetime.fromtimestamp(self.last_time - self.overlap_seconds)
+            else:
+                # chưa có deal nào: hỏi lại từ đầu cửa sổ — giờ server chậm hơn local không làm sót deal đầu tiên
+                date_from = datetime.fromtimestamp(self.covered_from)
+            deals = self._fetch(date_from, to_date)
+            if deals is not None:
+                self.add(deals)
+            self._prune(now.timestamp())
+            return from_ts
+
+    def _prune(self, now_ts):
+        """Bỏ position có deal cuối cũ hơn cửa sổ lớn nhất đã hỏi (+1 ngày) để bot chạy lâu không phình RAM."""
+        if self.pruned_at is not None and now_ts - self.pruned_at < PRUNE_INTERVAL:
+            return
+        self.pruned_at = now_ts
+        cutoff = now_ts - (self.max_days + 1) * 86400
+        old = [pid for pid, rows in self.deals.items() if rows[-1].time < cutoff]
+        for pid in old:
+            for d in self.deals.pop(pid):
+                self.tickets.discard(int(d.ticket))
+                self.by_magic.get(int(getattr(d, "magic", 0) or 0), set()).discard(pid)
+        if old:
+            self.covered_from = max(self.covered_from, cutoff)
+
+    # ----- truy vấn -----
+
+    def _positions(self, magic, from_ts, symbol=None, comment_prefix=None, match="position"):
+        """[(position_id, deal trong cửa sổ)] theo thứ tự deal đầu tiên — như vòng for trên history_deals_get cũ."""
+        mag_i = int(magic)
+        found = []
+        for pid in self.by_magic.get(mag_i, ()):
+            rows = self.deals[pid]
+            if rows[-1].time < from_ts:
+                continue
+            deals = [d for d in rows
+                     if d.time >= from_ts and int(getattr(d, "magic", 0) or 0) == mag_i
+                     and (symbol is None or getattr(d, "symbol", "") == symbol)]
+            if comment_prefix is not None:
+                tagged = [d for d in deals if (getattr(d, "comment", "") or "").strip().startswith(comment_prefix)]
+                if not tagged:
+                    continue
+                if match == "deal":
+                    deals = tagged
+            if deals:
+                found.append((_sort_key(deals[0]), pid, deals))
+        found.sort(key=lambda x: x[0])
+        return [(pid, deals) for _, pid, deals in found]
+
+    def closed(self, symbol, magic, days_back=1, comment_prefix=None, match="position", newest_first=True):
+        """
+        Position có deal OUT trong cửa sổ days_back ngày → [ClosedPosition] (net_profit = tổng các deal OUT,
+        close_time = time deal OUT cuối). newest_first: đóng gần nhất trước (cùng giờ đóng: thứ tự gặp deal đầu);
+        False: thứ tự gặp deal đầu. symbol=None: mọi symbol của magic.
+        """
+        with self.lock:
+            from_ts = self.refresh(days_back)
+            rows = []
+            for pid, deals in self._positions(magic, from_ts, symbol, comment_prefix, match):
+                s = summarize(deals)
+                if s.last_out is None:
+                    continue
+                rows.append(ClosedPosition(pid, s.first_in, s.last_in, s.last_out, s.out_net, s.last_out.time))
+        if newest_first:
+            rows.sort(key=lambda r: r.close_time, reverse=True)
+        return rows
+
+    def last_n_closed(self, symbol, magic, n, days_back=1, comment_prefix=None, match="position"):
+        """N position đóng gần nhất: [(net_profit, close_time)] mới trước."""
+        rows = self.closed(symbol, magic, days_back, comment_prefix, match)
+        return [(r.net_profit, r.close_time) for r in rows[:max(int(n), 0)]]
+
+    def loss_streak(self, symbol, magic, days_back=1, comment_prefix=None, match="position"):
+        """Số position thua liên tiếp tính từ lệnh đóng gần nhất."""
+        streak = 0
+        for r in self.closed(symbol, magic, days_back, comment_prefix, match):
+            if r.net_profit >= 0:
+                break
+            streak += 1
+        return streak
+
+    def recent_entry_prices(self, symbol, magic, lookback_minutes, days_back=1, comment_prefix=None):
+        """Giá deal IN của position đóng trong lookback_minutes gần nhất, mới đóng trước."""
+        cutoff = datetime.now().timestamp() - lookback_minutes * 60
+        return [float(r.last_in.price) for r in self.closed(symbol, magic, days_back, comment_prefix)
+                if r.last_in is not None and r.close_time >= cutoff]
+
+    def latest_loss(self, symbol, magic, comment_prefix, days_back=2, still_open=None):
+        """
+        Position đóng lỗ (tổng deal OUT < 0) gần nhất → deal OUT cuối của nó, None nếu không có.
+        still_open(position_id) → True: bỏ qua position còn mở (mới đóng một phần).
+        """
+        for r in self.closed(symbol, magic, days_back, comment_prefix):
+            if float(r.net_profit or 0) >= 0:
+                continue
+            if still_open is not None and still_open(r.position_id):
+                continue
+            return r.last_out
+        return None
+
+    def has_out_after(self, symbol, magic, since_ts, comment_prefix=None):
+        """True nếu có deal OUT (comment khớp prefix) sau since_ts."""
+        entry_out = getattr(mt5, "DEAL_ENTRY_OUT", 1)
+        with self.lock:
+            days_back = max((datetime.now().timestamp() - since_ts) / 86400.0, 0.0) + 1.0 / 1440
+            from_ts = self.refresh(days_back)
+            for _, deals in self._positions(magic, from_ts, symbol, comment_prefix, match="deal"):
+                if any(int(getattr(d, "entry", -1)) == entry_out and int(d.time or 0) > since_ts for d in deals):
+                    return True
+        return False
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def enabled():
+    """True khi TRADECORE_POSITION_INDEX bật (khác rỗng / 0): các hàm đọc history GridStep đi qua index."""
+    return os.environ.get(ENV_ENABLE, "") not in ("", "0")
+
+
+def get_index():
+    """PositionIndex dùng chung trong process."""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = PositionIndex()
+        return _index
@@ -0,0 +1,356 @@
+"""
+Đo thời gian từng phần của 1 vòng strategy (data / indicators / db / order_send / mt5 / print ...).
+
+- profiler.cycle(strategy, db_path): bọc 1 vòng logic, ghi tổng thời gian vòng ("cycle") và phần
+  không thuộc stage nào ("other")
+- profiler.stage(name) / @profiled(name): đo 1 đoạn; stage lồng nhau chỉ tính stage ngoài cùng
+  nên tổng các stage + other = cycle
+- instrument_module(module): bọc sẵn các hàm mà file strategy gọi (get_data, calculate_*,
+  send_order, db.*, mt5.*, print) ngay trên globals của module — file strategy không phải sửa
+- Mỗi (strategy, stage) là 1 ring buffer cố định (capacity mẫu gần nhất, đồng hồ perf_counter_ns);
+  mỗi flush_every giây ghi p50 / p95 / p99 / max vào bảng cycle_profile của trades.db
+  (hoặc file JSON sidecar nếu không có db_path); dashboard đọc qua latest_profile()
+
+Bật bằng config "profile": true hoặc biến môi trường TRADECORE_PROFILE=1. Tắt: stage() trả về
+1 context manager rỗng dùng chung, không đo gì. Module chỉ dùng sqlite3 (dashboard import được).
+"""
+import os
+import json
+import time
+import types
+import sqlite3
+import functools
+from threading import get_ident
+from time import perf_counter_ns
+from datetime import datetime
+from contextlib import nullcontext
+
+import numpy as np
+
+ENV_ENABLE = "TRADECORE_PROFILE"
+DEFAULT_CAPACITY = 512
+DEFAULT_FLUSH_EVERY = 60.0
+
+SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS cycle_profile (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        strategy_name TEXT,
+        stage TEXT,
+        samples INTEGER,
+        p50_ms REAL,
+        p95_ms REAL,
+        p99_ms REAL,
+        max_ms REAL,
+        share_pct REAL
+    )
+'''
+
+# tên global trong file strategy → stage
+DATA_NAMES = ("get_data", "get_data_np", "get_tick", "get_data_cached")
+ORDER_NAMES = ("send_order", "place_pending_order", "place_buy_stop", "place_sell_stop",
+               "place_buy_limit", "place_sell_limit", "close_all_positions", "cancel_pending_orders_bot")
+MANAGE_NAMES = ("manage_positions", "manage_position")
+INDICATOR_PREFIXES = ("calculate_", "is_doji", "detect_", "find_swing")
+
+_NULL = nullcontext()
+
+
+class StageRing:
+    """Ring buffer cố định cho thời gian (ns) của 1 stage."""
+    __slots__ = ("buf", "idx", "count", "window_ns")
+
+    def __init__(self, capacity):
+        self.buf = [0] * capacity
+        self.idx = 0
+        self.count = 0
+        self.window_ns = 0   # tổng thời gian từ lần flush trước (tính tỉ trọng stage trong vòng)
+
+    def add(self, ns):
+        self.buf[self.idx] = ns
+        self.idx += 1
+        if self.idx == len(self.buf):
+            self.idx = 0
+        self.count += 1
+        self.window_ns += ns
+
+    def values_ms(self):
+        n = min(self.count, len(self.buf))
+        return np.array(self.buf[:n], dtype=np.float64) / 1e6
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "t0")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler._active = self.name
+        self.t0 = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler._end_stage(self.name, self.t0)
+        return False
+
+
+class _Cycle:
+    __slots__ = ("profiler", "strategy", "db_path", "t0", "outer")
+
+    def __init__(self, profiler, strategy, db_path):
+        self.profiler = profiler
+        self.strategy = strategy
+        self.db_path = db_path
+
+    def __enter__(self):
+        p = self.profiler
+        if self.db_path:
+            p.db_paths[self.strategy] = self.db_path
+        self.outer = (p._owner, p._rings, p._active, p._stage_ns)
+        p._owner = get_ident()
+        p._rings = p.rings.setdefault(self.strategy, {})
+        p._active = None
+        p._stage_ns = 0
+        self.t0 = perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        p = self.profiler
+        elapsed = perf_counter_ns() - self.t0
+        p._record("cycle", elapsed)
+        p._record("other", max(0, elapsed - p._stage_ns))
+        p._owner, p._rings, p._active, p._stage_ns = self.outer
+        if time.monotonic() >= p._next_flush:
+            p.flush()
+        return False
+
+
+class Profiler:
+    """
+    Chỉ đo trên thread đang chạy cycle (vòng strategy của runner / GridStep chạy trên 1 thread);
+    stage gọi từ thread khác hoặc ngoài cycle bị bỏ qua.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, flush_every=DEFAULT_FLUSH_EVERY, sidecar_path=None):
+        self.enabled = bool(os.environ.get(ENV_ENABLE))
+        self.capacity = capacity
+        self.flush_every = flush_every
+        self.sidecar_path = sidecar_path
+        self.rings = {}      # strategy -> {stage: StageRing}
+        self.db_paths = {}   # strategy -> trades.db
+        self._owner = None   # thread ident của cycle đang chạy
+        self._rings = None   # rings của strategy đang chạy
+        self._active = None  # stage đang đo (stage lồng bên trong không tính)
+        self._stage_ns = 0
+        self._next_flush = time.monotonic() + flush_every
+
+    def enable(self, flush_every=None, sidecar_path=None):
+        self.enabled = True
+        if flush_every is not None:
+            self.flush_every = flush_every
+            self._next_flush = time.monotonic() + flush_every
+        if sidecar_path is not None:
+            self.sidecar_path = sidecar_path
+
+    def stage(self, name):
+        """Context manager đo 1 đoạn code. Tắt / ngoài cycle / đang trong stage khác → không đo."""
+        if self._active is not None or self._owner != get_ident():
+            return _NULL
+        return _Stage(self, name)
+
+    def cycle(self, strategy, db_path=None):
+        if not self.enabled:
+            return _NULL
+        return _Cycle(self, strategy, db_path)
+
+    def _record(self, stage, ns):
+        ring = self._rings.get(stage)
+        if ring is None:
+            ring = self._rings[stage] = StageRing(self.capacity)
+        ring.add(ns)
+
+    def _end_stage(self, stage, t0):
+        elapsed = perf_counter_ns() - t0
+        self._active = None
+        self._stage_ns += elapsed
+        self._record(stage, elapsed)
+
+    def snapshot(self):
+        """
+        {strategy: {stage: {samples, p50_ms, p95_ms, p99_ms, max_ms, share_pct}}}: percentile theo lần gọi
+        trên ring buffer, share_pct = tỉ lệ thời gian stage / thời gian vòng từ lần flush trước.
+        """
+        out = {}
+        for strategy, stage, ring in [(k, st, r) for k, rings in self.rings.items() for st, r in rings.items()]:
+            values = ring.values_ms()
+            if not len(values):
+                continue
+            p50, p95, p99 = np.percentile(values, (50, 95, 99))
+            out.setdefault(strategy, {})[stage] = {
+                "samples": int(len(values)), "p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3),
+                "p99_ms": round(float(p99), 3), "max_ms": round(float(values.max()), 3),
+                "window_ns": ring.window_ns,
+            }
+        for stages in out.values():
+            cycle_total = stages.get("cycle", {}).get("window_ns") or 0
+            for row in stages.values():
+                row["share_pct"] = round(100.0 * row.pop("window_ns") / cycle_total, 1) if cycle_total else None
+        return out
+
+    def flush(self):
+        """Ghi percentiles vào cycle_profile (theo db_path của strategy) hoặc sidecar JSON."""
+        self._next_flush = time.monotonic() + self.flush_every
+        snap = self.snapshot()
+        for rings in self.rings.values():
+            for ring in rings.values():
+                ring.window_ns = 0
+        if not snap:
+            return
+        sidecar = {}
+        for strategy, stages in snap.items():
+            db_path = self.db_paths.get(strategy)
+            if db_path:
+                write_profile(db_path, strategy, stages)
+            else:
+                sidecar[strategy] = stages
+        if sidecar and self.sidecar_path:
+            try:
+                with open(self.sidecar_path, "w", encoding="utf-8") as f:
+                    json.dump({"updated": time.strftime("%Y-%m-%d %H:%M:%S"), "strategies": sidecar}, f, indent=2)
+            except OSError as e:
+                print(f"⚠️ Profiler sidecar write error: {e}")
+
+    def wrap(self, fn, stage_name):
+        prof = self
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if prof._active is not None or prof._owner != get_ident():
+                return fn(*args, **kwargs)
+            prof._active = stage_name
+            t0 = perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                # = _end_stage, viết thẳng để bớt lời gọi hàm trên đường nóng
+                elapsed = perf_counter_ns() - t0
+                prof._active = None
+                prof._stage_ns += elapsed
+                ring = prof._rings.get(stage_name)
+                if ring is None:
+                    ring = prof._rings[stage_name] = StageRing(prof.capacity)
+                ring.add(elapsed)
+        wrapper.__profiled__ = True
+        return wrapper
+
+
+class _StageProxy:
+    """
+    Proxy cho object (mt5, db): mọi hàm gọi qua proxy được đo vào 1 stage; thuộc tính khác giữ nguyên.
+    Hàm đã bọc (và hằng số của module) được lưu vào __dict__ của proxy nên lần sau không qua __getattr__.
+    """
+
+    def __init__(self, target, stage_name, prof):
+        self.__dict__["_target"] = target
+        self.__dict__["_stage_name"] = stage_name
+        self.__dict__["_prof"] = prof
+
+    def __getattr__(self, name):
+        target = self.__dict__["_target"]
+        value = getattr(target, name)
+        if callable(value) and not isinstance(value, type):
+            value = self.__dict__["_prof"].wrap(value, self.__dict__["_stage_name"])
+            self.__dict__[name] = value
+        elif isinstance(target, types.ModuleType):
+            self.__dict__[name] = value   # hằng số module (mt5.TIMEFRAME_M1...) không đổi
+        return value
+
+    def __setattr__(self, name, value):
+        setattr(self.__dict__["_target"], name, value)
+
+
+profiler = Profiler()
+
+
+def profiled(stage_name):
+    """Decorator: @profiled("indicators")."""
+    def decorator(fn):
+        return profiler.wrap(fn, stage_name)
+    return decorator
+
+
+def profiling_enabled(config=None):
+    return profiler.enabled or bool((config or {}).get("profile"))
+
+
+def instrument_module(module, prof=None):
+    """Bọc các global của file strategy theo stage. Gọi 1 lần sau khi nạp module."""
+    prof = prof or profiler
+    g = vars(module)
+    for name, value in list(g.items()):
+        if not callable(value) or getattr(value, "__profiled__", False) or isinstance(value, type):
+            continue
+        if name in DATA_NAMES:
+            g[name] = prof.wrap(value, "data")
+        elif name in ORDER_NAMES:
+            g[name] = prof.wrap(value, "order_send")
+        elif name in MANAGE_NAMES:
+            g[name] = prof.wrap(value, "manage")
+        elif name.startswith(INDICATOR_PREFIXES):
+            g[name] = prof.wrap(value, "indicators")
+        elif name == "send_telegram":
+            g[name] = prof.wrap(value, "telegram")
+    if "mt5" in g and not isinstance(g["mt5"], _StageProxy):
+        g["mt5"] = _StageProxy(g["mt5"], "mt5", prof)
+    if "db" in g and hasattr(g["db"], "db_path") and not isinstance(g["db"], _StageProxy):
+        g["db"] = _StageProxy(g["db"], "db", prof)
+    g["print"] = prof.wrap(print, "print")
+    return module
+
+
+def write_profile(db_path, strategy, stages):
+    try:
+        conn = sqlite3.connect(db_path, timeout=5)
+        try:
+            conn.execute(SCHEMA)
+            ts = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")   # cùng mốc cho cả lần flush
+            conn.executemany(
+                "INSERT INTO cycle_profile (timestamp, strategy_name, stage, samples, p50_ms, p95_ms, p99_ms, max_ms, "
+                "share_pct) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(ts, strategy, stage, r["samples"], r["p50_ms"], r["p95_ms"], r["p99_ms"], r["max_ms"], r["share_pct"])
+                 for stage, r in stages.items()])
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"⚠️ Profiler write error: {e}")
+
+
+STAGE_ORDER = ("cycle", "data", "indicators", "mt5", "manage", "order_send", "db", "telegram", "print", "other")
+
+
+def latest_profile(conn):
+    """
+    Lần flush gần nhất của mỗi strategy: [{strategy, updated, stages: [{stage, samples, p50_ms, ...}]}].
+    Bảng chưa có (chưa bật profile) → [].
+    """
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='cycle_profile'").fetchone()
+    if not exists:
+        return []
+    rows = conn.execute('''
+        SELECT p.strategy_name, p.timestamp, p.stage, p.samples, p.p50_ms, p.p95_ms, p.p99_ms, p.max_ms, p.share_pct
+        FROM cycle_profile p
+        JOIN (SELECT strategy_name, MAX(timestamp) AS ts FROM cycle_profile GROUP BY strategy_name) last
+          ON p.strategy_name = last.strategy_name AND p.timestamp = last.ts
+    ''').fetchall()
+    out = {}
+    for strategy, ts, stage, samples, p50, p95, p99, mx, share in rows:
+        entry = out.setdefault(strategy, {"strategy": strategy, "updated": ts, "stages": []})
+        entry["stages"].append({"stage": stage, "samples": samples, "p50_ms": p50, "p95_ms": p95,
+                                "p99_ms": p99, "max_ms": mx, "share_pct": share})
+    rank = {name: i for i, name in enumerate(STAGE_ORDER)}
+    for entry in out.values():
+        entry["stages"].sort(key=lambda r: rank.get(r["stage"], len(rank)))
+    return [out[k] for k in sorted(out)]
@@ -0,0 +1,315 @@
+"""
+Runner 1 process cho các strategy của 1 thư mục bot (thay cho main.py spawn 1 interpreter / strategy).
+
+- Mỗi file strategy_*.py được nạp như plugin (importlib, __name__ != "__main__" nên vòng lặp
+  trong `if __name__ == "__main__"` không chạy): lấy hàm `strategy_X_logic*(config, error_count)`
+  và đường dẫn configs/config_X.json ghi trong file.
+- 1 kết nối MT5 cho cả process; bar_cache / indicator_cache dùng chung giữa các strategy.
+- Mỗi strategy là 1 task asyncio với chu kỳ riêng (config "loop_interval", mặc định 1 giây),
+  lịch cố định theo thời điểm bắt đầu vòng (không cộng dồn thời gian chạy logic).
+- Lỗi của 1 strategy không ảnh hưởng strategy khác: exception → log + backoff riêng;
+  5 lệnh lỗi liên tiếp → cảnh báo Telegram + tạm dừng 2 phút như vòng lặp gốc.
+- Logic chạy ngay trên thread của event loop: MT5 API và các cache không thread-safe,
+  nên các strategy luân phiên nhau, không chạy song song.
+- Event mode (config "event_mode": "bar_close", xem bar_events.py): logic nặng chỉ chạy ở tick
+  đầu của nến mới; các vòng còn lại chỉ chạy việc mức tick — hàm `tick_logic(config)` nếu file
+  strategy định nghĩa, nếu không thì quản lý lệnh (manage_positions / manage_position của bot).
+- In bảng thời gian vòng (last / avg / p95 / max ms) mỗi `report_every` giây.
+- Config "profile": true (hoặc TRADECORE_PROFILE=1): đo thời gian từng stage của vòng
+  (tradecore.profiler), in kèm bảng thời gian và ghi vào bảng cycle_profile của trades.db.
+
+Chạy: python main.py (trong thư mục bot) hoặc
+      python -m tradecore.runner XAU_M1 strategy_1_trend_ha.py strategy_5_filter_first.py
+"""
+import os
+import re
+import sys
+import time
+import asyncio
+import argparse
+import traceback
+import contextlib
+import importlib.util
+from collections import deque
+
+import numpy as np
+
+from . import trades_db
+from .bar_events import gate_from_config
+from .profiler import profiler, profiling_enabled, instrument_module
+
+PAUSE_AFTER_ERRORS = 5
+PAUSE_SECONDS = 120
+MAX_BACKOFF = 60
+
+_LOGIC_RE = re.compile(r"^def (strategy_\w*_logic\w*)\(", re.MULTILINE)
+_CONFIG_RE = re.compile(r"[\"'](config_[\w.\-]+\.json)[\"']")
+
+
+class StrategyPlugin:
+    """1 strategy đã nạp: module, hàm logic, config, chu kỳ và số liệu thời gian vòng."""
+
+    def __init__(self, name, module, logic, config, interval):
+        self.name = name
+        self.module = module
+        self.logic = logic
+        self.config = config
+        self.interval = interval
+        self.error_count = 0
+        self.last_error_code = 0
+        self.cycles = 0
+        self.exceptions = 0
+        self.paused_until = 0.0
+        self.timings = deque(maxlen=600)
+        self.gate = gate_from_config(config)
+        self.tick_cycles = 0
+        self.tick_timings = deque(maxlen=600)
+        self.db_path = getattr(getattr(module, 'db', None), 'db_path', None)
+
+    def stats(self):
+        samples = np.fromiter(self.timings, dtype=float) if self.timings else np.zeros(1)
+        tick_samples = np.fromiter(self.tick_timings, dtype=float) if self.tick_timings else np.zeros(1)
+        return {
+            "cycles": self.cycles, "exceptions": self.exceptions,
+            "tick_cycles": self.tick_cycles, "tick_avg_ms": round(float(tick_samples.mean()), 2),
+            "last_ms": round(samples[-1], 2), "avg_ms": round(float(samples.mean()), 2),
+            "p95_ms": round(float(np.percentile(samples, 95)), 2), "max_ms": round(float(samples.max()), 2),
+            "paused": self.paused_until > time.monotonic(),
+        }
+
+
+def load_strategy(script_path, logic_name=None, config_path=None, interval=None, db_path=None):
+    """
+    Nạp file strategy như plugin. logic_name / config_path mặc định đọc từ mã nguồn
+    (hàm `def strategy_..._logic...` duy nhất và tên file config_*.json trong khối __main__).
+    db_path: Database() mở lúc import (`db = Database()` cấp module) dùng file này thay cho trades.db
+    của thư mục bot (trades_db.redirect) — cho backtest / check script.
+    """
+    from .data import load_config
+
+    script_path = os.path.abspath(script_path)
+    base_dir = os.path.dirname(script_path)
+    with open(script_path, 'r', encoding='utf-8') as f:
+        source = f.read()
+
+    if logic_name is None:
+        names = _LOGIC_RE.findall(source)
+        if len(names) != 1:
+            raise ValueError(f"{script_path}: cần đúng 1 hàm strategy_*_logic, tìm thấy {names}")
+        logic_name = names[0]
+    if config_path is None:
+        found = _CONFIG_RE.findall(source)
+        if not found:
+            raise ValueError(f"{script_path}: không tìm thấy config_*.json, truyền config_path")
+        config_path = os.path.join(base_dir, "configs", found[-1])
+
+    config = load_config(config_path)
+    if not config:
+        raise ValueError(f"{script_path}: không đọc được config {config_path}")
+
+    # Tên module duy nhất (file có dấu chấm như strategy_1_trend_ha_v2.1.py)
+    name = os.path.splitext(os.path.basename(script_path))[0]
+    module_name = "strategy_plugin_" + re.sub(r"\W", "_", name)
+    spec = importlib.util.spec_from_file_location(module_name, script_path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    with trades_db.redirect(db_path) if db_path else contextlib.nullcontext():
+        spec.loader.exec_module(module)
+
+    logic = getattr(module, logic_name)
+    if interval is None:
+        interval = float(config.get('loop_interval', 1.0))
+    return StrategyPlugin(name, module, logic, config, interval)
+
+
+def manage_open_positions(module, config):
+    """Breakeven / trailing cho lệnh của strategy bằng hàm quản lý lệnh mà module đã import từ utils."""
+    import MetaTrader5 as mt5
+
+    symbol, magic = config['symbol'], config['magic']
+    positions = [p for p in (mt5.positions_get(symbol=symbol) or []) if p.magic == magic]
+    if not positions:
+        return
+    batch = getattr(module, 'manage_positions', None)
+    if batch is not None:
+        batch(symbol, magic, config, positions)
+        return
+    for pos in positions:
+        module.manage_position(pos.ticket, symbol, magic, config)
+
+
+class StrategyRunner:
+    """Lập lịch các StrategyPlugin trên 1 event loop asyncio."""
+
+    def __init__(self, plugins, report_every=60.0):
+        self.plugins = plugins
+        self.report_every = report_every
+        self.started = time.monotonic()
+
+    def _run_tick_work(self, plugin):
+        """Giữa 2 lần đóng nến (event mode): chỉ việc mức tick."""
+        t0 = time.perf_counter()
+        try:
+            with profiler.cycle(f"{plugin.name} (tick)", plugin.db_path):
+                tick_logic = getattr(plugin.module, 'tick_logic', None)
+                if tick_logic is not None:
+                    tick_logic(plugin.config)
+                else:
+                    manage_open_positions(plugin.module, plugin.config)
+        except Exception as e:
+            print(f"⚠️ [{plugin.name}] Tick work error: {e}")
+        plugin.tick_timings.append((time.perf_counter() - t0) * 1e3)
+        plugin.tick_cycles += 1
+
+    def _run_cycle(self, plugin):
+        if plugin.gate is not None and not plugin.gate.due():
+            self._run_tick_work(plugin)
+            return 0.0
+        t0 = time.perf_counter()
+        try:
+            with profiler.cycle(plugin.name, plugin.db_path):
+                plugin.error_count, plugin.last_error_code = plugin.logic(plugin.config, plugin.error_count)
+            backoff = 0.0
+        except Exception as e:
+            plugin.exceptions += 1
+            backoff = min(MAX_BACKOFF, 2 ** min(plugin.exceptions, 6))
+            print(f"❌ [{plugin.name}] Exception: {e} (retry in {backoff:.0f}s)")
+            traceback.print_exc()
+            if plugin.gate is not None:
+                plugin.gate.retry()
+        plugin.timings.append((time.perf_counter() - t0) * 1e3)
+        plugin.cycles += 1
+        return backoff
+
+    def _check_error_pause(self, plugin):
+        if plugin.error_count < PAUSE_AFTER_ERRORS:
+            return False
+        from .data import send_telegram
+        from .orders import get_mt5_error_message
+
+        error_msg = get_mt5_error_message(plugin.last_error_code)
+        msg = (f"⚠️ [{plugin.name}] WARNING: {PAUSE_AFTER_ERRORS} Consecutive Order Failures. "
+               f"Last Error: {error_msg}. Pausing for 2 minutes...")
+        print(msg)
+        send_telegram(msg, plugin.config.get('telegram_token'), plugin.config.get('telegram_chat_id'))
+        plugin.error_count = 0
+        plugin.paused_until = time.monotonic() + PAUSE_SECONDS
+        return True
+
+    async def _strategy_task(self, plugin):
+        next_run = time.monotonic()
+        while True:
+            backoff = self._run_cycle(plugin)
+            if self._check_error_pause(plugin):
+                await asyncio.sleep(PAUSE_SECONDS)
+                print(f"▶️ [{plugin.name}] Resuming...")
+                next_run = time.monotonic()
+                continue
+            if backoff:
+                await asyncio.sleep(backoff)
+                next_run = time.monotonic()
+                continue
+            next_run += plugin.interval
+            delay = next_run - time.monotonic()
+            if delay < 0:
+                # Vòng chạy lâu hơn chu kỳ: bỏ các lượt lỡ, không chạy dồn
+                next_run = time.monotonic()
+                delay = 0
+            await asyncio.sleep(delay)
+
+    def report(self):
+        print(f"\n⏱️ Cycle timings (uptime {time.monotonic() - self.started:.0f}s)")
+        print(f"   {'strategy':<32}{'cycles':>8}{'last':>9}{'avg':>9}{'p95':>9}{'max':>9}{'exc':>6}"
+              f"{'ticks':>8}{'tick avg':>10}")
+        for plugin in self.plugins:
+            s = plugin.stats()
+            flag = " ⏸" if s['paused'] else ""
+            print(f"   {plugin.name:<32}{s['cycles']:>8}{s['last_ms']:>9.1f}{s['avg_ms']:>9.1f}"
+                  f"{s['p95_ms']:>9.1f}{s['max_ms']:>9.1f}{s['exceptions']:>6}"
+                  f"{s['tick_cycles']:>8}{s['tick_avg_ms']:>10.2f}{flag}")
+        if profiler.enabled:
+            print("   stage p50/p95/p99 ms (share of cycle):")
+            for strategy, stages in profiler.snapshot().items():
+                parts = [f"{name} {r['p50_ms']:.1f}/{r['p95_ms']:.1f}/{r['p99_ms']:.1f} ({r['share_pct'] or 0:.0f}%)"
+                         for name, r in stages.items() if name != "cycle"]
+                print(f"   {strategy:<32}" + " | ".join(parts))
+
+    async def _report_task(self):
+        while True:
+            await asyncio.sleep(self.report_every)
+            self.report()
+
+    async def run(self):
+        tasks = [asyncio.create_task(self._strategy_task(p), name=p.name) for p in self.plugins]
+        if self.report_every:
+            tasks.append(asyncio.create_task(self._report_task(), name="report"))
+        await asyncio.gather(*tasks)
+
+
+def run_folder(base_dir, scripts, report_every=60.0):
+    """
+    Nạp các strategy của 1 thư mục bot, kết nối MT5 1 lần (config của strategy đầu tiên)
+    rồi chạy tới khi Ctrl+C.
+    """
+    import MetaTrader5 as mt5
+    from .data import connect_mt5
+    from .governor import configure as configure_governor
+
+    base_dir = os.path.abspath(base_dir)
+    if base_dir not in sys.path:
+        sys.path.insert(0, base_dir)   # utils / db của thư mục bot
+
+    t0 = time.perf_counter()
+    plugins = []
+    for script in scripts:
+        path = script if os.path.isabs(script) else os.path.join(base_dir, script)
+        try:
+            plugin = load_strategy(path)
+        except Exception as e:
+            print(f"❌ Cannot load {path}: {e}")
+            continue
+        mode = f", event mode (bar close {plugin.config.get('event_timeframe', 'M1')})" if plugin.gate else ""
+        if profiling_enabled(plugin.config):
+            profiler.enable()
+            instrument_module(plugin.module)
+            mode += ", profiled"
+        print(f"   ▶️ Loaded {plugin.name}: {plugin.logic.__name__} every {plugin.interval:g}s{mode}")
+        plugins.append(plugin)
+    if not plugins:
+        print("❌ No strategy loaded")
+        return
+
+    config = plugins[0].config
+    for plugin in plugins[1:]:
+        if (plugin.config.get('account'), plugin.config.get('server')) != (config.get('account'), config.get('server')):
+            print(f"⚠️ {plugin.name}: account/server khác strategy đầu — dùng chung kết nối của {plugins[0].name}")
+    if not connect_mt5(config):
+        return
+    if config.get('governor_address'):
+        configure_governor(config['governor_address'])
+        print(f"🚦 Governor: {config['governor_address']}")
+    print(f"✅ {len(plugins)} strategies loaded in {time.perf_counter() - t0:.1f}s (1 process, 1 MT5 connection)")
+
+    runner = StrategyRunner(plugins, report_every=report_every)
+    try:
+        asyncio.run(runner.run())
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping all strategies...")
+        runner.report()
+    finally:
+        if profiler.enabled:
+            profiler.flush()
+        mt5.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base_dir", help="Thư mục bot (chứa utils.py, db.py, configs/)")
+    parser.add_argument("scripts", nargs="+", help="Các file strategy_*.py (tương đối với base_dir)")
+    parser.add_argument("--report-every", type=float, default=60.0, help="Giây giữa 2 lần in bảng thời gian (0 = tắt)")
+    args = parser.parse_args()
+    run_folder(args.base_dir, args.scripts, report_every=args.report_every)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,457 @@
+"""
+Ma trận tín hiệu (vectorized): điều kiện vào lệnh của Strategy 1 (Trend HA) và Strategy 4 (UT Bot)
+tính 1 lượt trên toàn bộ lịch sử M1 bằng mảng boolean, thay cho gọi *_logic từng nến — dùng để lọc
+tham số trên nhiều năm dữ liệu rồi mới chạy backtest event-driven (tradecore.backtest) cho bộ tốt.
+
+    python -m tradecore.signal_matrix XAU_M1/strategy_1_trend_ha.py --bars XAUUSD=data/xauusd_m1_2024.npy
+    python -m tradecore.signal_matrix XAU_M1/strategy_4_ut_bot.py --synthetic 372000 --out s4.csv \\
+        --set rsi_buy_threshold=60 --set volume_threshold=1.5
+
+    from tradecore import signal_matrix
+    cache = {}                                            # phần không phụ thuộc tham số tính 1 lần
+    for thr in (50, 55, 60):
+        m = signal_matrix.strategy_1_signal_matrix(rates, {"rsi_buy_threshold": thr}, cache=cache)
+        print(thr, (m["signal"] == 1).sum())
+
+Mỗi dòng của kết quả = trạng thái mà *_logic thấy ở điểm giá cuối của nến M1 đó (nến vừa đủ, trước khi
+nến kế tiếp mở), với cùng số nến get_data như file strategy:
+- nến M5 / H1 đang chạy (forming) là nến gộp từ các M1 của bucket tới nến hiện tại, nến đã đóng trước đó
+  lấy từ lịch sử → SMA / ADX / EMA của khung lớn tính trên đúng cửa sổ (199 nến đóng + forming)
+- indicator đệ quy tính theo cửa sổ như strategy thấy, không theo toàn bộ lịch sử: RSI (ewm Wilder trên 200 nến M1),
+  EMA50 H1 trên 50 nến (Strategy 4), UT Bot trailing stop chạy lại từ đầu cửa sổ 200 nến
+- giả định không có lệnh mở của magic đó (max_positions / spam filter / loss guard / cooldown theo deal là
+  phần quản lý lệnh — để backtest event-driven xử lý); cột ready = False khi chưa đủ nến cho cửa sổ đầy
+
+Khác *_logic chỉ ở mức làm tròn float (tổng trượt tính khác thứ tự với pandas rolling) → chỉ lệch khi
+giá trị nằm đúng trên ngưỡng; XAU_M1/benchmarks/check_signal_matrix.py so với logic thật qua fake_mt5.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from . import fake_mt5
+from .indicators_np import calculate_adx_np, calculate_heiken_ashi_np, sma_np, ut_bot_trailing_stop_np
+
+M1_BARS = 200   # get_data(M1, 200) của cả 2 strategy
+
+STRATEGY_1_DEFAULTS = {
+    "h1_ema_period": 100,
+    "h1_trend_confirmation_required": True,
+    "adx_period": 14,
+    "adx_min_threshold": 20,
+    "rsi_buy_threshold": 55,
+    "rsi_sell_threshold": 45,
+}
+
+STRATEGY_4_DEFAULTS = {
+    "sensitivity": 2,
+    "period": 10,
+    "adx_threshold": 20,
+    "h1_adx_threshold": 20,
+    "rsi_buy_threshold": 55,
+    "rsi_sell_threshold": 45,
+    "volume_threshold": 1.3,
+}
+
+
+def _memo(cache, key, fn):
+    if cache is None:
+        return fn()
+    if key not in cache:
+        cache[key] = fn()
+    return cache[key]
+
+
+# ----- khung lớn: nến đã đóng + nến forming tại từng M1 -----
+
+def forming_bars(m1, timeframe):
+    """
+    Gộp M1 thành khung `timeframe` như terminal: trả về (bars, k, forming) với bars = nến đã gộp đủ,
+    k[i] = chỉ số nến khung lớn chứa M1 thứ i (bars[:k[i]] là các nến đã đóng lúc đó),
+    forming = dict open/high/low/close/tick_volume của nến đang chạy tính tới hết M1 thứ i.
+    """
+    times = m1["time"].astype(np.int64)
+    bucket = fake_mt5._bucket(times, timeframe)
+    first = np.r_[True, bucket[1:] != bucket[:-1]]
+    starts = np.flatnonzero(first)
+    k = np.cumsum(first) - 1
+    ends = np.r_[starts[1:], len(m1)]
+    high = m1["high"].astype(np.float64)
+    low = m1["low"].astype(np.float64)
+    volume = m1["tick_volume"].astype(np.float64)
+    bars = {
+        "open": m1["open"][starts].astype(np.float64),
+        "high": np.maximum.reduceat(high, starts),
+        "low": np.minimum.reduceat(low, starts),
+        "close": m1["close"][ends - 1].astype(np.float64),
+        "tick_volume": np.add.reduceat(volume, starts),
+    }
+    # max / min / tổng cộng dồn trong từng bucket: cộng dồn toàn mảng rồi "reset" ở đầu bucket
+    forming = {
+        "open": bars["open"][k],
+        "high": pd.Series(high).groupby(k).cummax().to_numpy(),
+        "low": pd.Series(low).groupby(k).cummin().to_numpy(),
+        "close": m1["close"].astype(np.float64),
+        "tick_volume": pd.Series(volume).groupby(k).cumsum().to_numpy(),
+    }
+    return bars, k, forming
+
+
+def _tail_sum(values, k, count):
+    """Tổng values[k-count:k] (count nến đã đóng ngay trước nến forming) cho từng M1; NaN khi thiếu nến."""
+    out = np.full(len(k), np.nan)
+    if count == 0:
+        out[:] = 0.0
+        return out
+    if count > len(values):
+        return out
+    sums = sliding_window_view(values, count).sum(axis=1)   # sums[j] = values[j:j+count]
+    ok = k >= count
+    out[ok] = sums[k[ok] - count]
+    return out
+
+
+def _forming_sma(closed, value, k, period):
+    """rolling(period).mean() ở dòng cuối cửa sổ: period-1 nến đóng + giá trị của nến forming."""
+    return (_tail_sum(closed, k, period - 1) + value) / period
+
+
+def _forming_adx(bars, k, forming, period=14):
+    """calculate_adx(df)['adx'] ở dòng cuối (nến forming) của cửa sổ nến khung lớn, cho từng M1."""
+    high, low, close = bars["high"], bars["low"], bars["close"]
+    up = high - np.r_[np.nan, high[:-1]]
+    down = np.r_[np.nan, low[:-1]] - low
+    with np.errstate(invalid='ignore'):
+        dm_plus = np.where((up > down) & (up > 0), up, 0.0)
+        dm_minus = np.where((down > up) & (down > 0), down, 0.0)
+    prev_close = np.r_[np.nan, close[:-1]]
+    tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    _, di_plus, di_minus = calculate_adx_np(high, low, close, period)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dx = 100 * np.abs(di_plus - di_minus) / (di_plus + di_minus)
+
+    prev = np.maximum(k - 1, 0)
+    f_up = forming["high"] - high[prev]
+    f_down = low[prev] - forming["low"]
+    f_dm_plus = np.where((f_up > f_down) & (f_up > 0), f_up, 0.0)
+    f_dm_minus = np.where((f_down > f_up) & (f_down > 0), f_down, 0.0)
+    f_tr = np.maximum(forming["high"] - forming["low"],
+                      np.maximum(np.abs(forming["high"] - close[prev]), np.abs(forming["low"] - close[prev])))
+    tr_s = _tail_sum(tr, k, period - 1) + f_tr
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f_di_plus = 100 * ((_tail_sum(dm_plus, k, period - 1) + f_dm_plus) / tr_s)
+        f_di_minus = 100 * ((_tail_sum(dm_minus, k, period - 1) + f_dm_minus) / tr_s)
+        f_dx = 100 * np.abs(f_di_plus - f_di_minus) / (f_di_plus + f_di_minus)
+    adx = (_tail_sum(dx, k, period - 1) + f_dx) / period
+    adx[k < 2 * period - 1] = np.nan     # cửa sổ chưa đủ 2*period-1 nến → NaN như rolling
+    return adx
+
+
+def _window_ewm(values, alpha, window, first=None):
+    """
+    ewm(alpha, adjust=False).mean() ở dòng cuối của cửa sổ `window` phần tử kết thúc tại từng vị trí.
+    ewm tuyến tính: y_cửa_sổ(t) = Y(t) - (1-alpha)^(window-1) * (Y(s) - x'(s)) với Y = ewm toàn chuỗi,
+    s = đầu cửa sổ, x'(s) = giá trị đầu cửa sổ mà strategy thấy (first; mặc định values[s]).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    full = pd.Series(values).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    out = np.full(len(values), np.nan)
+    if len(values) < window:
+        return out
+    start = full[:len(values) - window + 1]
+    head = values[:len(values) - window + 1] if first is None else first
+    out[window - 1:] = full[window - 1:] - (1 - alpha) ** (window - 1) * (start - head)
+    return out
+
+
+def window_rsi(close, period=14, window=M1_BARS):
+    """calculate_rsi(df['close'].tail(window)) ở dòng cuối, cho từng nến (delta đầu cửa sổ = 0)."""
+    close = np.asarray(close, dtype=np.float64)
+    delta = np.r_[0.0, np.diff(close)]
+    gain = np.where(delta > 0, delta, 0.0)
+    loss = np.where(delta < 0, -delta, 0.0)
+    avg_gain = _window_ewm(gain, 1 / period, window, first=0.0)
+    avg_loss = _window_ewm(loss, 1 / period, window, first=0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+
+def _ut_bot_step(close, n_loss, prev_close, prev_stop, prev_pos):
+    """indicators_np.ut_bot_next trên mảng (max/min của Python: NaN ở đối số 2 → giữ đối số 1)."""
+    up = (close > prev_stop) & (prev_close > prev_stop)
+    down = (close < prev_stop) & (prev_close < prev_stop) & ~up
+    with np.errstate(invalid='ignore'):
+        long_stop = close - n_loss
+        short_stop = close + n_loss
+        stop = np.where(close > prev_stop, long_stop, short_stop)
+        stop = np.where(up, np.where(long_stop > prev_stop, long_stop, prev_stop), stop)
+        stop = np.where(down, np.where(short_stop < prev_stop, short_stop, prev_stop), stop)
+    buy = (close > prev_stop) & (prev_close < prev_stop)
+    sell = (close < prev_stop) & (prev_close > prev_stop) & ~buy
+    keep = np.where(prev_pos != 0, prev_pos, np.where(close > stop, 1, -1))
+    return stop, np.where(buy, 1, np.where(sell, -1, keep))
+
+
+def window_ut_bot(high, low, close, sensitivity=2, period=10, window=M1_BARS):
+    """
+    pos của calculate_ut_bot(df.tail(window)) ở 2 dòng cuối (prev, last) cho từng nến.
+    Trailing stop đệ quy từ đầu cửa sổ → mỗi cửa sổ chạy lại; các cửa sổ chạy song song theo bước, cửa sổ nào
+    đã trùng trạng thái (stop, pos) với bản chạy toàn lịch sử thì từ đó đi giống hệt → lấy luôn kết quả
+    toàn lịch sử và bỏ khỏi vòng lặp (thường chỉ vài chục bước).
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    prev_pos = np.zeros(n, dtype=np.int64)
+    last_pos = np.zeros(n, dtype=np.int64)
+    if n < window:
+        return prev_pos, last_pos
+    prev_close = np.r_[np.nan, close[:-1]]
+    tr = np.fmax(high, prev_close) - np.fmin(low, prev_close)
+    n_loss = sensitivity * sma_np(tr, period)
+    full_stop, full_pos = ut_bot_trailing_stop_np(close, n_loss)
+
+    ends = np.arange(window - 1, n)
+    starts = ends - (window - 1)
+    # nến đầu cửa sổ không có close trước → TR = high - low; ATR nến thứ period của cửa sổ khác bản toàn lịch sử
+    first_tr = high[starts] - low[starts]
+    first_atr = first_tr
+    if period > 1:
+        first_atr = first_tr + sliding_window_view(tr, period - 1)[starts + 1].sum(axis=1)
+    first_n_loss = sensitivity * first_atr / period
+
+    stop = np.zeros(len(ends))
+    pos = np.zeros(len(ends), dtype=np.int64)
+    active = np.arange(len(ends))
+    done_prev = np.zeros(len(ends), dtype=np.int64)
+    done_last = np.zeros(len(ends), dtype=np.int64)
+    for step in range(1, window):
+        row = starts[active] + step
+        if step < period - 1:
+            step_loss = np.full(len(active), np.nan)
+        elif step == period - 1:
+            step_loss = first_n_loss[active]
+        else:
+            step_loss = n_loss[row]
+        new_stop, new_pos = _ut_bot_step(close[row], step_loss, close[row - 1], stop[active], pos[active])
+        if step == window - 2:
+            done_prev[active] = new_pos
+        stop[active], pos[active] = new_stop, new_pos
+        if step >= period:
+            same = (new_stop == full_stop[row]) & (new_pos == full_pos[row])
+            if same.any():
+                synced = active[same]
+                tail = ends[synced]
+                done_prev[synced] = np.where(row[same] <= tail - 1, full_pos[tail - 1], done_prev[synced])
+                done_last[synced] = full_pos[tail]
+                active = active[~same]
+                if not len(active):
+                    break
+    done_last[active] = pos[active]
+    prev_pos[ends] = done_prev
+    last_pos[ends] = done_last
+    return prev_pos, last_pos
+
+
+# ----- Strategy 1: Trend HA -----
+
+def _strategy_1_base(m1):
+    bars_m5, k_m5, f_m5 = forming_bars(m1, fake_mt5.TIMEFRAME_M5)
+    bars_h1, k_h1, f_h1 = forming_bars(m1, fake_mt5.TIMEFRAME_H1)
+    o, h = m1["open"].astype(np.float64), m1["high"].astype(np.float64)
+    l, c = m1["low"].astype(np.float64), m1["close"].astype(np.float64)
+    ha_open, ha_close, _, _ = calculate_heiken_ashi_np(o, h, l, c)
+    body, rng = np.abs(c - o), h - l
+    return {
+        "m5": (bars_m5, k_m5, f_m5), "h1": (bars_h1, k_h1, f_h1),
+        "m5_sma200": _forming_sma(bars_m5["close"], f_m5["close"], k_m5, 200),
+        "ha_open": ha_open, "ha_close": ha_close,
+        "sma55_high": sma_np(h, 55), "sma55_low": sma_np(l, 55),
+        "solid": (rng > 0) & ~(body <= rng * 0.2),        # not is_doji(last_ha, threshold=0.2)
+        "rsi": window_rsi(c, 14),
+        "ready": (np.arange(len(m1)) >= M1_BARS - 1) & (k_m5 >= M1_BARS - 1) & (k_h1 >= M1_BARS - 1),
+    }
+
+
+def strategy_1_signal_matrix(m1, params=None, cache=None):
+    """
+    Điều kiện vào lệnh của strategy_1_logic (XAU_M1/strategy_1_trend_ha.py) cho mọi nến M1.
+    m1: structured array copy_rates (time, open, high, low, close, tick_volume); params: config['parameters'].
+    Trả về DataFrame (index = giờ mở nến M1) gồm giá trị indicator, từng điều kiện và signal (1 BUY / -1 SELL / 0).
+    """
+    p = dict(STRATEGY_1_DEFAULTS, **(params or {}))
+    base = _memo(cache, "s1", lambda: _strategy_1_base(m1))
+    bars_m5, k_m5, f_m5 = base["m5"]
+    bars_h1, k_h1, f_h1 = base["h1"]
+    close = f_m5["close"]
+    h1_period = int(p["h1_ema_period"])
+    h1_sma = _memo(cache, ("s1_h1_sma", h1_period),
+                   lambda: _forming_sma(bars_h1["close"], f_h1["close"], k_h1, h1_period)
+                   if h1_period <= M1_BARS else np.full(len(m1), np.nan))
+    adx_period = int(p["adx_period"])
+    adx = _memo(cache, ("s1_m5_adx", adx_period), lambda: _forming_adx(bars_m5, k_m5, f_m5, adx_period))
+
+    bullish = close > base["m5_sma200"]                  # NaN → BEARISH như strategy
+    h1_bullish = close > h1_sma
+    trend_ok = (h1_bullish == bullish) if p["h1_trend_confirmation_required"] else np.ones(len(m1), dtype=bool)
+    adx_ok = adx >= p["adx_min_threshold"]
+
+    ha_open, ha_close, rsi = base["ha_open"], base["ha_close"], base["rsi"]
+    high_band, low_band = base["sma55_high"], base["sma55_low"]
+    prev_ha_close = np.r_[np.nan, ha_close[:-1]]
+    green, red = ha_close > ha_open, ha_close < ha_open
+    above, below = ha_close > high_band, ha_close < low_band
+    fresh_up = prev_ha_close <= np.r_[np.nan, high_band[:-1]]
+    fresh_down = prev_ha_close >= np.r_[np.nan, low_band[:-1]]
+
+    gate = base["ready"] & trend_ok & adx_ok
+    buy = gate & bullish & green & above & fresh_up & base["solid"] & (rsi > p["rsi_buy_threshold"])
+    sell = gate & ~bullish & red & below & fresh_down & base["solid"] & (rsi < p["rsi_sell_threshold"])
+    return pd.DataFrame({
+        "close": close, "m5_sma200": base["m5_sma200"], "h1_sma": h1_sma, "m5_adx": adx, "rsi": rsi,
+        "ha_open": ha_open, "ha_close": ha_close, "sma55_high": high_band, "sma55_low": low_band,
+        "ready": base["ready"], "m5_bullish": bullish, "h1_bullish": h1_bullish, "trend_ok": trend_ok,
+        "adx_ok": adx_ok, "breakout_up": green & above & fresh_up, "breakout_down": red & below & fresh_down,
+        "solid": base["solid"], "buy": buy, "sell": sell,
+        "signal": np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8),
+    }, index=pd.to_datetime(m1["time"], unit="s"))
+
+
+# ----- Strategy 4: UT Bot -----
+
+def _strategy_4_base(m1):
+    bars_h1, k_h1, f_h1 = forming_bars(m1, fake_mt5.TIMEFRAME_H1)
+    h, l = m1["high"].astype(np.float64), m1["low"].astype(np.float64)
+    c = m1["close"].astype(np.float64)
+    volume = m1["tick_volume"].astype(np.float64)
+    # ewm(span=50) trên 50 nến H1 = 49 nến đóng + forming: cửa sổ 49 nến đóng rồi thêm 1 bước với giá forming
+    alpha = 2 / (50 + 1)
+    closed_ema = _window_ewm(bars_h1["close"], alpha, 49)
+    prev = np.maximum(k_h1 - 1, 0)
+    h1_ema = np.where(k_h1 >= 49, (1 - alpha) * closed_ema[prev] + alpha * f_h1["close"], np.nan)
+    adx_m1, _, _ = calculate_adx_np(h, l, c, 14)
+    return {
+        "h1_ema50": h1_ema, "h1_bullish": f_h1["close"] > h1_ema,
+        "h1_adx": _forming_adx(bars_h1, k_h1, f_h1, 14),
+        "rsi": window_rsi(c, 14), "adx": adx_m1, "volume": volume, "vol_ma": sma_np(volume, 20),
+        "ready": (np.arange(len(m1)) >= M1_BARS - 1) & (k_h1 >= 49),
+    }
+
+
+def strategy_4_signal_matrix(m1, params=None, cache=None):
+    """
+    Điều kiện vào lệnh của strategy_4_logic (XAU_M1/strategy_4_ut_bot.py) cho mọi nến M1.
+    UT Bot đổi chiều (pos -1 → 1 / 1 → -1) + ADX M1 + xu hướng / ADX H1 + RSI + volume > vol_ma * ngưỡng.
+    """
+    p = dict(STRATEGY_4_DEFAULTS, **(params or {}))
+    base = _memo(cache, "s4", lambda: _strategy_4_base(m1))
+    sensitivity, period = p["sensitivity"], int(p["period"])
+    prev_pos, last_pos = _memo(cache, ("s4_ut", sensitivity, period), lambda: window_ut_bot(
+        m1["high"], m1["low"], m1["close"], sensitivity, period))
+
+    flip_up = (prev_pos == -1) & (last_pos == 1)
+    flip_down = (prev_pos == 1) & (last_pos == -1)
+    adx_ok = base["adx"] >= p["adx_threshold"]
+    h1_adx_ok = base["h1_adx"] >= p["h1_adx_threshold"]
+    rsi = base["rsi"]
+    high_volume = base["volume"] > base["vol_ma"] * p["volume_threshold"]
+
+    gate = base["ready"] & adx_ok & h1_adx_ok & high_volume
+    buy = gate & flip_up & base["h1_bullish"] & (rsi > p["rsi_buy_threshold"])
+    sell = gate & flip_down & ~base["h1_bullish"] & (rsi < p["rsi_sell_threshold"])
+    return pd.DataFrame({
+        "close": m1["close"].astype(np.float64), "ut_pos_prev": prev_pos, "ut_pos": last_pos,
+        "m1_adx": base["adx"], "rsi": rsi, "vol_ma": base["vol_ma"], "h1_ema50": base["h1_ema50"],
+        "h1_adx": base["h1_adx"], "ready": base["ready"], "ut_flip_up": flip_up, "ut_flip_down": flip_down,
+        "adx_ok": adx_ok, "h1_bullish": base["h1_bullish"], "h1_adx_ok": h1_adx_ok, "high_volume": high_volume,
+        "buy": buy, "sell": sell,
+        "signal": np.where(buy, 1, np.where(sell, -1, 0)).astype(np.int8),
+    }, index=pd.to_datetime(m1["time"], unit="s"))
+
+
+MATRICES = {
+    "strategy_1_logic": strategy_1_signal_matrix,
+    "strategy_4_logic": strategy_4_signal_matrix,
+}
+
+
+def matrix_for(script):
+    """Hàm ma trận tín hiệu cho file strategy (theo tên hàm strategy_N_logic trong file); None nếu chưa hỗ trợ."""
+    with open(script, 'r', encoding='utf-8') as f:
+        source = f.read()
+    for name, fn in MATRICES.items():
+        if f"def {name}(" in source:
+            return fn
+    return None
+
+
+def _parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def main():
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from .backtest import load_bars, _bar_sources
+    from .runner import _CONFIG_RE
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("script", help="strategy_1_trend_ha.py / strategy_4_ut_bot.py (của bất kỳ thư mục bot nào)")
+    parser.add_argument("--config", help="file config (mặc định: configs/config_*.json ghi trong file)")
+    parser.add_argument("--bars", action="append", metavar="SYMBOL=PATH", help="nến M1 (.npy / .csv MT5 export)")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="N nến M1 ngẫu nhiên")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE", help="ghi đè config['parameters']")
+    parser.add_argument("--out", help="ghi ma trận (.csv / .parquet) — chỉ các nến có tín hiệu, --all để ghi mọi nến")
+    parser.add_argument("--all", action="store_true")
+    args = parser.parse_args()
+
+    matrix = matrix_for(args.script)
+    if matrix is None:
+        parser.error("chỉ hỗ trợ strategy_1_logic / strategy_4_logic")
+    config_path = args.config
+    if config_path is None:
+        with open(args.script, 'r', encoding='utf-8') as f:
+            found = _CONFIG_RE.findall(f.read())
+        if not found:
+            parser.error("không tìm thấy config_*.json, truyền --config")
+        config_path = os.path.join(os.path.dirname(os.path.abspath(args.script)), "configs", found[-1])
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    params = dict(config.get('parameters', {}))
+    for item in args.set:
+        key, _, value = item.partition("=")
+        params[key] = _parse_value(value)
+
+    sources = _bar_sources(args.bars)
+    if args.synthetic:
+        sources.insert(0, (config['symbol'], ("synthetic", args.synthetic)))
+    if len(sources) != 1:
+        parser.error("cần đúng 1 nguồn nến: --bars SYMBOL=PATH hoặc --synthetic N")
+    rates = load_bars(sources[0])
+
+    t0 = time.perf_counter()
+    result = matrix(rates, params)
+    wall = time.perf_counter() - t0
+    ready = int(result["ready"].sum())
+    print(f"⏱️ {len(rates):,} nến M1 trong {wall:.2f}s ({len(rates) / wall:,.0f} nến/s)")
+    print(f"📊 {ready:,} nến đủ cửa sổ | BUY {int(result['buy'].sum())} | SELL {int(result['sell'].sum())}")
+    if args.out:
+        out = result if args.all else result[result["signal"] != 0]
+        if args.out.endswith(".parquet"):
+            out.to_parquet(args.out)
+        else:
+            out.to_csv(args.out)
+        print(f"💾 {args.out} ({len(out)} dòng)")
+
+
+if __name__ == "__main__":
+    main()
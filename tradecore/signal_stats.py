@@ -0,0 +1,107 @@
+"""
+Thống kê thắng / thua theo chỉ báo lúc vào lệnh (RSI / ADX) cho dashboard, tính bằng SQL.
+
+Mỗi order ghép với signal gần nhất (cùng strategy / symbol / chiều, lệch ≤ 30 phút, có RSI hoặc ADX
+trong 0-100); chỉ báo đọc từ bảng signal_indicators (trades_db v4) — DB chưa nâng schema thì
+json_extract trên signals.indicators. Gom bucket 0-10 ... 90-100 bằng GROUP BY, không json.loads
+từng signal trong Python. Chỉ dùng sqlite3 nên DashBoardMain import được.
+"""
+import json
+
+MATCH_SECONDS = 30 * 60
+BUCKET_LABELS = [f"{low}-{low + 10}" for low in range(0, 100, 10)]
+# cột chỉ báo có kiểu trong CSV export của dashboard (tên chỉ báo, tiêu đề cột)
+EXPORT_INDICATORS = (("rsi", "RSI"), ("adx", "ADX"), ("atr", "ATR"), ("trend", "Trend"), ("sl_mode", "SL Mode"))
+
+
+def _has_indicator_table(conn):
+    return conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type='table' AND name='signal_indicators'").fetchone() is not None
+
+
+def _value_sql(conn, name, signal_id="s.id", indicators="s.indicators"):
+    """Biểu thức SQL: chỉ báo số `name` của 1 signal, NULL nếu không có / ngoài 0-100."""
+    if _has_indicator_table(conn):
+        raw = f"(SELECT num FROM signal_indicators WHERE signal_id = {signal_id} AND name = '{name}')"
+    else:
+        raw = f"(CASE WHEN json_valid({indicators}) THEN json_extract({indicators}, '$.{name}') END)"
+    return f"(CASE WHEN {raw} BETWEEN 0 AND 100 THEN {raw} END)"
+
+
+def indicator_columns_sql(conn, names, table="signals"):
+    """Danh sách cột SELECT (', expr AS name ...') đọc chỉ báo của dòng `table` — số hoặc chuỗi như khi log."""
+    if _has_indicator_table(conn):
+        return "".join(f", (SELECT COALESCE(num, txt) FROM signal_indicators WHERE signal_id = {table}.id AND name = '{name}') AS {name}"
+                       for name in names)
+    return "".join(f", (CASE WHEN json_valid({table}.indicators) THEN json_extract({table}.indicators, '$.{name}') END) AS {name}"
+                   for name in names)
+
+
+def _matched_sql(conn):
+    """CTE matched(ticket, profit, rsi, adx): signal gần nhất cho mỗi order (tham số: strategy, json ticket)."""
+    rsi, adx = _value_sql(conn, "rsi"), _value_sql(conn, "adx")
+    diff = "ABS(strftime('%s', s.timestamp) - strftime('%s', o.open_time))"
+    return f'''
+        WITH selected AS (
+            SELECT * FROM orders WHERE ticket IN (SELECT value FROM json_each(:tickets))
+        ),
+        candidates AS (
+            SELECT o.ticket, s.id AS signal_id, {rsi} AS rsi, {adx} AS adx,
+                   ROW_NUMBER() OVER (PARTITION BY o.ticket ORDER BY {diff}, s.id) AS rank
+            FROM selected o
+            JOIN signals s ON s.strategy_name = :strategy AND s.symbol = o.symbol AND s.signal_type = o.order_type
+                AND s.timestamp >= datetime(o.open_time, '-{MATCH_SECONDS} seconds')
+                AND s.timestamp < datetime(o.open_time, '+{MATCH_SECONDS + 1} seconds')
+            WHERE {diff} <= {MATCH_SECONDS} AND ({rsi} IS NOT NULL OR {adx} IS NOT NULL)
+        ),
+        matched AS (
+            SELECT o.ticket, o.profit, c.rsi, c.adx
+            FROM selected o LEFT JOIN candidates c ON c.ticket = o.ticket AND c.rank = 1
+        )
+    '''
+
+
+def _params(strategy_name, orders):
+    return {"strategy": strategy_name, "tickets": json.dumps([o["ticket"] for o in orders])}
+
+
+def orders_with_indicators(conn, strategy_name, orders):
+    """
+    [{order, rsi, adx}] theo thứ tự `orders` (order đã lọc của 1 strategy), rsi / adx = None nếu
+    không có signal khớp. Lỗi SQL (DB khác tab thiếu bảng...) → mọi rsi / adx None.
+    """
+    if not orders:
+        return []
+    try:
+        rows = conn.execute(_matched_sql(conn) + "SELECT ticket, rsi, adx FROM matched",
+                            _params(strategy_name, orders)).fetchall()
+    except Exception as e:
+        print(f"orders_with_indicators: {e}")
+        rows = []
+    values = {r[0]: (r[1], r[2]) for r in rows}
+    return [{"order": dict(o), "rsi": values.get(o["ticket"], (None, None))[0],
+             "adx": values.get(o["ticket"], (None, None))[1]} for o in orders]
+
+
+def indicator_bucket_stats(conn, strategy_name, orders):
+    """
+    {"rsi": [...], "adx": [...]}: mỗi list 10 bucket {label, wins, losses} (order đã đóng, profit > 0 / < 0),
+    đếm bằng GROUP BY trên kết quả ghép order → signal.
+    """
+    stats = {name: [{"label": label, "wins": 0, "losses": 0} for label in BUCKET_LABELS] for name in ("rsi", "adx")}
+    if not orders:
+        return stats
+    bucket = "MIN(CAST({col} / 10 AS INTEGER), 9)"
+    sql = _matched_sql(conn) + " UNION ALL ".join(
+        f"SELECT '{name}', {bucket.format(col=name)} AS bucket, SUM(profit > 0), SUM(profit < 0) "
+        f"FROM matched WHERE {name} IS NOT NULL AND profit IS NOT NULL GROUP BY bucket"
+        for name in ("rsi", "adx"))
+    try:
+        rows = conn.execute(sql, _params(strategy_name, orders)).fetchall()
+    except Exception as e:
+        print(f"indicator_bucket_stats: {e}")
+        return stats
+    for name, index, wins, losses in rows:
+        stats[name][index]["wins"] = wins
+        stats[name][index]["losses"] = losses
+    return stats
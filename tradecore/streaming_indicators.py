@@ -0,0 +1,445 @@
+"""
+Indicator dạng stream: seed từ lịch sử rồi cập nhật O(1) mỗi nến, thay vì tính lại
+rolling/ewm trên 200 nến mỗi giây.
+
+- push(...)        : thêm 1 nến mới (nến trước đó coi như đã đóng)
+- update_last(...) : sửa nến cuối (nến đang chạy đổi giá) — không làm lệch trạng thái
+- value            : giá trị tại nến cuối (NaN khi chưa đủ warm-up, như bản pandas)
+- snapshot()/restore(): dict JSON được, để bot restart không phải warm-up lại
+
+Giá trị khớp với indicators (sai số dấu phẩy động ~1e-12):
+SMA ↔ rolling(window).mean(), EMA ↔ ewm(span, adjust=False), WilderRSI ↔ calculate_rsi,
+ATR ↔ calculate_atr, ADX ↔ calculate_adx, SMAChannel ↔ sma55_high/low của Strategy 1,
+HeikenAshi ↔ calculate_heiken_ashi (trùng từng bit).
+
+IndicatorSet gom các indicator của 1 (symbol, timeframe) và đồng bộ từ rates
+(data.get_data_np) theo `time`: nến mới → push, nến trùng time cuối → update_last.
+"""
+import os
+import json
+import math
+from collections import deque
+
+NAN = float('nan')
+
+
+class RollingWindow:
+    """Tổng trượt `period` phần tử; NaN trong cửa sổ → sum NaN (như pandas rolling)."""
+
+    # Cộng lại từ đầu sau mỗi RESYNC lần push để tổng không trôi do sai số cộng/trừ
+    RESYNC = 64
+
+    def __init__(self, period):
+        self.period = period
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.nan_count = 0
+        self._pushes = 0
+
+    def _add(self, x, sign):
+        if math.isnan(x):
+            self.nan_count += sign
+        else:
+            self.total += sign * x
+
+    def push(self, x):
+        if len(self.window) == self.period:
+            self._add(self.window[0], -1)
+        self.window.append(x)
+        self._add(x, 1)
+        self._pushes += 1
+        if self._pushes % self.RESYNC == 0:
+            self.total = math.fsum(v for v in self.window if not math.isnan(v))
+
+    def update_last(self, x):
+        self._add(self.window[-1], -1)
+        self.window[-1] = x
+        self._add(x, 1)
+
+    @property
+    def sum(self):
+        if len(self.window) < self.period or self.nan_count:
+            return NAN
+        return self.total
+
+    def snapshot(self):
+        return {"period": self.period, "window": list(self.window), "pushes": self._pushes}
+
+    @classmethod
+    def restore(cls, snap):
+        obj = cls(snap["period"])
+        for x in snap["window"]:
+            obj.window.append(x)
+            obj._add(x, 1)
+        obj._pushes = snap.get("pushes", 0)
+        return obj
+
+
+class SMA:
+    """Simple moving average (rolling(window=period).mean())."""
+
+    def __init__(self, period):
+        self.period = period
+        self._win = RollingWindow(period)
+
+    def push(self, x):
+        self._win.push(float(x))
+
+    def update_last(self, x):
+        self._win.update_last(float(x))
+
+    @property
+    def value(self):
+        return self._win.sum / self.period
+
+    def snapshot(self):
+        return {"win": self._win.snapshot()}
+
+    def restore_state(self, snap):
+        self._win = RollingWindow.restore(snap["win"])
+
+
+class EMA:
+    """EMA kiểu ewm(alpha hoặc span, adjust=False, min_periods)."""
+
+    def __init__(self, span=None, alpha=None, min_periods=0):
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1)
+        self.min_periods = min_periods
+        self.count = 0
+        self._prev = None
+        self._value = None
+
+    def _step(self, prev, x):
+        return x if prev is None else (1 - self.alpha) * prev + self.alpha * x
+
+    def push(self, x):
+        self._prev = self._value
+        self._value = self._step(self._prev, float(x))
+        self.count += 1
+
+    def update_last(self, x):
+        self._value = self._step(self._prev, float(x))
+
+    @property
+    def value(self):
+        if self._value is None or self.count < max(self.min_periods, 1):
+            return NAN
+        return self._value
+
+    def snapshot(self):
+        return {"count": self.count, "prev": self._prev, "value": self._value}
+
+    def restore_state(self, snap):
+        self.count, self._prev, self._value = snap["count"], snap["prev"], snap["value"]
+
+
+class WilderRSI:
+    """RSI Wilder (alpha = 1/period), như indicators.calculate_rsi."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self._gain = EMA(alpha=1.0 / period, min_periods=period)
+        self._loss = EMA(alpha=1.0 / period, min_periods=period)
+        self._close_before_last = None
+        self._last_close = None
+
+    def _feed(self, close, revise):
+        prev = self._close_before_last if revise else self._last_close
+        # Nến đầu tiên: delta NaN → gain = loss = 0 (như delta.where(delta > 0, 0))
+        delta = 0.0 if prev is None else close - prev
+        gain, loss = max(delta, 0.0), max(-delta, 0.0)
+        if revise:
+            self._gain.update_last(gain)
+            self._loss.update_last(loss)
+        else:
+            self._close_before_last = self._last_close
+            self._gain.push(gain)
+            self._loss.push(loss)
+        self._last_close = close
+
+    def push(self, close):
+        self._feed(float(close), revise=False)
+
+    def update_last(self, close):
+        self._feed(float(close), revise=True)
+
+    @property
+    def value(self):
+        avg_gain, avg_loss = self._gain.value, self._loss.value
+        if math.isnan(avg_gain) or math.isnan(avg_loss):
+            return NAN
+        if avg_loss == 0:
+            return NAN if avg_gain == 0 else 100.0
+        return 100 - (100 / (1 + avg_gain / avg_loss))
+
+    def snapshot(self):
+        return {"gain": self._gain.snapshot(), "loss": self._loss.snapshot(),
+                "close_before_last": self._close_before_last, "last_close": self._last_close}
+
+    def restore_state(self, snap):
+        self._gain.restore_state(snap["gain"])
+        self._loss.restore_state(snap["loss"])
+        self._close_before_last = snap["close_before_last"]
+        self._last_close = snap["last_close"]
+
+
+class ATR:
+    """ATR = SMA(TR, period), như indicators.calculate_atr (TR nến đầu = high - low)."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self._tr = SMA(period)
+        self._close_before_last = None
+        self._last_close = None
+
+    @staticmethod
+    def _true_range(high, low, prev_close):
+        if prev_close is None:
+            return abs(high - low)
+        return max(abs(high - low), abs(high - prev_close), abs(low - prev_close))
+
+    def push(self, high, low, close):
+        self._close_before_last = self._last_close
+        self._tr.push(self._true_range(high, low, self._close_before_last))
+        self._last_close = float(close)
+
+    def update_last(self, high, low, close):
+        self._tr.update_last(self._true_range(high, low, self._close_before_last))
+        self._last_close = float(close)
+
+    @property
+    def value(self):
+        return self._tr.value
+
+    def snapshot(self):
+        return {"tr": self._tr.snapshot(), "close_before_last": self._close_before_last,
+                "last_close": self._last_close}
+
+    def restore_state(self, snap):
+        self._tr.restore_state(snap["tr"])
+        self._close_before_last = snap["close_before_last"]
+        self._last_close = snap["last_close"]
+
+
+class ADX:
+    """ADX như indicators.calculate_adx: tổng trượt TR/DM, DX = |DI+ - DI-| / (DI+ + DI-), ADX = SMA(DX)."""
+
+    def __init__(self, period=14):
+        self.period = period
+        self._tr = RollingWindow(period)
+        self._dm_plus = RollingWindow(period)
+        self._dm_minus = RollingWindow(period)
+        self._dx = SMA(period)
+        self._dx_pushed = False
+        self._prev_bar = None   # (high, low, close) của nến trước nến cuối
+        self._last_bar = None
+        self.di_plus = NAN
+        self.di_minus = NAN
+
+    def _feed(self, high, low, close, revise):
+        prev = self._prev_bar if revise else self._last_bar
+        if not revise:
+            self._prev_bar = self._last_bar
+        self._last_bar = (high, low, close)
+        if prev is None:
+            # Nến đầu: diff NaN → chưa có TR/DM (bản pandas cho TR = NaN ở nến này)
+            self.di_plus = self.di_minus = NAN
+            return
+        prev_high, prev_low, prev_close = prev
+        up = high - prev_high
+        down = prev_low - low
+        dm_plus = up if (up > down and up > 0) else 0.0
+        dm_minus = down if (down > up and down > 0) else 0.0
+        tr = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        if revise:
+            self._tr.update_last(tr)
+            self._dm_plus.update_last(dm_plus)
+            self._dm_minus.update_last(dm_minus)
+        else:
+            self._tr.push(tr)
+            self._dm_plus.push(dm_plus)
+            self._dm_minus.push(dm_minus)
+
+        tr_s = self._tr.sum
+        if math.isnan(tr_s):
+            self.di_plus = self.di_minus = NAN
+            return
+        self.di_plus = 100 * (self._dm_plus.sum / tr_s) if tr_s else NAN
+        self.di_minus = 100 * (self._dm_minus.sum / tr_s) if tr_s else NAN
+        di_sum = self.di_plus + self.di_minus
+        dx = 100 * abs(self.di_plus - self.di_minus) / di_sum if di_sum else NAN
+        if revise and self._dx_pushed:
+            self._dx.update_last(dx)
+        else:
+            self._dx.push(dx)
+            self._dx_pushed = True
+
+    def push(self, high, low, close):
+        self._feed(float(high), float(low), float(close), revise=False)
+
+    def update_last(self, high, low, close):
+        self._feed(float(high), float(low), float(close), revise=True)
+
+    @property
+    def value(self):
+        return self._dx.value
+
+    def snapshot(self):
+        return {"tr": self._tr.snapshot(), "dm_plus": self._dm_plus.snapshot(),
+                "dm_minus": self._dm_minus.snapshot(), "dx": self._dx.snapshot(),
+                "dx_pushed": self._dx_pushed, "prev_bar": self._prev_bar, "last_bar": self._last_bar,
+                "di_plus": self.di_plus, "di_minus": self.di_minus}
+
+    def restore_state(self, snap):
+        self._tr = RollingWindow.restore(snap["tr"])
+        self._dm_plus = RollingWindow.restore(snap["dm_plus"])
+        self._dm_minus = RollingWindow.restore(snap["dm_minus"])
+        self._dx.restore_state(snap["dx"])
+        self._dx_pushed = snap["dx_pushed"]
+        self._prev_bar = tuple(snap["prev_bar"]) if snap["prev_bar"] else None
+        self._last_bar = tuple(snap["last_bar"]) if snap["last_bar"] else None
+        self.di_plus, self.di_minus = snap["di_plus"], snap["di_minus"]
+
+
+class SMAChannel:
+    """Kênh SMA của high/low (Strategy 1: sma55_high / sma55_low trên M1)."""
+
+    def __init__(self, period=55):
+        self.period = period
+        self.high = SMA(period)
+        self.low = SMA(period)
+
+    def push(self, high, low):
+        self.high.push(high)
+        self.low.push(low)
+
+    def update_last(self, high, low):
+        self.high.update_last(high)
+        self.low.update_last(low)
+
+    @property
+    def value(self):
+        return self.high.value, self.low.value
+
+    def snapshot(self):
+        return {"high": self.high.snapshot(), "low": self.low.snapshot()}
+
+    def restore_state(self, snap):
+        self.high.restore_state(snap["high"])
+        self.low.restore_state(snap["low"])
+
+
+class HeikenAshi:
+    """Heiken Ashi nến cuối; value = (ha_open, ha_close, ha_high, ha_low)."""
+
+    def __init__(self):
+        self._prev = None   # (ha_open, ha_close) của nến trước nến cuối
+        self._last = None
+
+    def _calc(self, prev, open_, high, low, close):
+        ha_close = (open_ + high + low + close) / 4
+        ha_open = (open_ + close) / 2 if prev is None else (prev[0] + prev[1]) / 2
+        return ha_open, ha_close, max(high, ha_open, ha_close), min(low, ha_open, ha_close)
+
+    def push(self, open_, high, low, close):
+        self._prev = self._last[:2] if self._last else None
+        self._last = self._calc(self._prev, open_, high, low, close)
+
+    def update_last(self, open_, high, low, close):
+        self._last = self._calc(self._prev, open_, high, low, close)
+
+    @property
+    def value(self):
+        return self._last if self._last else (NAN, NAN, NAN, NAN)
+
+    def snapshot(self):
+        return {"prev": self._prev, "last": self._last}
+
+    def restore_state(self, snap):
+        self._prev = tuple(snap["prev"]) if snap["prev"] else None
+        self._last = tuple(snap["last"]) if snap["last"] else None
+
+
+# Cột OHLC mỗi loại indicator đọc từ 1 nến
+_INPUTS = {
+    SMA: ('close',), EMA: ('close',), WilderRSI: ('close',),
+    ATR: ('high', 'low', 'close'), ADX: ('high', 'low', 'close'), SMAChannel: ('high', 'low'),
+    HeikenAshi: ('open', 'high', 'low', 'close'),
+}
+
+
+class IndicatorSet:
+    """
+    Các indicator stream của 1 (symbol, timeframe), đồng bộ theo thời gian nến.
+
+        ind = IndicatorSet({"rsi": WilderRSI(14), "adx": ADX(14), "ema200": SMA(200)})
+        ind.sync(get_data_np(symbol, mt5.TIMEFRAME_M5, 200))   # lần đầu: seed 200 nến
+        ind["adx"].value
+    """
+
+    def __init__(self, indicators, inputs=None):
+        self.indicators = dict(indicators)
+        # inputs: ghi đè cột đầu vào theo tên (vd {"sma_high": ("high",)})
+        self.inputs = {name: (inputs or {}).get(name, _INPUTS[type(ind)]) for name, ind in self.indicators.items()}
+        self.last_time = None
+
+    def __getitem__(self, name):
+        return self.indicators[name]
+
+    def _apply(self, bar, revise):
+        for name, ind in self.indicators.items():
+            args = [float(bar[col]) for col in self.inputs[name]]
+            if revise:
+                ind.update_last(*args)
+            else:
+                ind.push(*args)
+
+    def sync(self, rates):
+        """
+        Đưa các nến trong rates (cũ → mới, như get_data_np) vào indicator.
+        Trả về số nến mới đã push. Nến có time < last_time bị bỏ qua.
+        """
+        if rates is None or len(rates) == 0:
+            return 0
+        pushed = 0
+        times = rates['time']
+        for i in range(len(rates)):
+            t = int(times[i])
+            if self.last_time is not None and t < self.last_time:
+                continue
+            if t == self.last_time:
+                self._apply(rates[i], revise=True)
+            else:
+                self._apply(rates[i], revise=False)
+                self.last_time = t
+                pushed += 1
+        return pushed
+
+    def snapshot(self):
+        return {"last_time": self.last_time,
+                "indicators": {name: ind.snapshot() for name, ind in self.indicators.items()}}
+
+    def restore(self, snap):
+        """Khôi phục trạng thái (các indicator phải cùng tên/cấu hình như lúc snapshot)."""
+        self.last_time = snap["last_time"]
+        for name, state in snap["indicators"].items():
+            if name in self.indicators:
+                self.indicators[name].restore_state(state)
+
+    def save(self, path):
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp, path)
+
+    def load(self, path):
+        """Trả về True nếu nạp được snapshot từ file."""
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.restore(json.load(f))
+            return True
+        except Exception as e:
+            print(f"⚠️ Không đọc được indicator state {path}: {e}")
+            return False
@@ -0,0 +1,140 @@
+"""
+Swing high/low bằng rolling max/min căn giữa, thay cho vòng lặp df.iloc[j] O(n·lookback).
+
+Ngữ nghĩa giữ nguyên bản cũ (bất đẳng thức chặt):
+- swing high tại i ⇔ high[i] > mọi high[j], j ∈ [i-lookback, i+lookback], j ≠ i
+- swing low  tại i ⇔ low[i]  < mọi low[j]
+- chỉ xét lookback ≤ i < len - lookback
+
+SwingPointTracker: chế độ incremental cho vòng lặp mỗi giây — đồng bộ nến theo `time`,
+chỉ đánh giá lại các nến trong cửa sổ 2*lookback quanh nến mới / nến vừa sửa.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def swing_point_indices(high, low, lookback=5):
+    """Trả về (idx_swing_high, idx_swing_low) — mảng index tăng dần"""
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    if len(high) < 2 * lookback + 1:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty
+    win_h = sliding_window_view(high, 2 * lookback + 1)
+    win_l = sliding_window_view(low, 2 * lookback + 1)
+    centre_h = win_h[:, lookback]
+    centre_l = win_l[:, lookback]
+    if lookback > 0:
+        neighbours_h = np.maximum(win_h[:, :lookback].max(axis=1), win_h[:, lookback + 1:].max(axis=1))
+        neighbours_l = np.minimum(win_l[:, :lookback].min(axis=1), win_l[:, lookback + 1:].min(axis=1))
+        is_high = centre_h > neighbours_h
+        is_low = centre_l < neighbours_l
+    else:
+        is_high = np.ones(len(centre_h), dtype=bool)
+        is_low = np.ones(len(centre_l), dtype=bool)
+    return np.flatnonzero(is_high) + lookback, np.flatnonzero(is_low) + lookback
+
+
+def swing_points_from_df(df, lookback=5, tracker=None):
+    """
+    Như find_swing_points cũ: ([{'index', 'price', 'time'}], [...]) với index theo vị trí trong df,
+    time = df.index[i]. Truyền tracker (SwingPointTracker) để chạy incremental.
+    """
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    if tracker is not None and 'time' in df.columns:
+        idx_high, idx_low = tracker.update(df['time'].to_numpy(), high, low)
+    else:
+        idx_high, idx_low = swing_point_indices(high, low, lookback)
+    index = df.index
+    swing_highs = [{'index': int(i), 'price': high[i], 'time': index[i]} for i in idx_high]
+    swing_lows = [{'index': int(i), 'price': low[i], 'time': index[i]} for i in idx_low]
+    return swing_highs, swing_lows
+
+
+class SwingPointTracker:
+    """
+    Giữ high/low + cờ swing của các nến đã thấy (khóa theo time). Mỗi lần update với cửa sổ
+    nến mới nhất: nến mới → append, nến cuối trùng time → sửa, rồi chỉ đánh giá lại các tâm
+    i có cửa sổ [i-lookback, i+lookback] chạm nến thay đổi. Kết quả trả về theo index của
+    cửa sổ truyền vào và trùng với swing_point_indices(cửa sổ).
+    """
+
+    def __init__(self, lookback=5, max_bars=5000):
+        self.lookback = lookback
+        self.max_bars = max_bars
+        self._reset()
+
+    def _reset(self):
+        self._times = np.empty(0, dtype=np.int64)
+        self._high = np.empty(0)
+        self._low = np.empty(0)
+        self._is_high = np.zeros(0, dtype=bool)
+        self._is_low = np.zeros(0, dtype=bool)
+
+    def _evaluate(self, start):
+        """Đánh giá lại tâm i ∈ [start, n - 1 - lookback]"""
+        lb = self.lookback
+        n = len(self._high)
+        start = max(start, lb)
+        stop = n - lb
+        self._is_high[start:] = False
+        self._is_low[start:] = False
+        if stop <= start:
+            return
+        seg_from = start - lb
+        idx_h, idx_l = swing_point_indices(self._high[seg_from:], self._low[seg_from:], lb)
+        self._is_high[idx_h + seg_from] = True
+        self._is_low[idx_l + seg_from] = True
+
+    def update(self, times, high, low):
+        """times/high/low: cửa sổ nến mới nhất (cũ → mới). Trả về (idx_high, idx_low) theo cửa sổ."""
+        times = np.asarray(times)
+        if times.dtype.kind == 'M':
+            times = times.astype('datetime64[s]')
+        times = times.astype(np.int64)
+        n_win = len(times)
+        if n_win == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+
+        # Nến đầu cửa sổ phải khớp dữ liệu đã lưu; nếu không (đổi symbol/TF, hở dữ liệu) → làm lại
+        pos0 = int(np.searchsorted(self._times, times[0]))
+        if pos0 >= len(self._times) or self._times[pos0] != times[0] \
+                or self._high[pos0] != high[0] or self._low[pos0] != low[0]:
+            self._times, self._high, self._low = times.copy(), np.array(high, dtype=np.float64), np.array(low, dtype=np.float64)
+            self._is_high = np.zeros(n_win, dtype=bool)
+            self._is_low = np.zeros(n_win, dtype=bool)
+            self._evaluate(0)
+            first_dirty = None
+        else:
+            # Nến trùng time: ghi lại (chỉ nến cuối thường đổi); nến mới: append
+            overlap = min(len(self._times) - pos0, n_win)
+            changed = np.flatnonzero((self._high[pos0:pos0 + overlap] != high[:overlap]) |
+                                     (self._low[pos0:pos0 + overlap] != low[:overlap]))
+            first_dirty = pos0 + int(changed[0]) if len(changed) else None
+            self._high[pos0:pos0 + overlap] = high[:overlap]
+            self._low[pos0:pos0 + overlap] = low[:overlap]
+            if overlap < n_win:
+                if first_dirty is None:
+                    first_dirty = len(self._times)
+                self._times = np.concatenate([self._times, times[overlap:]])
+                self._high = np.concatenate([self._high, np.asarray(high[overlap:], dtype=np.float64)])
+                self._low = np.concatenate([self._low, np.asarray(low[overlap:], dtype=np.float64)])
+                self._is_high = np.concatenate([self._is_high, np.zeros(n_win - overlap, dtype=bool)])
+                self._is_low = np.concatenate([self._is_low, np.zeros(n_win - overlap, dtype=bool)])
+            if first_dirty is not None:
+                self._evaluate(first_dirty - self.lookback)
+
+        # Giới hạn bộ nhớ: bỏ bớt nến cũ (cờ swing của nến còn lại không đổi)
+        if len(self._times) > self.max_bars:
+            cut = len(self._times) - self.max_bars
+            self._times, self._high, self._low = self._times[cut:], self._high[cut:], self._low[cut:]
+            self._is_high, self._is_low = self._is_high[cut:], self._is_low[cut:]
+
+        # Map về index của cửa sổ; tâm sát mép trái cửa sổ không được xét (như bản cũ)
+        start = int(np.searchsorted(self._times, times[0]))
+        lo = start + self.lookback
+        hi = start + n_win - self.lookback
+        idx_h = np.flatnonzero(self._is_high[lo:hi]) + self.lookback if hi > lo else np.array([], dtype=np.int64)
+        idx_l = np.flatnonzero(self._is_low[lo:hi]) + self.lookback if hi > lo else np.array([], dtype=np.int64)
+        return idx_h, idx_l
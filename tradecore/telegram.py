@@ -0,0 +1,244 @@
+"""
+Gửi Telegram không chặn vòng lặp trading: send_telegram chỉ đưa tin vào hàng đợi,
+1 thread nền (daemon) gửi đi.
+
+- Hàng đợi giới hạn (maxsize, tính cả lô thread nền đang gửi): đầy → bỏ tin mới, tăng dropped_overflow
+  (vòng lặp không bao giờ chờ)
+- Gom tin: tin đến trong `coalesce_window` giây cùng (token, chat_id) được nối thành 1 tin
+  (cách nhau 1 dòng trống, tối đa max_length ký tự / tin) → 1 request thay vì N. Khối gom bị 4xx
+  (vd. 1 tin HTML hỏng) → gửi lại từng tin riêng, chỉ bỏ tin lỗi
+- HTTP 429: đợi đúng `retry_after` (JSON parameters.retry_after hoặc header Retry-After) rồi gửi lại
+- Lỗi mạng / 5xx: thử lại có backoff (max_attempts); 4xx khác: bỏ, tăng dropped_failed
+- on_result(ok, description) gọi từ thread nền cho từng tin gốc (log file, đếm...)
+- api_base (hoặc biến môi trường TELEGRAM_API_BASE) trỏ sang server HTTP local để kiểm thử
+- Bộ đếm (stats) tăng từ cả thread gọi lẫn thread nền → luôn qua _count (giữ _stats_lock)
+
+Khi thoát process, atexit chờ tối đa EXIT_FLUSH_SECONDS để gửi nốt các tin còn trong hàng đợi.
+"""
+import os
+import time
+import queue
+import atexit
+import threading
+
+import requests
+
+DEFAULT_API_BASE = "https://api.telegram.org"
+EXIT_FLUSH_SECONDS = 5.0
+MAX_429_RETRIES = 5
+
+_STOP = object()
+
+
+class TelegramNotifier:
+    """Hàng đợi + thread gửi Telegram."""
+
+    def __init__(self, maxsize=500, coalesce_window=0.5, max_length=4000, api_base=None,
+                 timeout=10, max_attempts=3):
+        self.api_base = (api_base or os.environ.get("TELEGRAM_API_BASE") or DEFAULT_API_BASE).rstrip("/")
+        self.coalesce_window = coalesce_window
+        self.max_length = max_length
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.maxsize = maxsize
+        self._queue = queue.Queue()
+        self._slots = threading.BoundedSemaphore(maxsize)   # tin chưa gửi xong: trong hàng đợi + lô đang gửi
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._session = requests.Session()
+        self.enqueued = 0
+        self.sent_messages = 0
+        self.requests_sent = 0
+        self.coalesced = 0
+        self.dropped_overflow = 0
+        self.dropped_failed = 0
+        self.retries_429 = 0
+        self.last_error = None
+
+    # ----- phía vòng lặp trading -----
+
+    def enqueue(self, text, token, chat_id, parse_mode="HTML", on_result=None):
+        """Đưa tin vào hàng đợi, trả về ngay. False nếu thiếu token/chat_id hoặc hàng đợi đầy."""
+        if not token or not chat_id:
+            return False
+        self._ensure_started()
+        if not self._slots.acquire(blocking=False):
+            dropped = self._count("dropped_overflow")
+            if dropped == 1 or dropped % 100 == 0:
+                print(f"⚠️ Telegram queue full ({self.maxsize}), dropped {dropped} message(s)")
+            return False
+        self._queue.put_nowait((str(token), str(chat_id).strip(), parse_mode, text, on_result))
+        self._count("enqueued")
+        return True
+
+    def send_now(self, text, token, chat_id, parse_mode="HTML"):
+        """Gửi đồng bộ (bỏ qua hàng đợi) — chỉ dùng ngoài vòng lặp, vd. test kết nối lúc khởi động."""
+        if not token or not chat_id:
+            return False, "missing token or chat_id"
+        ok, description, _ = self._deliver(str(token), str(chat_id).strip(), parse_mode, text)
+        if ok:
+            self._count("sent_messages")
+        return ok, description
+
+    def flush(self, timeout=EXIT_FLUSH_SECONDS):
+        """Chờ hàng đợi gửi hết (tối đa timeout giây). True nếu đã hết."""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline or self._thread is None or not self._thread.is_alive():
+                return False
+            time.sleep(0.02)
+        return True
+
+    def close(self, timeout=EXIT_FLUSH_SECONDS):
+        """Gửi nốt hàng đợi rồi dừng thread nền."""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "queued": self._queue.qsize(), "maxsize": self.maxsize,
+                "enqueued": self.enqueued, "sent_messages": self.sent_messages,
+                "requests_sent": self.requests_sent, "coalesced": self.coalesced,
+                "dropped_overflow": self.dropped_overflow, "dropped_failed": self.dropped_failed,
+                "retries_429": self.retries_429, "last_error": self.last_error,
+            }
+
+    def _count(self, name, n=1):
+        """Cộng n vào bộ đếm `name` dưới _stats_lock, trả về giá trị mới."""
+        with self._stats_lock:
+            value = getattr(self, name) + n
+            setattr(self, name, value)
+            return value
+
+    # ----- thread nền -----
+
+    def _ensure_started(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="telegram-sender", daemon=True)
+                self._thread.start()
+
+    def _collect_batch(self, first):
+        """Gom thêm tin đến trong coalesce_window giây sau tin đầu."""
+        batch = [first]
+        deadline = time.monotonic() + self.coalesce_window
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is _STOP:
+                self._queue.task_done()
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _chunks(self, items):
+        """Nối các tin cùng đích thành các khối <= max_length (1 tin dài quá giữ nguyên 1 khối)."""
+        chunk, length = [], 0
+        for item in items:
+            size = len(item[3]) + (2 if chunk else 0)
+            if chunk and length + size > self.max_length:
+                yield chunk
+                chunk, length = [], 0
+                size = len(item[3])
+            chunk.append(item)
+            length += size
+        if chunk:
+            yield chunk
+
+    def _run(self):
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is _STOP:
+                self._queue.task_done()
+                break
+            batch, stop = self._collect_batch(first)
+            groups = {}
+            for item in batch:
+                groups.setdefault(item[:3], []).append(item)
+            for (token, chat_id, parse_mode), items in groups.items():
+                for chunk in self._chunks(items):
+                    self._send_chunk(token, chat_id, parse_mode, chunk)
+            for _ in batch:
+                self._slots.release()
+                self._queue.task_done()
+
+    def _send_chunk(self, token, chat_id, parse_mode, chunk):
+        text = "\n\n".join(item[3] for item in chunk)
+        try:
+            ok, description, client_error = self._deliver(token, chat_id, parse_mode, text)
+        except Exception as e:   # thread nền không được chết
+            ok, description, client_error = False, str(e), False
+        if not ok and client_error and len(chunk) > 1:
+            # 4xx của khối gom (1 tin HTML hỏng...) → gửi lại từng tin, chỉ bỏ tin lỗi
+            for item in chunk:
+                self._send_chunk(token, chat_id, parse_mode, [item])
+            return
+        if ok:
+            self._count("sent_messages", len(chunk))
+            self._count("coalesced", len(chunk) - 1)
+        else:
+            self._count("dropped_failed", len(chunk))
+            with self._stats_lock:
+                self.last_error = description
+            print(f"⚠️ Telegram error: {description} ({len(chunk)} message(s) dropped)")
+        for item in chunk:
+            if item[4] is not None:
+                try:
+                    item[4](ok, description)
+                except Exception as e:
+                    print(f"⚠️ Telegram on_result error: {e}")
+
+    def _deliver(self, token, chat_id, parse_mode, text):
+        """(ok, description, client_error) — client_error: 4xx không phải 429, tách khối gom ra gửi lại có ích."""
+        url = f"{self.api_base}/bot{token}/sendMessage"
+        payload = {"chat_id": chat_id, "text": text}
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+        attempts = 0
+        retries_429 = 0
+        description = ""
+        while attempts < self.max_attempts:
+            try:
+                self._count("requests_sent")
+                response = self._session.post(url, data=payload, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                attempts += 1
+                description = f"{type(e).__name__}: {e}"
+                time.sleep(min(2 ** attempts, 10))
+                continue
+            try:
+                body = response.json()
+            except ValueError:
+                body = {}
+            if response.status_code == 429 and retries_429 < MAX_429_RETRIES:
+                retries_429 += 1
+                self._count("retries_429")
+                retry_after = (body.get("parameters") or {}).get("retry_after") \
+                    or response.headers.get("Retry-After") or 1
+                time.sleep(float(retry_after))
+                continue
+            if response.status_code == 200 and body.get("ok", True):
+                return True, "", False
+            description = f"{response.status_code} {body.get('description', response.text[:200])}"
+            if 400 <= response.status_code < 500:
+                # token/chat_id/HTML sai: gửi lại cũng vậy (429 hết lượt thử: tách tin chỉ thêm request)
+                return False, description, response.status_code != 429
+            attempts += 1
+            time.sleep(min(2 ** attempts, 10))
+        return False, description, False
+
+
+# Notifier dùng chung trong process (send_telegram của mọi bot)
+telegram_notifier = TelegramNotifier()
+atexit.register(telegram_notifier.flush)
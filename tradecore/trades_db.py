@@ -0,0 +1,584 @@
+"""
+trades.db của bot: Database (signals / orders / grid_pending_orders) dùng chung cho mọi thư mục bot
+(`db.py` của từng thư mục là shim, chỉ giữ đường dẫn mặc định trades.db cạnh script).
+
+Mỗi process giữ 1 kết nối cho mỗi file (thay cho connect / commit / close ở từng hàm):
+- journal_mode=WAL: dashboard đọc không chặn bot ghi và ngược lại (5 bot + dashboard cùng 1 file)
+- synchronous=NORMAL (WAL: commit vẫn nguyên vẹn khi process chết, chỉ mất commit cuối nếu mất điện —
+  lệnh vẫn đồng bộ lại được từ history MT5 qua update_db.py), busy_timeout=5000 ms
+- ghi không quan trọng (log_signal, order_executions) vào hàng đợi write-behind: thread nền gom lại
+  ghi 1 transaction mỗi FLUSH_INTERVAL giây; mốc thời gian lấy lúc gọi (không phải lúc flush)
+- ghi quan trọng (log_order, update_order_profit, lệnh chờ grid) chạy đồng bộ: ghi nốt hàng đợi rồi ghi
+  dòng đó trong cùng 1 transaction → không bao giờ có order mà thiếu signal trước nó
+- đọc qua Database (cùng process) flush hàng đợi trước nên luôn thấy dữ liệu vừa ghi; process khác
+  (dashboard) thấy signal chậm tối đa FLUSH_INTERVAL giây
+
+Kết nối mở lại sau fork (key theo pid); atexit flush mọi hàng đợi. So sánh: benchmarks/bench_trades_db.py.
+trades_db.redirect(path): check / backtest import file strategy mà `db = Database()` không mở trades.db thật.
+
+Schema theo PRAGMA user_version + MIGRATIONS (bước tăng dần): khởi động với schema đã mới chỉ đọc
+user_version, không PRAGMA table_info / ALTER. Index cho truy vấn nóng: benchmarks/check_query_plans.py.
+signals.indicators (JSON) được tách thêm vào signal_indicators (signal_id, name, num / txt) bằng trigger;
+DB không có bot chạy để tự nâng: python -m tradecore.trades_db <trades.db ...> (nâng schema + backfill).
+mt5_deals / mt5_sync_state: bản sao deal history MT5 + high-water mark cho update_db (tradecore.history_sync).
+"""
+import os
+import time
+import json
+import atexit
+import sqlite3
+import argparse
+import threading
+import contextlib
+
+FLUSH_INTERVAL = 0.5        # giây giữa 2 lần thread nền ghi hàng đợi
+MAX_BATCH = 500             # hàng đợi dài hơn → flush ngay trong luồng gọi
+MAX_PENDING = 20000         # DB bị khoá lâu: bỏ dòng cũ nhất (chỉ dữ liệu không quan trọng) thay vì phình RAM
+BUSY_TIMEOUT_MS = 5000
+
+_stores = {}
+_stores_lock = threading.Lock()
+_redirect_path = None       # redirect(): mọi Database() mở trong khối dùng file này
+
+
+def utc_now():
+    """'YYYY-MM-DD HH:MM:SS' UTC như CURRENT_TIMESTAMP / datetime('now') của SQLite."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+
+
+class Store:
+    """Kết nối WAL dùng chung trong process cho 1 file + hàng đợi write-behind. Mọi thao tác giữ self.lock."""
+
+    def __init__(self, path):
+        self.path = path
+        self.pid = os.getpid()
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self.pending = []
+        self.ensured = set()
+        self.stats = {"queued": 0, "flushes": 0, "flushed": 0, "dropped": 0, "sync_writes": 0}
+        self._wake = threading.Event()
+        self._thread = None
+
+    # ----- đọc / ghi đồng bộ -----
+
+    def query(self, sql, params=()):
+        """SELECT (sau khi ghi nốt hàng đợi) → list tuple."""
+        with self.lock:
+            if self.pending:
+                self._flush_locked()
+            return self.conn.execute(sql, params).fetchall()
+
+    def execute(self, sql, params=()):
+        """Ghi đồng bộ: hàng đợi + câu lệnh trong 1 transaction, commit trước khi trả về. Trả về rowcount."""
+        with self.lock:
+            try:
+                self._write_pending()
+                rowcount = self.conn.execute(sql, params).rowcount
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+            self.stats["flushed"] += len(self.pending)
+            self.stats["sync_writes"] += 1
+            del self.pending[:]
+            return rowcount
+
+    def transaction(self, items):
+        """Như execute cho nhiều câu [(sql, params)]: tất cả hoặc không câu nào. Trả về list rowcount từng câu."""
+        with self.lock:
+            try:
+                self._write_pending()
+                rowcount = [self.conn.execute(sql, params).rowcount for sql, params in items]
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+            self.stats["flushed"] += len(self.pending)
+            self.stats["sync_writes"] += 1
+            del self.pending[:]
+            return rowcount
+
+    def script(self, statements):
+        """Nhiều câu lệnh (schema) trong 1 transaction."""
+        with self.lock:
+            try:
+                self._write_pending()
+                for sql in statements:
+                    self.conn.execute(sql)
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+            del self.pending[:]
+
+    def migrate(self, migrations):
+        """Đưa PRAGMA user_version lên bước cuối của `migrations` ((version, mô tả, bước), tăng dần).
+
+        Schema đã mới → chỉ 1 lần đọc user_version (và không đọc lại trong process). Bước là list câu lệnh
+        hoặc hàm nhận connection; mọi bước còn thiếu chạy trong 1 transaction BEGIN IMMEDIATE (process khác
+        khởi động cùng lúc chờ rồi thấy version mới, không chạy lại).
+        """
+        target = migrations[-1][0]
+        if ("schema", target) in self.ensured:
+            return
+        with self.lock:
+            if self.conn.execute("PRAGMA user_version").fetchone()[0] < target:
+                self._flush_locked()
+                self.conn.execute("BEGIN IMMEDIATE")
+                try:
+                    current = self.conn.execute("PRAGMA user_version").fetchone()[0]
+                    for version, description, step in migrations:
+                        if version <= current:
+                            continue
+                        print(f"📦 Migrating DB {os.path.basename(self.path)}: v{version} {description}")
+                        if callable(step):
+                            step(self.conn)
+                        else:
+                            for sql in step:
+                                self.conn.execute(sql)
+                    self.conn.execute(f"PRAGMA user_version = {int(target)}")
+                    self.conn.commit()
+                except BaseException:
+                    self.conn.rollback()
+                    raise
+            self.ensured.add(("schema", target))
+
+    def ensure(self, key, statements):
+        """Chạy statements (CREATE TABLE IF NOT EXISTS...) 1 lần cho mỗi key trong process."""
+        if key in self.ensured:
+            return
+        self.script(statements)
+        self.ensured.add(key)
+
+    # ----- write-behind -----
+
+    def enqueue(self, sql, params=()):
+        """Ghi không quan trọng: vào hàng đợi, thread nền ghi theo lô."""
+        with self.lock:
+            self.pending.append((sql, params))
+            self.stats["queued"] += 1
+            if len(self.pending) > MAX_PENDING:
+                drop = len(self.pending) - MAX_PENDING
+                del self.pending[:drop]
+                self.stats["dropped"] += drop
+            if len(self.pending) >= MAX_BATCH:
+                self._flush_locked(quiet=True)
+                return
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"trades-db-flush:{os.path.basename(self.path)}",
+                                                daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def flush(self):
+        """Ghi ngay hàng đợi (1 transaction). Lỗi (DB khoá quá busy_timeout) → giữ lại, lần sau ghi tiếp."""
+        with self.lock:
+            self._flush_locked(quiet=True)
+
+    def _write_pending(self):
+        sql, batch = None, []
+        for item_sql, params in self.pending:
+            if item_sql != sql and batch:
+                self.conn.executemany(sql, batch)
+                batch = []
+            sql = item_sql
+            batch.append(params)
+        if batch:
+            self.conn.executemany(sql, batch)
+
+    def _flush_locked(self, quiet=False):
+        if not self.pending:
+            return
+        try:
+            self._write_pending()
+            self.conn.commit()
+        except sqlite3.Error as e:
+            self.conn.rollback()
+            if not quiet:
+                raise
+            print(f"⚠️ trades.db write-behind: {e} ({len(self.pending)} dòng chờ ghi lại)")
+            return
+        self.stats["flushes"] += 1
+        self.stats["flushed"] += len(self.pending)
+        del self.pending[:]
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            # gom các lần ghi trong FLUSH_INTERVAL; Event.wait dùng đồng hồ thật kể cả khi module bị patch_clock
+            threading.Event().wait(FLUSH_INTERVAL)
+            if os.getpid() != self.pid:
+                return
+            self.flush()
+
+
+def store(path):
+    """Store của process hiện tại cho file `path` (tạo khi gọi lần đầu, mở lại sau fork)."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        current = _stores.get(key)
+        if current is None or current.pid != os.getpid():
+            current = _stores[key] = Store(key)
+        return current
+
+
+def flush_all():
+    """Ghi hàng đợi của mọi Store trong process (atexit, cuối backtest, trước khi đọc bằng kết nối khác)."""
+    for item in list(_stores.values()):
+        if item.pid == os.getpid():
+            item.flush()
+
+
+atexit.register(flush_all)
+
+
+@contextlib.contextmanager
+def redirect(path):
+    """
+    Mọi Database() mở trong khối dùng `path` thay cho đường dẫn được truyền / mặc định của shim.
+    Cho check / backtest import file strategy: `db = Database()` cấp module không mở trades.db của thư mục bot.
+    """
+    global _redirect_path
+    previous, _redirect_path = _redirect_path, path
+    try:
+        yield path
+    finally:
+        _redirect_path = previous
+
+
+_TABLES = [
+    # Table for logging signals (analysis)
+    '''
+    CREATE TABLE IF NOT EXISTS signals (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+        strategy_name TEXT,
+        symbol TEXT,
+        signal_type TEXT,
+        price REAL,
+        sl REAL,
+        tp REAL,
+        indicators TEXT,
+        status TEXT,
+        account_id INTEGER DEFAULT 0
+    )
+    ''',
+    # Table for logging executed orders
+    '''
+    CREATE TABLE IF NOT EXISTS orders (
+        ticket INTEGER PRIMARY KEY,
+        strategy_name TEXT,
+        symbol TEXT,
+        order_type TEXT,
+        volume REAL,
+        open_price REAL,
+        sl REAL,
+        tp REAL,
+        open_time DATETIME,
+        close_price REAL,
+        profit REAL,
+        comment TEXT,
+        account_id INTEGER DEFAULT 0,
+        close_time DATETIME
+    )
+    ''',
+    # Lệnh chờ Grid Step: BUY_STOP / SELL_STOP, cập nhật status khi khớp hoặc hủy
+    '''
+    CREATE TABLE IF NOT EXISTS grid_pending_orders (
+        ticket INTEGER PRIMARY KEY,
+        strategy_name TEXT,
+        symbol TEXT,
+        order_type TEXT,
+        price REAL,
+        sl REAL,
+        tp REAL,
+        volume REAL,
+        status TEXT DEFAULT 'PENDING',
+        position_ticket INTEGER,
+        placed_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        filled_at DATETIME,
+        account_id INTEGER DEFAULT 0
+    )
+    ''',
+]
+
+
+def _add_missing_columns(conn):
+    """DB tạo trước khi có account_id / close_time (user_version 0)."""
+    for table, column, decl in (("orders", "account_id", "INTEGER DEFAULT 0"),
+                                ("orders", "close_time", "DATETIME"),
+                                ("signals", "account_id", "INTEGER DEFAULT 0")):
+        columns = [info[1] for info in conn.execute(f"PRAGMA table_info({table})")]
+        if column not in columns:
+            print(f"📦 Migrating DB: Adding {column} to {table} table...")
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+_INDEXES = [
+    # get_last_closed_orders*: strategy + profit IS NOT NULL, mới nhất trước (covering cho cột hay đọc)
+    '''
+    CREATE INDEX IF NOT EXISTS idx_orders_closed ON orders (
+        strategy_name, COALESCE(close_time, open_time), account_id, profit, open_time, close_time, open_price
+    ) WHERE profit IS NOT NULL
+    ''',
+    # lệnh đang mở (update_db / đồng bộ profit mỗi vòng): strategy + profit IS NULL + account
+    "CREATE INDEX IF NOT EXISTS idx_orders_open ON orders (strategy_name, account_id) WHERE profit IS NULL",
+    # dashboard: orders theo khoảng thời gian đóng (hoặc mở nếu chưa đóng)
+    "CREATE INDEX IF NOT EXISTS idx_orders_time ON orders (COALESCE(close_time, open_time))",
+    # dashboard: ghép signal → order (cùng strategy / symbol / chiều, open_time trong ±30s)
+    "CREATE INDEX IF NOT EXISTS idx_orders_match ON orders (strategy_name, symbol, order_type, open_time)",
+    # dashboard: signals mới nhất / theo khoảng thời gian, toàn bộ hoặc 1 strategy
+    "CREATE INDEX IF NOT EXISTS idx_signals_time ON signals (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_signals_strategy_time ON signals (strategy_name, timestamp)",
+    # get_grid_pending_by_status
+    "CREATE INDEX IF NOT EXISTS idx_grid_pending_status ON grid_pending_orders (strategy_name, symbol, status)",
+]
+
+# Chỉ báo của signal dạng key / value có kiểu: số (kể cả bool → 1 / 0) vào num, chuỗi vào txt.
+# Trigger ghi lúc INSERT signals (cả lô write-behind của log_signal lẫn script ghi thẳng vào DB);
+# indicators không phải JSON object (rỗng, hỏng, NaN) → không có dòng nào.
+_INDICATOR_ROWS = '''
+    SELECT {id}, j.key,
+           CASE WHEN j.type IN ('integer', 'real') THEN j.value WHEN j.type = 'true' THEN 1 WHEN j.type = 'false' THEN 0 END,
+           CASE WHEN j.type = 'text' THEN j.value END
+    FROM {signals}json_each(CASE WHEN NOT json_valid({src}) THEN NULL WHEN json_type({src}) = 'object' THEN {src} END) AS j
+    WHERE j.type IN ('integer', 'real', 'text', 'true', 'false')
+'''
+
+
+def _indicator_table(conn):
+    """Bảng signal_indicators + trigger, backfill signal đã có (1 câu INSERT ... SELECT json_each)."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS signal_indicators (
+            signal_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            num REAL,
+            txt TEXT,
+            PRIMARY KEY (signal_id, name)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS signals_indicators_insert AFTER INSERT ON signals
+        BEGIN
+            INSERT OR IGNORE INTO signal_indicators (signal_id, name, num, txt)
+            {_INDICATOR_ROWS.format(id="NEW.id", signals="", src="NEW.indicators")};
+        END
+    ''')
+    conn.execute("CREATE TRIGGER IF NOT EXISTS signals_indicators_delete AFTER DELETE ON signals "
+                 "BEGIN DELETE FROM signal_indicators WHERE signal_id = OLD.id; END")
+    count = backfill_indicators(conn)
+    if count:
+        print(f"📦 Migrating DB: backfill {count} chỉ báo từ signals.indicators")
+
+
+def backfill_indicators(conn):
+    """Tách JSON signals.indicators vào signal_indicators; chạy lại không nhân đôi. Trả về số dòng thêm."""
+    before = conn.total_changes
+    conn.execute(f'''
+        INSERT OR IGNORE INTO signal_indicators (signal_id, name, num, txt)
+        {_INDICATOR_ROWS.format(id="s.id", signals="signals AS s, ", src="s.indicators")}
+    ''')
+    return conn.total_changes - before
+
+
+# Deal history MT5 đã lấy về (tradecore.history_sync): khoá (account, ticket) → lấy trùng vùng overlap không sao;
+# mt5_sync_state giữ high-water mark (deal mới nhất) mỗi account để lần sau chỉ hỏi terminal phần mới.
+_HISTORY_TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS mt5_deals (
+        account_id INTEGER NOT NULL,
+        ticket INTEGER NOT NULL,
+        position_id INTEGER,
+        magic INTEGER,
+        type INTEGER,
+        entry INTEGER,
+        symbol TEXT,
+        volume REAL,
+        price REAL,
+        profit REAL,
+        swap REAL,
+        commission REAL,
+        time INTEGER,
+        comment TEXT,
+        PRIMARY KEY (account_id, ticket)
+    ) WITHOUT ROWID
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_mt5_deals_position ON mt5_deals (account_id, magic, position_id)",
+    '''
+    CREATE TABLE IF NOT EXISTS mt5_sync_state (
+        account_id INTEGER PRIMARY KEY,
+        last_deal_ticket INTEGER,
+        last_deal_time INTEGER,
+        synced_at DATETIME,
+        full_synced_at DATETIME
+    )
+    ''',
+]
+
+# (user_version, mô tả, bước) — chỉ thêm bước mới ở cuối, không sửa bước đã phát hành
+MIGRATIONS = (
+    (1, "signals / orders / grid_pending_orders", _TABLES),
+    (2, "account_id / close_time cho DB cũ", _add_missing_columns),
+    (3, "index cho truy vấn bot / dashboard", _INDEXES),
+    (4, "signal_indicators (chỉ báo có kiểu, tách từ JSON)", _indicator_table),
+    (5, "mt5_deals / mt5_sync_state (đồng bộ history MT5 tăng dần)", _HISTORY_TABLES),
+)
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+class Database:
+    def __init__(self, db_path):
+        """Initialize database connection"""
+        if _redirect_path is not None:
+            db_path = _redirect_path
+        self.db_path = db_path
+        self._store = store(db_path)
+        self._store.migrate(MIGRATIONS)
+
+    def flush(self):
+        """Ghi ngay các signal đang chờ trong hàng đợi write-behind."""
+        self._store.flush()
+
+    def log_signal(self, strategy_name, symbol, signal_type, price, sl, tp, indicators, status="PENDING", account_id=0):
+        """Log a trading signal (write-behind: ghi theo lô, timestamp = lúc gọi; trigger tách indicators vào signal_indicators)"""
+        # Convert indicators dict to JSON string if needed
+        if isinstance(indicators, dict):
+            indicators = json.dumps(indicators)
+
+        self._store.enqueue('''
+            INSERT INTO signals (timestamp, strategy_name, symbol, signal_type, price, sl, tp, indicators, status, account_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (utc_now(), strategy_name, symbol, signal_type, price, sl, tp, indicators, status, account_id))
+
+    def order_exists(self, ticket):
+        """Kiểm tra order đã tồn tại trong bảng orders chưa."""
+        return bool(self._store.query("SELECT 1 FROM orders WHERE ticket = ?", (ticket,)))
+
+    def log_order(self, ticket, strategy_name, symbol, order_type, volume, open_price, sl, tp, comment="", account_id=0):
+        """Log an executed order"""
+        self._store.execute('''
+            INSERT OR REPLACE INTO orders (ticket, strategy_name, symbol, order_type, volume, open_price, sl, tp, open_time, comment, account_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (ticket, strategy_name, symbol, order_type, volume, open_price, sl, tp, utc_now(), comment, account_id))
+
+    def update_order_profit(self, ticket, close_price, profit, close_time=None):
+        """Update closed order with profit and close_time (giờ đóng lệnh, dùng cho pause tính từ lệnh thua cuối)."""
+        if close_time is not None:
+            self._store.execute('''
+                UPDATE orders
+                SET close_price = ?, profit = ?, close_time = ?
+                WHERE ticket = ?
+            ''', (close_price, profit, close_time, ticket))
+        else:
+            self._store.execute('''
+                UPDATE orders
+                SET close_price = ?, profit = ?
+                WHERE ticket = ?
+            ''', (close_price, profit, ticket))
+
+    def apply_closed_positions(self, updates, inserts=()):
+        """
+        update_db: ghi lệnh đã đóng từ history MT5 trong 1 transaction.
+        updates: [(ticket, close_price, profit, close_time)] — chỉ UPDATE dòng còn mở hoặc khác giá trị đang có;
+        inserts: [(ticket, strategy_name, symbol, order_type, volume, open_price, sl, tp, comment, account_id)]
+        (lệnh bot mở mà chưa có trong DB; kết quả đóng của chúng đi qua updates). Trả về số order đã cập nhật.
+        """
+        items = [('''
+            INSERT OR IGNORE INTO orders (ticket, strategy_name, symbol, order_type, volume, open_price, sl, tp, open_time, comment, account_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', row[:8] + (utc_now(),) + row[8:]) for row in inserts]
+        items += [('''
+            UPDATE orders
+            SET close_price = ?, profit = ?, close_time = COALESCE(?, close_time)
+            WHERE ticket = ? AND (profit IS NULL OR profit IS NOT ? OR close_price IS NOT ?
+                                  OR (? IS NOT NULL AND close_time IS NOT ?))
+        ''', (close_price, profit, close_time, ticket, profit, close_price, close_time, close_time))
+            for ticket, close_price, profit, close_time in updates]
+        if not items:
+            return 0
+        return sum(self._store.transaction(items)[len(inserts):])
+
+    def log_grid_pending(self, ticket, strategy_name, symbol, order_type, price, sl, tp, volume, account_id=0):
+        """Lưu lệnh chờ BUY_STOP / SELL_STOP (status PENDING)."""
+        self._store.execute('''
+            INSERT OR REPLACE INTO grid_pending_orders
+            (ticket, strategy_name, symbol, order_type, price, sl, tp, volume, status, placed_at, account_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, 'PENDING', ?, ?)
+        ''', (ticket, strategy_name, symbol, order_type, price, sl, tp, volume, utc_now(), account_id))
+
+    def update_grid_pending_status(self, ticket, status, position_ticket=None):
+        """Cập nhật status: FILLED (khi khớp) hoặc CANCELLED (khi hủy)."""
+        self._store.execute('''
+            UPDATE grid_pending_orders
+            SET status = ?, position_ticket = ?,
+                filled_at = CASE WHEN ? = 'FILLED' THEN ? ELSE filled_at END
+            WHERE ticket = ?
+        ''', (status, position_ticket or 0, status, utc_now(), ticket))
+
+    def get_grid_pending_by_status(self, strategy_name, symbol, status='PENDING'):
+        """Lấy danh sách lệnh chờ theo status (để kiểm tra và cập nhật)."""
+        rows = self._store.query('''
+            SELECT ticket, order_type, price FROM grid_pending_orders
+            WHERE strategy_name = ? AND symbol = ? AND status = ?
+        ''', (strategy_name, symbol, status))
+        return [{"ticket": r[0], "order_type": r[1], "price": r[2]} for r in rows]
+
+    def _last_closed(self, columns, strategy_name, limit, account_id):
+        # Ưu tiên close_time (giờ server đóng lệnh) để tính pause từ lệnh thua cuối
+        order_col = "COALESCE(close_time, open_time) DESC"
+        if account_id is not None:
+            return self._store.query(f'''
+                SELECT {columns} FROM orders
+                WHERE strategy_name = ? AND profit IS NOT NULL AND account_id = ?
+                ORDER BY {order_col} LIMIT ?
+            ''', (strategy_name, account_id, limit))
+        return self._store.query(f'''
+            SELECT {columns} FROM orders
+            WHERE strategy_name = ? AND profit IS NOT NULL
+            ORDER BY {order_col} LIMIT ?
+        ''', (strategy_name, limit))
+
+    def get_last_closed_orders(self, strategy_name, limit=10, account_id=None):
+        """Lấy các lệnh đã đóng gần nhất (profit IS NOT NULL), sắp theo thời gian đóng (close_time hoặc open_time) DESC."""
+        rows = self._last_closed("profit, open_time, close_time", strategy_name, limit, account_id)
+        return [{"profit": r[0], "open_time": r[1], "close_time": r[2]} for r in rows]
+
+    def get_last_closed_orders_with_entry(self, strategy_name, limit=10, account_id=None):
+        """Lấy các lệnh đã đóng gần nhất kèm open_price (entry), dùng cho chop detection."""
+        rows = self._last_closed("profit, open_price, close_time", strategy_name, limit, account_id)
+        return [{"profit": r[0], "open_price": r[1], "close_time": r[2]} for r in rows]
+
+    def get_last_closed_orders_with_sl(self, strategy_name, limit=5, account_id=None):
+        """Lấy các lệnh đã đóng gần nhất kèm sl, close_price, order_type — dùng để phát hiện đóng do SL (V3 re-entry lock)."""
+        rows = self._last_closed("ticket, profit, open_price, close_price, sl, close_time, order_type",
+                                 strategy_name, limit, account_id)
+        return [
+            {"ticket": r[0], "profit": r[1], "open_price": r[2], "close_price": r[3], "sl": r[4], "close_time": r[5], "order_type": r[6]}
+            for r in rows
+        ]
+
+
+def main():
+    """Nâng schema (kèm backfill signal_indicators) cho các trades.db không có bot nào đang chạy để tự nâng."""
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("paths", nargs="+", help="file trades.db")
+    args = parser.parse_args()
+    for path in args.paths:
+        if not os.path.exists(path):
+            print(f"⚠️ {path}: không có file")
+            continue
+        db = Database(path)
+        with db._store.lock:
+            added = backfill_indicators(db._store.conn)
+            db._store.conn.commit()
+        signals, rows = db._store.query("SELECT (SELECT COUNT(*) FROM signals), (SELECT COUNT(*) FROM signal_indicators)")[0]
+        print(f"✅ {path}: schema v{SCHEMA_VERSION}, {signals} signal → {rows} chỉ báo (+{added})")
+
+
+if __name__ == "__main__":
+    main()